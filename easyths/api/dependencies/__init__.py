@@ -1,9 +1,10 @@
 """
 API依赖项
 """
-from .common import get_operation_queue, get_automator
+from .common import get_operation_queue, get_automator, get_caller
 
 __all__ = [
     "get_operation_queue",
-    "get_automator"
+    "get_automator",
+    "get_caller"
 ]
\ No newline at end of file
@@ -2,6 +2,10 @@
 通用依赖项
 """
 
+from typing import Optional
+
+from fastapi import Request
+
 from easyths.core import TonghuashunAutomator
 from easyths.core.operation_queue import OperationQueue
 
@@ -33,3 +37,8 @@ def get_operation_queue() -> OperationQueue:
         raise RuntimeError("操作队列未初始化")
     return queue
 
+
+
+def get_caller(request: Request) -> Optional[str]:
+    """获取认证中间件写入的调用方名称，未启用认证时为None"""
+    return getattr(request.state, "caller", None)
@@ -19,7 +19,8 @@ security = HTTPBearer(auto_error=False)
 class APIKeyAuthMiddleware(BaseHTTPMiddleware):
     """API密钥认证中间件
 
-    验证请求中的 Bearer Token 是否与配置的 API Key 一致
+    验证请求中的 Bearer Token 是否为配置的 API Key（[api] key 或 [api] keys 中的任意一个），
+    验证通过后把密钥对应的调用方名称写入 request.state.caller，队列据此按调用方公平调度
     """
 
     def __init__(self, app):
@@ -29,11 +30,11 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
             app: FastAPI应用实例
         """
         super().__init__(app)
-        self.expected_key = project_config_instance.api_key
-        self.auth_enabled = bool(self.expected_key)
+        self.key_callers = project_config_instance.api_key_callers
+        self.auth_enabled = bool(self.key_callers)
 
         if self.auth_enabled:
-            logger.info("API密钥认证已启用")
+            logger.info("API密钥认证已启用", callers=sorted(set(self.key_callers.values())))
         else:
             logger.warning("API_KEY环境变量未设置, 生产环境可能存在被非法调用的风险，请注意")
 
@@ -73,8 +74,9 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
             )
 
         api_key = credentials.credentials
+        caller = self.key_callers.get(api_key)
 
-        if api_key != self.expected_key:
+        if caller is None:
             logger.warning("无效的API密钥访问尝试", path=request.url.path, provided_key=api_key[:8] + "...")
             message = {
                 "error": "Unauthorized",
@@ -88,5 +90,6 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
                 headers={"WWW-Authenticate": "Bearer"}
             )
 
-        logger.info("API访问验证成功", path=request.url.path)
+        logger.info("API访问验证成功", path=request.url.path, caller=caller)
+        request.state.caller = caller
         return await call_next(request)
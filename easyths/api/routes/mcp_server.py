@@ -3,10 +3,13 @@
 Author: noimank
 Email: noimank@163.com
 """
-from typing import Optional
+from typing import List, Optional
 
 from fastmcp import FastMCP
 from structlog import get_logger
+from easyths.core import operation_registry
+from easyths.core.operation_queue import CallerQuotaExceededError
+from easyths.core.pre_trade import PreTradeRejectedError
 from easyths.models.operations import Operation
 
 from easyths.utils import project_config_instance
@@ -29,12 +32,24 @@ def set_queue(queue) -> None:
     _operation_queue = queue
 
 
-def _execute_operation(operation_name: str, params: dict) -> dict:
+def _current_caller() -> Optional[str]:
+    """当前 MCP 请求的调用方（认证中间件写入），不在 HTTP 请求上下文中时为None"""
+    try:
+        from fastmcp.server.dependencies import get_http_request
+        return getattr(get_http_request().state, "caller", None)
+    except (ImportError, RuntimeError):
+        return None
+
+
+async def _execute_operation(operation_name: str, params: dict, timeout: float = 30.0) -> dict:
     """执行操作的辅助函数
 
+    异步等待操作结果，等待期间不占用事件循环
+
     Args:
         operation_name: 操作名称
         params: 操作参数
+        timeout: 等待结果的超时时间（秒）
 
     Returns:
         执行结果字典
@@ -45,18 +60,46 @@ def _execute_operation(operation_name: str, params: dict) -> dict:
             "error": "操作队列未初始化",
         }
 
+    # 提交时验证参数，错误请求不进入队列
+    errors = operation_registry.validate_params(operation_name, params)
+    if errors:
+        return {
+            "success": False,
+            "error": f"参数验证失败: {'; '.join(errors)}",
+        }
+
     # 创建操作对象
     operation = Operation(
         name=operation_name,
         params=params,
-        priority=0
+        priority=0,
+        # 等待结果超时后不再执行
+        max_queue_wait=timeout,
+        caller=_current_caller()
     )
 
     # 提交操作到队列
-    operation_id = _operation_queue.submit(operation)
+    try:
+        operation_id = _operation_queue.submit(operation)
+    except PreTradeRejectedError as e:
+        return {
+            "success": False,
+            "error": f"下单前检查未通过: {str(e)}",
+        }
+    except CallerQuotaExceededError as e:
+        return {
+            "success": False,
+            "error": str(e),
+        }
+    except ValueError as e:
+        # 队列已满等提交失败
+        return {
+            "success": False,
+            "error": f"提交操作失败: {str(e)}",
+        }
 
     # 等待操作完成
-    result = _operation_queue.get_result(operation_id, timeout=30.0)
+    result = await _operation_queue.get_result_async(operation_id, timeout=timeout)
 
     if result is None:
         return {
@@ -76,7 +119,7 @@ def _execute_operation(operation_name: str, params: dict) -> dict:
 # ============= 交易操作工具 =============
 
 @mcp_server.tool
-def buy(stock_code: str, price: float, quantity: int) -> dict:
+async def buy(stock_code: str, price: float, quantity: int) -> dict:
     """买入股票
 
     Args:
@@ -87,7 +130,7 @@ def buy(stock_code: str, price: float, quantity: int) -> dict:
     Returns:
         买入结果
     """
-    return _execute_operation("buy", {
+    return await _execute_operation("buy", {
         "stock_code": stock_code,
         "price": price,
         "quantity": quantity
@@ -95,7 +138,7 @@ def buy(stock_code: str, price: float, quantity: int) -> dict:
 
 
 @mcp_server.tool
-def sell(stock_code: str, price: float, quantity: int) -> dict:
+async def sell(stock_code: str, price: float, quantity: int) -> dict:
     """卖出股票
 
     Args:
@@ -106,7 +149,7 @@ def sell(stock_code: str, price: float, quantity: int) -> dict:
     Returns:
         卖出结果
     """
-    return _execute_operation("sell", {
+    return await _execute_operation("sell", {
         "stock_code": stock_code,
         "price": price,
         "quantity": quantity
@@ -114,7 +157,25 @@ def sell(stock_code: str, price: float, quantity: int) -> dict:
 
 
 @mcp_server.tool
-def market_buy(stock_code: str, quantity: int, execution_strategy: int = 3) -> dict:
+async def batch_order(legs: List[dict], stop_on_error: bool = False) -> dict:
+    """批量委托，在委托页面上连续录入多笔买入/卖出，逐笔返回结果
+
+    Args:
+        legs: 委托列表，按顺序提交，每笔包含 side（"buy" 或 "sell"）、stock_code（6位数字）、price、quantity
+        stop_on_error: 某一笔失败后是否停止提交剩余委托
+
+    Returns:
+        批量委托结果，逐笔结果在 data.legs
+    """
+    # 每笔委托约占用1秒GUI时间，按笔数放宽等待时间
+    return await _execute_operation("batch_order", {
+        "legs": legs,
+        "stop_on_error": stop_on_error
+    }, timeout=30.0 + len(legs))
+
+
+@mcp_server.tool
+async def market_buy(stock_code: str, quantity: int, execution_strategy: int = 3) -> dict:
     """市价买入股票，无需指定价格，通过成交策略决定成交方式。
     注意：并不是所有类型的标的都支持市价交易，且可用成交策略因标的而异。
     如果设置了不支持的策略，系统会自动使用「五档即成剩撤」进行提交。
@@ -127,7 +188,7 @@ def market_buy(stock_code: str, quantity: int, execution_strategy: int = 3) -> d
     Returns:
         市价买入结果
     """
-    return _execute_operation("market_buy", {
+    return await _execute_operation("market_buy", {
         "stock_code": stock_code,
         "quantity": quantity,
         "execution_strategy": execution_strategy
@@ -135,7 +196,7 @@ def market_buy(stock_code: str, quantity: int, execution_strategy: int = 3) -> d
 
 
 @mcp_server.tool
-def market_sell(stock_code: str, quantity: int, execution_strategy: int = 3) -> dict:
+async def market_sell(stock_code: str, quantity: int, execution_strategy: int = 3) -> dict:
     """市价卖出股票，无需指定价格，通过成交策略决定成交方式。
     注意：并不是所有类型的标的都支持市价交易，且可用成交策略因标的而异。
     如果设置了不支持的策略，系统会自动使用「五档即成剩撤」进行提交。
@@ -148,7 +209,7 @@ def market_sell(stock_code: str, quantity: int, execution_strategy: int = 3) ->
     Returns:
         市价卖出结果
     """
-    return _execute_operation("market_sell", {
+    return await _execute_operation("market_sell", {
         "stock_code": stock_code,
         "quantity": quantity,
         "execution_strategy": execution_strategy
@@ -158,7 +219,7 @@ def market_sell(stock_code: str, quantity: int, execution_strategy: int = 3) ->
 # ============= 查询操作工具 =============
 
 @mcp_server.tool
-def holding_query(return_type: str = "json") -> dict:
+async def holding_query(return_type: str = "json") -> dict:
     """查询股票持仓信息
 
     Args:
@@ -167,23 +228,23 @@ def holding_query(return_type: str = "json") -> dict:
     Returns:
         持仓信息
     """
-    return _execute_operation("holding_query", {
+    return await _execute_operation("holding_query", {
         "return_type": return_type
     })
 
 
 @mcp_server.tool
-def funds_query() -> dict:
+async def funds_query() -> dict:
     """查询账户资金信息
 
     Returns:
         资金信息，包含资金余额、可用金额、总资产等
     """
-    return _execute_operation("funds_query", {})
+    return await _execute_operation("funds_query", {})
 
 
 @mcp_server.tool
-def order_query(return_type: str = "json", stock_code: Optional[str] = None) -> dict:
+async def order_query(return_type: str = "json", stock_code: Optional[str] = None) -> dict:
     """查询股票委托订单信息
 
     Args:
@@ -196,11 +257,11 @@ def order_query(return_type: str = "json", stock_code: Optional[str] = None) ->
     params = {"return_type": return_type}
     if stock_code:
         params["stock_code"] = stock_code
-    return _execute_operation("order_query", params)
+    return await _execute_operation("order_query", params)
 
 
 @mcp_server.tool
-def historical_commission_query(
+async def historical_commission_query(
     return_type: str,
     stock_code: Optional[str] = None,
     time_range: str = "当日"
@@ -218,13 +279,13 @@ def historical_commission_query(
     params = {"return_type": return_type, "time_range": time_range}
     if stock_code:
         params["stock_code"] = stock_code
-    return _execute_operation("historical_commission_query", params)
+    return await _execute_operation("historical_commission_query", params)
 
 
 # ============= 委托管理工具 =============
 
 @mcp_server.tool
-def order_cancel(
+async def order_cancel(
     stock_code: Optional[str] = None,
     cancel_type: str = "all"
 ) -> dict:
@@ -240,13 +301,13 @@ def order_cancel(
     params = {"cancel_type": cancel_type}
     if stock_code:
         params["stock_code"] = stock_code
-    return _execute_operation("order_cancel", params)
+    return await _execute_operation("order_cancel", params)
 
 
 # ============= 条件单工具 =============
 
 @mcp_server.tool
-def condition_buy(
+async def condition_buy(
     stock_code: str,
     target_price: float,
     quantity: int,
@@ -265,7 +326,7 @@ def condition_buy(
     Returns:
         条件单创建结果
     """
-    return _execute_operation("condition_buy", {
+    return await _execute_operation("condition_buy", {
         "stock_code": stock_code,
         "target_price": target_price,
         "quantity": quantity,
@@ -274,7 +335,7 @@ def condition_buy(
 
 
 @mcp_server.tool
-def condition_order_query(return_type: str = "json") -> dict:
+async def condition_order_query(return_type: str = "json") -> dict:
     """查询条件单信息
 
     Args:
@@ -283,13 +344,13 @@ def condition_order_query(return_type: str = "json") -> dict:
     Returns:
         条件单信息
     """
-    return _execute_operation("condition_order_query", {
+    return await _execute_operation("condition_order_query", {
         "return_type": return_type
     })
 
 
 @mcp_server.tool
-def condition_order_cancel(
+async def condition_order_cancel(
     stock_code: Optional[str] = None,
     order_type: Optional[str] = None
 ) -> dict:
@@ -307,13 +368,13 @@ def condition_order_cancel(
         params["stock_code"] = stock_code
     if order_type:
         params["order_type"] = order_type
-    return _execute_operation("condition_order_cancel", params)
+    return await _execute_operation("condition_order_cancel", params)
 
 
 # ============= 止损止盈工具 =============
 
 @mcp_server.tool
-def stop_loss_profit(
+async def stop_loss_profit(
     stock_code: str,
     stop_loss_percent: float,
     stop_profit_percent: float,
@@ -340,13 +401,13 @@ def stop_loss_profit(
     }
     if quantity:
         params["quantity"] = quantity
-    return _execute_operation("stop_loss_profit", params)
+    return await _execute_operation("stop_loss_profit", params)
 
 
 # ============= 国债逆回购工具 =============
 
 @mcp_server.tool
-def reverse_repo_buy(
+async def reverse_repo_buy(
     market: str,
     time_range: str,
     amount: int
@@ -361,7 +422,7 @@ def reverse_repo_buy(
     Returns:
         逆回购结果
     """
-    return _execute_operation("reverse_repo_buy", {
+    return await _execute_operation("reverse_repo_buy", {
         "market": market,
         "time_range": time_range,
         "amount": amount
@@ -369,13 +430,13 @@ def reverse_repo_buy(
 
 
 @mcp_server.tool
-def reverse_repo_query() -> dict:
+async def reverse_repo_query() -> dict:
     """查询国债逆回购年化利率
 
     Returns:
         各期限国债逆回购年化利率信息
     """
-    return _execute_operation("reverse_repo_query", {})
+    return await _execute_operation("reverse_repo_query", {})
 
 
 # 创建 ASGI 应用用于挂载
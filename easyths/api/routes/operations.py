@@ -1,13 +1,16 @@
 """
 操作相关路由 - 适配同步队列
 """
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Literal, Optional
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 
-from easyths.api.dependencies.common import get_operation_queue
+from easyths.api.dependencies.common import get_caller, get_operation_queue
 from easyths.core import operation_registry
+from easyths.core.operation_queue import CallerQuotaExceededError
+from easyths.core.pre_trade import PreTradeRejectedError
 from easyths.models.operations import Operation, APIResponse, OperationResult
 
 router = APIRouter(prefix="/api/v1/operations", tags=["操作"])
@@ -18,13 +21,99 @@ class ExecuteOperationRequest(BaseModel):
     """执行操作请求"""
     params: Dict[str, Any] = Field(default_factory=dict)
     priority: int = Field(default=0, ge=0, le=10)
+    max_age: Optional[float] = Field(default=None, ge=0)
+    deadline: Optional[datetime] = None
+    max_queue_wait: Optional[float] = Field(default=None, gt=0)
+    execute_at: Optional[datetime] = None
+
+
+class UpdatePriorityRequest(BaseModel):
+    """调整优先级请求"""
+    priority: int = Field(ge=0, le=10)
+
+
+class BatchOrderLeg(BaseModel):
+    """批量委托中的一笔委托"""
+    side: Literal["buy", "sell"]
+    stock_code: str = Field(pattern=r"^[0-9]{6}$")
+    price: float = Field(gt=0)
+    quantity: int = Field(gt=0)
+
+
+class BatchOrderRequest(BaseModel):
+    """批量委托请求"""
+    legs: List[BatchOrderLeg] = Field(min_length=1, max_length=50)
+    stop_on_error: bool = False
+    priority: int = Field(default=0, ge=0, le=10)
+    deadline: Optional[datetime] = None
+    max_queue_wait: Optional[float] = Field(default=None, gt=0)
+    execute_at: Optional[datetime] = None
+
+
+@router.post("/batch_order")
+async def execute_batch_order(
+        request: BatchOrderRequest,
+        queue=Depends(get_operation_queue),
+        caller: Optional[str] = Depends(get_caller)
+) -> APIResponse:
+    """批量委托（在委托页面上连续录入，逐笔返回结果）"""
+    params = {
+        "legs": [leg.model_dump() for leg in request.legs],
+        "stop_on_error": request.stop_on_error
+    }
+    errors = operation_registry.validate_params("batch_order", params)
+    if errors:
+        raise HTTPException(
+            status_code=422,
+            detail=f"参数验证失败: {'; '.join(errors)}"
+        )
+
+    operation = Operation(
+        name="batch_order",
+        params=params,
+        priority=request.priority,
+        deadline=request.deadline,
+        max_queue_wait=request.max_queue_wait,
+        execute_at=request.execute_at,
+        caller=caller
+    )
+
+    try:
+        operation_id = queue.submit(operation)
+    except PreTradeRejectedError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"下单前检查未通过: {str(e)}"
+        )
+    except CallerQuotaExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+    return APIResponse(
+        success=True,
+        message="批量委托已添加到队列",
+        data={
+            "operation_id": operation_id,
+            "status": operation.status.value,
+            "leg_count": len(request.legs),
+            "queue_position": queue.get_queue_position(operation_id)
+        }
+    )
 
 
 @router.post("/{operation_name}")
 async def execute_operation(
         operation_name: str,
         request: ExecuteOperationRequest,
-        queue=Depends(get_operation_queue)
+        queue=Depends(get_operation_queue),
+        caller: Optional[str] = Depends(get_caller)
 ) -> APIResponse:
     """执行操作"""
     # 验证操作是否存在
@@ -35,16 +124,39 @@ async def execute_operation(
             detail=f"操作 '{operation_name}' 不存在"
         )
 
+    # 提交时验证参数，错误请求不进入队列
+    errors = operation_registry.validate_params(operation_name, request.params)
+    if errors:
+        raise HTTPException(
+            status_code=422,
+            detail=f"参数验证失败: {'; '.join(errors)}"
+        )
+
     # 创建操作
     operation = Operation(
         name=operation_name,
         params=request.params,
-        priority=request.priority
+        priority=request.priority,
+        max_age=request.max_age,
+        deadline=request.deadline,
+        max_queue_wait=request.max_queue_wait,
+        execute_at=request.execute_at,
+        caller=caller
     )
 
     # 添加到队列（同步方法）
     try:
         operation_id = queue.submit(operation)
+    except PreTradeRejectedError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f"下单前检查未通过: {str(e)}"
+        )
+    except CallerQuotaExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=500,
@@ -57,7 +169,7 @@ async def execute_operation(
         data={
             "operation_id": operation_id,
             "status": operation.status.value,
-            "queue_position": queue.get_queue_stats()["queued_count"]
+            "queue_position": queue.get_queue_position(operation_id)
         }
     )
 
@@ -83,6 +195,8 @@ async def get_operation_status(
             "operation_id": operation_id,
             "name": operation.name,
             "status": operation.status.value if operation.status else None,
+            "priority": operation.priority,
+            "queue_position": queue.get_queue_position(operation_id),
             "result": operation.result.model_dump() if operation.result else None,
             "error": operation.error,
             "timestamp": operation.timestamp.isoformat() if operation.timestamp else None
@@ -96,8 +210,8 @@ async def get_operation_result(
         timeout: float = None,
         queue=Depends(get_operation_queue)
 ) -> OperationResult:
-    """获取操作结果（阻塞等待）"""
-    result = queue.get_result(operation_id, timeout=timeout)
+    """获取操作结果（异步等待，不阻塞事件循环）"""
+    result = await queue.get_result_async(operation_id, timeout=timeout)
 
     if result is None:
         raise HTTPException(
@@ -108,6 +222,32 @@ async def get_operation_result(
     return result
 
 
+@router.put("/{operation_id}/priority")
+async def update_operation_priority(
+        operation_id: str,
+        request: UpdatePriorityRequest,
+        queue=Depends(get_operation_queue)
+) -> APIResponse:
+    """调整排队中操作的优先级"""
+    success = queue.update_priority(operation_id, request.priority)
+
+    if not success:
+        raise HTTPException(
+            status_code=404,
+            detail="操作不存在或已不在队列中"
+        )
+
+    return APIResponse(
+        success=True,
+        message="优先级已调整",
+        data={
+            "operation_id": operation_id,
+            "priority": request.priority,
+            "queue_position": queue.get_queue_position(operation_id)
+        }
+    )
+
+
 @router.delete("/{operation_id}")
 async def cancel_operation(
         operation_id: str,
@@ -2,15 +2,28 @@
 系统相关路由
 """
 from datetime import datetime
-from fastapi import APIRouter, Depends
+from typing import List, Optional
 
-from easyths.api.dependencies.common import get_automator
-from easyths.models.operations import APIResponse
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+
+from easyths.api.dependencies.common import get_automator, get_caller, get_operation_queue
+from easyths.models.operations import APIResponse, Operation
 from easyths.core import operation_registry
+from easyths.core.delay_profile import get_delay_profile
+from easyths.core.operation_queue import CallerQuotaExceededError
 
 router = APIRouter(prefix="/api/v1/system", tags=["系统"])
 
 
+class CalibrateRequest(BaseModel):
+    """延时校准请求"""
+    operations: Optional[List[str]] = None
+    rounds: int = Field(default=5, ge=1, le=20)
+    tolerance: float = Field(default=0.0, ge=0, le=1)
+    priority: int = Field(default=0, ge=0, le=10)
+
+
 @router.get("/health")
 async def health_check(
     automator = Depends(get_automator)
@@ -56,7 +69,9 @@ async def get_system_status(
             "automator": {
                 "connected": is_connected,
                 "app_path": automator.app_path,
-                "backend": "win32"
+                "backend": automator.backend.name,
+                "page_state": automator.page_state.stats(),
+                "control_cache": automator.control_cache.stats()
             },
             "plugins": {
                 "loaded_plugins": list(operations.keys()),
@@ -67,6 +82,52 @@ async def get_system_status(
     )
 
 
+@router.get("/delay_profile")
+async def get_delay_profile_info() -> APIResponse:
+    """获取本机的延时配置（各延时的默认值、校准值和实际时长）"""
+    return APIResponse(
+        success=True,
+        message="查询成功",
+        data=get_delay_profile().stats()
+    )
+
+
+@router.post("/calibrate")
+async def calibrate_delays(
+    request: CalibrateRequest,
+    queue = Depends(get_operation_queue),
+    caller: Optional[str] = Depends(get_caller)
+) -> APIResponse:
+    """校准本机的延时，作为操作加入队列，与其他操作串行执行"""
+    params = {"rounds": request.rounds, "tolerance": request.tolerance}
+    if request.operations is not None:
+        params["operations"] = request.operations
+    operation = Operation(name="calibrate_delays", params=params, priority=request.priority, caller=caller)
+
+    try:
+        operation_id = queue.submit(operation)
+    except CallerQuotaExceededError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+    return APIResponse(
+        success=True,
+        message="延时校准已添加到队列",
+        data={
+            "operation_id": operation_id,
+            "status": operation.status.value,
+            "queue_position": queue.get_queue_position(operation_id)
+        }
+    )
+
+
 @router.get("/info")
 async def get_system_info() -> APIResponse:
     """获取系统信息"""
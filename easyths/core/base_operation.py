@@ -5,6 +5,7 @@ Email: noimank@163.com
 """
 
 import importlib.util
+import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -12,22 +13,35 @@ from pathlib import Path
 from uuid import uuid4
 
 from PIL import Image
-from typing import Dict, Any, Optional, Tuple, TYPE_CHECKING
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union, TYPE_CHECKING
 
-import pyperclip
-import pywinauto
 import structlog
 
 if TYPE_CHECKING:
+    import pywinauto
     from pywinauto.base_wrapper import BaseWrapper
 
+    from easyths.core.gui_trace import TraceRecorder
+
+from easyths.core.control_cache import LEFT_MENU_TREE, Locator
+from easyths.core.delay_profile import get_delay_profile
+from easyths.core.param_validator import ParamValidator
+from easyths.core.pop_dialog import CloseAction, PopDialogSnapshot
+from easyths.core.time_budget import TimeBudget
 from easyths.core.tonghuashun_automator import TonghuashunAutomator
 from easyths.models.operations import OperationResult, PluginMetadata
-from easyths.utils import get_captcha_ocr_server
+from easyths.utils import get_captcha_ocr_server, get_clipboard_provider
 from easyths.utils.config import project_config_instance
 logger = structlog.get_logger(__name__)
 
 
+class OperationPreempted(BaseException):
+    """只读操作在抢占检查点被中止，由队列重新排队
+
+    与 asyncio.CancelledError 一样继承 BaseException，插件中的 except Exception 不会把它当作普通失败吞掉。
+    """
+
+
 class BaseOperation(ABC):
     """操作插件基类 - 同步执行模式
 
@@ -43,6 +57,19 @@ class BaseOperation(ABC):
         self.automator: TonghuashunAutomator = automator
         self.metadata = self._get_metadata()
         self.logger = structlog.get_logger(f"{__name__}.{self.__class__.__name__}")
+        # 最近一次检查得到的弹窗快照，供紧随其后的 get_pop_dialog / get_pop_dialog_content 复用
+        self._pop_dialog_snapshot: Optional[PopDialogSnapshot] = None
+        # 本次运行中每次条件等待的实际耗时
+        self.wait_records: List[Dict[str, Any]] = []
+        # 最近一次清空剪贴板时的序列号
+        self._clipboard_mark: Optional[int] = None
+        # 本次运行的耗时预算（睡眠、等待、UIA查找、按键、验证码、剪贴板）
+        self.budget = TimeBudget()
+        # 本次运行的抢占请求，只读操作在检查点发现已置位时中止
+        self._preempt: Optional[threading.Event] = None
+        # 定时执行：阻塞到 execute_at 并返回触发记录，触发后清空
+        self._fire: Optional[Callable[[], Dict[str, Any]]] = None
+        self._fire_record: Optional[Dict[str, Any]] = None
 
     @abstractmethod
     def _get_metadata(self) -> PluginMetadata:
@@ -110,15 +137,49 @@ class BaseOperation(ABC):
         """
         return result
 
-    def run(self, params: Dict[str, Any]) -> OperationResult:
+    def run(self, params: Dict[str, Any], preempt: Optional[threading.Event] = None,
+            fire: Optional[Callable[[], Dict[str, Any]]] = None) -> OperationResult:
         """运行操作的完整流程 - 同步方法
 
+        各阶段、各类耗时的明细记录在结果的 metadata["budget"] 中
+
         Args:
             params: 操作参数
+            preempt: 抢占请求，只读操作在阶段之间、导航步骤之间的检查点发现已置位时中止，
+                返回 metadata["preempted"] 为 True 的失败结果；写操作忽略
+            fire: 定时执行时阻塞到 execute_at 的函数，触发记录写入结果的 metadata["fire"]
 
         Returns:
             OperationResult: 操作结果
         """
+        self.wait_records = []
+        self.budget = TimeBudget()
+        self._preempt = preempt if self.metadata.read_only else None
+        self._fire = fire
+        self._fire_record = None
+        recorder = self._trace_recorder()
+        if recorder is not None:
+            recorder.begin(self.metadata.operation_name, params)
+        try:
+            result = self._run(params)
+        except OperationPreempted as e:
+            # 可能中止在导航中途，下次完整导航
+            self.mark_page_dirty()
+            self.logger.info(f"操作被抢占: {self.metadata.operation_name}", checkpoint=str(e))
+            result = OperationResult(success=False, message=f"操作被抢占（{e}），已让出执行线程",
+                                     metadata={"preempted": True, "checkpoint": str(e)})
+        finally:
+            self._preempt = None
+            self._fire = None
+        if self._fire_record is not None:
+            result.metadata["fire"] = self._fire_record
+        result.metadata["budget"] = self.budget.summary()
+        if recorder is not None:
+            recorder.end(result)
+        return result
+
+    def _run(self, params: Dict[str, Any]) -> OperationResult:
+        """依次执行参数验证、执行前检查、核心操作、执行后处理"""
         start_time = datetime.now()
         operation_name = self.metadata.operation_name
         stage = "初始化"
@@ -128,6 +189,7 @@ class BaseOperation(ABC):
 
             # 阶段1：参数验证
             stage = "参数验证"
+            self.budget.enter_stage("validate")
             try:
                 is_param_valid = self.validate(params)
                 if not is_param_valid:
@@ -141,6 +203,8 @@ class BaseOperation(ABC):
 
             # 阶段2：执行前检查
             stage = "执行前检查"
+            self.checkpoint(stage)
+            self.budget.enter_stage("pre_execute")
             try:
                 pre_execute_result = self.pre_execute(params)
                 if not pre_execute_result:
@@ -154,15 +218,25 @@ class BaseOperation(ABC):
 
             # 阶段3：执行核心操作
             stage = "核心操作执行"
+            self.checkpoint(stage)
+            if not self.metadata.preposition:
+                # 不支持预先定位的操作在核心操作开始前等待到定时时刻
+                self.fire()
+            self.budget.enter_stage("execute")
             try:
                 result = self.execute(params)
             except Exception as e:
+                self.mark_page_dirty()
                 error_msg = f"{stage}异常: {str(e)}"
                 self.logger.error(error_msg, params=params, exc_info=True)
                 return OperationResult(success=False, message=error_msg, timestamp=start_time)
+            # 操作失败时界面可能停留在弹窗、残留输入等未知状态，下次需要完整导航
+            if not result.success:
+                self.mark_page_dirty()
 
             # 阶段4：执行后处理
             stage = "执行后处理"
+            self.budget.enter_stage("post_execute")
             try:
                 result = self.post_execute(params, result)
             except Exception as e:
@@ -176,10 +250,13 @@ class BaseOperation(ABC):
             # 记录执行结果
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
+            if self.wait_records:
+                result.metadata["waits"] = self.wait_records
             self.logger.info(
                 f"操作执行完成: {operation_name}",
                 success=result.success,
-                duration=duration
+                duration=duration,
+                wait_time=round(sum(record["elapsed"] for record in self.wait_records), 4)
             )
 
             return result
@@ -191,23 +268,83 @@ class BaseOperation(ABC):
 
     # ============ 辅助方法 ============
 
-    def switch_left_menus(self, main_option: str, sub_option: Optional[str] = None) -> None:
-        """切换左侧菜单栏
+    def checkpoint(self, where: str) -> None:
+        """抢占检查点：队列请求抢占时中止当前的只读操作，写操作不会被中止
+
+        在阶段之间、导航步骤之间调用；耗时较长的只读插件可以在自己的步骤之间调用
+
+        Args:
+            where: 检查点位置，记录在结果中
+
+        Raises:
+            OperationPreempted: 队列请求抢占
+        """
+        if self._preempt is not None and self._preempt.is_set():
+            raise OperationPreempted(where)
+
+    def fire(self) -> None:
+        """定时执行的触发点：阻塞到 execute_at 再返回，非定时执行时立即返回
+
+        声明了 preposition 的插件在完成导航和填写、按下提交键之前调用，到点只需提交
+        """
+        if self._fire is None:
+            return
+        fire, self._fire = self._fire, None
+        self._fire_record = fire()
+
+    def switch_hotkey_page(self, hotkey: str, page: str, clear_first: bool = True,
+                           settle: Union[float, str] = "page.hotkey_settle") -> bool:
+        """通过快捷键切换页面（如 F1 买入、F3 撤单），已在该页面时跳过
+
+        Args:
+            hotkey: 快捷键，如 {F1}
+            page: 页面标识，如 买入[F1]
+            clear_first: 是否先切到撤单页面再切回，清空页面上可能残留的操作信息
+            settle: 按下快捷键后的防抖等待时间（秒或延时名称）
+
+        Returns:
+            bool: 是否实际执行了导航（已在目标页面时返回False）
+        """
+        if self._is_on_page(page):
+            return False
+
+        self.checkpoint(f"导航到{page}")
+        main_window = self.get_main_window(wrapper_obj=True)
+        if clear_first:
+            # 切换到别的页面再切回来会清空可能残留的操作信息，增强操作可用性
+            self.type_keys(main_window, "{F3}")
+            self.sleep("page.clear")
+            self.checkpoint(f"导航到{page}")
+        self.type_keys(main_window, hotkey)
+        # 防抖
+        self.sleep(settle)
+        self._record_page(page)
+        return True
+
+    def switch_left_menus(self, main_option: str, sub_option: Optional[str] = None, clear_first: bool = False) -> bool:
+        """切换左侧菜单栏，已在该页面时跳过
 
         重写参考easytrader原有的垃圾实现，目前已经做到0.7s，原来需要2.2s
 
         Args:
             main_option: 主选项，如 查询[F4]
             sub_option: 资金股票
+            clear_first: 是否先跳到撤单页面，停留在同一菜单时再次点击可能没反应
+
+        Returns:
+            bool: 是否实际执行了导航（已在目标页面时返回False）
         """
+        page = f"{main_option}/{sub_option}" if sub_option else main_option
+        if self._is_on_page(page):
+            return False
+
+        self.checkpoint(f"导航到{page}")
         main_window = self.get_main_window(wrapper_obj=True)
-        # 获取左侧导航栏
-        main_panel = self.get_control_with_children(main_window, control_type="Pane", auto_id="59648")
-        left_menu_panel = self.get_control_with_children(main_panel,  class_name="AfxWnd140s")
-        # 只有一个元素
-        HexinScrollWnd = left_menu_panel.children(title="HexinScrollWnd")[0]
-        HexinScrollWnd2 = HexinScrollWnd.children(title="HexinScrollWnd2")[0]
-        tree_view = HexinScrollWnd2.children(control_type="Tree", class_name="SysTreeView32")[0]
+        if clear_first:
+            self.type_keys(main_window, "{F3}")
+            self.sleep("page.clear")
+            self.checkpoint(f"导航到{page}")
+        tree_view = self._get_left_menu_tree()
 
         # 处理主选择
         main_option_control = self.get_control_with_children(tree_view, title=main_option)
@@ -218,14 +355,16 @@ class BaseOperation(ABC):
         if main_option in ["国债逆回购","双向委托"]:
             main_option_control.select()
             # 没有下级子菜单，也用不了expand()方法
-            return
+            self._record_page(page)
+            return True
         main_option_control.expand()
         # 确保可见,实际测试不需要
         # self.sleep(0.05)
         # main_option_control.ensure_visible()
 
         # 等待子菜单渲染，内存变化，无需视图可见
-        self.sleep(0.15)
+        self.sleep("menu.expand")
+        self.checkpoint(f"导航到{page}")
         # 处理子选择
         if sub_option is not None:
             cc = self.get_control_with_children(main_option_control, title=sub_option)
@@ -234,7 +373,51 @@ class BaseOperation(ABC):
             else:
                 logger.error(f"未找到子菜单{sub_option}")
                 raise Exception(f"未找到子菜单{sub_option}")
-        self.sleep(0.1)
+        self.sleep("menu.select")
+        self._record_page(page)
+        return True
+
+    def mark_page_dirty(self) -> None:
+        """标记当前页面状态未知（填写过表单、触发了弹窗等），下次进入页面时完整导航"""
+        if self.automator is not None:
+            self.automator.page_state.invalidate()
+
+    def _get_left_menu_tree(self) -> Any:
+        """获取左侧菜单树控件（不随页面变化，连接期间缓存）"""
+        return self.locate(LEFT_MENU_TREE, page_scoped=False)
+
+    def _menu_fingerprint(self) -> Optional[Tuple[str, ...]]:
+        """读取左侧菜单树当前选中项作为页面指纹（一次UIA调用），读取失败返回None"""
+        try:
+            return tuple(item.name for item in self._get_left_menu_tree().get_selection())
+        except Exception as e:
+            # 菜单树控件失效（如客户端重绘），下次重新定位
+            self.automator.control_cache.discard(LEFT_MENU_TREE)
+            self.logger.debug("读取左侧菜单选中项失败", error=str(e))
+            return None
+
+    def _is_on_page(self, page: str) -> bool:
+        """客户端是否已停留在目标页面（页面记录一致且菜单选中项未变）"""
+        if self.automator is None:
+            return False
+        page_state = self.automator.page_state
+        if not page_state.is_on(page):
+            return False
+
+        fingerprint = self._menu_fingerprint()
+        if fingerprint is not None and fingerprint == page_state.fingerprint:
+            page_state.record_skip()
+            self.logger.debug("已在目标页面，跳过导航", page=page)
+            return True
+
+        self.logger.info("页面状态与记录不一致，执行完整导航", page=page, expected=page_state.fingerprint, actual=fingerprint)
+        page_state.record_mismatch()
+        return False
+
+    def _record_page(self, page: str) -> None:
+        """记录完成导航后的页面"""
+        if self.automator is not None:
+            self.automator.page_state.update(page, self._menu_fingerprint())
 
 
     def get_main_window(self, wrapper_obj: bool = False) -> Optional[Any]:
@@ -261,101 +444,157 @@ class BaseOperation(ABC):
             return None
 
 
-    def sleep(self, seconds: float = 0.1) -> None:
-        """睡眠指定秒数"""
-        time.sleep(seconds)
+    def locate(self, locator: Locator, page_scoped: bool = True) -> Optional["BaseWrapper"]:
+        """按定位路径从主窗口查找控件，已解析过且仍有效的控件直接复用
+
+        Args:
+            locator: 定位路径，常用路径见 easyths.core.control_cache
+            page_scoped: 控件是否随页面变化，是则切换页面后重新解析
+
+        Returns:
+            控件，找不到返回None
+        """
+        generation = self.automator.page_state.generation if page_scoped else None
+        with self.budget.measure("uia_lookup"):
+            return self.automator.control_cache.resolve(self.get_main_window(wrapper_obj=True), locator, generation)
+
+    def sleep(self, seconds: Union[float, str] = 0.1) -> None:
+        """睡眠指定秒数
+
+        Args:
+            seconds: 秒数，或 easyths.core.delay_profile.DELAY_DEFAULTS 中登记的延时名称，
+                按名称引用的延时使用本机校准后的时长
+        """
+        if isinstance(seconds, str):
+            seconds = get_delay_profile().get(seconds)
+        self._trace("sleep", d=seconds)
+        with self.budget.measure("sleep"):
+            time.sleep(seconds)
+
+    def type_keys(self, control: Any, keys: str, **kwargs) -> None:
+        """向控件发送按键，耗时计入按键预算
+
+        Args:
+            control: 接收按键的控件
+            keys: 按键序列，格式同 pywinauto 的 type_keys
+            **kwargs: 传给 type_keys 的其他参数，如 pause
+        """
+        with self.budget.measure("keystroke"):
+            control.type_keys(keys, **kwargs)
+
+    def wait_until(self, predicate: Callable[[], Any], timeout: float = 1.0, interval: float = 0.01,
+                   backoff: float = 1.5, max_interval: float = 0.1, name: Optional[str] = None) -> bool:
+        """等待条件成立，用于替代固定时长的 sleep
+
+        轮询间隔从 interval 开始按 backoff 倍数增长，最长不超过 max_interval，条件检查本身通常是一次UIA调用，
+        间隔递增可以避免界面迟迟不响应时密集轮询。条件检查抛出异常视为未成立（控件可能正在重绘）。
+        每次等待的实际耗时记录在 wait_records 中，并随操作结果的 metadata 返回
+
+        Args:
+            predicate: 条件函数，返回真值表示条件成立
+            timeout: 最长等待时间（秒），一般取原来固定 sleep 的时长，超时后由调用方按原流程继续
+            interval: 首次轮询间隔（秒）
+            backoff: 轮询间隔增长倍数
+            max_interval: 最大轮询间隔（秒）
+            name: 等待名称，用于统计
+
+        Returns:
+            bool: 超时前条件是否成立
+        """
+        start = time.perf_counter()
+        deadline = start + timeout
+        delay = interval
+        polls = 0
+        with self.budget.measure("wait"):
+            while True:
+                polls += 1
+                try:
+                    is_ready = bool(predicate())
+                except Exception:
+                    is_ready = False
+                now = time.perf_counter()
+                if is_ready or now >= deadline:
+                    break
+                time.sleep(min(delay, deadline - now))
+                delay = min(delay * backoff, max_interval)
+
+        record = {
+            "name": name or getattr(predicate, "__name__", "wait"),
+            "elapsed": round(time.perf_counter() - start, 4),
+            "timeout": timeout,
+            "success": is_ready,
+            "polls": polls,
+        }
+        self.wait_records.append(record)
+        self._trace("wait", **record)
+        self.logger.debug("条件等待结束", **record)
+        return is_ready
+
+    def wait_for_text(self, control: Any, expected: Optional[str] = None, timeout: float = 0.3, name: Optional[str] = None) -> bool:
+        """等待控件文本提交到界面
+
+        Args:
+            control: 输入框、文本等控件
+            expected: 期望的文本，None 表示等待文本非空（如输入代码后自动带出的证券名称）
+            timeout: 最长等待时间（秒）
+            name: 等待名称，用于统计
+        """
+        if expected is None:
+            return self.wait_until(lambda: len(control.window_text()) > 0, timeout=timeout, name=name or "text_filled")
+        return self.wait_until(lambda: control.window_text() == expected, timeout=timeout, name=name or "text_committed")
 
     def wait_for_pop_dialog(self, timeout: float = 1.0) -> bool:
         """等待弹窗出现"""
-        start = time.perf_counter()
-        while time.perf_counter() - start < timeout:
-            # 这里的检查是“大头”，如果它很慢，sleep 甚至可以不要
-            if self.is_exist_pop_dialog():
-                return True
-            # 给 CPU 留一点点喘息机会即可
-            time.sleep(0.001)
-        return False
+        # 弹窗检查是“大头”，开始时密集轮询以尽快发现弹窗，之后逐步放宽
+        return self.wait_until(self.is_exist_pop_dialog, timeout=timeout, interval=0.005, max_interval=0.05, name="pop_dialog")
 
 
     def is_exist_pop_dialog(self) -> bool:
-        """是否存在弹窗"""
-        main_window = self.get_main_window(wrapper_obj=True)
-        # 弹窗一般是这个Pane和#32770类型。如果后面有其他类型的弹窗再说，再修正
-        childrens = main_window.children(control_type="Pane", class_name="#32770")
-        # 另一种是独立的窗口
-        win = self.get_control_with_children(main_window, control_type="Window")
-        if win:
-            return True
-        return len(childrens) != 0
+        """是否存在弹窗（每次调用都重新检查）"""
+        return self._take_pop_dialog_snapshot().exists()
 
     def get_pop_dialog_content(self)-> str | None:
         """获取弹窗内容"""
-        if not self.is_exist_pop_dialog():
+        snapshot = self._consume_pop_dialog_snapshot()
+        if not snapshot.exists():
             return None
-
-        main_window = self.get_main_window(wrapper_obj=True)
-        childrens = main_window.children(control_type="Pane", class_name="#32770")
         # 可能会出现多个（概率很小），但是不管，找到一个直接返回，由上层应用兜底和判断
-        for children in childrens:
-            # 根据
-            sub_childrens = children.children(class_name="Static")
-            content = "".join([child.window_text() for child in sub_childrens])
-            return content
-        return None
+        return snapshot.content()
 
     def get_pop_dialog(self) -> Tuple[Optional[str], Optional[Any]]:
         """
         获取弹窗标题和对应弹窗控件，搭配get_control_in_children实现更细化的使用
 
-        注意在这里新加入了弹窗判断逻辑后，记得去close_pop_dialog函数中添加对应的窗口关闭逻辑
-
+        紧跟在 is_exist_pop_dialog / wait_for_pop_dialog 之后调用时复用同一份弹窗快照。
+        新的弹窗类型及其关闭动作在 easyths.core.pop_dialog 的规则表中添加
         """
-        if not self.is_exist_pop_dialog():
-            return None, None
-
-        main_window = self.get_main_window(wrapper_obj=True)
-        childrens = main_window.children(control_type="Pane", class_name="#32770")
-        # 可能会出现多个（概率很小），但是不管，找到一个直接返回，由上层应用兜底和判断
-        for children in childrens:
-            # 根据
-            sub_childrens = children.children(class_name="Static")
-            # 有些内嵌的浏览器窗口（也是弹窗）
-            pane_childrens = children.children(control_type="Pane")
-            content = "".join([child.window_text() for child in sub_childrens])
-            if "您的风险承受能力等级即将过期" in content:
-                return "风险测评提示",children
-            elif "您输入的价格已超出涨跌停限制" in content:
-                return "提示信息", children
-            elif "先输入验证码" in content:
-                return "验证码提示框",children
-            elif "委托价格的小数部分应" in content:
-                return "委托价格提示框", children
-            elif "不支持历史委托查询" in content:
-                return "不支持历史委托查询提示框", children
-            # 买入、卖出时的弹窗
-            elif "提交失败" in content:
-                return "失败提示", children
-            elif "一键打新" in content:
-                return "一键打新提示框", children
-            elif "国债逆回购" in content:
-                return "国债逆回购窗口", children
-            elif "退出确认" in content:
-                return "程序退出确认窗口", children
-            elif "failed" in content:
-                return "BeginFailed失败提示", children
-            else:
-                pass
-
-            # 特殊处理浏览器嵌入型弹窗,这里可能是 条件单的弹窗，class_name=ConditionToolBar
-            if pane_childrens:
-                return pane_childrens[0].class_name(), pane_childrens[0]
-
-        # 处理可能出现的window类型的独立窗口,目前已知的有 条件单触发提醒、银证转账窗口
-        win = self.get_control_with_children(main_window, control_type="Window")
-        if win:
-            return win.class_name(), win
-
-        return "内嵌的浏览器窗口", None
+        snapshot = self._consume_pop_dialog_snapshot()
+        with self.budget.measure("uia_lookup"):
+            title, control, _ = snapshot.classify()
+        return title, control
+
+    def _take_pop_dialog_snapshot(self) -> PopDialogSnapshot:
+        """枚举当前弹窗并保留快照"""
+        with self.budget.measure("uia_lookup"):
+            self._pop_dialog_snapshot = PopDialogSnapshot(self.get_main_window(wrapper_obj=True))
+        self._trace("popup", dialogs=len(self._pop_dialog_snapshot.dialogs))
+        return self._pop_dialog_snapshot
+
+    def _consume_pop_dialog_snapshot(self) -> PopDialogSnapshot:
+        """取出最近一次检查的快照（只复用一次），没有则重新枚举"""
+        snapshot = self._pop_dialog_snapshot or self._take_pop_dialog_snapshot()
+        self._pop_dialog_snapshot = None
+        return snapshot
+
+    def _trace_recorder(self) -> Optional["TraceRecorder"]:
+        """界面交互轨迹录制器，未开启录制时为 None"""
+        return getattr(self.automator, "trace_recorder", None)
+
+    def _trace(self, kind: str, **fields: Any) -> None:
+        """向界面交互轨迹写入一个非 UIA 事件（睡眠、条件等待、弹窗检查）"""
+        recorder = self._trace_recorder()
+        if recorder is not None:
+            recorder.record(kind, **fields)
 
     def set_main_window_focus(self) -> None:
         """设置主窗口焦点"""
@@ -372,84 +611,73 @@ class BaseOperation(ABC):
         """关闭弹窗
         该函数实现各种弹窗的关闭，实现多重弹窗窗口关闭，为每一个业务操作提供一个干净的待操作状态
         """
-        flag = self.is_exist_pop_dialog()
-        if not flag:
+        snapshot = self._take_pop_dialog_snapshot()
+        if not snapshot.exists():
             return
         count = 0
-        while count < 4 and self.is_exist_pop_dialog():
+        while count < 4 and snapshot.exists():
             count+=1
-            self.sleep(0.15)
-            pop_dialog_title, pop_control = self.get_pop_dialog()
-            if pop_dialog_title == "风险测评提示":
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="7").click()
-            elif pop_dialog_title in ["提示信息", "委托价格提示框"]:
-                #点击否
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="7").click()
-
-            elif pop_dialog_title == "验证码提示框":
-                #点击取消
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="2").click()
-            elif pop_dialog_title == "不支持历史委托查询提示框":
-                #点击确定
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="2", class_name="Button").click()
-            elif pop_dialog_title == "失败提示":
-                #点击确定
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="2", class_name="Button").click()
-            elif pop_dialog_title == "一键打新提示框":
-                # 点击窗口右上角的 X 触发关闭
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="1008", class_name="Button").click()
-            elif pop_dialog_title == "国债逆回购窗口":
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="1008", class_name="Button").click()
-            elif pop_dialog_title == "BeginFailed失败提示":
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="2", class_name="Button").click()
-            #条件单触发提醒
-            elif pop_dialog_title == 'CDlgTriggeredConfitionTip':
-                pop_control.close()
-            elif pop_dialog_title == 'TranferAccount':
-                pop_control.close()
-            # 条件单窗口
-            elif pop_dialog_title == "ConditionToolBar":
-                pop_control.type_keys("{ESC}")
-            elif pop_dialog_title == "程序退出确认窗口":
-                # 点击否关闭窗口
-                self.get_control_with_children(pop_control, control_type="Button", auto_id="7").click()
-
-
-        self.sleep(0.05)
-
-    def process_captcha_dialog(self) -> None:
+            self.sleep("pop_dialog.close")
+            with self.budget.measure("uia_lookup"):
+                pop_dialog_title, pop_control, action = snapshot.classify()
+            self._apply_close_action(pop_control, action)
+            # 关闭后重新检查，处理多重弹窗
+            snapshot = self._take_pop_dialog_snapshot()
+
+        self._pop_dialog_snapshot = None
+        self.sleep("pop_dialog.settle")
+
+    def _apply_close_action(self, pop_control: Any, action: Optional[CloseAction]) -> None:
+        """按规则表中的关闭动作关闭弹窗，未知弹窗不处理"""
+        if pop_control is None or action is None:
+            return
+        if action.kind == "click":
+            self.get_control_with_children(pop_control, control_type="Button", auto_id=action.auto_id, class_name=action.class_name).click()
+        elif action.kind == "close":
+            pop_control.close()
+        elif action.kind == "esc":
+            self.type_keys(pop_control, "{ESC}")
+
+    def process_captcha_dialog(self) -> bool:
         """
         处理验证码弹窗
+
+        Returns:
+            bool: 是否处理了验证码弹窗
         """
         captcha_code_length = 0
         count = 0
         captcha_image = None
+        is_handled = False
         while self.is_exist_pop_dialog() and count < 5:
             pop_dialog_title, pop_control = self.get_pop_dialog()
             if pop_dialog_title == "验证码提示框":
-                if captcha_image is not None and captcha_code_length != 0 and project_config_instance.save_error_captcha_image:
-                    # 保存错误的图片
-                    captcha_image.save(f"{str(Path("~/easyths/captcha_error").expanduser())}/{uuid4().hex[:12]}.png")
-
-                code_edit = self.get_control_with_children(pop_control, control_type="Edit", auto_id="2404",
-                                                           class_name="Edit")
-                # 尝试删除可能存在的旧验证码
-                code_edit.type_keys('{{BACKSPACE {}}}'.format(captcha_code_length))
-                code_image_control = self.get_control_with_children(pop_control, control_type="Image", auto_id="2405",
-                                                                    class_name="Static")
-                if captcha_code_length != 0:
-                    code_image_control.click_input()
-                    # 等待刷新验证码
-                    self.sleep(0.2)
-                captcha_code, captcha_image = self.ocr_captcha(code_image_control)
-                captcha_code_length = len(captcha_code)
-                code_edit.type_keys(captcha_code)
-                self.sleep(0.1)
-                # 按确定键
-                # self.get_control_with_children(pop_control,control_type="Button", auto_id="1", class_name="Button").click_input()
-                pop_control.type_keys("{ENTER}")
-                self.sleep(0.2)
+                is_handled = True
+                with self.budget.measure("captcha"):
+                    if captcha_image is not None and captcha_code_length != 0 and project_config_instance.save_error_captcha_image:
+                        # 保存错误的图片
+                        captcha_image.save(f"{str(Path("~/easyths/captcha_error").expanduser())}/{uuid4().hex[:12]}.png")
+
+                    code_edit = self.get_control_with_children(pop_control, control_type="Edit", auto_id="2404",
+                                                               class_name="Edit")
+                    # 尝试删除可能存在的旧验证码
+                    self.type_keys(code_edit, '{{BACKSPACE {}}}'.format(captcha_code_length))
+                    code_image_control = self.get_control_with_children(pop_control, control_type="Image", auto_id="2405",
+                                                                        class_name="Static")
+                    if captcha_code_length != 0:
+                        code_image_control.click_input()
+                        # 等待刷新验证码
+                        self.sleep("captcha.refresh")
+                    captcha_code, captcha_image = self.ocr_captcha(code_image_control)
+                    captcha_code_length = len(captcha_code)
+                    self.type_keys(code_edit, captcha_code)
+                    self.sleep("captcha.input")
+                    # 按确定键
+                    # self.get_control_with_children(pop_control,control_type="Button", auto_id="1", class_name="Button").click_input()
+                    self.type_keys(pop_control, "{ENTER}")
+                    self.sleep("captcha.submit")
             count += 1
+        return is_handled
 
     def get_control_with_children(self, parent_control: Any, class_name: Optional[str] = None,
                                   title: Optional[str] = None, title_re: Optional[str] = None,
@@ -462,42 +690,64 @@ class BaseOperation(ABC):
         一般返回的控件有以下方法：
         - click()   -> 必须是ButtonWrapper类型才可以调用
         - click_input()  -> 模拟物理点击，会移动鼠标，uia控件都会有
-        - type_keys()
+        - type_keys()  -> 插件中通过 self.type_keys(control, keys) 调用，按键耗时计入耗时预算
         - texts()
         - window_text()
         - element_info
         """
-        # 1. 先拿到所有亲儿子,先使用支持的筛选参数进行
-        all_children = parent_control.children(control_type=control_type, class_name=class_name,title=title)
-
-        # 2. 手动筛选，处理内置不支持的情况
-        for child in all_children:
-            info = child.element_info
-            # 逐项比对（如果参数不为 None 且不匹配，则跳过）
-            if auto_id and info.automation_id != auto_id:
-                continue
-            # title_re 需要用到 re.match， 包含就是匹配
-            if title_re and not (title_re in info.name):
-                continue
-            # 匹配成功，立刻返回第一个
-            return child
+        with self.budget.measure("uia_lookup"):
+            # 1. 先拿到所有亲儿子,先使用支持的筛选参数进行
+            all_children = parent_control.children(control_type=control_type, class_name=class_name,title=title)
+
+            # 2. 手动筛选，处理内置不支持的情况
+            for child in all_children:
+                info = child.element_info
+                # 逐项比对（如果参数不为 None 且不匹配，则跳过）
+                if auto_id and info.automation_id != auto_id:
+                    continue
+                # title_re 需要用到 re.match， 包含就是匹配
+                if title_re and not (title_re in info.name):
+                    continue
+                # 匹配成功，立刻返回第一个
+                return child
         return None
 
 
     def ocr_captcha(self, control: Any) -> Tuple[str, Image.Image]:
-        """根据控件获取OCR验证码结果"""
+        """根据控件获取OCR验证码结果（由自动化器的 GUI 后端识别）"""
+        if self.automator is not None:
+            return self.automator.backend.recognize_captcha(control)
         code, image = get_captcha_ocr_server().recognize(control)
         return code, image
 
 
     def get_clipboard_data(self) -> str:
         """获取剪贴板数据"""
-        return pyperclip.paste()
+        with self.budget.measure("clipboard"):
+            return get_clipboard_provider().get_text()
 
 
     def clear_clipboard(self) -> None:
-        """清空剪贴板"""
-        pyperclip.copy("")
+        """清空剪贴板，并记下序列号供 wait_for_clipboard 判断新内容是否到达"""
+        with self.budget.measure("clipboard"):
+            self._clipboard_mark = get_clipboard_provider().clear()
+
+    def wait_for_clipboard(self, timeout: float = 2.0) -> bool:
+        """等待复制的内容写入剪贴板（需先调用 clear_clipboard）
+
+        复制触发限制时客户端会先弹出验证码框，出现弹窗时也立即返回，由调用方处理后再次等待
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 剪贴板是否已有新内容
+        """
+        provider = get_clipboard_provider()
+        mark = self._clipboard_mark
+        self.wait_until(lambda: provider.has_new_content(mark) or self.is_exist_pop_dialog(),
+                        timeout=timeout, interval=0.005, max_interval=0.05, name="clipboard")
+        return provider.has_new_content(mark)
 
 # ============ 操作注册表 ============
 
@@ -507,6 +757,10 @@ class OperationRegistry:
     def __init__(self):
         self._operations: Dict[str, type] = {}
         self._instances: Dict[str, BaseOperation] = {}
+        self._metadata: Dict[str, PluginMetadata] = {}
+        # 注册时编译的参数验证器，以及用于提交时执行插件 validate() 的实例（不绑定自动化器）
+        self._validators: Dict[str, ParamValidator] = {}
+        self._validation_instances: Dict[str, BaseOperation] = {}
         self.logger = structlog.get_logger(__name__)
 
     def register(self, operation_class: type) -> None:
@@ -523,6 +777,9 @@ class OperationRegistry:
         operation_name = temp_instance.metadata.operation_name
 
         self._operations[operation_name] = operation_class
+        self._metadata[operation_name] = temp_instance.metadata
+        self._validators[operation_name] = ParamValidator(temp_instance.metadata.parameters)
+        self._validation_instances[operation_name] = temp_instance
         self.logger.info(f"注册操作: {operation_name}", class_name=operation_class.__name__)
 
     def get_operation_class(self, name: str) -> Optional[type]:
@@ -536,8 +793,43 @@ class OperationRegistry:
         """
         return self._operations.get(name)
 
+    def get_metadata(self, name: str) -> Optional[PluginMetadata]:
+        """获取操作元数据（注册时缓存，无需创建实例）
+
+        Args:
+            name: 操作名称
+
+        Returns:
+            操作元数据
+        """
+        return self._metadata.get(name)
+
+    def validate_params(self, name: str, params: Dict[str, Any]) -> List[str]:
+        """提交时验证操作参数，不进入队列
+
+        先执行由参数定义编译的检查，通过后再执行插件自己的 validate()
+
+        Args:
+            name: 操作名称
+            params: 操作参数
+
+        Returns:
+            错误信息列表，为空表示通过（未注册的操作不做检查）
+        """
+        validator = self._validators.get(name)
+        if validator is None:
+            return []
+        errors = validator.validate(params)
+        if errors:
+            return errors
+        try:
+            is_valid = self._validation_instances[name].validate(params)
+        except Exception as e:
+            return [f"参数验证异常: {e}"]
+        return [] if is_valid else [f"参数未通过 {name} 的验证"]
+
     def get_operation_instance(self, name: str, automator=None) -> Optional[BaseOperation]:
-        """获取操作实例（单例模式）
+        """获取操作实例（单例模式，自动化器更换后重新创建）
 
         Args:
             name: 操作名称
@@ -546,8 +838,9 @@ class OperationRegistry:
         Returns:
             操作实例
         """
-        if name in self._instances:
-            return self._instances[name]
+        instance = self._instances.get(name)
+        if instance is not None and (automator is None or instance.automator is automator):
+            return instance
 
         operation_class = self.get_operation_class(name)
         if operation_class:
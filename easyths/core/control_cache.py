@@ -0,0 +1,251 @@
+"""控件句柄缓存 - 按声明式定位路径缓存已解析的控件，减少跨进程的 children() 调用
+
+每次 UIA children() 调用都是一次跨进程 COM 往返，操作中反复出现的
+主窗口 -> 面板 -> 表格 这类定位链是GUI耗时的主要来源之一。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+if sys.platform == "win32":
+    import ctypes
+
+    _is_window = ctypes.windll.user32.IsWindow
+else:
+    _is_window = None
+
+
+class LocatorStep(NamedTuple):
+    """定位路径中的一步：在父控件的亲儿子中筛选
+
+    control_type / class_name / title 交给 children() 筛选，auto_id 手动比对；
+    index 表示取筛选结果的第几个（不指定 auto_id 时默认取第一个）
+    """
+    control_type: Optional[str] = None
+    class_name: Optional[str] = None
+    title: Optional[str] = None
+    auto_id: Optional[str] = None
+    index: Optional[int] = None
+
+    def __str__(self) -> str:
+        parts = [self.control_type or "", self.class_name or "", self.title or "", self.auto_id or ""]
+        if self.index is not None:
+            parts.append(str(self.index))
+        return ":".join(parts)
+
+
+# 定位路径：从主窗口出发的步骤序列，可直接用 + 拼接
+Locator = Tuple[LocatorStep, ...]
+
+
+def locator_key(locator: Locator) -> str:
+    """定位路径的文本键，用于日志和持久化"""
+    return "/".join(str(step) for step in locator)
+
+
+# ============ 常用定位路径 ============
+
+# 右侧功能面板（随页面变化）
+MAIN_PANEL: Locator = (
+    LocatorStep(control_type="Pane", class_name="AfxMDIFrame140s", auto_id="59648"),
+    LocatorStep(class_name="AfxMDIFrame140s", index=0),
+)
+# 左侧菜单树
+LEFT_MENU_TREE: Locator = (
+    LocatorStep(control_type="Pane", auto_id="59648"),
+    LocatorStep(class_name="AfxWnd140s"),
+    LocatorStep(title="HexinScrollWnd", index=0),
+    LocatorStep(title="HexinScrollWnd2", index=0),
+    LocatorStep(control_type="Tree", class_name="SysTreeView32", index=0),
+)
+# 买入/卖出页面的输入控件
+ORDER_STOCK_CODE: Locator = MAIN_PANEL + (LocatorStep(control_type="Edit", auto_id="1032"),)
+ORDER_PRICE: Locator = MAIN_PANEL + (LocatorStep(control_type="Edit", auto_id="1033"),)
+ORDER_QUANTITY: Locator = MAIN_PANEL + (LocatorStep(control_type="Edit", auto_id="1034"),)
+ORDER_STOCK_NAME: Locator = MAIN_PANEL + (LocatorStep(control_type="Text", auto_id="1036"),)
+# 功能面板中的数据表格（持仓、委托等页面）
+MAIN_GRID: Locator = MAIN_PANEL + (
+    LocatorStep(control_type="Pane", auto_id="1047"),
+    LocatorStep(index=0),
+    LocatorStep(class_name="CVirtualGridCtrl", index=0),
+)
+
+
+class _CachedControl:
+    """缓存条目"""
+
+    __slots__ = ("control", "handle", "runtime_id", "generation")
+
+    def __init__(self, control: Any, handle: Optional[int], runtime_id: Any, generation: Optional[int]):
+        self.control = control
+        self.handle = handle
+        self.runtime_id = runtime_id
+        self.generation = generation
+
+
+class ControlCache:
+    """控件句柄缓存（每个连接会话一份，重连时清空）
+
+    设计原则：
+        - 以定位路径为键缓存每一级已解析的控件，命中时从最长的有效前缀继续解析
+        - 使用前廉价校验：窗口句柄仍然存在、runtime id 与解析时一致，失效则丢弃重新解析
+        - 页面级条目记录页面代数（generation），页面切换或标记失效后不再使用
+        - 学到的子控件下标持久化到文件，重启后按下标直接比对，免去逐个读取 automation_id
+    """
+
+    def __init__(self, index_file: Optional[str] = None):
+        """初始化缓存
+
+        Args:
+            index_file: 学习到的下标持久化文件，None 表示不持久化
+        """
+        self._entries: Dict[Locator, _CachedControl] = {}
+        self._index_file = index_file
+        self._indexes: Dict[str, int] = self._load_indexes()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,  # 整条路径命中缓存
+            'misses': 0,  # 需要至少解析一级
+            'stale': 0,  # 校验失败被丢弃的条目
+            'children_calls': 0,  # 解析时发出的 children() 调用
+        }
+
+    def resolve(self, root: Any, locator: Locator, generation: Optional[int] = None) -> Optional[Any]:
+        """按定位路径获取控件
+
+        Args:
+            root: 定位起点（主窗口）
+            locator: 定位路径
+            generation: 页面代数，None 表示会话级控件（不随页面失效）
+
+        Returns:
+            控件，找不到返回None
+        """
+        with self._lock:
+            node, start = root, 0
+            for depth in range(len(locator), 0, -1):
+                entry = self._entries.get(locator[:depth])
+                if entry is None:
+                    continue
+                if self._is_valid(entry, generation):
+                    node, start = entry.control, depth
+                    break
+                self._stats['stale'] += 1
+                del self._entries[locator[:depth]]
+
+            if start == len(locator):
+                self._stats['hits'] += 1
+                return node
+
+            self._stats['misses'] += 1
+            for depth in range(start + 1, len(locator) + 1):
+                node = self._resolve_step(node, locator[:depth])
+                if node is None:
+                    return None
+                self._entries[locator[:depth]] = self._make_entry(node, generation)
+            return node
+
+    def discard(self, locator: Locator) -> None:
+        """丢弃某条路径及其所有延伸路径的缓存（如控件操作失败）"""
+        with self._lock:
+            for key in [key for key in self._entries if key[:len(locator)] == locator]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """清空已解析的控件（重连时调用），学到的下标保留"""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> List[Tuple[Locator, Any, Any, Optional[int]]]:
+        """当前缓存的条目 (定位路径, 控件, runtime id, 页面代数)，录制界面交互轨迹时保存"""
+        with self._lock:
+            return [(locator, entry.control, entry.runtime_id, entry.generation) for locator, entry in self._entries.items()]
+
+    def restore(self, entries: List[Tuple[Locator, Any, Any, Optional[int]]]) -> None:
+        """恢复 snapshot() 得到的条目，回放轨迹时重建录制开始时的缓存状态"""
+        with self._lock:
+            self._entries = {locator: _CachedControl(control, None, runtime_id, generation)
+                             for locator, control, runtime_id, generation in entries}
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        return {'entries': len(self._entries), 'learned_indexes': len(self._indexes), **self._stats}
+
+    # ============ 内部方法（调用方持有锁） ============
+
+    def _resolve_step(self, parent: Any, prefix: Locator) -> Optional[Any]:
+        """在父控件中解析路径的最后一步"""
+        step = prefix[-1]
+        self._stats['children_calls'] += 1
+        children = parent.children(control_type=step.control_type, class_name=step.class_name, title=step.title)
+        if step.auto_id is None:
+            index = step.index or 0
+            return children[index] if index < len(children) else None
+
+        # 先按学到的下标直接比对，只读取一个子控件的 automation_id
+        key = locator_key(prefix)
+        index = self._indexes.get(key)
+        if index is not None and index < len(children) and children[index].element_info.automation_id == step.auto_id:
+            return children[index]
+
+        for index, child in enumerate(children):
+            if child.element_info.automation_id == step.auto_id:
+                self._indexes[key] = index
+                self._save_indexes()
+                return child
+        return None
+
+    def _make_entry(self, control: Any, generation: Optional[int]) -> _CachedControl:
+        info = control.element_info
+        try:
+            runtime_id = info.runtime_id
+        except Exception:
+            runtime_id = None
+        return _CachedControl(control, getattr(info, "handle", None), runtime_id, generation)
+
+    @staticmethod
+    def _is_valid(entry: _CachedControl, generation: Optional[int]) -> bool:
+        """校验缓存的控件是否仍然可用"""
+        if entry.generation is not None and entry.generation != generation:
+            return False
+        try:
+            if entry.handle and _is_window is not None and not _is_window(entry.handle):
+                return False
+            return entry.runtime_id is not None and entry.control.element_info.runtime_id == entry.runtime_id
+        except Exception:
+            # 控件已销毁时读取属性会抛出COM异常
+            return False
+
+    def _load_indexes(self) -> Dict[str, int]:
+        if not self._index_file or not os.path.exists(self._index_file):
+            return {}
+        try:
+            with open(self._index_file, "r", encoding="utf-8") as f:
+                return {key: int(value) for key, value in json.load(f).items()}
+        except Exception as e:
+            logger.warning("读取控件下标缓存失败，将重新学习", path=self._index_file, error=str(e))
+            return {}
+
+    def _save_indexes(self) -> None:
+        if not self._index_file:
+            return
+        try:
+            path = Path(self._index_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._indexes, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("保存控件下标缓存失败", path=self._index_file, error=str(e))
@@ -0,0 +1,289 @@
+"""延时配置 - 按名称引用的固定等待时长，支持按机器校准
+
+操作中剩余的固定等待（菜单展开、页面切换、表格刷新等）按名称登记在 DELAY_DEFAULTS 中，
+默认值即原来写死的时长。不同机器的界面响应速度差别很大，校准模式反复执行只读查询，
+逐个缩短延时直到失败率上升，把能稳定通过的最短时长保存为本机的延时配置，启动时自动加载。
+
+实际使用的时长 = min(默认值, 校准值 × (1 + guard_ratio) + guard_margin)，
+保护带为慢机器和偶发卡顿留出余量，且永远不会比默认值更慢。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import json
+import platform
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+from easyths.models.operations import OperationResult
+from easyths.utils.config import project_config_instance
+
+logger = structlog.get_logger(__name__)
+
+# 延时名称 -> (默认时长秒数, 说明)
+DELAY_DEFAULTS: Dict[str, Tuple[float, str]] = {
+    # 页面导航
+    "page.clear": (0.2, "切到撤单页面清空残留信息后的等待"),
+    "page.hotkey_settle": (0.25, "快捷键切换买入、卖出页面后的防抖"),
+    "page.query_settle": (0.2, "快捷键切换查询、撤单页面后的防抖"),
+    "page.order_settle": (0.1, "委托查询切换到撤单页面后的防抖"),
+    "menu.expand": (0.15, "展开左侧主菜单后等待子菜单渲染"),
+    "menu.select": (0.1, "选中左侧菜单后等待页面切换"),
+    # 弹窗
+    "pop_dialog.close": (0.15, "关闭每个弹窗前的等待"),
+    "pop_dialog.settle": (0.05, "弹窗全部关闭后的等待"),
+    # 验证码
+    "captcha.refresh": (0.2, "点击验证码图片后等待刷新"),
+    "captcha.input": (0.1, "输入验证码后、按确定前的等待"),
+    "captcha.submit": (0.2, "验证码按确定后等待弹窗关闭"),
+    # 表格查询
+    "table.refresh": (0.3, "按F5刷新持仓、资金、条件单数据后的等待"),
+    "table.order_refresh": (0.25, "按F5刷新委托数据后的等待"),
+    "table.select_all": (0.05, "Ctrl+A 与 Ctrl+C 之间的等待"),
+    "table.filter_input": (0.1, "输入证券代码筛选表格后的等待"),
+    "table.filter_query": (0.1, "点击查询按钮后的等待"),
+    "history.clear_input": (0.05, "清空历史委托证券代码后的等待"),
+    "history.load": (0.2, "历史委托数据加载的等待"),
+    "history.grid_focus": (0.01, "点击历史委托表格后的等待"),
+    "history.select_all": (0.02, "历史委托 Ctrl+A 与 Ctrl+C 之间的等待"),
+    # 条件单
+    "condition.menu_settle": (0.1, "切换到条件单监控页面后的等待"),
+    "condition.tab_switch": (0.3, "切换条件单标签页后的等待"),
+    "condition.pop_close": (0.15, "关闭条件单页面残留提示后的等待"),
+}
+
+
+class DelayProfile:
+    """本机的延时配置"""
+
+    def __init__(self, delays: Optional[Dict[str, float]] = None, guard_ratio: float = 0.5,
+                 guard_margin: float = 0.02, host: Optional[str] = None, calibrated_at: Optional[str] = None):
+        """
+        Args:
+            delays: 校准得到的延时（秒），未校准的延时使用默认值
+            guard_ratio: 保护带比例，校准值按比例放大
+            guard_margin: 保护带余量（秒），放大后再加上的固定时长
+            host: 校准所在的机器名
+            calibrated_at: 校准时间
+        """
+        self.delays: Dict[str, float] = {name: value for name, value in (delays or {}).items() if name in DELAY_DEFAULTS}
+        self.guard_ratio = guard_ratio
+        self.guard_margin = guard_margin
+        self.host = host
+        self.calibrated_at = calibrated_at
+        # 校准过程中临时使用的延时，不加保护带
+        self._overrides: Dict[str, float] = {}
+        # 各延时被使用的次数，校准时据此找出每个查询用到的延时
+        self.usage: Dict[str, int] = {}
+
+    def get(self, name: str) -> float:
+        """获取延时的实际时长（秒）"""
+        self.usage[name] = self.usage.get(name, 0) + 1
+        if name in self._overrides:
+            return self._overrides[name]
+        return self.effective(name)
+
+    def effective(self, name: str) -> float:
+        """校准值加上保护带后的时长，未校准时为默认值"""
+        default, _ = DELAY_DEFAULTS[name]
+        calibrated = self.delays.get(name)
+        if calibrated is None:
+            return default
+        return min(default, round(calibrated * (1 + self.guard_ratio) + self.guard_margin, 4))
+
+    def override(self, name: str, value: Optional[float]) -> None:
+        """临时指定延时（校准用），None 表示取消"""
+        if value is None:
+            self._overrides.pop(name, None)
+        else:
+            self._overrides[name] = value
+
+    def clear_overrides(self) -> None:
+        self._overrides.clear()
+
+    @classmethod
+    def load(cls, file_path: str, guard_ratio: float = 0.5, guard_margin: float = 0.02) -> "DelayProfile":
+        """从文件加载，文件不存在、损坏或不是本机校准的结果时使用默认延时"""
+        path = Path(file_path)
+        if not path.exists():
+            return cls(guard_ratio=guard_ratio, guard_margin=guard_margin)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning("延时配置文件读取失败，使用默认延时", file=file_path, error=str(e))
+            return cls(guard_ratio=guard_ratio, guard_margin=guard_margin)
+        if data.get("host") != platform.node():
+            logger.warning("延时配置不是本机校准的结果，使用默认延时", file=file_path, host=data.get("host"))
+            return cls(guard_ratio=guard_ratio, guard_margin=guard_margin)
+        logger.info("已加载延时配置", file=file_path, calibrated_at=data.get("calibrated_at"))
+        return cls(data.get("delays"), guard_ratio, guard_margin, data.get("host"), data.get("calibrated_at"))
+
+    def save(self, file_path: str, details: Optional[Dict[str, Any]] = None) -> None:
+        """保存到文件"""
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "host": self.host,
+            "calibrated_at": self.calibrated_at,
+            "delays": self.delays,
+            "details": details or {},
+        }
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def stats(self) -> Dict[str, Any]:
+        """各延时的默认值、校准值和实际时长"""
+        return {
+            "host": self.host,
+            "calibrated_at": self.calibrated_at,
+            "guard_ratio": self.guard_ratio,
+            "guard_margin": self.guard_margin,
+            "delays": {
+                name: {
+                    "default": default,
+                    "calibrated": self.delays.get(name),
+                    "effective": self.effective(name),
+                    "description": description,
+                }
+                for name, (default, description) in DELAY_DEFAULTS.items()
+            },
+        }
+
+
+_delay_profile: Optional[DelayProfile] = None
+
+
+def get_delay_profile() -> DelayProfile:
+    """获取当前使用的延时配置，首次使用时从配置的文件加载"""
+    global _delay_profile
+    if _delay_profile is None:
+        _delay_profile = DelayProfile.load(
+            project_config_instance.app_delay_profile_file,
+            guard_ratio=project_config_instance.app_delay_guard_ratio,
+            guard_margin=project_config_instance.app_delay_guard_margin,
+        )
+    return _delay_profile
+
+
+def set_delay_profile(profile: Optional[DelayProfile]) -> None:
+    """替换当前使用的延时配置，None 表示下次使用时重新从文件加载"""
+    global _delay_profile
+    _delay_profile = profile
+
+
+class DelayCalibrator:
+    """延时校准器
+
+    流程：
+        1. 以当前延时把每个校准查询执行 rounds 次，记录基准失败率、基准结果，以及每个查询用到了哪些延时
+        2. 逐个延时从默认值按 FACTORS 依次缩短，只重跑用到该延时的查询，
+           失败率超过基准 + tolerance 或查询结果与基准不一致时停止，保留最后一个通过的时长
+        3. 已校准的延时在校准后续延时时保持校准值，使延时之间的相互影响也计入
+
+    查询结果会随行情变化的数据（如持仓市值）会被判为不一致，使校准偏保守，建议在收盘后校准。
+    """
+
+    # 相对默认值的缩短比例，依次尝试
+    FACTORS = (0.75, 0.5, 0.35, 0.25, 0.15, 0.1, 0.0)
+
+    def __init__(self, run_operation: Callable[[str, Dict[str, Any]], OperationResult], profile: DelayProfile,
+                 operations: Sequence[Tuple[str, Dict[str, Any]]], rounds: int = 5, tolerance: float = 0.0):
+        """
+        Args:
+            run_operation: 执行一次操作并返回结果，每次执行前应使页面状态失效，保证导航延时也被用到
+            profile: 要校准的延时配置
+            operations: 校准用的只读查询 (操作名称, 参数)
+            rounds: 每个候选时长重复执行的次数
+            tolerance: 允许的失败率上升幅度
+        """
+        self.run_operation = run_operation
+        self.profile = profile
+        self.operations = list(operations)
+        self.rounds = rounds
+        self.tolerance = tolerance
+        self._baseline: Dict[int, Any] = {}
+
+    def _run(self, name: str, params: Dict[str, Any]) -> Tuple[bool, Any]:
+        try:
+            result = self.run_operation(name, params)
+        except Exception as e:
+            logger.warning("校准查询执行异常", operation_name=name, error=str(e))
+            return False, None
+        return result.success, result.data
+
+    def _trial(self, operations: List[Tuple[str, Dict[str, Any]]]) -> float:
+        """重复执行查询，返回失败率（失败或结果与基准不一致）"""
+        failures = 0
+        for _ in range(self.rounds):
+            for index, (name, params) in operations:
+                success, data = self._run(name, params)
+                if not success or data != self._baseline[index]:
+                    failures += 1
+        return failures / (self.rounds * len(operations))
+
+    def calibrate(self) -> Dict[str, Any]:
+        """执行校准，更新 profile 并返回校准明细，校准中途出错时恢复原来的延时"""
+        previous = self.profile.delays
+        try:
+            return self._calibrate()
+        except Exception:
+            self.profile.delays = previous
+            raise
+        finally:
+            self.profile.clear_overrides()
+
+    def _calibrate(self) -> Dict[str, Any]:
+        self.profile.clear_overrides()
+        self.profile.delays = {}
+
+        # 1. 基准：默认延时下的结果、失败率，以及每个查询用到的延时
+        users: Dict[str, List[Tuple[int, Tuple[str, Dict[str, Any]]]]] = {}
+        baseline_failures: Dict[int, int] = {}
+        for index, (name, params) in enumerate(self.operations):
+            self.profile.usage.clear()
+            success, data = self._run(name, params)
+            self._baseline[index] = data if success else None
+            for delay_name in self.profile.usage:
+                users.setdefault(delay_name, []).append((index, (name, params)))
+            failures = 0 if success else 1
+            for _ in range(self.rounds - 1):
+                run_success, run_data = self._run(name, params)
+                failures += 0 if run_success and run_data == self._baseline[index] else 1
+            baseline_failures[index] = failures
+
+        # 2. 逐个缩短延时
+        details: Dict[str, Any] = {}
+        for delay_name in DELAY_DEFAULTS:
+            operations = users.get(delay_name)
+            if not operations:
+                continue
+            default, _ = DELAY_DEFAULTS[delay_name]
+            baseline_rate = sum(baseline_failures[index] for index, _ in operations) / (self.rounds * len(operations))
+            best = default
+            trials = []
+            for factor in self.FACTORS:
+                candidate = round(default * factor, 4)
+                self.profile.override(delay_name, candidate)
+                failure_rate = self._trial(operations)
+                trials.append({"value": candidate, "failure_rate": round(failure_rate, 4)})
+                if failure_rate > baseline_rate + self.tolerance:
+                    break
+                best = candidate
+            self.profile.override(delay_name, best)
+            details[delay_name] = {
+                "default": default,
+                "calibrated": best,
+                "baseline_failure_rate": round(baseline_rate, 4),
+                "operations": sorted({name for _, (name, _) in operations}),
+                "trials": trials,
+            }
+            logger.info("延时校准完成", delay_name=delay_name, default=default, calibrated=best)
+
+        # 3. 保存校准值，之后按保护带放大使用
+        self.profile.delays = {name: detail["calibrated"] for name, detail in details.items()}
+        self.profile.host = platform.node()
+        self.profile.calibrated_at = datetime.now().isoformat()
+        return details
@@ -0,0 +1,306 @@
+"""按调用方公平调度的队列 - 调用方之间按实际占用的GUI时间做赤字轮询（DRR）
+
+多个策略共用一个服务时，某个调用方循环提交查询就能占满队列、拖慢其他调用方的委托。
+这里每个调用方（认证的 API 密钥对应的名称）有自己的多通道优先级队列（LaneQueue），调用方之间：
+
+    - 赤字轮询：轮到的调用方赤字不为负时出队一个操作，执行结束后按实际占用的GUI时间扣减赤字；
+      赤字为负时补充一个时间片（quantum 秒）并轮到下一个调用方。
+      每个调用方长期获得相同的GUI时间，与各自提交的操作数量、耗时无关
+    - 新加入轮询的调用方（之前没有排队的操作）剩余的正赤字清零，欠下的负赤字保留：
+      GUI时间在操作执行结束后才扣减，每次只提交一个操作的调用方也要按占用的时间等待补回，
+      偶尔提交、没有欠账的调用方轮到时立即出队
+    - 排队上限：每个调用方排队中的操作数有上限，超出时拒绝该调用方的提交，不影响其他调用方
+    - 优先级和通道内重排（如页面亲和调度）只在同一调用方内部生效：先按赤字轮询选出调用方，
+      再在该调用方的 LaneQueue 中按通道选择，轮到调用方 A 时，A 的低优先级操作照样先于其他调用方的高优先级操作
+    - 紧急操作例外：优先级不低于 urgent_priority（且满足 urgent 筛选）的操作不检查赤字，
+      按轮询顺序找到的第一个调用方的紧急操作立即出队，占用的GUI时间照常在执行结束后从该调用方的赤字中扣减，
+      之后该调用方要等赤字补回才能再出队普通操作
+
+接口与 LaneQueue 一致，另有 charge() 记录操作实际占用的GUI时间。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from easyths.core.lane_queue import MAX_PRIORITY, LaneQueue
+
+# 未认证（未启用 API 密钥）的调用方
+ANONYMOUS = "anonymous"
+
+
+class CallerQueueFull(queue.Full):
+    """调用方排队中的操作数已达上限"""
+
+
+class _Caller:
+    __slots__ = ("lanes", "deficit", "dispatched", "gui_time", "rejected", "urgent")
+
+    def __init__(self, lanes: LaneQueue):
+        self.lanes = lanes
+        self.deficit = 0.0
+        self.dispatched = 0
+        self.gui_time = 0.0
+        self.rejected = 0
+        self.urgent = 0
+
+
+class FairQueue:
+    """按调用方公平调度的队列"""
+
+    def __init__(self, maxsize: int = 0, max_per_caller: int = 0, quantum: float = 1.0, levels: int = 5,
+                 batch_size: int = 10, aging_interval: float = 5.0, clock: Callable[[], float] = time.monotonic,
+                 reorder: Optional[Callable[[List[Any]], int]] = None, reorder_window: int = 8, max_skips: int = 3,
+                 urgent_priority: int = MAX_PRIORITY + 1, urgent: Optional[Callable[[Any], bool]] = None):
+        """初始化队列
+
+        Args:
+            maxsize: 所有调用方合计的最大容量，0 表示不限制
+            max_per_caller: 每个调用方排队中的操作数上限，0 表示不限制
+            quantum: 每轮补充的GUI时间片（秒）
+            levels / batch_size / aging_interval / clock: 各调用方 LaneQueue 的参数
+            reorder / reorder_window / max_skips: 各调用方 LaneQueue 的通道内重排，reorder 的参数为条目本身
+            urgent_priority: 紧急操作的最低优先级，越过调用方之间的轮询立即出队，大于 10 表示不启用
+            urgent: 进一步筛选紧急操作，参数为条目本身，None 表示不筛选
+
+        Raises:
+            ValueError: quantum 不大于 0
+        """
+        if quantum <= 0:
+            raise ValueError(f"时间片必须大于 0: {quantum}")
+        self.maxsize = maxsize
+        self.max_per_caller = max_per_caller
+        self.quantum = quantum
+        self._lane_options = {"levels": levels, "batch_size": batch_size,
+                              "aging_interval": aging_interval, "clock": clock}
+        if reorder is not None:
+            # 通道中保存的是 (key, 条目)
+            self._lane_options.update(reorder=lambda entries: reorder([item for _, item in entries]),
+                                      reorder_window=reorder_window, max_skips=max_skips)
+        self.urgent_priority = urgent_priority
+        # 通道中保存的是 (key, 条目)
+        self._urgent = (lambda entry: urgent(entry[1])) if urgent is not None else None
+        self._callers: Dict[str, _Caller] = {}
+        self._active: deque = deque()  # 有排队操作的调用方，按轮询顺序
+        self._owners: Dict[str, str] = {}  # key -> 调用方
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+
+    def put(self, key: str, item: Any, priority: int = 0, caller: Optional[str] = None) -> None:
+        """加入调用方的队列
+
+        Raises:
+            CallerQueueFull: 调用方排队中的操作数已达上限
+            queue.Full: 队列已满
+            ValueError: 条目已存在
+        """
+        caller = caller or ANONYMOUS
+        with self._mutex:
+            if self.maxsize and len(self._owners) >= self.maxsize:
+                raise queue.Full
+            if key in self._owners:
+                raise ValueError(f"条目已存在: {key}")
+            state = self._callers.get(caller)
+            if state is None:
+                state = self._callers[caller] = _Caller(LaneQueue(**self._lane_options))
+            if self.max_per_caller and state.lanes.qsize() >= self.max_per_caller:
+                state.rejected += 1
+                raise CallerQueueFull
+            if state.lanes.empty():
+                # 不累积空闲期间的额度，但保留已执行操作欠下的GUI时间
+                state.deficit = min(state.deficit, 0.0)
+                self._active.append(caller)
+            # 通道中保存 (key, 条目)，出队时据此移除归属
+            state.lanes.put(key, (key, item), priority)
+            self._owners[key] = caller
+            self._not_empty.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """按调用方赤字轮询取出下一个条目（阻塞）
+
+        Raises:
+            queue.Empty: 超时仍无条目
+        """
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._owners, timeout):
+                raise queue.Empty
+            return self._pop_next()
+
+    def get_nowait(self) -> Any:
+        """非阻塞取出下一个条目
+
+        Raises:
+            queue.Empty: 队列为空
+        """
+        with self._mutex:
+            if not self._owners:
+                raise queue.Empty
+            return self._pop_next()
+
+    def has_urgent(self) -> bool:
+        """是否有排队中的紧急操作"""
+        with self._mutex:
+            return any(self._callers[caller].lanes.has_urgent(self.urgent_priority, self._urgent)
+                       for caller in self._active)
+
+    def charge(self, caller: Optional[str], seconds: float) -> None:
+        """记录调用方的操作实际占用的GUI时间，从赤字中扣减"""
+        with self._mutex:
+            state = self._callers.get(caller or ANONYMOUS)
+            if state is None:
+                return
+            state.deficit -= seconds
+            state.gui_time += seconds
+
+    def remove(self, key: str) -> Optional[Any]:
+        """从队列中删除条目，立即释放容量
+
+        Returns:
+            被删除的条目，不存在（已出队或未入队）返回None
+        """
+        with self._mutex:
+            caller = self._owners.pop(key, None)
+            if caller is None:
+                return None
+            state = self._callers[caller]
+            _, item = state.lanes.remove(key)
+            if state.lanes.empty():
+                self._active.remove(caller)
+            return item
+
+    def update_priority(self, key: str, priority: int) -> bool:
+        """调整排队中条目在其调用方内的优先级
+
+        Returns:
+            bool: 条目是否存在
+        """
+        with self._mutex:
+            caller = self._owners.get(key)
+            return caller is not None and self._callers[caller].lanes.update_priority(key, priority)
+
+    def position(self, key: str) -> Optional[int]:
+        """估算排队位置（前面还有多少个条目，0 表示下一个出队）
+
+        按调用方每次轮流出队一个操作估算：调用方内的位置，加上轮询顺序中
+        其他调用方在这之前能出队的操作数。
+
+        Returns:
+            排队位置，不存在返回None
+        """
+        with self._mutex:
+            caller = self._owners.get(key)
+            if caller is None:
+                return None
+            own = self._callers[caller].lanes.position(key)
+            if own is None:
+                return None
+            turn = self._active.index(caller)
+            ahead = own
+            for index, other in enumerate(self._active):
+                if other != caller:
+                    # 轮询顺序在前的调用方多出队一轮
+                    ahead += min(self._callers[other].lanes.qsize(), own + (1 if index < turn else 0))
+            return ahead
+
+    def priority(self, key: str) -> Optional[int]:
+        """查询条目的当前优先级"""
+        caller = self._owners.get(key)
+        return self._callers[caller].lanes.priority(key) if caller is not None else None
+
+    def caller_of(self, key: str) -> Optional[str]:
+        """条目所属的调用方"""
+        return self._owners.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._owners
+
+    def qsize(self) -> int:
+        """条目数量"""
+        return len(self._owners)
+
+    def empty(self) -> bool:
+        return not self._owners
+
+    def clear(self) -> List[Any]:
+        """清空队列
+
+        Returns:
+            被清空的条目列表
+        """
+        with self._mutex:
+            items = []
+            for state in self._callers.values():
+                items.extend(item for _, item in state.lanes.clear())
+            self._owners.clear()
+            self._active.clear()
+            return items
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各优先级通道的统计（所有调用方合计），字段同 LaneQueue.stats()"""
+        with self._mutex:
+            per_caller = [state.lanes.stats() for state in self._callers.values()]
+        if not per_caller:
+            return LaneQueue(**self._lane_options).stats()
+        merged = []
+        for lanes in zip(*per_caller):
+            dispatched = sum(lane["dispatched"] for lane in lanes)
+            merged.append({
+                **lanes[0],
+                "queued": sum(lane["queued"] for lane in lanes),
+                "dispatched": dispatched,
+                "promoted": sum(lane["promoted"] for lane in lanes),
+                "avg_wait": round(sum(lane["avg_wait"] * lane["dispatched"] for lane in lanes) / dispatched, 3)
+                if dispatched else 0.0,
+                "max_wait": max(lane["max_wait"] for lane in lanes),
+                "oldest_wait": max(lane["oldest_wait"] for lane in lanes),
+            })
+        return merged
+
+    def caller_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各调用方的统计：排队数、已出队数（其中越过轮询的紧急操作数）、累计占用的GUI时间、当前赤字、因达到上限被拒绝的提交数"""
+        with self._mutex:
+            return {
+                caller: {
+                    "queued": state.lanes.qsize(),
+                    "dispatched": state.dispatched,
+                    "urgent": state.urgent,
+                    "gui_time": round(state.gui_time, 3),
+                    "deficit": round(state.deficit, 3),
+                    "rejected": state.rejected,
+                }
+                for caller, state in self._callers.items()
+            }
+
+    # ============ 内部方法（调用方持有锁） ============
+
+    def _pop_next(self) -> Any:
+        if self.urgent_priority <= MAX_PRIORITY:
+            for caller in self._active:
+                state = self._callers[caller]
+                entry = state.lanes.get_urgent(self.urgent_priority, self._urgent)
+                if entry is not None:
+                    # 不检查赤字，不改变轮询顺序，占用的GUI时间执行结束后照常扣减
+                    state.urgent += 1
+                    return self._dispatched(caller, state, entry)
+
+        while True:
+            caller = self._active[0]
+            state = self._callers[caller]
+            if state.deficit < 0:
+                state.deficit += self.quantum
+                self._active.rotate(-1)
+                continue
+            return self._dispatched(caller, state, state.lanes.get_nowait())
+
+    def _dispatched(self, caller: str, state: _Caller, entry: tuple) -> Any:
+        key, item = entry
+        del self._owners[key]
+        state.dispatched += 1
+        if state.lanes.empty():
+            self._active.remove(caller)
+        return item
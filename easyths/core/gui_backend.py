@@ -0,0 +1,109 @@
+"""GUI 后端 - 自动化器与具体界面实现之间的接口
+
+自动化器通过后端连接客户端、识别验证码，插件只使用后端返回的控件（children、type_keys、click 等），
+因此同一套插件既可以驱动真实的同花顺客户端，也可以驱动内存中的模拟客户端：
+    - uia: pywinauto UIA backend，连接真实的 xiadan.exe（仅 Windows）
+    - simulated: easyths.core.simulated_client 中的模拟客户端，可在 Linux 上跑通插件、基准测试和 CI
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+from easyths.utils import get_captcha_ocr_server, set_clipboard_provider
+
+
+class GuiBackend:
+    """GUI 后端接口"""
+
+    # 后端名称，对应配置项 trading_backend
+    name = ""
+
+    def connect(self, app_path: str) -> Tuple[Any, Any, Any]:
+        """连接客户端
+
+        Args:
+            app_path: 交易程序路径
+
+        Returns:
+            (应用对象, 主窗口, 主窗口 wrapper 对象)，应用对象需提供 top_window()
+        """
+        raise NotImplementedError
+
+    def disconnect(self) -> None:
+        """断开连接，释放后端占用的资源"""
+
+    def recognize_captcha(self, control: Any) -> Tuple[str, Image.Image]:
+        """识别验证码控件中的验证码
+
+        Returns:
+            (验证码, 验证码图片)
+        """
+        raise NotImplementedError
+
+
+class PywinautoBackend(GuiBackend):
+    """pywinauto UIA 后端，连接真实的同花顺客户端"""
+
+    name = "uia"
+
+    def connect(self, app_path: str) -> Tuple[Any, Any, Any]:
+        # 延迟导入，非 Windows 环境下使用模拟后端时无需安装 pywinauto
+        from pywinauto.application import Application
+
+        if not app_path or not Path(app_path).exists():
+            raise FileNotFoundError(f"同花顺应用路径不存在: {app_path}")
+        app = Application(backend="uia").connect(path=app_path, timeout=5)
+        # 修改为 正则匹配 网上股票交易系统.*  避免可能未来版本更新导致找不到窗口的问题
+        main_window = app.window(title_re="网上股票交易系统.*", control_type="Window", visible_only=False, depth=1)
+        return app, main_window, main_window.wrapper_object()
+
+    def recognize_captcha(self, control: Any) -> Tuple[str, Image.Image]:
+        return get_captcha_ocr_server().recognize(control)
+
+
+class SimulatedBackend(GuiBackend):
+    """模拟后端，连接内存中的模拟同花顺客户端"""
+
+    name = "simulated"
+
+    def __init__(self, client: Optional[Any] = None):
+        """
+        Args:
+            client: 模拟客户端（SimulatedClient），None 时按配置创建
+        """
+        if client is None:
+            from easyths.core.simulated_client import SimulatedClient
+            from easyths.utils import project_config_instance
+
+            client = SimulatedClient(latency_scale=project_config_instance.trading_simulated_latency_scale)
+        self.client = client
+
+    def connect(self, app_path: str) -> Tuple[Any, Any, Any]:
+        # 模拟客户端复制表格时写入自己的内存剪贴板
+        set_clipboard_provider(self.client.clipboard)
+        return self.client, self.client.main_window, self.client.main_window.wrapper_object()
+
+    def disconnect(self) -> None:
+        set_clipboard_provider(None)
+
+    def recognize_captcha(self, control: Any) -> Tuple[str, Image.Image]:
+        return self.client.recognize_captcha(control)
+
+
+GUI_BACKENDS: Dict[str, type] = {
+    PywinautoBackend.name: PywinautoBackend,
+    SimulatedBackend.name: SimulatedBackend,
+}
+
+
+def create_gui_backend(name: str) -> GuiBackend:
+    """按名称创建 GUI 后端"""
+    backend_class = GUI_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"不支持的GUI后端: {name}，可选：{list(GUI_BACKENDS)}")
+    return backend_class()
@@ -0,0 +1,590 @@
+"""界面交互轨迹 - 录制生产环境中的每次 UIA 调用，离线回放操作
+
+录制：TraceRecorder 包装自动化器的 GUI 后端，后端返回的应用、主窗口以及由它们得到的所有控件、
+element_info 都换成记录代理，每次方法调用（children、window_text、type_keys、click 等）和属性读取
+连同耗时、返回值写入轨迹；剪贴板读写、验证码识别、sleep、条件等待、弹窗检查也一并记录。
+每个操作一份轨迹文件（gzip 压缩的 JSON Lines），只保留耗时超过阈值的操作。
+
+回放：TraceReplayer 用录制的返回值构造假的控件，让操作（可以是修改后的新版本代码）离线重新执行，
+默认按录制的耗时等待，复现当时的界面延迟。调用顺序与录制不同时，同名调用依次取录制值，
+取完后重复最后一个值；录制中没有的调用视为不匹配，记录在回放报告中。
+
+轨迹文件格式：
+    第一行为头部：操作名称、参数、结果、录制开始时的页面状态和控件缓存、应用和主窗口的对象编号
+    之后每行一个事件：
+        t: 相对操作开始的时间（秒）  d: 耗时（秒）  k: 事件类型
+        o: 对象编号  n: 方法或属性名  a: 参数  r: 返回值（对象以 {"$": 编号} 表示）  x: 异常信息
+    事件类型：call 方法调用、get 属性读取、clip 剪贴板、ocr 验证码识别、sleep、wait 条件等待、popup 弹窗检查
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import gzip
+import itertools
+import json
+import platform
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import structlog
+from PIL import Image
+
+from easyths.core.control_cache import LocatorStep
+from easyths.core.gui_backend import GuiBackend
+from easyths.models.operations import OperationResult
+from easyths.utils import get_clipboard_provider, set_clipboard_provider
+from easyths.utils.clipboard import ClipboardProvider
+
+logger = structlog.get_logger(__name__)
+
+TRACE_VERSION = 1
+
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+class TraceMismatchError(RuntimeError):
+    """回放时遇到录制中没有的调用"""
+
+
+# ============ 录制 ============
+
+class TracedObject:
+    """记录代理：转发对被包装对象的方法调用和属性读取，录制进行中时写入轨迹"""
+
+    __slots__ = ("_target", "_recorder", "_trace_id")
+
+    def __init__(self, target: Any, recorder: "TraceRecorder"):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_recorder", recorder)
+        # 首次写入轨迹时才分配编号
+        object.__setattr__(self, "_trace_id", None)
+
+    def __getattr__(self, name: str) -> Any:
+        target = self._target
+        recorder = self._recorder
+        if not recorder.recording:
+            value = getattr(target, name)
+            return recorder.method(self, name, value) if callable(value) else recorder.wrap(value)
+
+        start = time.perf_counter()
+        try:
+            value = getattr(target, name)
+        except Exception as e:
+            recorder.record("get", start, obj=self, name=name, error=e)
+            raise
+        if callable(value):
+            return recorder.method(self, name, value)
+        value = recorder.wrap(value)
+        recorder.record("get", start, obj=self, name=name, result=value)
+        return value
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target, name, value)
+
+    def __repr__(self) -> str:
+        return f"<Traced {self._target!r}>"
+
+
+class TracedClipboard(ClipboardProvider):
+    """记录剪贴板访问"""
+
+    def __init__(self, provider: ClipboardProvider, recorder: "TraceRecorder"):
+        self.provider = provider
+        self.recorder = recorder
+
+    def _call(self, name: str, *args: Any) -> Any:
+        if not self.recorder.recording:
+            return getattr(self.provider, name)(*args)
+        start = time.perf_counter()
+        try:
+            result = getattr(self.provider, name)(*args)
+        except Exception as e:
+            self.recorder.record("clip", start, name=name, args=list(args), error=e)
+            raise
+        self.recorder.record("clip", start, name=name, args=list(args), result=result)
+        return result
+
+    def get_text(self) -> str:
+        return self._call("get_text")
+
+    def set_text(self, text: str) -> None:
+        self._call("set_text", text)
+
+    def sequence_number(self) -> Optional[int]:
+        return self._call("sequence_number")
+
+    def clear(self) -> Optional[int]:
+        return self._call("clear")
+
+    def has_new_content(self, mark: Optional[int]) -> bool:
+        return self._call("has_new_content", mark)
+
+
+class TracingBackend(GuiBackend):
+    """包装 GUI 后端，连接后返回的对象都经过记录代理"""
+
+    def __init__(self, backend: GuiBackend, recorder: "TraceRecorder"):
+        self.backend = backend
+        self.recorder = recorder
+        self.name = backend.name
+        self.refs: Dict[str, TracedObject] = {}
+
+    def connect(self, app_path: str) -> Tuple[Any, Any, Any]:
+        app, main_window, main_window_wrapper = self.backend.connect(app_path)
+        set_clipboard_provider(TracedClipboard(get_clipboard_provider(), self.recorder))
+        self.refs = {
+            "app": TracedObject(app, self.recorder),
+            "main_window": TracedObject(main_window, self.recorder),
+            "main_window_wrapper": TracedObject(main_window_wrapper, self.recorder),
+        }
+        return self.refs["app"], self.refs["main_window"], self.refs["main_window_wrapper"]
+
+    def disconnect(self) -> None:
+        self.backend.disconnect()
+
+    def recognize_captcha(self, control: Any) -> Tuple[str, Image.Image]:
+        start = time.perf_counter()
+        code, image = self.backend.recognize_captcha(self.recorder.unwrap(control))
+        self.recorder.record("ocr", start, obj=control, result=code)
+        return code, image
+
+
+class TraceRecorder:
+    """界面交互轨迹录制器
+
+    用法:
+        recorder = TraceRecorder("~/easyths/traces", min_duration=2.0)
+        recorder.attach(automator)  # 在 automator.connect() 之前调用
+    """
+
+    def __init__(self, trace_dir: str, min_duration: float = 0.0):
+        """
+        Args:
+            trace_dir: 轨迹文件保存目录
+            min_duration: 只保存耗时不少于该秒数的操作，0 表示全部保存
+        """
+        self.trace_dir = Path(trace_dir).expanduser()
+        self.min_duration = min_duration
+        self.automator = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._events: Optional[List[Dict[str, Any]]] = None
+        self._header: Dict[str, Any] = {}
+        self._start = 0.0
+        self._stats = {"recorded": 0, "saved": 0, "discarded": 0}
+
+    @property
+    def recording(self) -> bool:
+        return self._events is not None
+
+    def attach(self, automator: Any) -> None:
+        """包装自动化器的 GUI 后端，操作执行时自动录制"""
+        if not isinstance(automator.backend, TracingBackend):
+            automator.backend = TracingBackend(automator.backend, self)
+        automator.trace_recorder = self
+        self.automator = automator
+
+    # ============ 操作边界 ============
+
+    def begin(self, operation_name: str, params: Dict[str, Any]) -> None:
+        """开始录制一次操作，保存开始时的页面状态和控件缓存"""
+        with self._lock:
+            self._events = []
+            self._start = time.perf_counter()
+        automator = self.automator
+        page_state = automator.page_state
+        self._header = {
+            "v": TRACE_VERSION,
+            "operation": operation_name,
+            "params": params,
+            "host": platform.node(),
+            "started_at": datetime.now().isoformat(),
+            "refs": {name: self.ref(obj) for name, obj in automator.backend.refs.items()},
+            "state": {
+                "page": page_state.page,
+                "fingerprint": page_state.fingerprint,
+                "generation": page_state.generation,
+                "cache": [
+                    [[list(step) for step in locator], self.serialize(control), self.serialize(runtime_id), generation]
+                    for locator, control, runtime_id, generation in automator.control_cache.snapshot()
+                ],
+            },
+        }
+
+    def end(self, result: OperationResult) -> Optional[Path]:
+        """结束录制，耗时达到阈值时写入轨迹文件
+
+        Returns:
+            轨迹文件路径，未保存返回None
+        """
+        with self._lock:
+            events, self._events = self._events, None
+        if events is None:
+            return None
+        duration = time.perf_counter() - self._start
+        self._stats["recorded"] += 1
+        if duration < self.min_duration:
+            self._stats["discarded"] += 1
+            return None
+
+        header = {**self._header, "duration": round(duration, 6),
+                  "result": {"success": result.success, "message": result.message}}
+        path = self.save(header, events)
+        if path is not None:
+            self._stats["saved"] += 1
+        return path
+
+    def save(self, header: Dict[str, Any], events: List[Dict[str, Any]]) -> Optional[Path]:
+        """保存一次操作的轨迹，子类可覆盖（如只在内存中统计调用次数）
+
+        Returns:
+            轨迹文件路径，保存失败返回None
+        """
+        path = self.trace_dir / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{header['operation']}.jsonl.gz"
+        try:
+            save_trace(path, header, events)
+        except Exception as e:
+            logger.warning("保存界面交互轨迹失败", path=str(path), error=str(e))
+            return None
+        logger.info("已保存界面交互轨迹", path=str(path), operation_name=header["operation"], duration=header["duration"])
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        return {"trace_dir": str(self.trace_dir), "min_duration": self.min_duration, **self._stats}
+
+    # ============ 事件记录 ============
+
+    def record(self, kind: str, start: Optional[float] = None, obj: Any = None, name: Optional[str] = None,
+               args: Optional[List[Any]] = None, result: Any = None, error: Optional[Exception] = None,
+               **fields: Any) -> None:
+        """记录一个事件，start 为事件开始的 time.perf_counter()，None 表示瞬时事件"""
+        if self._events is None:
+            return
+        now = time.perf_counter()
+        event: Dict[str, Any] = {"t": round((start or now) - self._start, 6), "k": kind}
+        if start is not None:
+            event["d"] = round(now - start, 6)
+        if obj is not None:
+            event["o"] = self.ref(obj)
+        if name is not None:
+            event["n"] = name
+        if args:
+            event["a"] = self.serialize(args)
+        if error is not None:
+            event["x"] = f"{type(error).__name__}: {error}"
+        elif result is not None:
+            event["r"] = self.serialize(result)
+        event.update(fields)
+        with self._lock:
+            if self._events is not None:
+                self._events.append(event)
+
+    def method(self, owner: TracedObject, name: str, method: Callable) -> Callable:
+        """包装代理对象的方法，调用时记录参数、返回值和耗时"""
+
+        def traced(*args: Any, **kwargs: Any) -> Any:
+            raw_args = [self.unwrap(arg) for arg in args]
+            raw_kwargs = {key: self.unwrap(value) for key, value in kwargs.items()}
+            if not self.recording:
+                return self.wrap(method(*raw_args, **raw_kwargs))
+            call_args = _call_args(args, kwargs)
+            start = time.perf_counter()
+            try:
+                result = self.wrap(method(*raw_args, **raw_kwargs))
+            except Exception as e:
+                self.record("call", start, obj=owner, name=name, args=call_args, error=e)
+                raise
+            self.record("call", start, obj=owner, name=name, args=call_args, result=result)
+            return result
+
+        return traced
+
+    def wrap(self, value: Any) -> Any:
+        """把返回值中的对象换成记录代理"""
+        if isinstance(value, _PRIMITIVES) or isinstance(value, TracedObject):
+            return value
+        if isinstance(value, (list, tuple)):
+            return type(value)(self.wrap(item) for item in value)
+        return TracedObject(value, self)
+
+    @staticmethod
+    def unwrap(value: Any) -> Any:
+        return object.__getattribute__(value, "_target") if isinstance(value, TracedObject) else value
+
+    def ref(self, obj: TracedObject) -> int:
+        """代理对象在轨迹中的编号"""
+        trace_id = object.__getattribute__(obj, "_trace_id")
+        if trace_id is None:
+            trace_id = next(self._ids)
+            object.__setattr__(obj, "_trace_id", trace_id)
+        return trace_id
+
+    def serialize(self, value: Any) -> Any:
+        if isinstance(value, TracedObject):
+            return {"$": self.ref(value)}
+        if isinstance(value, (list, tuple)):
+            return [self.serialize(item) for item in value]
+        if isinstance(value, dict):
+            return {str(key): self.serialize(item) for key, item in value.items()}
+        if isinstance(value, _PRIMITIVES):
+            return value
+        return repr(value)
+
+
+def _call_args(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> List[Any]:
+    """调用参数：位置参数列表，有关键字参数时追加一个字典"""
+    call_args = list(args)
+    if kwargs:
+        call_args.append(dict(sorted(kwargs.items())))
+    return call_args
+
+
+def save_trace(path: Path, header: Dict[str, Any], events: List[Dict[str, Any]]) -> None:
+    """写入轨迹文件（gzip 压缩的 JSON Lines）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False, default=str, separators=(",", ":")) + "\n")
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False, default=str, separators=(",", ":")) + "\n")
+
+
+def load_trace(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """读取轨迹文件
+
+    Returns:
+        (头部, 事件列表)
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("v") != TRACE_VERSION:
+        raise ValueError(f"不支持的轨迹文件: {path}")
+    return lines[0], lines[1:]
+
+
+# ============ 回放 ============
+
+class TracePlayer:
+    """按录制的事件应答回放中的调用"""
+
+    def __init__(self, events: List[Dict[str, Any]], realtime: bool = True):
+        """
+        Args:
+            events: 录制的事件
+            realtime: 是否按录制的耗时等待，复现当时的界面延迟
+        """
+        self.realtime = realtime
+        # (事件类型, 对象编号, 名称, 参数) -> 依次应答的事件
+        self._exact: Dict[Tuple[Any, ...], Deque[Dict[str, Any]]] = {}
+        # (事件类型, 对象编号, 名称) -> 依次应答的事件，参数不一致时使用
+        self._by_name: Dict[Tuple[Any, ...], Deque[Dict[str, Any]]] = {}
+        self._last: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+        self._objects: Dict[int, ReplayObject] = {}
+        self.stats = {"matched": 0, "fallback": 0, "repeated": 0, "missing": 0}
+        self.missing: List[str] = []
+        for event in events:
+            if event["k"] not in ("call", "get", "clip", "ocr"):
+                continue
+            name_key = (event["k"], event.get("o"), event.get("n"))
+            self._exact.setdefault(name_key + (_args_key(event.get("a")),), deque()).append(event)
+            self._by_name.setdefault(name_key, deque()).append(event)
+
+    def obj(self, trace_id: int) -> "ReplayObject":
+        if trace_id not in self._objects:
+            self._objects[trace_id] = ReplayObject(trace_id, self)
+        return self._objects[trace_id]
+
+    def has(self, kind: str, trace_id: Optional[int], name: Optional[str]) -> bool:
+        return (kind, trace_id, name) in self._by_name
+
+    def answer(self, kind: str, trace_id: Optional[int], name: Optional[str], args: List[Any]) -> Any:
+        """取出应答事件，返回录制的返回值（录制时抛出异常则同样抛出）"""
+        name_key = (kind, trace_id, name)
+        exact = self._exact.get(name_key + (_args_key(args or None),))
+        by_name = self._by_name.get(name_key)
+        if exact:
+            event = exact.popleft()
+            by_name.remove(event)
+            self.stats["matched"] += 1
+        elif by_name:
+            event = by_name.popleft()
+            self._exact[name_key + (_args_key(event.get("a")),)].remove(event)
+            self.stats["fallback"] += 1
+        elif name_key in self._last:
+            event = self._last[name_key]
+            self.stats["repeated"] += 1
+        else:
+            self.stats["missing"] += 1
+            self.missing.append(f"{kind} #{trace_id}.{name}{args or ''}")
+            raise TraceMismatchError(f"轨迹中没有该调用: {kind} #{trace_id}.{name}")
+        self._last[name_key] = event
+
+        if self.realtime and event.get("d"):
+            time.sleep(event["d"])
+        if "x" in event:
+            raise RuntimeError(f"（回放）{event['x']}")
+        return self.deserialize(event.get("r"))
+
+    def deserialize(self, value: Any) -> Any:
+        if isinstance(value, dict) and set(value) == {"$"}:
+            return self.obj(value["$"])
+        if isinstance(value, list):
+            return [self.deserialize(item) for item in value]
+        return value
+
+
+def _args_key(args: Optional[List[Any]]) -> str:
+    return json.dumps(args, ensure_ascii=False, sort_keys=True, default=str) if args else ""
+
+
+class ReplayObject:
+    """回放中的对象：方法调用和属性读取都由录制的事件应答"""
+
+    def __init__(self, trace_id: int, player: TracePlayer):
+        self._trace_id = trace_id
+        self._player = player
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        player = self._player
+        if player.has("call", self._trace_id, name):
+            return lambda *args, **kwargs: player.answer("call", self._trace_id, name, _replay_args(args, kwargs))
+        if player.has("get", self._trace_id, name):
+            return player.answer("get", self._trace_id, name, [])
+        player.stats["missing"] += 1
+        player.missing.append(f"#{self._trace_id}.{name}")
+        raise AttributeError(f"轨迹中没有该属性或方法: #{self._trace_id}.{name}")
+
+    def __repr__(self) -> str:
+        return f"<Replay #{self._trace_id}>"
+
+
+def _replay_args(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> List[Any]:
+    """与录制时相同格式的参数，回放对象换成 {"$": 编号}"""
+    def convert(value: Any) -> Any:
+        if isinstance(value, ReplayObject):
+            return {"$": value._trace_id}
+        if isinstance(value, (list, tuple)):
+            return [convert(item) for item in value]
+        return value
+
+    return convert(_call_args(args, kwargs))
+
+
+class ReplayClipboard(ClipboardProvider):
+    """回放剪贴板访问"""
+
+    def __init__(self, player: TracePlayer):
+        self.player = player
+
+    def _answer(self, name: str, *args: Any) -> Any:
+        return self.player.answer("clip", None, name, list(args))
+
+    def get_text(self) -> str:
+        return self._answer("get_text")
+
+    def set_text(self, text: str) -> None:
+        self._answer("set_text", text)
+
+    def sequence_number(self) -> Optional[int]:
+        return self._answer("sequence_number")
+
+    def clear(self) -> Optional[int]:
+        return self._answer("clear")
+
+    def has_new_content(self, mark: Optional[int]) -> bool:
+        return self._answer("has_new_content", mark)
+
+
+class ReplayBackend(GuiBackend):
+    """回放后端：连接后返回录制的应用和主窗口"""
+
+    name = "replay"
+
+    def __init__(self, header: Dict[str, Any], player: TracePlayer):
+        self.header = header
+        self.player = player
+
+    def connect(self, app_path: str) -> Tuple[Any, Any, Any]:
+        set_clipboard_provider(ReplayClipboard(self.player))
+        refs = self.header["refs"]
+        return self.player.obj(refs["app"]), self.player.obj(refs["main_window"]), self.player.obj(refs["main_window_wrapper"])
+
+    def disconnect(self) -> None:
+        set_clipboard_provider(None)
+
+    def recognize_captcha(self, control: Any) -> Tuple[str, Image.Image]:
+        code = self.player.answer("ocr", control._trace_id if isinstance(control, ReplayObject) else None, None, [])
+        return code, Image.new("RGB", (60, 20))
+
+
+class TraceReplayer:
+    """离线回放轨迹文件中的操作"""
+
+    def __init__(self, path: str, realtime: bool = True):
+        """
+        Args:
+            path: 轨迹文件路径
+            realtime: 是否按录制的耗时等待，复现当时的界面延迟
+        """
+        self.path = path
+        self.realtime = realtime
+        self.header, self.events = load_trace(path)
+
+    def run(self, operation_class: Optional[type] = None) -> Dict[str, Any]:
+        """回放操作
+
+        Args:
+            operation_class: 要执行的操作类，默认使用录制的操作（从注册表获取），
+                传入修改后的版本即可在同一份轨迹上对比两个版本
+
+        Returns:
+            回放报告：回放与录制的结果、耗时，以及调用的匹配情况
+        """
+        from easyths.core.base_operation import operation_registry
+        from easyths.core.tonghuashun_automator import TonghuashunAutomator
+
+        player = TracePlayer(self.events, realtime=self.realtime)
+        automator = TonghuashunAutomator(backend=ReplayBackend(self.header, player))
+        automator.connect()
+        self._restore_state(automator, player)
+        try:
+            if operation_class is not None:
+                operation = operation_class(automator)
+            else:
+                operation = operation_registry.get_operation_instance(self.header["operation"], automator)
+                if operation is None:
+                    raise ValueError(f"操作未注册: {self.header['operation']}")
+            start = time.perf_counter()
+            result = operation.run(self.header["params"])
+            duration = time.perf_counter() - start
+        finally:
+            automator.disconnect()
+
+        return {
+            "operation": self.header["operation"],
+            "recorded": {**self.header["result"], "duration": self.header["duration"]},
+            "replayed": {"success": result.success, "message": result.message, "duration": round(duration, 6),
+                         "data": result.data},
+            "budget": result.metadata.get("budget"),
+            "calls": player.stats,
+            "missing": player.missing,
+        }
+
+    def _restore_state(self, automator: Any, player: TracePlayer) -> None:
+        """恢复录制开始时的页面状态和控件缓存"""
+        state = self.header["state"]
+        page_state = automator.page_state
+        page_state.page = state["page"]
+        page_state.fingerprint = tuple(state["fingerprint"]) if state["fingerprint"] is not None else None
+        page_state.generation = state["generation"]
+        automator.control_cache.restore([
+            (tuple(LocatorStep(*step) for step in locator), player.deserialize(control), player.deserialize(runtime_id), generation)
+            for locator, control, runtime_id, generation in state["cache"]
+        ])
@@ -0,0 +1,114 @@
+"""证券交易规则 - 按证券代码前缀查找价格精度、每手数量、所属市场
+
+买入、卖出、批量委托、条件单等插件原先各自按代码前缀判断价格精度（5/1 开头三位小数）、
+每手数量（11/12 开头的可转债 10 张，其余 100 股）和单笔金额上限，规则统一登记在这里，
+按前缀树做最长前缀匹配，插件和下单前的风控检查共用同一份规则。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+# 单笔委托金额上限（元）
+MAX_ORDER_AMOUNT = 10000000
+
+
+class InstrumentRule(NamedTuple):
+    """一类证券的交易规则"""
+    kind: str  # 证券类别：股票、基金、可转债
+    market: str  # 所属市场：SH 上交所、SZ 深交所、BJ 北交所，空字符串表示未知
+    lot_size: int  # 每手数量，委托数量必须是其整数倍且不小于一手
+    price_precision: int  # 价格小数位数
+
+    @property
+    def tick_size(self) -> float:
+        """最小价格变动单位"""
+        return round(10 ** -self.price_precision, self.price_precision)
+
+
+class _TrieNode:
+    __slots__ = ("children", "rule")
+
+    def __init__(self):
+        self.children: Dict[str, _TrieNode] = {}
+        self.rule: Optional[InstrumentRule] = None
+
+
+class InstrumentRules:
+    """证券交易规则索引（按代码前缀的前缀树，最长前缀优先）"""
+
+    def __init__(self, rules: Iterable[Tuple[str, InstrumentRule]] = (), default: Optional[InstrumentRule] = None):
+        """
+        Args:
+            rules: (代码前缀, 规则)
+            default: 没有匹配前缀时使用的规则
+        """
+        self._root = _TrieNode()
+        self.default = default or InstrumentRule("股票", "", 100, 2)
+        for prefix, rule in rules:
+            self.add(prefix, rule)
+
+    def add(self, prefix: str, rule: InstrumentRule) -> None:
+        """登记代码前缀的规则，已登记的前缀会被覆盖"""
+        node = self._root
+        for char in prefix:
+            node = node.children.setdefault(char, _TrieNode())
+        node.rule = rule
+
+    def lookup(self, stock_code: str) -> InstrumentRule:
+        """查找证券代码适用的规则"""
+        rule = self.default
+        node = self._root
+        for char in stock_code:
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.rule is not None:
+                rule = node.rule
+        return rule
+
+    def format_price(self, stock_code: str, price: float) -> str:
+        """按证券的价格精度格式化委托价格"""
+        return "{:.{}f}".format(float(price), self.lookup(stock_code).price_precision)
+
+    def check_quantity(self, stock_code: str, quantity: int) -> Optional[str]:
+        """检查委托数量是否为整手
+
+        Returns:
+            不符合规则的原因，符合返回None
+        """
+        rule = self.lookup(stock_code)
+        if not isinstance(quantity, int) or quantity < rule.lot_size or quantity % rule.lot_size != 0:
+            return f"数量必须是{rule.lot_size}的倍数且不小于{rule.lot_size}" + ("（可转债）" if rule.kind == "可转债" else "")
+        return None
+
+    def check_order(self, stock_code: str, price: float, quantity: int) -> Optional[str]:
+        """检查限价委托的数量和单笔金额
+
+        Returns:
+            不符合规则的原因，符合返回None
+        """
+        error = self.check_quantity(stock_code, quantity)
+        if error is not None:
+            return error
+        if price * quantity > MAX_ORDER_AMOUNT:
+            return "单笔金额过大"
+        return None
+
+
+# 默认规则：ETF等基金、可转债价格精度为三位小数（https://github.com/noimank/easyths/issues/6），可转债每手10张
+DEFAULT_INSTRUMENT_RULES = [
+    ("6", InstrumentRule("股票", "SH", 100, 2)),
+    ("0", InstrumentRule("股票", "SZ", 100, 2)),
+    ("3", InstrumentRule("股票", "SZ", 100, 2)),
+    ("4", InstrumentRule("股票", "BJ", 100, 2)),
+    ("8", InstrumentRule("股票", "BJ", 100, 2)),
+    ("92", InstrumentRule("股票", "BJ", 100, 2)),
+    ("5", InstrumentRule("基金", "SH", 100, 3)),
+    ("1", InstrumentRule("基金", "SZ", 100, 3)),
+    ("11", InstrumentRule("可转债", "SH", 10, 3)),
+    ("12", InstrumentRule("可转债", "SZ", 10, 3)),
+]
+
+instrument_rules = InstrumentRules(DEFAULT_INSTRUMENT_RULES)
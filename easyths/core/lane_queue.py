@@ -0,0 +1,365 @@
+"""多通道优先级队列 - 加权轮询 + 等待老化，低优先级操作的等待时间有上界
+
+单一堆按 (-priority, 入队序号) 出队时，持续不断的高优先级查询会让低优先级操作永远排不上。
+这里把优先级 0-10 划分为 queue_priority_levels 个通道：
+
+    - 通道内按入队顺序（FIFO）出队
+    - 通道之间按权重平滑加权轮询（最高通道权重为 queue_batch_size，最低通道为 1，中间线性分布），
+      高优先级通道出队更多，低优先级通道每一轮也能出队
+    - 等待老化：排队超过 aging_interval 秒的操作提升一个通道，之后每多等待 aging_interval 秒再提升一个，
+      提升后保留原入队序号，排在新通道中较晚入队的操作之前
+    - 可选的通道内重排（reorder）：出队时把选中通道队首 reorder_window 个条目交给 reorder 选择，
+      例如页面亲和调度优先执行与当前页面相同的操作；每个条目最多被越过 max_skips 次，达到上限后不再被越过
+    - 紧急条目（get_urgent）：优先级不低于给定阈值的条目可以不经加权轮询直接按入队顺序取出
+
+支持按操作ID删除、调整优先级、查询排队位置。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import bisect
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+MAX_PRIORITY = 10
+
+
+class _Entry:
+    __slots__ = ("counter", "key", "item", "priority", "base_lane", "lane", "enqueued_at", "skips")
+
+    def __init__(self, counter: int, key: str, item: Any, priority: int, lane: int, enqueued_at: float):
+        self.counter = counter
+        self.key = key
+        self.item = item
+        self.priority = priority
+        self.base_lane = lane  # 按优先级划分的通道，统计等待时间按它归类
+        self.lane = lane  # 当前所在通道（老化后高于 base_lane）
+        self.enqueued_at = enqueued_at
+        self.skips = 0  # 被通道内重排越过的次数
+
+
+class LaneQueue:
+    """多通道优先级队列"""
+
+    def __init__(self, maxsize: int = 0, levels: int = 5, batch_size: int = 10, aging_interval: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic, reorder: Optional[Callable[[List[Any]], int]] = None,
+                 reorder_window: int = 8, max_skips: int = 3):
+        """初始化队列
+
+        Args:
+            maxsize: 最大容量，0 表示不限制
+            levels: 通道数量（1-11），优先级 0-10 按区间均分到各通道
+            batch_size: 最高通道的轮询权重，即一轮中最多连续出队的数量
+            aging_interval: 老化间隔（秒），0 表示不老化
+            clock: 时钟，基准测试中可替换为模拟时钟
+            reorder: 通道内重排，参数为选中通道队首的若干条目（按出队顺序），返回要出队的下标，None 表示按 FIFO
+            reorder_window: 交给 reorder 的条目数上限
+            max_skips: 每个条目最多被越过的次数
+        """
+        self.maxsize = maxsize
+        self.levels = max(1, min(levels, MAX_PRIORITY + 1))
+        self.aging_interval = aging_interval
+        self._clock = clock
+        self._reorder = reorder
+        self.reorder_window = max(1, reorder_window)
+        self.max_skips = max(0, max_skips)
+        top = self.levels - 1
+        batch_size = max(1, batch_size)
+        self.weights = [round(1 + (batch_size - 1) * lane / top) if top else 1 for lane in range(self.levels)]
+        self._lanes: List[List[int]] = [[] for _ in range(self.levels)]  # 每个通道有序的入队序号
+        self._entries: Dict[int, _Entry] = {}  # 入队序号 -> 条目
+        self._index: Dict[str, _Entry] = {}
+        self._current = [0] * self.levels  # 平滑加权轮询的当前权重
+        self._counter = itertools.count()
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._stats = [{"dispatched": 0, "promoted": 0, "total_wait": 0.0, "max_wait": 0.0}
+                       for _ in range(self.levels)]
+
+    def lane_of(self, priority: int) -> int:
+        """优先级所属的通道，数值越大优先级越高"""
+        priority = max(0, min(priority, MAX_PRIORITY))
+        return priority * self.levels // (MAX_PRIORITY + 1)
+
+    def put(self, key: str, item: Any, priority: int = 0) -> None:
+        """加入队列
+
+        Args:
+            key: 条目唯一标识（操作ID）
+            item: 条目
+            priority: 优先级，数值越大越先出队
+
+        Raises:
+            queue.Full: 队列已满
+            ValueError: 条目已存在
+        """
+        with self._mutex:
+            if self.maxsize and len(self._index) >= self.maxsize:
+                raise queue.Full
+            if key in self._index:
+                raise ValueError(f"条目已存在: {key}")
+            entry = _Entry(next(self._counter), key, item, priority, self.lane_of(priority), self._clock())
+            self._push(entry)
+            self._not_empty.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """按加权轮询取出下一个条目（阻塞）
+
+        Args:
+            timeout: 超时时间（秒），None 表示无限等待
+
+        Raises:
+            queue.Empty: 超时仍无条目
+        """
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._index, timeout):
+                raise queue.Empty
+            return self._pop_next()
+
+    def get_nowait(self) -> Any:
+        """非阻塞取出下一个条目
+
+        Raises:
+            queue.Empty: 队列为空
+        """
+        with self._mutex:
+            if not self._index:
+                raise queue.Empty
+            return self._pop_next()
+
+    def get_urgent(self, min_priority: int, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """不经加权轮询，取出最早入队的紧急条目
+
+        Args:
+            min_priority: 紧急条目的最低优先级
+            accept: 进一步筛选条目，None 表示不筛选
+
+        Returns:
+            紧急条目，没有返回None
+        """
+        with self._mutex:
+            entry = self._find_urgent(min_priority, accept)
+            if entry is None:
+                return None
+            self._dispatch(entry, self._clock())
+            return entry.item
+
+    def has_urgent(self, min_priority: int, accept: Optional[Callable[[Any], bool]] = None) -> bool:
+        """是否有排队中的紧急条目，参数同 get_urgent"""
+        with self._mutex:
+            return self._find_urgent(min_priority, accept) is not None
+
+    def remove(self, key: str) -> Optional[Any]:
+        """从队列中删除条目，立即释放容量
+
+        Returns:
+            被删除的条目，不存在（已出队或未入队）返回None
+        """
+        with self._mutex:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self._unlink(entry)
+            return entry.item
+
+    def update_priority(self, key: str, priority: int) -> bool:
+        """调整排队中条目的优先级，保留原入队顺序和已等待的时间
+
+        Returns:
+            bool: 条目是否存在
+        """
+        with self._mutex:
+            entry = self._index.get(key)
+            if entry is None:
+                return False
+            self._unlink(entry)
+            entry.priority = priority
+            entry.base_lane = entry.lane = self.lane_of(priority)
+            self._push(entry)
+            # 已等待的时间仍计入老化
+            self._age(self._clock())
+            return True
+
+    def position(self, key: str) -> Optional[int]:
+        """查询条目的排队位置（前面还有多少个条目，0 表示下一个出队）
+
+        按当前各通道的条目数模拟加权轮询，不考虑之后的入队、老化和通道内重排。
+
+        Returns:
+            排队位置，不存在返回None
+        """
+        with self._mutex:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            counts = [len(counters) for counters in self._lanes]
+            current = list(self._current)
+            remaining = bisect.bisect_left(self._lanes[entry.lane], entry.counter)
+            ahead = 0
+            while True:
+                lane = self._select(counts, current)
+                if lane == entry.lane:
+                    if remaining == 0:
+                        return ahead
+                    remaining -= 1
+                counts[lane] -= 1
+                ahead += 1
+
+    def priority(self, key: str) -> Optional[int]:
+        """查询条目的当前优先级"""
+        entry = self._index.get(key)
+        return entry.priority if entry is not None else None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def qsize(self) -> int:
+        """条目数量"""
+        return len(self._index)
+
+    def empty(self) -> bool:
+        return not self._index
+
+    def clear(self) -> List[Any]:
+        """清空队列
+
+        Returns:
+            被清空的条目列表（按入队顺序）
+        """
+        with self._mutex:
+            items = [self._entries[counter].item for counter in sorted(self._entries)]
+            for counters in self._lanes:
+                counters.clear()
+            self._entries.clear()
+            self._index.clear()
+            self._current = [0] * self.levels
+            return items
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各通道的统计：排队数、已出队数（按原通道归类）、平均 / 最长等待时间、老化提升次数"""
+        with self._mutex:
+            now = self._clock()
+            result = []
+            for lane in range(self.levels):
+                stats = self._stats[lane]
+                oldest = self._entries[self._lanes[lane][0]].enqueued_at if self._lanes[lane] else None
+                priorities = [p for p in range(MAX_PRIORITY + 1) if self.lane_of(p) == lane]
+                result.append({
+                    "lane": lane,
+                    "priorities": f"{priorities[0]}-{priorities[-1]}" if priorities else "",
+                    "weight": self.weights[lane],
+                    "queued": len(self._lanes[lane]),
+                    "dispatched": stats["dispatched"],
+                    "promoted": stats["promoted"],
+                    "avg_wait": round(stats["total_wait"] / stats["dispatched"], 3) if stats["dispatched"] else 0.0,
+                    "max_wait": round(stats["max_wait"], 3),
+                    "oldest_wait": round(now - oldest, 3) if oldest is not None else 0.0,
+                })
+            return result
+
+    # ============ 内部方法（调用方持有锁） ============
+
+    def _push(self, entry: _Entry) -> None:
+        self._index[entry.key] = entry
+        self._entries[entry.counter] = entry
+        bisect.insort(self._lanes[entry.lane], entry.counter)
+
+    def _unlink(self, entry: _Entry) -> None:
+        counters = self._lanes[entry.lane]
+        del counters[bisect.bisect_left(counters, entry.counter)]
+        del self._entries[entry.counter]
+        del self._index[entry.key]
+
+    def _age(self, now: float) -> None:
+        """把等待超过老化间隔的条目提升通道
+
+        每个条目按自己的入队时间判断：提升上来的条目入队更早，排在通道前面，但要多等一个间隔才再次提升，
+        不能挡住后面已经到期的原通道条目。原通道的条目按入队时间排列，遇到第一个未到期的就停止检查。
+        从低到高检查各通道，一次等待多个间隔的条目可以连续提升多个通道。
+        """
+        if self.aging_interval <= 0:
+            return
+        for lane in range(self.levels - 1):
+            counters = self._lanes[lane]
+            due = []
+            for counter in counters:
+                entry = self._entries[counter]
+                if now - entry.enqueued_at >= self.aging_interval * (entry.lane - entry.base_lane + 1):
+                    due.append(entry)
+                elif entry.lane == entry.base_lane:
+                    break
+            for entry in due:
+                del counters[bisect.bisect_left(counters, entry.counter)]
+                entry.lane = lane + 1
+                bisect.insort(self._lanes[lane + 1], entry.counter)
+                self._stats[lane]["promoted"] += 1
+
+    def _select(self, counts: List[int], current: List[int]) -> int:
+        """平滑加权轮询：非空通道的当前权重加上各自权重，取最大者，再减去非空通道的权重之和"""
+        total = 0
+        best = -1
+        for lane in range(self.levels - 1, -1, -1):
+            if counts[lane]:
+                current[lane] += self.weights[lane]
+                total += self.weights[lane]
+                if best < 0 or current[lane] > current[best]:
+                    best = lane
+        current[best] -= total
+        return best
+
+    def _pop_next(self) -> Any:
+        now = self._clock()
+        self._age(now)
+        lane = self._select([len(counters) for counters in self._lanes], self._current)
+        if self._reorder is not None and len(self._lanes[lane]) > 1:
+            entry = self._reordered(lane)
+        else:
+            entry = self._entries[self._lanes[lane][0]]
+        self._dispatch(entry, now)
+        return entry.item
+
+    def _find_urgent(self, min_priority: int, accept: Optional[Callable[[Any], bool]]) -> Optional[_Entry]:
+        """最早入队的紧急条目
+
+        优先级不低于 min_priority 的条目只会在 lane_of(min_priority) 及更高的通道中（老化只会提升通道），
+        这些通道中也可能有老化提升上来的低优先级条目，逐个检查。
+        """
+        if min_priority > MAX_PRIORITY:
+            return None
+        found = None
+        for lane in range(self.lane_of(min_priority), self.levels):
+            for counter in self._lanes[lane]:
+                entry = self._entries[counter]
+                if entry.priority >= min_priority and (accept is None or accept(entry.item)):
+                    if found is None or entry.counter < found.counter:
+                        found = entry
+                    break
+        return found
+
+    def _dispatch(self, entry: _Entry, now: float) -> None:
+        """出队条目并记录等待时间"""
+        self._unlink(entry)
+        wait = now - entry.enqueued_at
+        stats = self._stats[entry.base_lane]
+        stats["dispatched"] += 1
+        stats["total_wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+
+    def _reordered(self, lane: int) -> _Entry:
+        """由 reorder 从通道队首的条目中选择出队的条目，被越过次数已达上限的条目之后的不参与选择"""
+        candidates = []
+        for counter in self._lanes[lane][:self.reorder_window]:
+            entry = self._entries[counter]
+            candidates.append(entry)
+            if entry.skips >= self.max_skips:
+                break
+        if len(candidates) == 1:
+            return candidates[0]
+        index = self._reorder([entry.item for entry in candidates])
+        for skipped in candidates[:index]:
+            skipped.skips += 1
+        return candidates[index]
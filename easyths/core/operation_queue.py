@@ -4,29 +4,60 @@ Author: noimank
 Email: noimank@163.com
 """
 
+import asyncio
+import functools
+import json
 import queue
 import threading
 import time
 import uuid
-from typing import Dict, Optional
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import structlog
 
 from easyths.core.base_operation import operation_registry
+from easyths.core.fair_queue import CallerQueueFull, FairQueue
+from easyths.core.lane_queue import MAX_PRIORITY
+from easyths.core.order_scheduler import OrderScheduler
+from easyths.core.page_affinity import PageAffinity
+from easyths.core.pre_trade import PreTradeChecker
+from easyths.core.query_cache import QueryCache
+from easyths.core.result_store import ResultStore
+from easyths.core.time_budget import BudgetStats
 from easyths.models.operations import Operation, OperationStatus, OperationResult
 from easyths.utils import project_config_instance
 
 logger = structlog.get_logger(__name__)
 
 
+class CallerQuotaExceededError(ValueError):
+    """调用方排队中的操作数已达上限"""
+
+
 class OperationQueue:
     """操作队列 - 后台线程串行执行所有操作
 
     设计原则：
         - 单一后台线程：所有操作按顺序串行执行
         - 同步接口：API提交任务后立即返回（异步体验）
-        - 优先级队列：高优先级操作优先执行
+        - 多通道优先级队列：优先级划分为多个通道加权轮询，等待过久的操作逐级提升，
+          低优先级操作不会被持续的高优先级请求饿死；支持取消即移除、查询排队位置、调整优先级
         - 状态查询：通过操作ID查询执行状态和结果
+        - 有界保留：已完成操作按 TTL / 数量 / 字节上限淘汰，大结果可落盘
+        - 请求合并：只读操作（PluginMetadata.read_only）与排队中或执行中的相同操作（名称+规范化参数）
+          合并，后来的提交方作为跟随者共享同一次执行的结果
+        - 查询缓存：声明了 cache_ttl 的只读操作在TTL内直接返回缓存结果，写操作结束后按 invalidates 失效
+        - 耗时预算：按操作名称汇总每次实际执行的睡眠、等待、UIA查找、按键等耗时明细
+        - 调用方公平：每个调用方（API 密钥）单独排队，调用方之间按实际占用的GUI时间赤字轮询，
+          排队中的操作数有上限，一个调用方的大量请求不会拖慢其他调用方
+        - 截止时间：取出时已超过 deadline（或 max_queue_wait）的操作不执行，以 expired 状态结束
+        - 页面亲和（可选）：同一通道队首若干个操作中优先执行目标页面（PluginMetadata.page）与当前页面相同的，
+          减少页面切换；同一证券的写操作不调换顺序，每个操作被越过的次数有上限
+        - 协作式抢占：优先级达到阈值的写操作提交时，正在执行的只读操作在下一个检查点中止并重新排队，
+          紧急委托等待的时间不超过一个检查点间隔；每个操作被抢占的次数有上限
+        - 定时执行：带 execute_at 的操作先由调度器保存，到点前 queue_schedule_lead 秒按最高优先级入队，
+          完成导航和填写后等到 execute_at 再提交，结果中记录触发误差
     """
 
     def __init__(self, automator=None):
@@ -38,23 +69,71 @@ class OperationQueue:
         self.automator = automator
         self.max_size = project_config_instance.queue_max_size
 
-        # 优先级队列：存储 (-priority, timestamp, operation) 元组
-        # -priority 实现降序（高优先级先执行）
-        # timestamp 保证相同优先级按时间顺序执行（FIFO）
-        self._queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=self.max_size)
-        self._operations: Dict[str, Operation] = {}  # 所有操作
+        # 按调用方公平调度：调用方之间按实际占用的GUI时间赤字轮询（每轮补充 queue_fair_quantum 秒），
+        # 每个调用方排队中的操作数不超过 queue_max_queued_per_caller；
+        # 优先级不低于 queue_preempt_priority 的写操作（紧急委托）越过调用方之间和通道之间的轮询，最先执行
+        # 调用方内为多通道优先级队列：优先级 0-10 划分为 queue_priority_levels 个通道，通道内按入队顺序（FIFO），
+        # 通道间按权重轮询（最高通道权重 queue_batch_size），排队超过 queue_aging_interval 秒逐级提升通道
+        # 以操作ID为句柄，取消时直接移除，不再占用队列容量
+        # 启用页面亲和调度时，通道队首 queue_page_affinity_window 个操作中优先执行与当前页面相同的操作
+        self._page_affinity = PageAffinity(self._current_page) \
+            if project_config_instance.queue_page_affinity_enabled else None
+        self._queue = FairQueue(
+            maxsize=self.max_size,
+            max_per_caller=project_config_instance.queue_max_queued_per_caller,
+            quantum=project_config_instance.queue_fair_quantum,
+            levels=project_config_instance.queue_priority_levels,
+            batch_size=project_config_instance.queue_batch_size,
+            aging_interval=project_config_instance.queue_aging_interval,
+            reorder=self._page_affinity,
+            reorder_window=project_config_instance.queue_page_affinity_window,
+            max_skips=project_config_instance.queue_page_affinity_max_skips,
+            urgent_priority=project_config_instance.queue_preempt_priority,
+            urgent=self._is_write
+        )
+        self._operations: Dict[str, Operation] = {}  # 未完成的操作（排队中、运行中）
         self._running_operations: Dict[str, Operation] = {}  # 正在运行的操作
-        self._completed_operations: Dict[str, Operation] = {}  # 已完成的操作
-        self._queue_counter = 0  # 用于保证相同优先级的顺序
+        # 已完成的操作，按保留策略淘汰
+        self._completed_operations = ResultStore(
+            ttl=project_config_instance.queue_result_ttl,
+            max_count=project_config_instance.queue_result_max_count,
+            max_bytes=project_config_instance.queue_result_max_bytes,
+            spill_threshold=project_config_instance.queue_result_spill_threshold,
+            spill_dir=project_config_instance.queue_result_spill_dir,
+            on_evict=self._on_result_evicted
+        )
+        # 每个操作一个完成事件，操作结束时由处理线程触发，等待方无需轮询即可立即唤醒
+        self._completion_events: Dict[str, threading.Event] = {}
+        # 异步等待方：事件循环 + Future，由处理线程通过 call_soon_threadsafe 唤醒
+        self._async_waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        # 请求合并：合并键 -> 主操作ID，主操作ID -> 合并键 / 跟随者
+        self._coalesce_leaders: Dict[str, str] = {}
+        self._coalesce_keys: Dict[str, str] = {}
+        self._followers: Dict[str, List[Operation]] = {}
+        # 查询结果缓存
+        self._query_cache = QueryCache() if project_config_instance.queue_query_cache_enabled else None
+        # 各操作的耗时预算汇总
+        self._budget_stats = BudgetStats()
+        # 下单前检查：按最近查询到的资金、持仓拒绝确定无法成交的委托
+        self._pre_trade = PreTradeChecker(project_config_instance.queue_pre_trade_snapshot_ttl) \
+            if project_config_instance.queue_pre_trade_check_enabled else None
+        # 抢占请求：紧急写操作提交时置位，正在执行的只读操作在下一个检查点中止
+        self._preempt = threading.Event()
+        # 定时操作：到 execute_at 前 queue_schedule_lead 秒入队
+        self._scheduler = OrderScheduler(self._release_scheduled, project_config_instance.queue_schedule_lead)
 
         # 控制标志
         self._thread: Optional[threading.Thread] = None
         self._running = False
-        self._lock = threading.Lock()  # 用于保护 queue_counter
+        self._lock = threading.Lock()  # 用于保护异步等待方列表和请求合并表
         self._stats = {
             'total_processed': 0,
             'total_failed': 0,
             'total_success': 0,
+            'total_coalesced': 0,
+            'total_cache_hits': 0,
+            'total_expired': 0,
+            'total_preempted': 0,
             'queue_size': 0
         }
 
@@ -68,6 +147,7 @@ class OperationQueue:
         self._running = True
         self._thread = threading.Thread(target=self._process_loop, name="OperationQueue", daemon=False)
         self._thread.start()
+        self._scheduler.start()
         self.logger.info("操作队列已启动")
 
     def _process_loop(self) -> None:
@@ -78,36 +158,48 @@ class OperationQueue:
             try:
                 # 从优先级队列获取操作（超时0.1秒以便检查running状态）
                 try:
-                    priority_item = self._queue.get(timeout=0.1)
-                    # priority_item 是 (-priority, counter, operation) 元组
-                    operation = priority_item[2]
+                    operation = self._queue.get(timeout=0.1)
                 except queue.Empty:
                     continue
 
-                # 检查操作是否已取消（失败且message为"操作已取消"）
-                if operation.status == OperationStatus.FAILED and operation.result and operation.result.message == "操作已取消":
-                    self._completed_operations[operation.id] = operation
-                    self._stats['total_processed'] += 1
+                # 超过截止时间的操作直接丢弃，不再占用GUI时间
+                if self._expire_if_due(operation):
                     continue
 
-                # 更新状态为运行中
+                # 更新状态为运行中（先清除抢占请求，之后提交的紧急操作都能看到这个运行中的操作）
+                self._preempt.clear()
                 operation.update_status(OperationStatus.RUNNING)
                 self._running_operations[operation.id] = operation
                 self._stats['queue_size'] = self._queue.qsize()
+                # 取出操作之后、登记为运行中之前提交的紧急写操作看不到这个操作，这里补上抢占请求
+                if self._preemptible(operation) and \
+                        operation.priority < project_config_instance.queue_preempt_priority and self._queue.has_urgent():
+                    self._preempt.set()
 
                 # 执行操作（同步调用）
+                started = time.perf_counter()
+                requeued = False
                 try:
-                    result = self._execute_sync(operation)
+                    result = self._execute_sync(
+                        operation,
+                        self._preempt if self._preemptible(operation) else None,
+                        functools.partial(self._scheduler.fire, operation) if operation.execute_at else None
+                    )
+                    self._budget_stats.record(operation.name, result.metadata.get("budget"))
 
                     # 更新操作状态
-                    if result.success:
+                    if result.metadata.get("preempted") and self._requeue_preempted(operation):
+                        # 重新排队的操作不保留被中止的那次结果，轮询方不会看到排队中的操作带着失败结果
+                        requeued = True
+                    elif result.success:
                         operation.update_status(OperationStatus.COMPLETED)
                         self._stats['total_success'] += 1
                     else:
                         operation.update_status(OperationStatus.FAILED)
                         self._stats['total_failed'] += 1
 
-                    operation.result = result
+                    if not requeued:
+                        operation.result = result
 
                 except Exception as e:
                     error_msg = f"执行操作异常: {str(e)}"
@@ -117,10 +209,20 @@ class OperationQueue:
                     self._stats['total_failed'] += 1
 
                 finally:
-                    # 从运行中列表移到已完成列表
-                    self._running_operations.pop(operation.id, None)
-                    self._completed_operations[operation.id] = operation
-                    self._stats['total_processed'] += 1
+                    # 按实际占用的GUI时间计入调用方的份额
+                    self._queue.charge(operation.caller, time.perf_counter() - started)
+                    if requeued:
+                        # 已重新排队，等下次执行结束
+                        self._running_operations.pop(operation.id, None)
+                    else:
+                        # 先更新查询缓存（写操作使相关缓存失效）和账户快照，再唤醒等待结果的调用方
+                        self._update_query_cache(operation)
+                        if self._pre_trade is not None:
+                            self._pre_trade.observe(operation)
+                        # 从运行中列表移到已完成列表，并唤醒等待结果的调用方
+                        self._running_operations.pop(operation.id, None)
+                        self._mark_completed(operation)
+                        self._stats['total_processed'] += 1
 
             except Exception as e:
                 self.logger.exception("处理队列时发生异常", error=str(e))
@@ -129,11 +231,313 @@ class OperationQueue:
         self._running = False
         self.logger.info("停止处理操作队列")
 
-    def _execute_sync(self, operation: Operation) -> OperationResult:
+    def _current_page(self) -> Optional[str]:
+        """交易客户端当前页面，未连接或未知返回 None"""
+        page_state = getattr(self.automator, "page_state", None)
+        return page_state.page if page_state is not None else None
+
+    def _release_scheduled(self, operation: Operation) -> None:
+        """定时操作到点前按最高优先级入队（在调度线程中调用）"""
+        operation.update_status(OperationStatus.QUEUED)
+        try:
+            self._queue.put(operation.id, operation, MAX_PRIORITY, operation.caller)
+        except queue.Full:
+            self.logger.error("定时操作入队失败，队列已满", operation_id=operation.id, operation_name=operation.name)
+            operation.update_status(OperationStatus.FAILED)
+            operation.result = OperationResult(success=False, message="定时操作到点时队列已满，未执行")
+            if self._pre_trade is not None:
+                self._pre_trade.release(operation.id)
+            self._mark_completed(operation)
+            self._stats['total_processed'] += 1
+            return
+        self._stats['queue_size'] = self._queue.qsize()
+        self._maybe_preempt(operation, MAX_PRIORITY)
+
+    def _is_write(self, operation: Operation) -> bool:
+        """是否为已注册的写操作（委托、撤单等）"""
+        metadata = operation_registry.get_metadata(operation.name)
+        return metadata is not None and not metadata.read_only
+
+    def _preemptible(self, operation: Operation) -> bool:
+        """操作能否被抢占：只读操作，且被抢占的次数未达上限"""
+        if not project_config_instance.queue_preemption_enabled:
+            return False
+        metadata = operation_registry.get_metadata(operation.name)
+        return metadata is not None and metadata.read_only and \
+            operation.metadata.get('preempted', 0) < project_config_instance.queue_max_preemptions
+
+    def _maybe_preempt(self, operation: Operation, priority: Optional[int] = None) -> None:
+        """优先级达到阈值的写操作入队时，请求正在执行的、优先级更低的只读操作让出执行线程
+
+        Args:
+            operation: 入队的操作
+            priority: 入队使用的优先级，默认为操作的优先级
+        """
+        priority = operation.priority if priority is None else priority
+        if priority < project_config_instance.queue_preempt_priority or not self._is_write(operation):
+            return
+        for running in list(self._running_operations.values()):
+            if running.priority < priority and self._preemptible(running):
+                self.logger.info(
+                    "请求抢占正在执行的只读操作",
+                    operation_id=running.id,
+                    operation_name=running.name,
+                    urgent_operation_id=operation.id
+                )
+                self._preempt.set()
+
+    def _requeue_preempted(self, operation: Operation) -> bool:
+        """被抢占的操作重新排队，队列已满时返回False（按失败结束）"""
+        operation.metadata['preempted'] = operation.metadata.get('preempted', 0) + 1
+        operation.update_status(OperationStatus.QUEUED)
+        try:
+            self._queue.put(operation.id, operation, operation.priority, operation.caller)
+        except queue.Full:
+            return False
+        self._stats['total_preempted'] += 1
+        self._stats['queue_size'] = self._queue.qsize()
+        return True
+
+    def _expire_if_due(self, operation: Operation) -> bool:
+        """已超过截止时间的操作不再执行，直接以过期结束
+
+        Args:
+            operation: 刚从队列中取出的操作
+
+        Returns:
+            bool: 操作是否已过期
+        """
+        if operation.deadline is None:
+            return False
+        overdue = (datetime.now() - operation.deadline).total_seconds()
+        if overdue <= 0:
+            return False
+
+        operation.update_status(OperationStatus.EXPIRED)
+        operation.result = OperationResult(
+            success=False,
+            message=f"操作已过期：超过截止时间{overdue:.1f}秒仍未开始执行，已丢弃",
+            metadata={"expired": True, "deadline": operation.deadline.isoformat()}
+        )
+        if self._pre_trade is not None:
+            self._pre_trade.release(operation.id)
+        self._mark_completed(operation)
+        self._stats['total_expired'] += 1
+        self._stats['total_processed'] += 1
+        self._stats['queue_size'] = self._queue.qsize()
+        self.logger.warning(
+            "操作已过期，未执行",
+            operation_id=operation.id,
+            operation_name=operation.name,
+            overdue=round(overdue, 3)
+        )
+        return True
+
+    def _mark_completed(self, operation: Operation) -> None:
+        """将操作移入已完成列表并唤醒等待方
+
+        主操作结束时，合并到它的跟随者一并以相同状态和结果结束。
+
+        Args:
+            operation: 已结束（成功、失败或取消）的操作
+        """
+        with self._lock:
+            followers = self._release_coalesce(operation.id)
+
+        # 先把结果交给跟随者，写入已完成存储时结果可能被转存到磁盘
+        for follower in followers:
+            follower.update_status(operation.status)
+            follower.result = operation.result
+
+        self._completed_operations.put(operation)
+        self._operations.pop(operation.id, None)
+        self._notify_waiters(operation.id)
+
+        for follower in followers:
+            self._mark_completed(follower)
+
+    def _query_key(self, operation: Operation) -> Optional[str]:
+        """计算只读操作的查询键（操作名称 + 补全默认值后按键排序的参数），用于请求合并和查询缓存
+
+        Args:
+            operation: 操作对象
+
+        Returns:
+            str: 查询键，非只读操作或参数无法序列化时返回None
+        """
+        metadata = operation_registry.get_metadata(operation.name)
+        if metadata is None or not metadata.read_only:
+            return None
+
+        params = {
+            name: spec["default"]
+            for name, spec in metadata.parameters.items()
+            if isinstance(spec, dict) and "default" in spec
+        }
+        params.update(operation.params)
+        try:
+            return f"{operation.name}:{json.dumps(params, sort_keys=True, ensure_ascii=False)}"
+        except (TypeError, ValueError):
+            return None
+
+    def _serve_from_cache(self, operation: Operation, key: str) -> bool:
+        """在缓存有效期内直接以缓存结果完成只读操作
+
+        Args:
+            operation: 新提交的操作
+            key: 查询键
+
+        Returns:
+            bool: 是否命中缓存
+        """
+        if self._query_cache is None or operation.max_age == 0:
+            return False
+        metadata = operation_registry.get_metadata(operation.name)
+        if not metadata.cache_ttl:
+            return False
+
+        hit = self._query_cache.get(key, operation.max_age)
+        if hit is None:
+            return False
+
+        result, age = hit
+        self._completion_events[operation.id] = threading.Event()
+        self._operations[operation.id] = operation
+        operation.update_status(OperationStatus.COMPLETED)
+        operation.result = result.model_copy(
+            update={"metadata": {**result.metadata, "cached": True, "cache_age": round(age, 3)}}
+        )
+        self._mark_completed(operation)
+        self._stats['total_cache_hits'] += 1
+        return True
+
+    def _update_query_cache(self, operation: Operation) -> None:
+        """操作执行结束后更新查询缓存：写操作使相关缓存失效，成功的只读查询写入缓存
+
+        Args:
+            operation: 刚执行结束的操作
+        """
+        if self._query_cache is None:
+            return
+        metadata = operation_registry.get_metadata(operation.name)
+        if metadata is None:
+            return
+
+        if metadata.invalidates:
+            count = self._query_cache.invalidate(metadata.invalidates)
+            if count:
+                self.logger.debug("写操作使查询缓存失效", operation_name=operation.name, count=count)
+
+        result = operation.result
+        if metadata.read_only and metadata.cache_ttl and result is not None and result.success:
+            key = self._query_key(operation)
+            if key is not None:
+                result.metadata.update({"cached": False, "cache_age": 0.0})
+                self._query_cache.put(key, result, metadata.cache_ttl, metadata.depends_on)
+
+    def _try_coalesce(self, operation: Operation, key: str) -> Optional[Operation]:
+        """尝试将操作作为跟随者合并到相同的未完成操作
+
+        Args:
+            operation: 新提交的操作
+            key: 合并键
+
+        Returns:
+            Operation: 被合并到的主操作，没有可合并的操作返回None（此时新操作成为主操作）
+        """
+        with self._lock:
+            leader_id = self._coalesce_leaders.get(key)
+            leader = self._operations.get(leader_id) if leader_id else None
+            if leader is None:
+                self._coalesce_leaders[key] = operation.id
+                self._coalesce_keys[operation.id] = key
+                return None
+
+            self._completion_events[operation.id] = threading.Event()
+            self._operations[operation.id] = operation
+            operation.update_status(OperationStatus.QUEUED)
+            operation.metadata['coalesced_with'] = leader.id
+            self._followers.setdefault(leader.id, []).append(operation)
+            self._stats['total_coalesced'] += 1
+            return leader
+
+    def _release_coalesce(self, leader_id: str) -> List[Operation]:
+        """移除主操作的合并登记（调用方持有锁）
+
+        Returns:
+            List[Operation]: 该主操作的跟随者
+        """
+        key = self._coalesce_keys.pop(leader_id, None)
+        if key is not None and self._coalesce_leaders.get(key) == leader_id:
+            del self._coalesce_leaders[key]
+        return self._followers.pop(leader_id, [])
+
+    def _detach_follower(self, operation_id: str) -> Optional[Operation]:
+        """将跟随者从主操作上摘除
+
+        Returns:
+            Operation: 被摘除的跟随者，不是跟随者返回None
+        """
+        operation = self._operations.get(operation_id)
+        leader_id = operation.metadata.get('coalesced_with') if operation else None
+        if leader_id is None:
+            return None
+
+        with self._lock:
+            followers = self._followers.get(leader_id, [])
+            if operation not in followers:
+                return None
+            followers.remove(operation)
+            if not followers:
+                self._followers.pop(leader_id, None)
+        return operation
+
+    def _on_result_evicted(self, operation_id: str) -> None:
+        """已完成操作被保留策略淘汰时，同步清理完成事件"""
+        self._completion_events.pop(operation_id, None)
+
+    def _find_operation(self, operation_id: str, load_result: bool = True) -> Optional[Operation]:
+        """按ID查找操作（先查已完成存储，再查未完成操作）
+
+        Args:
+            operation_id: 操作ID
+            load_result: 结果已落盘时是否从磁盘读回
+
+        Returns:
+            Operation: 操作对象
+        """
+        operation = self._completed_operations.get(operation_id, load_result=load_result)
+        if operation is None:
+            operation = self._operations.get(operation_id)
+        return operation
+
+    def _notify_waiters(self, operation_id: str) -> None:
+        """触发完成事件，并唤醒所有异步等待方
+
+        Args:
+            operation_id: 操作ID
+        """
+        with self._lock:
+            event = self._completion_events.get(operation_id)
+            if event is not None:
+                event.set()
+            waiters = self._async_waiters.pop(operation_id, [])
+
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve_future, future)
+            except RuntimeError:
+                # 事件循环已关闭，等待方已不存在
+                pass
+
+    def _execute_sync(self, operation: Operation, preempt: Optional[threading.Event] = None,
+                      fire: Optional[Callable[[], Dict[str, Any]]] = None) -> OperationResult:
         """同步执行操作
 
         Args:
             operation: 要执行的操作
+            preempt: 抢占请求，None 表示不可抢占
+            fire: 定时执行时阻塞到 execute_at 的函数
 
         Returns:
             OperationResult: 执行结果
@@ -154,7 +558,7 @@ class OperationQueue:
             raise ValueError(f"未找到操作: {operation.name}")
 
         # 同步执行
-        return operation_instance.run(operation.params)
+        return operation_instance.run(operation.params, preempt, fire)
 
     def submit(self, operation: Operation) -> str:
         """提交操作到队列
@@ -166,6 +570,8 @@ class OperationQueue:
             str: 操作ID
 
         Raises:
+            PreTradeRejectedError: 下单前检查未通过（可用资金或可用股份不足）
+            CallerQuotaExceededError: 调用方排队中的操作数已达上限
             ValueError: 队列已满或操作已存在
         """
         # 检查队列是否已满
@@ -177,26 +583,79 @@ class OperationQueue:
             operation.id = str(uuid.uuid4())
 
         # 检查操作是否已存在
-        if operation.id in self._operations:
+        if operation.id in self._operations or operation.id in self._completed_operations:
             raise ValueError(f"操作已存在: {operation.id}")
 
-        # 获取递增计数器（保证相同优先级的顺序）
-        with self._lock:
-            counter = self._queue_counter
-            self._queue_counter += 1
+        # 最长排队时间换算为截止时间，定时操作从 execute_at 起算
+        if operation.max_queue_wait is not None:
+            wait_deadline = (operation.execute_at or datetime.now()) + timedelta(seconds=operation.max_queue_wait)
+            if operation.deadline is None or wait_deadline < operation.deadline:
+                operation.deadline = wait_deadline
+
+        # 委托：按账户快照检查并预留资金/股份
+        if self._pre_trade is not None:
+            self._pre_trade.check_and_reserve(operation)
+
+        # 定时操作：交给调度器，到点前再入队
+        if operation.execute_at is not None:
+            self._completion_events[operation.id] = threading.Event()
+            self._operations[operation.id] = operation
+            operation.update_status(OperationStatus.SCHEDULED)
+            self._scheduler.schedule(operation)
+            self.logger.info(
+                "定时操作已登记",
+                operation_id=operation.id,
+                operation_name=operation.name,
+                execute_at=operation.execute_at.isoformat()
+            )
+            return operation.id
+
+        # 只读操作：缓存有效时直接返回；已有相同操作排队或执行中时直接合并，不再占用队列和GUI时间
+        key = self._query_key(operation)
+        if key is not None:
+            if self._serve_from_cache(operation, key):
+                self.logger.info("只读操作命中查询缓存", operation_id=operation.id, operation_name=operation.name)
+                return operation.id
+            leader = self._try_coalesce(operation, key)
+            if leader is not None:
+                if operation.priority > leader.priority:
+                    self.update_priority(leader.id, operation.priority)
+                # 主操作的截止时间放宽到跟随者中最晚的
+                if leader.deadline is not None and (operation.deadline is None or operation.deadline > leader.deadline):
+                    leader.deadline = operation.deadline
+                self.logger.info(
+                    "只读操作已合并到相同操作",
+                    operation_id=operation.id,
+                    operation_name=operation.name,
+                    leader_id=leader.id
+                )
+                return operation.id
+
+        # 更新状态（先于入队登记，避免处理线程抢先执行完成时找不到完成事件）
+        self._completion_events[operation.id] = threading.Event()
+        self._operations[operation.id] = operation
+        operation.update_status(OperationStatus.QUEUED)
 
-        # 添加到优先级队列（使用 -priority 实现降序）
-        priority_item = (-operation.priority, counter, operation)
+        # 添加到优先级队列
         try:
-            self._queue.put(priority_item, block=False)
-        except queue.Full:
+            self._queue.put(operation.id, operation, operation.priority, operation.caller)
+        except queue.Full as e:
+            self._completion_events.pop(operation.id, None)
+            self._operations.pop(operation.id, None)
+            with self._lock:
+                followers = self._release_coalesce(operation.id)
+            for follower in followers:
+                self._cancel(follower)
+            if self._pre_trade is not None:
+                self._pre_trade.release(operation.id)
+            if isinstance(e, CallerQueueFull):
+                raise CallerQuotaExceededError(
+                    f"调用方 {operation.caller or 'anonymous'} 排队中的操作已达上限"
+                    f"（{project_config_instance.queue_max_queued_per_caller}个），请等待已提交的操作完成")
             raise ValueError("队列已满，无法添加操作")
 
-        # 更新状态
-        self._operations[operation.id] = operation
-        operation.update_status(OperationStatus.QUEUED)
-
         self._stats['queue_size'] = self._queue.qsize()
+        self._maybe_preempt(operation)
         self.logger.info(
             "操作已添加到队列",
             operation_id=operation.id,
@@ -210,28 +669,72 @@ class OperationQueue:
     def get_result(self, operation_id: str, timeout: Optional[float] = None) -> Optional[OperationResult]:
         """获取操作结果（阻塞等待）
 
+        等待操作的完成事件，操作结束后立即返回，不再按固定间隔轮询。
+
         Args:
             operation_id: 操作ID
             timeout: 超时时间（秒），None表示无限等待
 
         Returns:
-            OperationResult: 操作结果，如果超时返回None
+            OperationResult: 操作结果，如果超时或操作不存在返回None
         """
-        start_time = time.perf_counter()
+        event = self._completion_events.get(operation_id)
+        if event is None:
+            return None
 
-        while True:
-            # 检查是否已完成
-            operation = self._completed_operations.get(operation_id)
-            if operation and operation.status in [OperationStatus.COMPLETED, OperationStatus.FAILED]:
-                return operation.result
+        if not event.wait(timeout):
+            return None
 
-            # 检查超时
-            if timeout is not None:
-                elapsed = time.perf_counter() - start_time
-                if elapsed >= timeout:
-                    return None
+        operation = self._find_operation(operation_id)
+        return operation.result if operation else None
 
-            time.sleep(0.1)
+    async def get_result_async(self, operation_id: str, timeout: Optional[float] = None) -> Optional[OperationResult]:
+        """获取操作结果（异步等待）
+
+        不占用事件循环线程：在当前事件循环上创建 Future，操作结束时由处理线程唤醒。
+        适用于 FastAPI / MCP 等异步路由，大量并发等待几乎没有开销。
+
+        Args:
+            operation_id: 操作ID
+            timeout: 超时时间（秒），None表示无限等待
+
+        Returns:
+            OperationResult: 操作结果，如果超时或操作不存在返回None
+        """
+        event = self._completion_events.get(operation_id)
+        if event is None:
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            if not event.is_set():
+                self._async_waiters.setdefault(operation_id, []).append(waiter)
+
+        if not event.is_set():
+            try:
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self._remove_async_waiter(operation_id, waiter)
+
+        operation = self._find_operation(operation_id)
+        return operation.result if operation else None
+
+    def _remove_async_waiter(self, operation_id: str, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future]) -> None:
+        """移除超时或被取消的异步等待方"""
+        with self._lock:
+            waiters = self._async_waiters.get(operation_id)
+            if not waiters:
+                return
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            if not waiters:
+                self._async_waiters.pop(operation_id, None)
 
     def get_status(self, operation_id: str) -> Optional[OperationStatus]:
         """获取操作状态
@@ -242,7 +745,7 @@ class OperationQueue:
         Returns:
             OperationStatus: 操作状态
         """
-        operation = self._operations.get(operation_id)
+        operation = self._find_operation(operation_id, load_result=False)
         return operation.status if operation else None
 
     def get_operation(self, operation_id: str) -> Optional[Operation]:
@@ -254,7 +757,7 @@ class OperationQueue:
         Returns:
             Operation: 操作对象
         """
-        return self._operations.get(operation_id)
+        return self._find_operation(operation_id)
 
     def get_queue_stats(self) -> Dict[str, any]:
         """获取队列统计信息
@@ -267,33 +770,114 @@ class OperationQueue:
             'processing': self._running,
             'running_count': len(self._running_operations),
             'completed_count': len(self._completed_operations),
+            'retention': self._completed_operations.stats(),
+            'query_cache': self._query_cache.stats() if self._query_cache is not None else None,
+            'budget': self._budget_stats.stats(),
+            'lanes': self._queue.stats(),
+            'callers': self._queue.caller_stats(),
+            'pre_trade': self._pre_trade.stats() if self._pre_trade is not None else None,
+            'page_affinity': self._page_affinity.stats() if self._page_affinity is not None else None,
+            'scheduled': self._scheduler.stats(),
             'queued_count': self._queue.qsize()
         }
 
-    def cancel_operation(self, operation_id: str) -> bool:
-        """取消操作（仅支持取消已入队但未执行的操作）
+    def get_queue_position(self, operation_id: str) -> Optional[int]:
+        """获取操作的排队位置
+
+        Args:
+            operation_id: 操作ID
 
-        注意：由于使用优先级队列，已入队的操作无法从队列中移除。
-        当操作被标记为取消后，执行时会跳过。
+        Returns:
+            int: 前面还有多少个操作（0 表示下一个执行），不在队列中返回None
+        """
+        operation = self._operations.get(operation_id)
+        leader_id = operation.metadata.get('coalesced_with') if operation else None
+        return self._queue.position(leader_id or operation_id)
+
+    def update_priority(self, operation_id: str, priority: int) -> bool:
+        """调整排队中操作的优先级（保留原入队顺序）
+
+        合并的跟随者没有单独排队，调高优先级时与提交时一样调高主操作的优先级。
 
         Args:
             operation_id: 操作ID
+            priority: 新优先级（0-10）
 
         Returns:
-            bool: 是否成功标记取消
+            bool: 操作是否仍在排队且调整成功
         """
         operation = self._operations.get(operation_id)
-        if not operation:
+        leader_id = operation.metadata.get('coalesced_with') if operation else None
+        if leader_id is not None:
+            leader = self._operations.get(leader_id)
+            if leader is None or leader.status != OperationStatus.QUEUED:
+                return False
+            if priority > leader.priority:
+                self.update_priority(leader_id, priority)
+        elif not operation or not self._queue.update_priority(operation_id, priority):
             return False
 
-        # 只能标记未执行的操作为取消状态
-        if operation.status == OperationStatus.QUEUED:
-            operation.update_status(OperationStatus.FAILED)
-            operation.result = OperationResult(success=False, message="操作已取消")
-            self.logger.info("操作已标记为取消", operation_id=operation_id)
-            return True
+        operation.priority = priority
+        self.logger.info("操作优先级已调整", operation_id=operation_id, priority=priority)
+        return True
+
+    def cancel_operation(self, operation_id: str) -> bool:
+        """取消操作（仅支持取消已入队但未执行的操作）
+
+        操作会立即从队列中移除并释放容量，等待方立即得到取消结果。
+        取消合并的跟随者只摘除该跟随者；取消带跟随者的主操作时，由第一个跟随者接替入队。
+
+        Args:
+            operation_id: 操作ID
 
-        return False
+        Returns:
+            bool: 是否成功取消
+        """
+        operation = self._queue.remove(operation_id) or self._scheduler.cancel(operation_id)
+        if operation is None:
+            operation = self._detach_follower(operation_id)
+            if operation is None:
+                return False
+        else:
+            self._promote_follower(operation)
+
+        self._cancel(operation)
+        self.logger.info("操作已取消", operation_id=operation_id)
+        return True
+
+    def _promote_follower(self, leader: Operation) -> None:
+        """主操作被取消时，让第一个跟随者接替成为主操作并入队"""
+        with self._lock:
+            key = self._coalesce_keys.get(leader.id)
+            followers = self._release_coalesce(leader.id)
+            if not followers:
+                return
+            successor, rest = followers[0], followers[1:]
+            successor.metadata.pop('coalesced_with', None)
+            successor.priority = max(follower.priority for follower in followers)
+            if key is not None:
+                self._coalesce_leaders[key] = successor.id
+                self._coalesce_keys[successor.id] = key
+            if rest:
+                for follower in rest:
+                    follower.metadata['coalesced_with'] = successor.id
+                self._followers[successor.id] = rest
+
+        try:
+            self._queue.put(successor.id, successor, successor.priority, successor.caller)
+        except queue.Full:
+            # 释放的容量已被并发提交占用，接替者连同其跟随者按取消处理
+            self._cancel(successor)
+
+    def _cancel(self, operation: Operation) -> None:
+        """将已移出队列的操作标记为取消并结束"""
+        operation.update_status(OperationStatus.FAILED)
+        operation.result = OperationResult(success=False, message="操作已取消")
+        if self._pre_trade is not None:
+            self._pre_trade.release(operation.id)
+        self._mark_completed(operation)
+        self._stats['total_processed'] += 1
+        self._stats['queue_size'] = self._queue.qsize()
 
     def stop(self) -> None:
         """停止队列处理"""
@@ -302,6 +886,7 @@ class OperationQueue:
 
         self.logger.info("正在停止操作队列...")
         self._running = False
+        self._scheduler.stop()
 
         # 等待当前操作完成
         while self._thread and self._thread.is_alive() and self._running_operations:
@@ -314,11 +899,14 @@ class OperationQueue:
         self.logger.info("操作队列已停止")
 
     def clear(self) -> None:
-        """清空队列"""
-        while not self._queue.empty():
-            try:
-                self._queue.get_nowait()
-            except queue.Empty:
-                break
+        """清空队列，排队中的操作均按取消处理"""
+        for operation in self._queue.clear() + self._scheduler.clear():
+            self._cancel(operation)
         self._stats['queue_size'] = 0
         self.logger.info("操作队列已清空")
+
+
+def _resolve_future(future: asyncio.Future) -> None:
+    """在事件循环线程中完成 Future（已超时取消的忽略）"""
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,199 @@
+"""定时委托 - 按 execute_at 在指定时刻提交，提前完成导航和填写，到点只按提交键
+
+开盘（09:30:00）、收盘集合竞价（14:57）等需要卡点的委托，由调用方自己计时的话，
+到点后还要经过 HTTP、排队、页面切换、填写输入框的延迟。这里由服务端按 execute_at 调度：
+
+    - 提前入队：execute_at 前 lead 秒按最高优先级放入队列
+    - 预先定位：执行线程取到定时委托后照常导航、填写证券代码、价格、数量，
+      在按下提交键前（BaseOperation.fire）阻塞到 execute_at；不支持预先定位的操作在核心操作开始前阻塞
+    - 高精度定时：先睡眠到目标前 spin 秒，再按 perf_counter 忙等到目标时刻，
+      不受 time.sleep 调度粒度（Windows 上约 1-15ms）的影响
+    - 触发误差：结果的 metadata["fire"] 记录目标时刻、实际触发时刻和误差（毫秒），
+      开始执行时已晚于 execute_at（队列繁忙、提交时已过时刻）的立即提交，误差如实记录
+
+时钟、睡眠函数可替换，测试中使用模拟时钟。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from easyths.models.operations import Operation
+
+logger = structlog.get_logger(__name__)
+
+
+class FireTimer:
+    """高精度定时：睡眠到目标前 spin 秒，之后忙等"""
+
+    def __init__(self, clock: Callable[[], float] = time.time, perf: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep, spin: float = 0.002):
+        """
+        Args:
+            clock: 墙上时钟（Unix 时间戳，秒），用于换算 execute_at
+            perf: 高精度单调时钟，用于最后一段忙等和计算误差
+            sleep: 睡眠函数
+            spin: 忙等的时长（秒），覆盖睡眠的唤醒误差
+        """
+        self._clock = clock
+        self._perf = perf
+        self._sleep = sleep
+        self.spin = spin
+
+    def wait_until(self, target: float) -> float:
+        """阻塞到墙上时钟的 target 时刻
+
+        Returns:
+            触发误差（秒），正数表示晚于目标时刻
+        """
+        remaining = target - self._clock()
+        if remaining <= 0:
+            return -remaining
+        # 之后都按单调时钟计算，避免墙上时钟的分辨率和调整
+        end = self._perf() + remaining
+        if remaining > self.spin:
+            self._sleep(remaining - self.spin)
+        now = self._perf()
+        while now < end:
+            now = self._perf()
+        return now - end
+
+
+class OrderScheduler:
+    """定时委托调度器：到 execute_at 前 lead 秒交给队列，执行时由 fire() 卡点触发"""
+
+    def __init__(self, release: Callable[[Operation], None], lead: float = 3.0,
+                 clock: Callable[[], float] = time.time, timer: Optional[FireTimer] = None):
+        """
+        Args:
+            release: 到点前把操作交给队列
+            lead: 提前入队的时长（秒），需覆盖排队、导航和填写的耗时
+            clock: 墙上时钟（Unix 时间戳，秒）
+            timer: 触发定时器，默认使用同一墙上时钟
+        """
+        self._release = release
+        self.lead = lead
+        self._clock = clock
+        self._timer = timer or FireTimer(clock=clock)
+        self._heap: List[Tuple[float, int, str]] = []  # (入队时刻, 序号, 操作ID)
+        self._pending: Dict[str, Operation] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._stats = {"fired": 0, "total_abs_error": 0.0, "max_abs_error": 0.0}  # 已触发的次数和误差（秒）
+
+    def schedule(self, operation: Operation) -> None:
+        """登记定时操作，operation.execute_at 不能为空"""
+        release_at = operation.execute_at.timestamp() - self.lead
+        with self._cond:
+            self._pending[operation.id] = operation
+            heapq.heappush(self._heap, (release_at, next(self._counter), operation.id))
+            self._cond.notify()
+
+    def cancel(self, operation_id: str) -> Optional[Operation]:
+        """取消尚未入队的定时操作
+
+        Returns:
+            被取消的操作，不存在（已入队或未登记）返回None
+        """
+        with self._cond:
+            # 堆中的条目在出堆时按 _pending 跳过
+            return self._pending.pop(operation_id, None)
+
+    def poll(self) -> int:
+        """把到达入队时刻的操作交给队列
+
+        Returns:
+            本次入队的操作数
+        """
+        due = []
+        with self._cond:
+            now = self._clock()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, operation_id = heapq.heappop(self._heap)
+                operation = self._pending.pop(operation_id, None)
+                if operation is not None:
+                    due.append(operation)
+        for operation in due:
+            logger.info("定时操作到点入队", operation_id=operation.id, operation_name=operation.name,
+                        execute_at=operation.execute_at.isoformat())
+            self._release(operation)
+        return len(due)
+
+    def fire(self, operation: Operation) -> Dict[str, Any]:
+        """在执行线程中阻塞到 execute_at，返回触发记录"""
+        target = operation.execute_at.timestamp()
+        error = self._timer.wait_until(target)
+        with self._cond:
+            self._stats["fired"] += 1
+            self._stats["total_abs_error"] += abs(error)
+            self._stats["max_abs_error"] = max(self._stats["max_abs_error"], abs(error))
+        return {
+            "execute_at": operation.execute_at.isoformat(timespec="microseconds"),
+            "fired_at": datetime.fromtimestamp(target + error).isoformat(timespec="microseconds"),
+            "error_ms": round(error * 1000, 3),
+        }
+
+    def __contains__(self, operation_id: str) -> bool:
+        return operation_id in self._pending
+
+    def start(self) -> None:
+        """启动调度线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="OrderScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止调度线程，未入队的定时操作保留"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def clear(self) -> List[Operation]:
+        """清空未入队的定时操作
+
+        Returns:
+            被清空的操作列表
+        """
+        with self._cond:
+            operations = list(self._pending.values())
+            self._pending.clear()
+            self._heap.clear()
+            return operations
+
+    def stats(self) -> Dict[str, Any]:
+        """未入队的定时操作数，已触发的次数和误差（毫秒）"""
+        with self._cond:
+            fired = self._stats["fired"]
+            return {
+                "pending": len(self._pending),
+                "fired": fired,
+                "avg_abs_error_ms": round(self._stats["total_abs_error"] * 1000 / fired, 3) if fired else 0.0,
+                "max_abs_error_ms": round(self._stats["max_abs_error"] * 1000, 3),
+            }
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                timeout = self._heap[0][0] - self._clock() if self._heap else None
+                if timeout is None or timeout > 0:
+                    # 最多等待1秒，墙上时钟被调整后也能及时入队
+                    self._cond.wait(min(timeout, 1.0) if timeout is not None else 1.0)
+                    continue
+            self.poll()
@@ -0,0 +1,84 @@
+"""页面亲和调度 - 同一通道中优先执行与交易客户端当前页面相同的操作，减少页面切换
+
+混合负载下执行线程在买入、撤单、持仓查询等页面之间来回切换，每次切换都要按键、等待页面加载。
+插件通过 PluginMetadata.page 声明目标页面，出队时在选中通道队首的若干个操作中：
+
+    - 队首操作的页面与当前页面相同（或当前页面未知）时按原顺序出队
+    - 否则取第一个页面与当前页面相同、且不与越过的操作冲突的操作
+    - 冲突：两个都是写操作，且涉及同一证券（没有证券代码的写操作，如全部撤单、逆回购，视为涉及所有证券），
+      冲突的委托之间不调换顺序
+    - 公平上限：由 LaneQueue 保证每个操作最多被越过 max_skips 次，之后必定按顺序出队
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, List, Optional
+
+from easyths.core.base_operation import operation_registry
+from easyths.models.operations import Operation
+
+# 涉及所有证券
+ALL_INSTRUMENTS = frozenset({"*"})
+
+
+class PageAffinity:
+    """页面亲和的通道内重排，作为 LaneQueue 的 reorder 使用"""
+
+    def __init__(self, current_page: Callable[[], Optional[str]]):
+        """
+        Args:
+            current_page: 返回交易客户端当前页面标识，未知返回 None
+        """
+        self._current_page = current_page
+        self._stats = {"reordered": 0, "conflicts": 0}
+
+    def __call__(self, operations: List[Operation]) -> int:
+        """从按出队顺序排列的操作中选择要出队的下标"""
+        page = self._current_page()
+        if page is None or page_of(operations[0]) == page:
+            return 0
+        for index in range(1, len(operations)):
+            candidate = operations[index]
+            if page_of(candidate) != page:
+                continue
+            if any(conflicts(candidate, earlier) for earlier in operations[:index]):
+                self._stats["conflicts"] += 1
+                continue
+            self._stats["reordered"] += 1
+            return index
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """提前出队的操作数、因与越过的写操作冲突而未提前的次数"""
+        return dict(self._stats)
+
+
+def page_of(operation: Operation) -> Optional[str]:
+    """操作声明的目标页面"""
+    metadata = operation_registry.get_metadata(operation.name)
+    return metadata.page if metadata is not None else None
+
+
+def instruments_of(operation: Operation) -> Optional[FrozenSet[str]]:
+    """写操作涉及的证券代码，只读操作返回 None"""
+    metadata = operation_registry.get_metadata(operation.name)
+    if metadata is not None and metadata.read_only:
+        return None
+    params = operation.params or {}
+    if operation.name == "batch_order":
+        legs = params.get("legs")
+        codes = [leg.get("stock_code") for leg in legs if isinstance(leg, dict)] if isinstance(legs, list) else []
+    else:
+        codes = [params.get("stock_code")]
+    if not codes or not all(isinstance(code, str) and code for code in codes):
+        return ALL_INSTRUMENTS
+    return frozenset(codes)
+
+
+def conflicts(first: Operation, second: Operation) -> bool:
+    """两个操作是否为涉及同一证券的写操作"""
+    a, b = instruments_of(first), instruments_of(second)
+    if a is None or b is None:
+        return False
+    return a is ALL_INSTRUMENTS or b is ALL_INSTRUMENTS or not a.isdisjoint(b)
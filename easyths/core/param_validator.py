@@ -0,0 +1,157 @@
+"""参数验证器 - 提交时按插件声明的参数定义验证请求
+
+插件的 validate() 在工作线程取出操作后才执行，参数错误的请求要先排完队才会失败。
+注册插件时把 PluginMetadata.parameters 编译成检查函数列表，提交时同步验证，
+错误请求直接返回 422，不进入队列。插件自己的 validate() 作为第二阶段，在声明式检查通过后执行。
+
+支持的参数定义字段：
+    type: string / integer / number / boolean / array / object
+    required、enum、pattern、min_length / max_length、minimum / maximum、multiple_of、
+    min_items / max_items、items（数组元素的定义，或对象元素各字段的定义）
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+# 检查函数：(参数值, 参数路径) -> 错误信息，通过返回 None
+Check = Callable[[Any, str], Optional[str]]
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, list),
+    "object": lambda value: isinstance(value, dict),
+}
+
+_TYPE_NAMES = {
+    "string": "字符串",
+    "integer": "整数",
+    "number": "数字",
+    "boolean": "布尔值",
+    "array": "数组",
+    "object": "对象",
+}
+
+
+class ParamValidator:
+    """从参数定义编译得到的验证器，编译一次，每次提交直接执行检查函数"""
+
+    def __init__(self, parameters: Dict[str, Any]):
+        """
+        Args:
+            parameters: PluginMetadata.parameters，参数名 -> 参数定义
+        """
+        self._fields = [(name, bool(spec.get("required", False)), _compile(spec))
+                        for name, spec in parameters.items() if isinstance(spec, dict)]
+
+    def validate(self, params: Dict[str, Any], path: str = "") -> List[str]:
+        """验证参数
+
+        未声明的参数不做检查，交给插件自己的 validate() 处理
+
+        Returns:
+            错误信息列表，为空表示通过
+        """
+        errors = []
+        for name, required, checks in self._fields:
+            field_path = f"{path}.{name}" if path else name
+            value = params.get(name)
+            if value is None:
+                if required:
+                    errors.append(f"{field_path}: 缺少必需参数")
+                continue
+            for check in checks:
+                try:
+                    error = check(value, field_path)
+                except TypeError:
+                    # 未声明 type 时，值的类型可能不支持后续检查
+                    error = f"{field_path}: 类型不正确"
+                if error is not None:
+                    errors.append(error)
+                    break
+        return errors
+
+
+def _compile(spec: Dict[str, Any]) -> List[Check]:
+    """把一个参数定义编译成检查函数列表，按顺序执行，类型不符时不再执行后续检查"""
+    checks: List[Check] = []
+    type_name = spec.get("type")
+
+    if type_name in _TYPE_CHECKS:
+        is_type = _TYPE_CHECKS[type_name]
+        expected = _TYPE_NAMES[type_name]
+        checks.append(lambda value, path: None if is_type(value) else f"{path}: 必须是{expected}")
+
+    if "enum" in spec:
+        choices = list(spec["enum"])
+        allowed = set(choices)
+        if type_name == "array":
+            # 数组的 enum 约束每个元素
+            checks.append(lambda value, path: next(
+                (f"{path}: 取值必须是 {choices} 之一" for item in value if item not in allowed), None))
+        else:
+            checks.append(lambda value, path: None if value in allowed else f"{path}: 取值必须是 {choices} 之一")
+
+    if "pattern" in spec:
+        pattern = re.compile(spec["pattern"])
+        checks.append(lambda value, path: None if pattern.search(value) else f"{path}: 格式不符合 {pattern.pattern}")
+
+    for key, compare, message in (
+            ("min_length", lambda value, limit: len(value) >= limit, "长度不能小于{limit}"),
+            ("max_length", lambda value, limit: len(value) <= limit, "长度不能大于{limit}"),
+            ("min_items", lambda value, limit: len(value) >= limit, "元素个数不能小于{limit}"),
+            ("max_items", lambda value, limit: len(value) <= limit, "元素个数不能大于{limit}"),
+            ("minimum", lambda value, limit: value >= limit, "不能小于{limit}"),
+            ("maximum", lambda value, limit: value <= limit, "不能大于{limit}"),
+            ("multiple_of", _is_multiple, "必须是{limit}的整数倍"),
+    ):
+        if key in spec:
+            checks.append(_bound_check(spec[key], compare, message))
+
+    if type_name == "array" and isinstance(spec.get("items"), dict):
+        checks.append(_items_check(spec["items"]))
+
+    return checks
+
+
+def _bound_check(limit: Any, compare: Callable[[Any, Any], bool], message: str) -> Check:
+    message = message.format(limit=limit)
+    return lambda value, path: None if compare(value, limit) else f"{path}: {message}"
+
+
+def _is_multiple(value: Any, base: Any) -> bool:
+    if isinstance(value, int) and isinstance(base, int):
+        return value % base == 0
+    return abs(round(value / base) * base - value) < 1e-9
+
+
+def _items_check(items: Dict[str, Any]) -> Check:
+    """数组元素的检查：items 带 type 时为元素的定义，否则为对象元素各字段的定义"""
+    if "type" in items:
+        item_checks = _compile(items)
+
+        def check(value: List[Any], path: str) -> Optional[str]:
+            for index, item in enumerate(value):
+                for item_check in item_checks:
+                    error = item_check(item, f"{path}[{index}]")
+                    if error is not None:
+                        return error
+            return None
+    else:
+        item_validator = ParamValidator(items)
+
+        def check(value: List[Any], path: str) -> Optional[str]:
+            for index, item in enumerate(value):
+                if not isinstance(item, dict):
+                    return f"{path}[{index}]: 必须是对象"
+                errors = item_validator.validate(item, f"{path}[{index}]")
+                if errors:
+                    return "; ".join(errors)
+            return None
+
+    return check
@@ -0,0 +1,159 @@
+"""弹窗识别 - 单次快照 + 规则表分类
+
+一次检查只枚举一次主窗口下的弹窗，是否存在、弹窗标题、弹窗内容、关闭动作都基于同一份快照，
+避免 is_exist_pop_dialog / get_pop_dialog / close_pop_dialog 之间重复的跨进程UIA调用。
+
+新增弹窗类型时只需在 POP_DIALOG_RULES 或 POP_DIALOG_CLASS_ACTIONS 中加一行。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class CloseAction(NamedTuple):
+    """弹窗关闭动作
+
+    kind:
+        - click: 点击弹窗中 auto_id（及 class_name）对应的按钮
+        - close: 直接关闭窗口
+        - esc: 向弹窗发送 ESC
+    """
+    kind: str
+    auto_id: Optional[str] = None
+    class_name: Optional[str] = None
+
+
+class PopDialogRule(NamedTuple):
+    """按弹窗文本识别的规则，排在前面的规则优先"""
+    keyword: str  # 弹窗文本中包含的关键字
+    title: str  # 识别出的弹窗标题
+    action: Optional[CloseAction]  # 关闭动作
+
+
+# 按弹窗文本识别（#32770 类型的内嵌弹窗）
+POP_DIALOG_RULES: List[PopDialogRule] = [
+    PopDialogRule("您的风险承受能力等级即将过期", "风险测评提示", CloseAction("click", "7")),
+    # 点击否
+    PopDialogRule("您输入的价格已超出涨跌停限制", "提示信息", CloseAction("click", "7")),
+    # 点击取消
+    PopDialogRule("先输入验证码", "验证码提示框", CloseAction("click", "2")),
+    PopDialogRule("委托价格的小数部分应", "委托价格提示框", CloseAction("click", "7")),
+    # 点击确定
+    PopDialogRule("不支持历史委托查询", "不支持历史委托查询提示框", CloseAction("click", "2", "Button")),
+    # 买入、卖出时的弹窗
+    PopDialogRule("提交失败", "失败提示", CloseAction("click", "2", "Button")),
+    # 点击窗口右上角的 X 触发关闭
+    PopDialogRule("一键打新", "一键打新提示框", CloseAction("click", "1008", "Button")),
+    PopDialogRule("国债逆回购", "国债逆回购窗口", CloseAction("click", "1008", "Button")),
+    # 点击否关闭窗口
+    PopDialogRule("退出确认", "程序退出确认窗口", CloseAction("click", "7")),
+    PopDialogRule("failed", "BeginFailed失败提示", CloseAction("click", "2", "Button")),
+]
+
+# 按控件类名识别（内嵌浏览器弹窗、独立窗口），类名即弹窗标题
+POP_DIALOG_CLASS_ACTIONS: Dict[str, CloseAction] = {
+    # 条件单触发提醒
+    "CDlgTriggeredConfitionTip": CloseAction("close"),
+    # 银证转账窗口
+    "TranferAccount": CloseAction("close"),
+    # 条件单窗口
+    "ConditionToolBar": CloseAction("esc"),
+}
+
+
+class PopDialogClassifier:
+    """弹窗文本分类器：所有关键字编译为一个正则，一次扫描找出优先级最高的规则"""
+
+    def __init__(self, rules: Iterable[PopDialogRule]):
+        self._rules = list(rules)
+        self._priority = {}
+        for index, rule in enumerate(self._rules):
+            self._priority.setdefault(rule.keyword, index)
+        self._pattern = re.compile("|".join(re.escape(keyword) for keyword in self._priority))
+
+    def classify(self, content: str) -> Optional[PopDialogRule]:
+        """返回文本命中的优先级最高的规则，未命中返回None"""
+        best = None
+        for match in self._pattern.finditer(content):
+            index = self._priority[match.group()]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return None if best is None else self._rules[best]
+
+
+pop_dialog_classifier = PopDialogClassifier(POP_DIALOG_RULES)
+
+
+class PopDialogSnapshot:
+    """某一时刻主窗口下的弹窗快照
+
+    弹窗列表在创建时枚举一次；独立窗口、弹窗文本、内嵌浏览器面板在首次用到时读取并缓存，
+    没有 #32770 弹窗时才需要再查一次独立窗口。
+    """
+
+    def __init__(self, main_window: Any, classifier: PopDialogClassifier = pop_dialog_classifier):
+        self._main_window = main_window
+        self._classifier = classifier
+        # 弹窗一般是这个Pane和#32770类型。如果后面有其他类型的弹窗再说，再修正
+        self.dialogs: List[Any] = main_window.children(control_type="Pane", class_name="#32770")
+        self._windows: Optional[List[Any]] = None
+        self._contents: Dict[int, str] = {}
+        self._classified: Optional[Tuple[Optional[str], Optional[Any], Optional[CloseAction]]] = None
+
+    @property
+    def windows(self) -> List[Any]:
+        """独立窗口，目前已知的有 条件单触发提醒、银证转账窗口"""
+        if self._windows is None:
+            self._windows = self._main_window.children(control_type="Window")
+        return self._windows
+
+    def exists(self) -> bool:
+        """是否存在弹窗"""
+        return len(self.dialogs) != 0 or len(self.windows) != 0
+
+    def content(self, index: int = 0) -> Optional[str]:
+        """弹窗的文本内容（Static 子控件文本拼接）"""
+        if index >= len(self.dialogs):
+            return None
+        if index not in self._contents:
+            sub_childrens = self.dialogs[index].children(class_name="Static")
+            self._contents[index] = "".join([child.window_text() for child in sub_childrens])
+        return self._contents[index]
+
+    def classify(self) -> Tuple[Optional[str], Optional[Any], Optional[CloseAction]]:
+        """识别弹窗
+
+        Returns:
+            (弹窗标题, 弹窗控件, 关闭动作)，没有弹窗返回 (None, None, None)
+        """
+        if self._classified is None:
+            self._classified = self._classify()
+        return self._classified
+
+    def _classify(self) -> Tuple[Optional[str], Optional[Any], Optional[CloseAction]]:
+        if not self.exists():
+            return None, None, None
+
+        # 可能会出现多个（概率很小），但是不管，找到一个直接返回，由上层应用兜底和判断
+        for index, dialog in enumerate(self.dialogs):
+            rule = self._classifier.classify(self.content(index))
+            if rule is not None:
+                return rule.title, dialog, rule.action
+            # 特殊处理浏览器嵌入型弹窗,这里可能是 条件单的弹窗，class_name=ConditionToolBar
+            pane_childrens = dialog.children(control_type="Pane")
+            if pane_childrens:
+                class_name = pane_childrens[0].class_name()
+                return class_name, pane_childrens[0], POP_DIALOG_CLASS_ACTIONS.get(class_name)
+
+        # 处理可能出现的window类型的独立窗口
+        if self.windows:
+            win = self.windows[0]
+            class_name = win.class_name()
+            return class_name, win, POP_DIALOG_CLASS_ACTIONS.get(class_name)
+
+        return "内嵌的浏览器窗口", None, None
@@ -0,0 +1,318 @@
+"""下单前检查 - 用最近查询到的资金、持仓在本地拒绝确定无法成交的委托
+
+委托提交到队列时，按最近一次资金查询的可用金额、持仓查询的可用余额检查：
+买入金额超过可用资金、卖出数量超过可用股份的委托直接拒绝，不再排队等待界面操作后由交易客户端弹窗拒绝。
+
+    - 账户快照：资金查询、持仓查询成功后记录可用金额和各证券的可用余额，超过有效期后不再使用
+    - 本地预留：通过检查的委托在提交时预留资金/股份，委托失败或取消后释放；
+      已完成的委托在下一次查询刷新快照时释放（新快照已反映其冻结的资金/股份）
+    - 保守失效：卖出成交可能增加可用资金，买入 T+0 证券可能增加可用股份，撤单会解冻资金和股份，
+      这些写操作完成后丢弃对应的快照，等下一次查询重新建立
+    - 没有快照或快照已过期时不做检查，只拒绝确定无法成交的委托
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import structlog
+
+from easyths.core.base_operation import operation_registry
+from easyths.models.operations import Operation, OperationStatus
+
+logger = structlog.get_logger(__name__)
+
+# 委托类操作 -> 买卖方向，batch_order 的方向由每笔委托的 side 决定
+ORDER_OPERATIONS = {
+    "buy": "buy",
+    "sell": "sell",
+    "market_buy": "buy",
+    "market_sell": "sell",
+    "batch_order": None,
+}
+
+
+class PreTradeRejectedError(ValueError):
+    """下单前检查未通过"""
+
+
+class _Order(NamedTuple):
+    side: str
+    stock_code: str
+    price: Optional[float]  # 市价委托没有价格，不检查资金
+    quantity: int
+    leg: Optional[int]  # 批量委托中的序号
+
+
+class _Reservation:
+    """一个操作预留的资金和股份"""
+    __slots__ = ("orders", "done")
+
+    def __init__(self, orders: List[_Order]):
+        self.orders = orders
+        self.done = False  # 委托已提交成功，等待下一次查询刷新快照
+
+    @property
+    def funds(self) -> float:
+        return sum(order.price * order.quantity for order in self.orders
+                   if order.side == "buy" and order.price is not None)
+
+    def shares(self, stock_code: str) -> int:
+        return sum(order.quantity for order in self.orders
+                   if order.side == "sell" and order.stock_code == stock_code)
+
+
+class PreTradeChecker:
+    """下单前的资金、持仓检查"""
+
+    def __init__(self, snapshot_ttl: float):
+        """
+        Args:
+            snapshot_ttl: 账户快照有效期（秒）
+        """
+        self.snapshot_ttl = snapshot_ttl
+        self._funds: Optional[float] = None
+        self._funds_time = 0.0
+        self._holdings: Optional[Dict[str, int]] = None
+        self._holdings_time = 0.0
+        self._reservations: Dict[str, _Reservation] = {}
+        self._lock = threading.Lock()
+        self._stats = {"checked": 0, "rejected": 0, "unchecked": 0}
+
+    def check_and_reserve(self, operation: Operation) -> None:
+        """提交时检查委托并预留资金/股份
+
+        Raises:
+            PreTradeRejectedError: 可用资金或可用股份不足
+        """
+        orders = _extract_orders(operation)
+        if not orders:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            funds_fresh = self._funds is not None and now - self._funds_time <= self.snapshot_ttl
+            holdings_fresh = self._holdings is not None and now - self._holdings_time <= self.snapshot_ttl
+            if not funds_fresh and not holdings_fresh:
+                self._stats["unchecked"] += 1
+            else:
+                self._stats["checked"] += 1
+                error = self._check(orders, funds_fresh, holdings_fresh, now)
+                if error is not None:
+                    self._stats["rejected"] += 1
+                    logger.info("下单前检查未通过", operation_name=operation.name, reason=error)
+                    raise PreTradeRejectedError(error)
+            self._reservations[operation.id] = _Reservation(orders)
+
+    def _check(self, orders: List[_Order], funds_fresh: bool, holdings_fresh: bool, now: float) -> Optional[str]:
+        """按快照和已预留的数量检查，返回拒绝原因"""
+        if funds_fresh:
+            need = _Reservation(orders).funds
+            if need > 0:
+                reserved = sum(reservation.funds for reservation in self._reservations.values())
+                available = self._funds - reserved
+                if need > available + 1e-6:
+                    return (f"可用资金不足：需要{need:.2f}元，"
+                            f"{now - self._funds_time:.0f}秒前查询的可用金额为{self._funds:.2f}元，"
+                            f"已提交未刷新的委托预留{reserved:.2f}元")
+
+        if holdings_fresh:
+            for stock_code in dict.fromkeys(order.stock_code for order in orders if order.side == "sell"):
+                need = _Reservation(orders).shares(stock_code)
+                reserved = sum(reservation.shares(stock_code) for reservation in self._reservations.values())
+                held = self._holdings.get(stock_code, 0)
+                if need > held - reserved:
+                    return (f"可用股份不足：卖出{stock_code} {need}股，"
+                            f"{now - self._holdings_time:.0f}秒前查询的可用余额为{held}股，"
+                            f"已提交未刷新的委托预留{reserved}股")
+        return None
+
+    def release(self, operation_id: str) -> None:
+        """释放操作的全部预留（操作取消时调用）"""
+        with self._lock:
+            self._reservations.pop(operation_id, None)
+
+    def observe(self, operation: Operation) -> None:
+        """操作执行结束后更新快照和预留
+
+        Args:
+            operation: 刚执行结束的操作
+        """
+        result = operation.result
+        success = operation.status == OperationStatus.COMPLETED and result is not None and result.success
+        now = time.monotonic()
+
+        with self._lock:
+            if operation.name == "funds_query":
+                if success:
+                    self._update_funds(result.data, now)
+                return
+            if operation.name == "holding_query":
+                if success:
+                    self._update_holdings(result.data, now)
+                return
+
+            reservation = self._reservations.get(operation.id)
+            if reservation is not None:
+                submitted = _submitted_orders(reservation.orders, result, success)
+                if submitted:
+                    reservation.orders = submitted
+                    reservation.done = True
+                else:
+                    del self._reservations[operation.id]
+
+            if operation.name in ORDER_OPERATIONS:
+                if reservation is not None and reservation.done:
+                    sides = {order.side for order in reservation.orders}
+                elif reservation is None and success:
+                    # 提交时没有取出委托明细，按买卖都有处理
+                    sides = {"buy", "sell"}
+                else:
+                    return
+                # 卖出成交会增加可用资金，买入 T+0 证券成交会增加可用股份，快照不再可靠
+                if "sell" in sides:
+                    self._drop_funds()
+                if "buy" in sides:
+                    self._drop_holdings()
+                return
+
+            # 其他改变资金、持仓的写操作（撤单、逆回购等）
+            metadata = operation_registry.get_metadata(operation.name)
+            if metadata is not None and metadata.invalidates:
+                if "funds" in metadata.invalidates:
+                    self._drop_funds()
+                if "holdings" in metadata.invalidates:
+                    self._drop_holdings()
+
+    def _update_funds(self, data: Any, now: float) -> None:
+        if not isinstance(data, dict):
+            return
+        available = _to_number(data.get("可用金额"))
+        if available is None:
+            return
+        self._funds, self._funds_time = available, now
+        # 已完成委托冻结的资金已反映在新快照中
+        for reservation in self._reservations.values():
+            if reservation.done:
+                reservation.orders = [order for order in reservation.orders if order.side != "buy"]
+        self._prune()
+
+    def _update_holdings(self, data: Any, now: float) -> None:
+        rows = _holding_rows(data)
+        if rows is None:
+            return
+        holdings: Dict[str, int] = {}
+        for row in rows:
+            stock_code, available = row.get("证券代码"), _to_number(row.get("可用余额"))
+            if stock_code is None or available is None:
+                continue
+            holdings[_normalize_code(stock_code)] = int(available)
+        self._holdings, self._holdings_time = holdings, now
+        for reservation in self._reservations.values():
+            if reservation.done:
+                reservation.orders = [order for order in reservation.orders if order.side != "sell"]
+        self._prune()
+
+    def _drop_funds(self) -> None:
+        self._funds = None
+        for reservation in self._reservations.values():
+            if reservation.done:
+                reservation.orders = [order for order in reservation.orders if order.side != "buy"]
+        self._prune()
+
+    def _drop_holdings(self) -> None:
+        self._holdings = None
+        for reservation in self._reservations.values():
+            if reservation.done:
+                reservation.orders = [order for order in reservation.orders if order.side != "sell"]
+        self._prune()
+
+    def _prune(self) -> None:
+        for operation_id in [operation_id for operation_id, reservation in self._reservations.items()
+                             if not reservation.orders]:
+            del self._reservations[operation_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """检查统计和当前快照"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                **self._stats,
+                "funds": self._funds,
+                "funds_age": round(now - self._funds_time, 3) if self._funds is not None else None,
+                "holdings_count": len(self._holdings) if self._holdings is not None else None,
+                "holdings_age": round(now - self._holdings_time, 3) if self._holdings is not None else None,
+                "reserved_funds": round(sum(reservation.funds for reservation in self._reservations.values()), 2),
+                "reservations": len(self._reservations),
+            }
+
+
+def _extract_orders(operation: Operation) -> List[_Order]:
+    """从委托类操作的参数中取出每笔委托，参数格式不对的返回空（交给参数验证处理）"""
+    if operation.name not in ORDER_OPERATIONS:
+        return []
+    params = operation.params or {}
+    if operation.name == "batch_order":
+        legs = params.get("legs")
+        if not isinstance(legs, list):
+            return []
+        orders = [_to_order(leg.get("side"), leg, index) for index, leg in enumerate(legs) if isinstance(leg, dict)]
+    else:
+        orders = [_to_order(ORDER_OPERATIONS[operation.name], params, None)]
+    return [order for order in orders if order is not None]
+
+
+def _to_order(side: Any, params: Dict[str, Any], leg: Optional[int]) -> Optional[_Order]:
+    stock_code, price, quantity = params.get("stock_code"), params.get("price"), params.get("quantity")
+    if side not in ("buy", "sell") or not isinstance(stock_code, str) or not isinstance(quantity, int):
+        return None
+    if not isinstance(price, (int, float)) or isinstance(price, bool):
+        price = None
+    return _Order(side, stock_code, price, quantity, leg)
+
+
+def _submitted_orders(orders: List[_Order], result: Any, success: bool) -> List[_Order]:
+    """委托结束后仍需预留的委托：整体成功保留全部，批量委托只保留提交成功的笔数，其余释放"""
+    if success:
+        return orders
+    legs = result.data.get("legs") if result is not None and isinstance(result.data, dict) else None
+    if not isinstance(legs, list):
+        return []
+    submitted = {leg.get("index") for leg in legs if isinstance(leg, dict) and leg.get("success")}
+    return [order for order in orders if order.leg in submitted]
+
+
+def _holding_rows(data: Any) -> Optional[List[Dict[str, Any]]]:
+    """持仓查询结果中的表格行，无法解析的格式（markdown、字符串）返回 None"""
+    if isinstance(data, list):
+        return [row for row in data if isinstance(row, dict)]
+    if isinstance(data, dict):
+        # 空持仓返回 {}
+        return [] if not data else None
+    if hasattr(data, "to_dict"):
+        return data.to_dict(orient="records")
+    return None
+
+
+def _normalize_code(stock_code: Any) -> str:
+    """剪贴板表格中的证券代码可能被解析为整数，去掉了前导零"""
+    text = str(stock_code).strip()
+    if text.endswith(".0"):
+        text = text[:-2]
+    return text.zfill(6)
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").strip())
+        except ValueError:
+            return None
+    return None
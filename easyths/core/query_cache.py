@@ -0,0 +1,137 @@
+"""查询结果缓存 - 按TTL复用只读查询结果，写操作按依赖状态失效
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from easyths.models.operations import OperationResult
+
+
+class _CacheEntry:
+    """缓存条目"""
+
+    __slots__ = ("result", "stored_at", "ttl", "tags")
+
+    def __init__(self, result: OperationResult, stored_at: float, ttl: float, tags: List[str]):
+        self.result = result
+        self.stored_at = stored_at
+        self.ttl = ttl
+        self.tags = tags
+
+
+class QueryCache:
+    """查询结果缓存
+
+    设计原则：
+        - 以查询键（操作名称 + 规范化参数）缓存成功的查询结果，超过查询声明的 cache_ttl 即过期
+        - 标签索引：每个条目记录其依赖的账户状态（depends_on），写操作结束后按 invalidates 使相关条目失效
+        - 调用方可通过 max_age 收紧可接受的数据时长，max_age=0 直接绕过缓存
+    """
+
+    # 条目数超过该值时，写入前先清理过期条目
+    SWEEP_SIZE = 256
+
+    def __init__(self):
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._tags: Dict[str, Set[str]] = {}  # 状态标签 -> 查询键
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Tuple[OperationResult, float]]:
+        """获取未过期的缓存结果
+
+        Args:
+            key: 查询键
+            max_age: 可接受的最大数据时长（秒），None 表示按条目自身的TTL
+
+        Returns:
+            (结果, 数据时长秒数)，未命中返回None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.stored_at
+                if age >= entry.ttl:
+                    self._remove(key)
+                elif max_age is None or age < max_age:
+                    self._hits += 1
+                    return entry.result, age
+            self._misses += 1
+            return None
+
+    def put(self, key: str, result: OperationResult, ttl: float, tags: List[str]) -> None:
+        """缓存查询结果
+
+        Args:
+            key: 查询键
+            result: 成功的查询结果
+            ttl: 缓存时长（秒）
+            tags: 结果依赖的账户状态
+        """
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            elif len(self._entries) >= self.SWEEP_SIZE:
+                self._sweep(now)
+            self._entries[key] = _CacheEntry(result, now, ttl, list(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tags: List[str]) -> int:
+        """使依赖指定账户状态的缓存失效
+
+        Args:
+            tags: 被写操作改变的账户状态
+
+        Returns:
+            int: 失效的条目数量
+        """
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        return {
+            'entries': len(self._entries),
+            'hits': self._hits,
+            'misses': self._misses,
+            'invalidations': self._invalidations,
+        }
+
+    # ============ 内部方法（调用方持有锁） ============
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.stored_at >= entry.ttl]
+        for key in expired:
+            self._remove(key)
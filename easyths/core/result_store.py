@@ -0,0 +1,258 @@
+"""已完成操作存储 - 有界保留与大结果落盘
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import structlog
+
+from easyths.models.operations import Operation, OperationResult
+
+logger = structlog.get_logger(__name__)
+
+# 落盘文件名前缀，启动时只清理带这个前缀的文件
+SPILL_PREFIX = "result_"
+
+
+class _Entry:
+    """存储条目"""
+
+    __slots__ = ("operation", "completed_at", "size", "spilled")
+
+    def __init__(self, operation: Operation, completed_at: float, size: int):
+        self.operation = operation
+        self.completed_at = completed_at
+        self.size = size  # 结果在内存中占用的估算字节数，落盘后为0
+        self.spilled = False
+
+
+class ResultStore:
+    """已完成操作存储
+
+    设计原则：
+        - TTL：完成超过 ttl 秒的操作被淘汰（0 表示不过期）
+        - 数量/字节上限：超出 max_count 或 max_bytes 时按 LRU 淘汰最久未访问的操作
+        - 落盘：结果大小超过 spill_threshold 的操作，结果写入 spill_dir，内存中只保留操作本身，
+          客户端查询时再从磁盘懒加载
+    """
+
+    # TTL 过期扫描的最小间隔（秒）
+    SWEEP_INTERVAL = 1.0
+
+    def __init__(self, ttl: float = 0, max_count: int = 0, max_bytes: int = 0,
+                 spill_threshold: int = 0, spill_dir: Optional[str] = None,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        """初始化存储
+
+        Args:
+            ttl: 保留时长（秒），0 表示不过期
+            max_count: 最多保留的操作数量，0 表示不限制
+            max_bytes: 内存中结果的总字节上限，0 表示不限制
+            spill_threshold: 结果超过该字节数时落盘，0 表示不落盘
+            spill_dir: 落盘目录
+            on_evict: 操作被淘汰时的回调，参数为操作ID
+        """
+        self.ttl = ttl
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.spill_threshold = spill_threshold if spill_dir else 0
+        self.spill_dir = Path(spill_dir).expanduser() if spill_dir else None
+        self.on_evict = on_evict
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self._spilled_count = 0
+        self._evicted_count = 0
+        self._last_sweep = time.monotonic()
+
+        if self.spill_threshold:
+            self._prepare_spill_dir()
+
+    def _prepare_spill_dir(self) -> None:
+        """创建落盘目录并清理上次运行遗留的结果文件（操作ID不会跨进程保留）
+
+        只清理本类写入的 result_<操作ID>.json，落盘目录中的其他文件不受影响。
+        """
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.spill_dir.glob(f"{SPILL_PREFIX}*.json"):
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    def put(self, operation: Operation) -> None:
+        """保存已完成的操作
+
+        Args:
+            operation: 已完成的操作
+        """
+        payload = _dump_result(operation.result)
+        size = len(payload.encode("utf-8")) if payload is not None else _estimate_size(operation.result)
+        entry = _Entry(operation, time.monotonic(), size)
+
+        if self.spill_threshold and payload is not None and size >= self.spill_threshold:
+            self._spill(entry, payload)
+
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(operation.id, None)
+            if old is not None:
+                self._forget(old)
+            self._entries[operation.id] = entry
+            self._memory_bytes += entry.size
+            if entry.spilled:
+                self._spilled_count += 1
+            evicted.extend(self._sweep_expired())
+            evicted.extend(self._enforce_limits())
+
+        self._after_evict(evicted)
+
+    def get(self, operation_id: str, load_result: bool = True) -> Optional[Operation]:
+        """获取已完成的操作（会刷新 LRU 顺序）
+
+        Args:
+            operation_id: 操作ID
+            load_result: 结果已落盘时是否从磁盘读回
+
+        Returns:
+            Operation: 操作对象；结果已落盘且需要读回时返回带结果的副本；不存在或已过期返回None
+        """
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(operation_id)
+            if entry is None:
+                return None
+            if self._is_expired(entry, time.monotonic()):
+                self._remove(operation_id)
+                evicted.append(operation_id)
+                entry = None
+            else:
+                self._entries.move_to_end(operation_id)
+
+        if entry is None:
+            self._after_evict(evicted)
+            return None
+
+        if entry.spilled and load_result:
+            result = self._load(operation_id)
+            return entry.operation.model_copy(update={"result": result})
+        return entry.operation
+
+    def __contains__(self, operation_id: str) -> bool:
+        return operation_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取存储统计信息"""
+        return {
+            'retained_count': len(self._entries),
+            'memory_bytes': self._memory_bytes,
+            'spilled_count': self._spilled_count,
+            'evicted_count': self._evicted_count,
+        }
+
+    def clear(self) -> None:
+        """清空存储"""
+        with self._lock:
+            evicted = list(self._entries.keys())
+            for operation_id in evicted:
+                self._remove(operation_id)
+        self._after_evict(evicted)
+
+    # ============ 内部方法 ============
+
+    def _is_expired(self, entry: _Entry, now: float) -> bool:
+        return bool(self.ttl) and now - entry.completed_at >= self.ttl
+
+    def _sweep_expired(self) -> list:
+        """淘汰过期条目（调用方持有锁），按间隔节流"""
+        if not self.ttl:
+            return []
+        now = time.monotonic()
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return []
+        self._last_sweep = now
+        expired = [op_id for op_id, entry in self._entries.items() if self._is_expired(entry, now)]
+        for operation_id in expired:
+            self._remove(operation_id)
+        return expired
+
+    def _enforce_limits(self) -> list:
+        """按 LRU 淘汰超出数量或字节上限的条目（调用方持有锁）"""
+        evicted = []
+        while self._entries and (
+                (self.max_count and len(self._entries) > self.max_count) or
+                (self.max_bytes and self._memory_bytes > self.max_bytes)):
+            operation_id = next(iter(self._entries))
+            self._remove(operation_id)
+            evicted.append(operation_id)
+        return evicted
+
+    def _remove(self, operation_id: str) -> None:
+        entry = self._entries.pop(operation_id)
+        self._forget(entry)
+        self._evicted_count += 1
+
+    def _forget(self, entry: _Entry) -> None:
+        """释放条目占用的内存计数和磁盘文件"""
+        self._memory_bytes -= entry.size
+        if entry.spilled:
+            self._spilled_count -= 1
+            try:
+                self._spill_path(entry.operation.id).unlink()
+            except OSError:
+                pass
+
+    def _after_evict(self, evicted: list) -> None:
+        """在锁外通知淘汰回调"""
+        if not evicted or self.on_evict is None:
+            return
+        for operation_id in evicted:
+            self.on_evict(operation_id)
+
+    def _spill_path(self, operation_id: str) -> Path:
+        return self.spill_dir / f"{SPILL_PREFIX}{operation_id}.json"
+
+    def _spill(self, entry: _Entry, payload: str) -> None:
+        """将结果写入磁盘，内存中只保留操作本身"""
+        try:
+            self._spill_path(entry.operation.id).write_text(payload, encoding="utf-8")
+        except OSError as e:
+            logger.warning("结果落盘失败，保留在内存中", operation_id=entry.operation.id, error=str(e))
+            return
+        entry.operation.result = None
+        entry.size = 0
+        entry.spilled = True
+
+    def _load(self, operation_id: str) -> Optional[OperationResult]:
+        """从磁盘读回结果"""
+        try:
+            payload = self._spill_path(operation_id).read_text(encoding="utf-8")
+        except OSError as e:
+            logger.error("读取落盘结果失败", operation_id=operation_id, error=str(e))
+            return OperationResult(success=False, message="操作结果已落盘但读取失败")
+        return OperationResult.model_validate_json(payload)
+
+
+def _dump_result(result: Optional[OperationResult]) -> Optional[str]:
+    """将结果序列化为JSON，无法序列化时返回None"""
+    if result is None:
+        return None
+    try:
+        return result.model_dump_json()
+    except Exception:
+        return None
+
+
+def _estimate_size(result: Optional[OperationResult]) -> int:
+    """无法序列化的结果按 repr 长度估算大小"""
+    return len(repr(result)) if result is not None else 0
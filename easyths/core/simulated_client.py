@@ -0,0 +1,752 @@
+"""模拟同花顺客户端 - 内存中的控件树，不依赖 Windows 即可运行插件
+
+控件树按真实客户端的 control_type / class_name / auto_id / 标题结构搭建，插件无需修改即可运行：
+    - 左侧菜单树：展开、选中子菜单切换页面，快捷键 F1-F4 切换页面
+    - 买入/卖出、市价委托、撤单、资金股票、历史委托页面
+    - 委托失败弹窗、复制表格触发的验证码弹窗
+    - 复制表格写入内存剪贴板（easyths.utils.clipboard.MemoryClipboard）
+    - 可配置的界面响应耗时：页面切换、菜单渲染、证券名称带出、表格复制等都在对应耗时后才可见，
+      每次 children() 调用模拟一次跨进程往返
+
+内嵌浏览器页面（条件单、国债逆回购、止盈止损）没有模拟，对应插件在模拟客户端上会返回失败。
+
+用法:
+    from easyths.core import TonghuashunAutomator
+    from easyths.core.gui_backend import SimulatedBackend
+    from easyths.core.simulated_client import SimulatedClient
+
+    automator = TonghuashunAutomator(backend=SimulatedBackend(SimulatedClient(latency_scale=0)))
+    automator.connect()
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import itertools
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from easyths.utils.clipboard import MemoryClipboard
+
+# 界面响应的模拟耗时（秒）
+DEFAULT_LATENCIES: Dict[str, float] = {
+    "uia_call": 0.0005,  # 每次 children() 调用（跨进程往返）
+    "keystroke": 0.001,  # 每个按键
+    "text_commit": 0.005,  # 输入框文本提交到界面
+    "page_switch": 0.06,  # 切换页面后新页面可用
+    "menu_expand": 0.03,  # 展开菜单后子菜单渲染
+    "stock_name": 0.03,  # 输入证券代码后带出证券名称
+    "order_submit": 0.04,  # 提交委托后清空输入框或弹出失败提示
+    "table_refresh": 0.08,  # F5 刷新表格数据
+    "copy": 0.03,  # Ctrl+C 后写入剪贴板
+    "popup": 0.02,  # 弹窗出现
+}
+
+# 默认行情：证券代码 -> (证券名称, 最新价)
+DEFAULT_STOCKS: Dict[str, Tuple[str, float]] = {
+    "600000": ("浦发银行", 10.25),
+    "600519": ("贵州茅台", 1500.0),
+    "601318": ("中国平安", 45.6),
+    "300750": ("宁德时代", 200.5),
+    "510300": ("沪深300ETF", 3.912),
+    "159915": ("创业板ETF", 2.105),
+}
+
+# 市价委托的可选策略
+MARKET_STRATEGIES = ["对手方最优价格", "本方最优价格", "即成剩撤", "五档即成剩撤", "全额成交或撤销"]
+
+# 表格表头
+HOLDING_HEADER = ["证券代码", "证券名称", "股票余额", "可用余额", "冻结数量", "成本价", "市价", "盈亏", "市值"]
+ORDER_HEADER = ["委托时间", "证券代码", "证券名称", "操作", "委托数量", "成交数量", "委托价格", "成交均价", "撤消数量", "合同编号", "备注"]
+
+# 按键序列：{KEY} / {KEY N} / 修饰键+字符 / 单个字符
+_KEY_PATTERN = re.compile(r"\{([A-Z0-9]+)(?: (\d+))?\}|([\^+%])(.)|(.)", re.S)
+
+
+def parse_keys(keys: str) -> List[str]:
+    """解析 pywinauto 格式的按键序列，如 {F1}、{BACKSPACE 6}、^a
+
+    与 pywinauto type_keys 的默认行为一致，空格被忽略
+
+    Returns:
+        按键列表，特殊键为大写名称（如 F1、ENTER），组合键为 ^a，普通字符为字符本身
+    """
+    tokens = []
+    for match in _KEY_PATTERN.finditer(keys):
+        name, count, modifier, char, plain = match.groups()
+        if name:
+            tokens.extend([name] * (int(count) if count else 1))
+        elif modifier:
+            tokens.append(modifier + char.lower())
+        elif plain != " ":
+            tokens.append(plain)
+    return tokens
+
+
+class SimulatedElementInfo:
+    """模拟 pywinauto 的 element_info"""
+
+    def __init__(self, control: "SimulatedControl"):
+        self._control = control
+
+    @property
+    def automation_id(self) -> str:
+        return self._control.auto_id
+
+    @property
+    def name(self) -> str:
+        return self._control.window_text()
+
+    @property
+    def class_name(self) -> str:
+        return self._control.class_name()
+
+    @property
+    def control_type(self) -> str:
+        return self._control.control_type
+
+    @property
+    def runtime_id(self) -> Tuple[int, ...]:
+        if self._control.closed:
+            raise RuntimeError("控件已销毁")
+        return self._control.runtime_id
+
+    @property
+    def handle(self) -> None:
+        return None
+
+
+class SimulatedControl:
+    """模拟控件，提供插件用到的 pywinauto wrapper 方法"""
+
+    def __init__(self, client: "SimulatedClient", control_type: str, class_name: str = "",
+                 text: Union[str, Callable[[], str]] = "", auto_id: str = "",
+                 children: Optional[List["SimulatedControl"]] = None, enabled: Union[bool, Callable[[], bool]] = True,
+                 visible_at: float = 0.0, role: Optional[str] = None):
+        """
+        Args:
+            client: 所属模拟客户端
+            control_type: UIA 控件类型，如 Edit、Button、Pane
+            class_name: 窗口类名
+            text: 控件文本，可以是返回当前文本的函数
+            auto_id: automation_id
+            children: 子控件
+            enabled: 是否可用，可以是函数
+            visible_at: 控件可见的时间（time.perf_counter），用于模拟界面渲染耗时
+            role: 控件在模拟客户端中的角色，按键、点击由客户端按角色处理
+        """
+        self.client = client
+        self.control_type = control_type
+        self._class_name = class_name
+        self._text = text
+        self._pending: Optional[Tuple[float, str]] = None
+        self.auto_id = auto_id
+        self._children: List[SimulatedControl] = []
+        self.parent: Optional[SimulatedControl] = None
+        self._enabled = enabled
+        self.visible_at = visible_at
+        self.role = role
+        self.runtime_id = (42, next(client.runtime_ids))
+        self.closed = False
+        self.expanded = False
+        self.element_info = SimulatedElementInfo(self)
+        for child in children or []:
+            self.add_child(child)
+
+    # ============ 控件树 ============
+
+    def add_child(self, child: "SimulatedControl") -> "SimulatedControl":
+        child.parent = self
+        self._children.append(child)
+        return child
+
+    def remove_child(self, child: "SimulatedControl") -> None:
+        """移除子控件，子控件及其后代随之销毁"""
+        self._children.remove(child)
+        child.destroy()
+
+    def destroy(self) -> None:
+        self.closed = True
+        for child in self._children:
+            child.destroy()
+
+    def visible_children(self) -> List["SimulatedControl"]:
+        """已渲染的子控件"""
+        now = time.perf_counter()
+        return [child for child in self.client.dynamic_children(self) if child.visible_at <= now]
+
+    def children(self, control_type: Optional[str] = None, class_name: Optional[str] = None,
+                 title: Optional[str] = None) -> List["SimulatedControl"]:
+        """按控件类型、类名、标题筛选子控件（一次跨进程调用）"""
+        self.client.uia_call()
+        return [child for child in self.visible_children()
+                if (control_type is None or child.control_type == control_type)
+                and (class_name is None or child.class_name() == class_name)
+                and (title is None or child.window_text() == title)]
+
+    def wrapper_object(self) -> "SimulatedControl":
+        return self
+
+    # ============ 属性 ============
+
+    def window_text(self) -> str:
+        if self._pending is not None and self._pending[0] <= time.perf_counter():
+            self._text, self._pending = self._pending[1], None
+        return self._text() if callable(self._text) else self._text
+
+    def set_text(self, text: str, delay: float = 0.0) -> None:
+        """设置文本，delay 秒后在界面上可见"""
+        if delay <= 0:
+            self._text, self._pending = text, None
+        else:
+            # 先提交之前未生效的文本
+            self.window_text()
+            self._pending = (time.perf_counter() + delay, text)
+
+    def texts(self) -> List[List[str]]:
+        return [[child.window_text()] for child in self.visible_children()]
+
+    def class_name(self) -> str:
+        return self._class_name
+
+    def is_enabled(self) -> bool:
+        return self._enabled() if callable(self._enabled) else self._enabled
+
+    def is_visible(self) -> bool:
+        return True
+
+    def is_selected(self) -> bool:
+        return self.client.is_selected(self)
+
+    def get_item(self, index: int) -> "SimulatedControl":
+        return self.visible_children()[index]
+
+    def get_selection(self) -> List[SimulatedElementInfo]:
+        return self.client.get_selection(self)
+
+    # ============ 操作 ============
+
+    def type_keys(self, keys: str, pause: Optional[float] = None, **kwargs) -> None:
+        for key in parse_keys(keys):
+            self.client.press(self, key)
+            if pause:
+                time.sleep(pause)
+
+    def click(self) -> None:
+        if not self.is_enabled():
+            raise RuntimeError(f"控件不可用: {self.auto_id or self.window_text()}")
+        self.client.click(self)
+
+    def click_input(self) -> None:
+        self.client.click(self)
+
+    def invoke(self) -> None:
+        self.client.click(self)
+
+    def expand(self) -> None:
+        self.client.expand(self)
+
+    def select(self) -> None:
+        self.client.select(self)
+
+    def close(self) -> None:
+        self.client.close_popup(self)
+
+    def set_focus(self) -> None:
+        pass
+
+    def restore(self) -> None:
+        pass
+
+    def __repr__(self) -> str:
+        return f"<SimulatedControl {self.control_type} {self._class_name} auto_id={self.auto_id!r} text={self.window_text()!r}>"
+
+
+class SimulatedAccount:
+    """模拟账户：资金、持仓、委托"""
+
+    def __init__(self, stocks: Dict[str, Tuple[str, float]], balance: float = 1000000.0,
+                 holdings: Optional[Dict[str, Tuple[int, float]]] = None):
+        """
+        Args:
+            stocks: 行情，证券代码 -> (证券名称, 最新价)
+            balance: 资金余额
+            holdings: 持仓，证券代码 -> (股票余额, 成本价)
+        """
+        self.stocks = stocks
+        self.balance = balance
+        self.holdings: Dict[str, Dict[str, Any]] = {
+            code: {"quantity": quantity, "frozen": 0, "cost": cost} for code, (quantity, cost) in (holdings or {}).items()
+        }
+        self.orders: List[Dict[str, Any]] = []
+        self._contract_numbers = itertools.count(1001)
+
+    @property
+    def frozen(self) -> float:
+        return sum(order["price"] * order["quantity"] for order in self.pending_orders() if order["side"] == "买入")
+
+    @property
+    def market_value(self) -> float:
+        return sum(holding["quantity"] * self.stocks[code][1] for code, holding in self.holdings.items())
+
+    @property
+    def profit(self) -> float:
+        return sum(holding["quantity"] * (self.stocks[code][1] - holding["cost"]) for code, holding in self.holdings.items())
+
+    def pending_orders(self, stock_code: str = "", side: Optional[str] = None) -> List[Dict[str, Any]]:
+        """未撤销的委托"""
+        return [order for order in self.orders
+                if order["status"] == "已报" and stock_code in order["code"] and (side is None or order["side"] == side)]
+
+    def place_order(self, side: str, code: str, price_text: str, quantity_text: str) -> Optional[str]:
+        """提交委托
+
+        Returns:
+            失败原因，成功返回None
+        """
+        if code not in self.stocks:
+            return "证券代码不存在"
+        try:
+            price = float(price_text)
+            quantity = int(quantity_text)
+        except ValueError:
+            return "委托价格或数量格式错误"
+        if price <= 0:
+            return "委托价格必须大于0"
+        if quantity <= 0 or quantity % 100 != 0:
+            return "委托数量必须是100的整数倍"
+        if side == "买入" and price * quantity > self.balance - self.frozen:
+            return "可用资金不足"
+        if side == "卖出":
+            holding = self.holdings.get(code)
+            if holding is None or quantity > holding["quantity"] - holding["frozen"]:
+                return "可用股份不足"
+            holding["frozen"] += quantity
+        self.orders.append({
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "code": code,
+            "name": self.stocks[code][0],
+            "side": side,
+            "quantity": quantity,
+            "price": price,
+            "contract_no": str(next(self._contract_numbers)),
+            "status": "已报",
+        })
+        return None
+
+    def cancel_orders(self, stock_code: str = "", side: Optional[str] = None) -> int:
+        """撤销委托，返回撤销的笔数"""
+        orders = self.pending_orders(stock_code, side)
+        for order in orders:
+            order["status"] = "已撤"
+            if order["side"] == "卖出":
+                self.holdings[order["code"]]["frozen"] -= order["quantity"]
+        return len(orders)
+
+    def funds(self) -> Dict[str, str]:
+        """资金页面各项数值，auto_id -> 文本"""
+        available = self.balance - self.frozen
+        return {
+            "1012": f"{self.balance:.2f}",
+            "1013": f"{self.frozen:.2f}",
+            "1014": f"{self.market_value:.2f}",
+            "1015": f"{self.balance + self.market_value:.2f}",
+            "1016": f"{available:.2f}",
+            "1017": f"{available:.2f}",
+            "1027": f"{self.profit:.2f}",
+        }
+
+    def holding_table(self) -> str:
+        rows = [HOLDING_HEADER]
+        for code, holding in self.holdings.items():
+            name, price = self.stocks[code]
+            rows.append([code, name, str(holding["quantity"]), str(holding["quantity"] - holding["frozen"]), str(holding["frozen"]),
+                         f"{holding['cost']:.3f}", f"{price:.3f}", f"{holding['quantity'] * (price - holding['cost']):.2f}",
+                         f"{holding['quantity'] * price:.2f}"])
+        return _to_table_text(rows)
+
+    def order_table(self, stock_code: str = "") -> str:
+        rows = [ORDER_HEADER]
+        for order in self.orders:
+            if stock_code not in order["code"]:
+                continue
+            cancelled = order["quantity"] if order["status"] == "已撤" else 0
+            rows.append([order["time"], order["code"], order["name"], order["side"], str(order["quantity"]), "0",
+                         f"{order['price']:.3f}", "0.000", str(cancelled), order["contract_no"], order["status"]])
+        return _to_table_text(rows)
+
+
+def _to_table_text(rows: List[List[str]]) -> str:
+    """按客户端复制表格的格式拼接：制表符分隔，每行以换行结尾"""
+    return "".join("\t".join(row) + "\n" for row in rows)
+
+
+class SimulatedClient:
+    """模拟同花顺客户端
+
+    作为 GUI 后端返回的应用对象，提供 main_window 和 top_window()；
+    界面状态（当前页面、菜单选中项、弹窗）和账户状态都保存在内存中
+    """
+
+    # 左侧菜单：主菜单 -> 子菜单
+    MENUS: Dict[str, List[str]] = {
+        "买入[F1]": [],
+        "卖出[F2]": [],
+        "撤单[F3]": [],
+        "查询[F4]": ["资金股票", "当日委托", "当日成交", "历史委托", "历史成交"],
+        "市价委托": ["买入", "卖出"],
+        "条件单": ["股价条件", "止盈止损"],
+        "国债逆回购": [],
+        "双向委托": [],
+    }
+    # 快捷键 -> 页面
+    HOTKEY_PAGES: Dict[str, str] = {
+        "F1": "买入[F1]",
+        "F2": "卖出[F2]",
+        "F3": "撤单[F3]",
+        "F4": "查询[F4]/资金股票",
+    }
+
+    def __init__(self, latencies: Optional[Dict[str, float]] = None, latency_scale: float = 1.0,
+                 stocks: Optional[Dict[str, Tuple[str, float]]] = None, balance: float = 1000000.0,
+                 holdings: Optional[Dict[str, Tuple[int, float]]] = None, captcha_every: int = 0,
+                 ocr_error_rate: float = 0.0, seed: int = 0):
+        """
+        Args:
+            latencies: 覆盖 DEFAULT_LATENCIES 中的模拟耗时
+            latency_scale: 所有模拟耗时的缩放比例，0 表示界面即时响应
+            stocks: 行情，证券代码 -> (证券名称, 最新价)
+            balance: 资金余额
+            holdings: 持仓，证券代码 -> (股票余额, 成本价)
+            captcha_every: 每复制多少次表格弹出一次验证码，0 表示不弹出
+            ocr_error_rate: 模拟验证码识别的出错概率
+            seed: 随机数种子，保证基准测试可复现
+        """
+        self.latencies = {name: value * latency_scale for name, value in {**DEFAULT_LATENCIES, **(latencies or {})}.items()}
+        self.account = SimulatedAccount(dict(stocks or DEFAULT_STOCKS), balance, holdings)
+        self.captcha_every = captcha_every
+        self.ocr_error_rate = ocr_error_rate
+        self.clipboard = MemoryClipboard()
+        self.runtime_ids = itertools.count(1)
+        self.stats: Dict[str, int] = {"uia_calls": 0, "keystrokes": 0, "copies": 0, "captchas": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self.page: Optional[str] = None
+        # 当前委托页面的输入控件 (方向, 代码, 价格, 数量, 证券名称)
+        self.order_inputs: Optional[Tuple[str, SimulatedControl, SimulatedControl, SimulatedControl, SimulatedControl]] = None
+        # 撤单页面点击查询时的证券代码筛选
+        self.order_filter = ""
+        self._selected_item: Optional[SimulatedControl] = None
+        self._popups: List[SimulatedControl] = []
+        self._pending_copy: Optional[str] = None
+        self._refreshed_at = 0.0
+        self.main_window = self._build_main_window()
+
+    # ============ 应用对象接口 ============
+
+    def top_window(self) -> SimulatedControl:
+        return self._popups[-1] if self._popups else self.main_window
+
+    def recognize_captcha(self, control: SimulatedControl) -> Tuple[str, Image.Image]:
+        """模拟验证码识别：读出控件中的验证码，按 ocr_error_rate 的概率识别错误"""
+        code = getattr(control, "captcha_code", "")
+        if code and self._random.random() < self.ocr_error_rate:
+            code = code[::-1] if len(set(code)) > 1 else code + "0"
+        return code, Image.new("RGB", (60, 20))
+
+    def uia_call(self) -> None:
+        """记录一次跨进程调用并模拟其耗时"""
+        self.stats["uia_calls"] += 1
+        self._sleep("uia_call")
+
+    # ============ 控件树搭建 ============
+
+    def _control(self, control_type: str, class_name: str = "", text: Union[str, Callable[[], str]] = "",
+                 auto_id: str = "", children: Optional[List[SimulatedControl]] = None, **kwargs) -> SimulatedControl:
+        return SimulatedControl(self, control_type, class_name, text, auto_id, children, **kwargs)
+
+    def _build_main_window(self) -> SimulatedControl:
+        self.tree = self._control("Tree", "SysTreeView32", role="menu_tree")
+        for main_option, sub_options in self.MENUS.items():
+            item = self.tree.add_child(self._control("TreeItem", text=main_option, role="menu_item"))
+            for sub_option in sub_options:
+                item.add_child(self._control("TreeItem", text=sub_option, role="menu_item"))
+
+        menu_pane = self._control("Pane", "AfxWnd140s", children=[
+            self._control("Pane", text="HexinScrollWnd", children=[
+                self._control("Pane", text="HexinScrollWnd2", children=[self.tree]),
+            ]),
+        ])
+        self.frame = self._control("Pane", "AfxMDIFrame140s", auto_id="59648", children=[menu_pane])
+        self.page_panel = self._control("Pane", "AfxMDIFrame140s")
+        self.frame.add_child(self.page_panel)
+        return self._control("Window", "Afx:00400000:b:00010003:00000006:00000000", "网上股票交易系统5.0",
+                             children=[self.frame], role="main_window")
+
+    def dynamic_children(self, control: SimulatedControl) -> List[SimulatedControl]:
+        """子控件列表，主窗口包含当前的弹窗，折叠的菜单项没有子控件"""
+        if control is self.main_window:
+            return control._children + self._popups
+        if control.role == "menu_item" and not control.expanded:
+            return []
+        return control._children
+
+    def _build_page(self, page: str) -> SimulatedControl:
+        """搭建页面的功能面板"""
+        builders = {
+            "买入[F1]": lambda: self._build_order_page("买入"),
+            "卖出[F2]": lambda: self._build_order_page("卖出"),
+            "撤单[F3]": self._build_cancel_page,
+            "查询[F4]/资金股票": self._build_funds_page,
+            "查询[F4]/历史委托": self._build_history_page,
+            "市价委托/买入": lambda: self._build_market_page("买入"),
+            "市价委托/卖出": lambda: self._build_market_page("卖出"),
+        }
+        children = builders[page]() if page in builders else []
+        return self._control("Pane", "AfxMDIFrame140s", children=children, visible_at=self._after("page_switch"))
+
+    def _grid(self, table: Callable[[], str]) -> SimulatedControl:
+        """数据表格：面板 1047 -> 容器 -> CVirtualGridCtrl"""
+        grid = self._control("Pane", "CVirtualGridCtrl", role="grid")
+        grid.table = table
+        grid.selected_all = False
+        return self._control("Pane", "AfxWnd140s", auto_id="1047", children=[self._control("Pane", "AfxWnd140s", children=[grid])])
+
+    def _build_order_page(self, side: str) -> List[SimulatedControl]:
+        stock_name = self._control("Text", "Static", auto_id="1036")
+        stock_code = self._control("Edit", "Edit", auto_id="1032", role="stock_code_edit")
+        stock_code.stock_name = stock_name
+        self.order_inputs = (side, stock_code, self._control("Edit", "Edit", auto_id="1033"),
+                             self._control("Edit", "Edit", auto_id="1034"), stock_name)
+        return list(self.order_inputs[1:])
+
+    def _build_market_page(self, side: str) -> List[SimulatedControl]:
+        stock_code = self._control("Edit", "Edit", auto_id="1032")
+        quantity = self._control("Edit", "Edit", auto_id="1034")
+        strategies = self._control("List", "ComboLBox", children=[self._control("ListItem", text=text, role="strategy_item")
+                                                                  for text in MARKET_STRATEGIES])
+        combo_box = self._control("ComboBox", "ComboBox", auto_id="1541", text=MARKET_STRATEGIES[3], role="strategy_combo")
+        submit_button = self._control("Button", "Button", "买入" if side == "买入" else "卖出", auto_id="1006", role="market_submit")
+        submit_button.inputs = (side, stock_code, quantity)
+        combo_box.strategy_list = strategies
+        return [stock_code, quantity, combo_box, submit_button]
+
+    def _build_cancel_page(self) -> List[SimulatedControl]:
+        account = self.account
+        stock_code = self._control("Edit", "Edit", auto_id="3348")
+        self.order_filter = ""
+        query_button = self._control("Button", "Button", "查询", auto_id="3349", role="order_filter")
+        query_button.filter_edit = stock_code
+        buttons = []
+        for auto_id, side in (("30001", None), ("30002", "买入"), ("30003", "卖出")):
+            button = self._control("Button", "Button", auto_id=auto_id, role="cancel",
+                                   enabled=lambda side=side: len(account.pending_orders(self.order_filter, side)) > 0)
+            button.side = side
+            buttons.append(button)
+        return [stock_code, query_button, *buttons, self._grid(lambda: account.order_table(self.order_filter))]
+
+    def _build_funds_page(self) -> List[SimulatedControl]:
+        statics = [self._control("Text", "Static", lambda auto_id=auto_id: self.account.funds()[auto_id], auto_id=auto_id)
+                   for auto_id in ("1012", "1013", "1014", "1015", "1016", "1017", "1027")]
+        return statics + [self._grid(self.account.holding_table)]
+
+    def _build_history_page(self) -> List[SimulatedControl]:
+        buttons = [self._control("Button", "Button", auto_id=auto_id) for auto_id in ("5315", "5308", "5309", "5310", "5311")]
+        stock_code = self._control("Edit", "Edit", auto_id="1001")
+        combo_box = self._control("ComboBox", "ComboBox", auto_id="1337", children=[stock_code])
+        grid = self._control("Pane", "CVirtualGridCtrl", role="grid")
+        grid.table = lambda: self.account.order_table(stock_code.window_text())
+        grid.selected_all = False
+        table = self._control("Pane", text="HexinScrollWnd", children=[
+            self._control("Pane", text="HexinScrollWnd2", children=[grid]),
+        ])
+        return [*buttons, combo_box, self._control("Button", "Button", "查询", auto_id="2449"), table]
+
+    # ============ 界面行为 ============
+
+    def press(self, control: SimulatedControl, key: str) -> None:
+        """处理发送到控件的按键"""
+        with self._lock:
+            self.stats["keystrokes"] += 1
+            self._sleep("keystroke")
+            if control.control_type == "Edit":
+                self._edit(control, key)
+            elif key in self.HOTKEY_PAGES and control is self.main_window:
+                self._switch_page(self.HOTKEY_PAGES[key])
+            elif key == "F5" and control is self.main_window:
+                self._refreshed_at = self._after("table_refresh")
+            elif key == "ENTER" and control is self.main_window and self.page in ("买入[F1]", "卖出[F2]"):
+                self._submit_order()
+            elif key == "ENTER" and control.role == "captcha_dialog":
+                self._submit_captcha(control)
+            elif key == "ENTER" and control.control_type == "Button":
+                self.click(control)
+            elif key == "ESC" and control in self._popups:
+                self.close_popup(control)
+            elif control.role == "grid":
+                self._grid_key(control, key)
+
+    def _edit(self, control: SimulatedControl, key: str) -> None:
+        text = control.window_text() if control._pending is None else control._pending[1]
+        if key == "BACKSPACE":
+            text = text[:-1]
+        elif len(key) == 1:
+            text += key
+        else:
+            return
+        control.set_text(text, self.latencies["text_commit"])
+        if control.role == "stock_code_edit":
+            stock = self.account.stocks.get(text)
+            control.stock_name.set_text(stock[0] if stock else "", self.latencies["stock_name"])
+
+    def click(self, control: SimulatedControl) -> None:
+        with self._lock:
+            if control.role == "order_filter":
+                self.order_filter = control.filter_edit.window_text().strip()
+            elif control.role == "cancel":
+                self.account.cancel_orders(self.order_filter, control.side)
+            elif control.role == "market_submit":
+                self._submit_market_order(control)
+            elif control.role == "strategy_item":
+                # 选中策略后收起下拉列表
+                combo_box = control.parent.parent
+                combo_box.set_text(control.window_text())
+                combo_box._children.remove(control.parent)
+                combo_box.expanded = False
+            elif control.role == "captcha_image":
+                control.captcha_code = self._new_captcha_code()
+            elif control.control_type == "Button" and control.parent in self._popups:
+                if control.parent.role == "captcha_dialog" and control.auto_id == "1":
+                    self._submit_captcha(control.parent)
+                else:
+                    self.close_popup(control.parent)
+
+    def expand(self, control: SimulatedControl) -> None:
+        with self._lock:
+            if control.role == "menu_item" and not control.expanded:
+                control.expanded = True
+                for child in control._children:
+                    child.visible_at = self._after("menu_expand")
+            elif control.role == "strategy_combo" and not control.expanded:
+                control.expanded = True
+                control.strategy_list.visible_at = self._after("popup")
+                control.add_child(control.strategy_list)
+
+    def select(self, control: SimulatedControl) -> None:
+        with self._lock:
+            if control.role != "menu_item":
+                return
+            parent = control.parent
+            page = control.window_text() if parent is self.tree else f"{parent.window_text()}/{control.window_text()}"
+            self._switch_page(page)
+
+    def is_selected(self, control: SimulatedControl) -> bool:
+        return control is self._selected_item
+
+    def get_selection(self, control: SimulatedControl) -> List[SimulatedElementInfo]:
+        return [self._selected_item.element_info] if control is self.tree and self._selected_item is not None else []
+
+    def close_popup(self, popup: SimulatedControl) -> None:
+        with self._lock:
+            if popup in self._popups:
+                self._popups.remove(popup)
+                popup.destroy()
+                if popup.role == "captcha_dialog":
+                    # 取消验证码，本次复制作废
+                    self._pending_copy = None
+
+    def _switch_page(self, page: str) -> None:
+        """切换功能面板，并同步左侧菜单的选中项"""
+        self.page = page
+        self.frame.remove_child(self.page_panel)
+        self.page_panel = self.frame.add_child(self._build_page(page))
+        main_option, _, sub_option = page.partition("/")
+        item = next((child for child in self.tree._children if child.window_text() == main_option), None)
+        if item is not None and sub_option:
+            item = next((child for child in item._children if child.window_text() == sub_option), None)
+        self._selected_item = item
+
+    def _submit_order(self) -> None:
+        side, stock_code, price, quantity, stock_name = self.order_inputs
+        error = self.account.place_order(side, stock_code.window_text(), price.window_text(), quantity.window_text())
+        if error is not None:
+            self._show_failure(error)
+            return
+        # 提交成功后客户端清空输入框
+        delay = self.latencies["order_submit"]
+        for control in (stock_code, price, quantity, stock_name):
+            control.set_text("", delay)
+
+    def _submit_market_order(self, button: SimulatedControl) -> None:
+        side, stock_code, quantity = button.inputs
+        code = stock_code.window_text()
+        price = self.account.stocks.get(code, ("", 0.0))[1]
+        error = self.account.place_order(side, code, str(price), quantity.window_text())
+        if error is not None:
+            self._show_failure(error)
+
+    def _show_failure(self, message: str) -> None:
+        """弹出委托失败提示"""
+        self._popups.append(self._control("Pane", "#32770", visible_at=self._after("order_submit"), role="failure_dialog", children=[
+            self._control("Text", "Static", "提交失败"),
+            self._control("Image", "Static", message, auto_id="1004"),
+            self._control("Button", "Button", "确定", auto_id="2"),
+        ]))
+
+    def _grid_key(self, grid: SimulatedControl, key: str) -> None:
+        if key == "^a":
+            grid.selected_all = True
+        elif key == "^c" and grid.selected_all:
+            self.stats["copies"] += 1
+            # 表格刷新完成后才能复制到最新数据
+            delay = max(self._refreshed_at - time.perf_counter(), 0.0) + self.latencies["copy"]
+            if self.captcha_every and self.stats["copies"] % self.captcha_every == 0:
+                self._pending_copy = grid.table()
+                self._show_captcha()
+            else:
+                self.clipboard.copy_after(grid.table(), delay)
+
+    def _new_captcha_code(self) -> str:
+        return "".join(self._random.choice("0123456789") for _ in range(4))
+
+    def _show_captcha(self) -> None:
+        """复制触发限制，弹出验证码框"""
+        self.stats["captchas"] += 1
+        image = self._control("Image", "Static", auto_id="2405", role="captcha_image")
+        image.captcha_code = self._new_captcha_code()
+        self._popups.append(self._control("Pane", "#32770", visible_at=self._after("popup"), role="captcha_dialog", children=[
+            self._control("Text", "Static", "提示"),
+            self._control("Text", "Static", "为保护您的账户安全，请先输入验证码"),
+            self._control("Edit", "Edit", auto_id="2404"),
+            image,
+            self._control("Button", "Button", "确定", auto_id="1"),
+            self._control("Button", "Button", "取消", auto_id="2"),
+        ]))
+
+    def _submit_captcha(self, dialog: SimulatedControl) -> None:
+        """确认验证码：正确则关闭弹窗并完成复制，错误则刷新验证码"""
+        code_edit = next(child for child in dialog._children if child.auto_id == "2404")
+        image = next(child for child in dialog._children if child.auto_id == "2405")
+        if code_edit.window_text() != image.captcha_code:
+            image.captcha_code = self._new_captcha_code()
+            return
+        pending_copy = self._pending_copy
+        self.close_popup(dialog)
+        if pending_copy is not None:
+            self.clipboard.copy_after(pending_copy, self.latencies["copy"])
+
+    # ============ 工具方法 ============
+
+    def _after(self, latency: str) -> float:
+        """界面在指定耗时之后可见的时间点"""
+        return time.perf_counter() + self.latencies[latency]
+
+    def _sleep(self, latency: str) -> None:
+        if self.latencies[latency] > 0:
+            time.sleep(self.latencies[latency])
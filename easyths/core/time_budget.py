@@ -0,0 +1,157 @@
+"""耗时预算统计 - 记录一次操作中睡眠、等待、UIA查找、按键、验证码、剪贴板各自的耗时
+
+每类耗时同时记录含嵌套的总耗时（time）和扣除嵌套部分的自身耗时（self_time），
+例如验证码处理中的按键和睡眠计入 keystroke / sleep，captcha 的自身耗时只剩OCR等部分。
+各类自身耗时之和与操作总耗时的差值记为 other（控件点击、读取文本等未分类的耗时）。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# 统计的耗时类别
+BUDGET_CATEGORIES = ("sleep", "wait", "uia_lookup", "keystroke", "captcha", "clipboard")
+
+
+def _round(value: float) -> float:
+    return round(value, 4)
+
+
+class TimeBudget:
+    """一次操作运行的耗时预算"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._stage: Optional[str] = None
+        self._stage_start = self._start
+        self._stages: Dict[str, float] = {}
+        # 类别 -> [次数, 总耗时, 自身耗时]
+        self._categories: Dict[str, List[float]] = {name: [0, 0.0, 0.0] for name in BUDGET_CATEGORIES}
+        # 阶段 -> 类别 -> 自身耗时
+        self._by_stage: Dict[str, Dict[str, float]] = {}
+        # 正在计时的嵌套类别，元素为已计入子类别的耗时
+        self._stack: List[List[float]] = []
+
+    def enter_stage(self, stage: str) -> None:
+        """进入新的执行阶段（validate / pre_execute / execute / post_execute）"""
+        now = time.perf_counter()
+        self._close_stage(now)
+        self._stage = stage
+        self._stage_start = now
+
+    def _close_stage(self, now: float) -> None:
+        if self._stage is not None:
+            self._stages[self._stage] = self._stages.get(self._stage, 0.0) + now - self._stage_start
+
+    @contextmanager
+    def measure(self, category: str) -> Iterator[None]:
+        """统计代码块的耗时"""
+        start = time.perf_counter()
+        frame = [0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            self.add(category, elapsed, elapsed - frame[0])
+
+    def add(self, category: str, elapsed: float, self_time: Optional[float] = None) -> None:
+        """直接计入一次耗时，self_time 默认等于 elapsed"""
+        if self_time is None:
+            self_time = elapsed
+        record = self._categories[category]
+        record[0] += 1
+        record[1] += elapsed
+        record[2] += self_time
+        if self._stack:
+            self._stack[-1][0] += elapsed
+        stage = self._by_stage.setdefault(self._stage or "init", {})
+        stage[category] = stage.get(category, 0.0) + self_time
+
+    def summary(self) -> Dict[str, Any]:
+        """结束计时并返回耗时明细"""
+        now = time.perf_counter()
+        self._close_stage(now)
+        self._stage = None
+        total = now - self._start
+        accounted = sum(record[2] for record in self._categories.values())
+        return {
+            "total": _round(total),
+            "stages": {stage: _round(elapsed) for stage, elapsed in self._stages.items()},
+            "categories": {
+                name: {"count": int(count), "time": _round(elapsed), "self_time": _round(self_time)}
+                for name, (count, elapsed, self_time) in self._categories.items()
+            },
+            "by_stage": {
+                stage: {name: _round(elapsed) for name, elapsed in categories.items()}
+                for stage, categories in self._by_stage.items()
+            },
+            "other": _round(max(total - accounted, 0.0)),
+        }
+
+
+class BudgetStats:
+    """按操作名称汇总耗时预算，由队列处理线程写入、API线程读取"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, operation_name: str, budget: Optional[Dict[str, Any]]) -> None:
+        """汇总一次操作运行的耗时明细"""
+        if not budget:
+            return
+        with self._lock:
+            entry = self._operations.get(operation_name)
+            if entry is None:
+                entry = {
+                    "runs": 0,
+                    "total": 0.0,
+                    "other": 0.0,
+                    "stages": {},
+                    "categories": {name: {"count": 0, "time": 0.0, "self_time": 0.0} for name in BUDGET_CATEGORIES},
+                }
+                self._operations[operation_name] = entry
+            entry["runs"] += 1
+            entry["total"] += budget["total"]
+            entry["other"] += budget["other"]
+            for stage, elapsed in budget["stages"].items():
+                entry["stages"][stage] = entry["stages"].get(stage, 0.0) + elapsed
+            for name, record in budget["categories"].items():
+                target = entry["categories"][name]
+                target["count"] += record["count"]
+                target["time"] += record["time"]
+                target["self_time"] += record["self_time"]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各操作的累计耗时和平均每次耗时"""
+        with self._lock:
+            result = {}
+            for operation_name, entry in self._operations.items():
+                runs = entry["runs"]
+                result[operation_name] = {
+                    "runs": runs,
+                    "total": _round(entry["total"]),
+                    "avg_total": _round(entry["total"] / runs),
+                    "avg_other": _round(entry["other"] / runs),
+                    "avg_stages": {stage: _round(elapsed / runs) for stage, elapsed in entry["stages"].items()},
+                    "categories": {
+                        name: {
+                            "count": record["count"],
+                            "time": _round(record["time"]),
+                            "self_time": _round(record["self_time"]),
+                            "avg_self_time": _round(record["self_time"] / runs),
+                        }
+                        for name, record in entry["categories"].items()
+                    },
+                }
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._operations.clear()
@@ -1,37 +1,100 @@
 """同花顺交易自动化器 - 核心GUI自动化类
 
-基于 pywinauto 的 UI Automation backend 实现，提供完整的同花顺交易客户端自动化操作能力。
+默认基于 pywinauto 的 UI Automation backend 实现，提供完整的同花顺交易客户端自动化操作能力；
+界面实现可通过 GUI 后端替换（见 easyths.core.gui_backend），如在 Linux 上使用模拟客户端。
 
 Author: noimank
 Email: noimank@163.com
 """
 
-from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 import structlog
-from pywinauto.application import Application
 
+from easyths.core.control_cache import ControlCache
+from easyths.core.gui_backend import GuiBackend, create_gui_backend
 from easyths.utils import project_config_instance
 
 logger = structlog.get_logger(__name__)
 
 
+class PageState:
+    """GUI 页面状态 - 记录客户端当前显示的页面，用于跳过重复导航
+
+    设计原则：
+        - 页面标识：快捷键页面为菜单名（如 买入[F1]），左侧菜单页面为 主菜单/子菜单（如 查询[F4]/资金股票）
+        - 指纹校验：导航完成后记录左侧菜单树的选中项，再次进入前比对，不一致（如用户手动切换过页面）则回退到完整导航
+        - 保守失效：操作失败、填写过表单、重连后都视为页面状态未知
+        - 页面代数：每次导航或失效都会递增，页面级的控件缓存据此失效
+    """
+
+    def __init__(self):
+        self.page: Optional[str] = None  # 当前页面标识，None 表示未知
+        self.fingerprint: Optional[Tuple[str, ...]] = None  # 导航完成时左侧菜单树的选中项
+        self.generation = 0  # 页面代数
+        self._stats = {
+            'navigated': 0,  # 执行了完整导航
+            'skipped': 0,  # 已在目标页面，跳过导航
+            'mismatched': 0,  # 记录的页面与实际不一致，回退到完整导航
+        }
+
+    def is_on(self, page: str) -> bool:
+        """记录的当前页面是否为目标页面"""
+        return self.page is not None and self.page == page
+
+    def update(self, page: str, fingerprint: Optional[Tuple[str, ...]]) -> None:
+        """记录完成导航后的页面"""
+        self.page = page
+        self.fingerprint = fingerprint
+        self.generation += 1
+        self._stats['navigated'] += 1
+
+    def record_skip(self) -> None:
+        self._stats['skipped'] += 1
+
+    def record_mismatch(self) -> None:
+        self._stats['mismatched'] += 1
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """当前页面状态未知，下次必须完整导航"""
+        self.page = None
+        self.fingerprint = None
+        self.generation += 1
+
+    def reset(self) -> None:
+        """连接变化时清空所有状态"""
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取页面导航统计信息"""
+        return {'page': self.page, **self._stats}
+
+
 class TonghuashunAutomator:
     """同花顺交易自动化器 - 核心GUI自动化类
 
     所有方法都是同步的，由调用方决定执行方式（直接调用或通过COM执行器）
     """
-    # 修改为 正则匹配 网上股票交易系统.*  避免可能未来版本更新导致找不到窗口的问题
-    # APP_TITLE_NAME = "网上股票交易系统5.0"
 
-    def __init__(self):
-        """初始化自动化器"""
+    def __init__(self, backend: Optional[GuiBackend] = None):
+        """初始化自动化器
+
+        Args:
+            backend: GUI 后端，None 时按配置项 trading_backend 创建
+        """
         self.app_path = project_config_instance.trading_app_path
-        self.app: Optional[Application] = None
+        self.backend = backend or create_gui_backend(project_config_instance.trading_backend)
+        self.app: Optional[Any] = None
         self.main_window = None
         self.main_window_wrapper_object = None
         self._connected = False
+        # 当前页面状态，操作导航前查询、导航后更新
+        self.page_state = PageState()
+        # 控件句柄缓存，重连后清空
+        self.control_cache = ControlCache(project_config_instance.app_locator_index_file)
+        # 界面交互轨迹录制器，开启录制时由 TraceRecorder.attach 设置
+        self.trace_recorder = None
         self.logger = structlog.get_logger(__name__)
 
     def connect(self) -> bool:
@@ -41,17 +104,12 @@ class TonghuashunAutomator:
             bool: 如果成功连接到同花顺应用返回 True，否则返回 False
         """
         try:
-            self.logger.info("正在连接同花顺...")
-
-            # 检查应用路径
-            if not self.app_path or not Path(self.app_path).exists():
-                self.logger.error("同花顺应用路径不存在", path=self.app_path)
-                return False
+            self.logger.info("正在连接同花顺...", backend=self.backend.name)
 
             # 连接应用
-            self.app = Application(backend="uia").connect(path=self.app_path, timeout=5)
-            self.main_window = self.app.window(title_re="网上股票交易系统.*", control_type="Window", visible_only=False, depth=1)
-            self.main_window_wrapper_object = self.main_window.wrapper_object()
+            self.app, self.main_window, self.main_window_wrapper_object = self.backend.connect(self.app_path)
+            self.page_state.reset()
+            self.control_cache.clear()
             self.logger.info("连接到同花顺进程")
             self._connected = True
 
@@ -66,6 +124,9 @@ class TonghuashunAutomator:
         self._connected = False
         self.main_window = None
         self.app = None
+        self.backend.disconnect()
+        self.page_state.reset()
+        self.control_cache.clear()
         self.logger.info("已断开同花顺连接")
 
     def is_connected(self) -> bool:
@@ -3,7 +3,7 @@
 
 架构说明：
     - 操作队列：后台线程串行执行所有业务操作（支持优先级）
-    - 自动化器：基于 pywinauto UIA backend 的 GUI 自动化
+    - 自动化器：基于 pywinauto UIA backend 的 GUI 自动化（可切换为模拟客户端）
     - 对外接口：异步高并发 API
 
 Author: noimank
@@ -21,7 +21,9 @@ import structlog
 
 from easyths.utils.logger import setup_logging
 from easyths.utils import project_config_instance
+from easyths.core import operation_registry
 from easyths.core.tonghuashun_automator import TonghuashunAutomator
+from easyths.core.gui_trace import TraceRecorder, TraceReplayer
 from easyths.core.operation_queue import OperationQueue
 from easyths.api.app import TradingAPIApp
 
@@ -80,6 +82,10 @@ def print_help():
     --exe_path <path>      指定同花顺交易程序路径（优先级高于配置文件）
     --config <file>        指定 TOML 配置文件路径
     --get_config           将示例配置文件复制到当前目录
+    --calibrate            校准本机的界面延时并保存延时配置（不启动API服务）
+    --calibrate_rounds <n> 校准时每个候选时长重复执行的次数（默认5）
+    --replay <file>        离线回放界面交互轨迹文件并输出回放报告（无需同花顺客户端）
+    --replay_fast          回放时不按录制的耗时等待
     --version, -v          显示版本信息
     --help                 显示此帮助信息
 
@@ -99,13 +105,19 @@ def print_help():
     # 生成示例配置文件
     uvx easyths[server] --get_config
 
+    # 校准本机延时（建议在收盘后执行，需已登录同花顺）
+    uvx easyths[server] --config my_config.toml --calibrate
+
+    # 离线回放录制的轨迹（[app] trace_enabled = true 时录制）
+    uvx easyths[server] --replay ~/easyths/traces/20250101_093000_000000_buy.jsonl.gz
+
     # 组合使用
     uvx easyths[server] --config my_config.toml --exe_path "C:/同花顺/xiadan.exe"
 
 配置文件:
     配置文件采用 TOML 格式，包含以下部分：
     - [app]: 应用程序配置
-    - [trading]: 交易程序配置
+    - [trading]: 交易程序配置（backend = "simulated" 时使用模拟客户端，可在 Linux 上运行）
     - [queue]: 队列配置
     - [api]: API 服务配置
     - [logging]: 日志配置
@@ -162,6 +174,28 @@ def parse_args():
         action="store_true",
         help="将示例配置文件复制到当前目录"
     )
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="校准本机的界面延时并保存延时配置"
+    )
+    parser.add_argument(
+        "--calibrate_rounds",
+        type=int,
+        default=5,
+        help="校准时每个候选时长重复执行的次数"
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="离线回放界面交互轨迹文件"
+    )
+    parser.add_argument(
+        "--replay_fast",
+        action="store_true",
+        help="回放时不按录制的耗时等待"
+    )
     parser.add_argument(
         "--help",
         action="store_true",
@@ -185,11 +219,17 @@ def check_running_env():
     2. 下单 exe 是否存在
     3. 是否存在对应的进程
 
+    使用模拟客户端（trading_backend = simulated）时不需要以上条件
+
     Returns:
         bool: 如果运行环境可用返回 True，否则返回 False
     """
     logger = structlog.get_logger(__name__)
 
+    if project_config_instance.trading_backend == "simulated":
+        logger.info("使用模拟同花顺客户端，跳过运行环境检查")
+        return True
+
     # 检查是否为 Windows 系统
     if platform.system() != "Windows":
         logger.error(
@@ -245,6 +285,10 @@ def initialize_components():
     # 创建自动化器
     automator = TonghuashunAutomator()
 
+    # 录制界面交互轨迹（需在连接前包装 GUI 后端）
+    if project_config_instance.app_trace_enabled:
+        TraceRecorder(project_config_instance.app_trace_dir, project_config_instance.app_trace_min_duration).attach(automator)
+
     # 连接到同花顺
     automator.connect()
 
@@ -255,6 +299,59 @@ def initialize_components():
     return automator, operation_queue
 
 
+def run_calibration(rounds: int) -> bool:
+    """校准本机的界面延时
+
+    反复执行只读查询，逐个缩短各命名延时直到失败率上升，结果保存为延时配置，之后启动时自动加载
+
+    Args:
+        rounds: 每个候选时长重复执行的次数
+
+    Returns:
+        bool: 校准是否成功
+    """
+    automator = TonghuashunAutomator()
+    if not automator.connect():
+        print("错误: 连接同花顺失败，无法校准，请确认交易客户端已启动并登录")
+        return False
+    operation_registry.load_plugins()
+    try:
+        operation = operation_registry.get_operation_instance("calibrate_delays", automator)
+        result = operation.run({"rounds": rounds})
+    finally:
+        automator.disconnect()
+
+    print(result.message)
+    if result.success:
+        for name, delay in result.data["profile"]["delays"].items():
+            if delay["calibrated"] is not None:
+                print(f"  {name}: 默认 {delay['default']}s -> 校准 {delay['calibrated']}s，实际使用 {delay['effective']}s")
+    return result.success
+
+
+def run_replay(path: str, realtime: bool) -> bool:
+    """离线回放界面交互轨迹
+
+    Args:
+        path: 轨迹文件路径
+        realtime: 是否按录制的耗时等待
+
+    Returns:
+        bool: 回放结果是否与录制一致且没有不匹配的调用
+    """
+    operation_registry.load_plugins()
+    report = TraceReplayer(path, realtime=realtime).run()
+
+    recorded, replayed = report["recorded"], report["replayed"]
+    print(f"回放操作: {report['operation']}")
+    print(f"  录制: success={recorded['success']} 耗时 {recorded['duration']:.3f}s  {recorded['message']}")
+    print(f"  回放: success={replayed['success']} 耗时 {replayed['duration']:.3f}s  {replayed['message']}")
+    print(f"  调用匹配: {report['calls']}")
+    for missing in report["missing"]:
+        print(f"  不匹配: {missing}")
+    return recorded["success"] == replayed["success"] and not report["missing"]
+
+
 def main():
     """主函数"""
     # 解析命令行参数
@@ -303,11 +400,23 @@ def main():
     # 打印项目信息
     print_project_info()
 
+    # 处理 --replay 参数（离线回放，无需检查运行环境）
+    if args.replay:
+        if not run_replay(args.replay, realtime=not args.replay_fast):
+            sys.exit(1)
+        return
+
     # 检查运行环境
     if not check_running_env():
         logger.error("运行环境检查失败，系统退出")
         sys.exit(1)
 
+    # 处理 --calibrate 参数
+    if args.calibrate:
+        if not run_calibration(args.calibrate_rounds):
+            sys.exit(1)
+        return
+
     # 初始化组件
     automator, operation_queue = initialize_components()
 
@@ -1,16 +1,18 @@
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 import uuid
 
 
 class OperationStatus(Enum):
     """操作状态枚举"""
+    SCHEDULED = "scheduled"  # 定时操作，等待到 execute_at 前入队
     QUEUED = "queued"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    EXPIRED = "expired"  # 超过截止时间仍未开始执行，已丢弃
 
 
 class OperationResult(BaseModel):
@@ -19,6 +21,7 @@ class OperationResult(BaseModel):
     data: Any = None
     message: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    metadata: Dict[str, Any] = Field(default_factory=dict)  # 附加信息，如 cached / cache_age
 
     class Config:
         json_encoders = {
@@ -37,6 +40,16 @@ class Operation(BaseModel):
     error: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
     metadata: Dict[str, Any] = Field(default_factory=dict)
+    # 可接受的查询缓存最大时长（秒），None 使用操作声明的 cache_ttl，0 表示不使用缓存
+    max_age: Optional[float] = Field(default=None, ge=0)
+    # 截止时间：到这个时间仍未开始执行的操作直接以 expired 结束，不再操作界面
+    deadline: Optional[datetime] = None
+    # 最长排队时间（秒），提交时换算为截止时间，与 deadline 取较早者
+    max_queue_wait: Optional[float] = Field(default=None, gt=0)
+    # 提交操作的调用方（认证的 API 密钥对应的名称），队列按调用方公平调度
+    caller: Optional[str] = None
+    # 定时执行时刻：提前入队完成导航和填写，到这个时刻才提交
+    execute_at: Optional[datetime] = None
 
     class Config:
         json_encoders = {
@@ -44,6 +57,14 @@ class Operation(BaseModel):
             OperationStatus: lambda v: v.value
         }
 
+    @field_validator("deadline", "execute_at")
+    @classmethod
+    def _to_local_time(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """带时区的时间转换为本地时间，与 timestamp 一致"""
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return self.model_dump(exclude_none=True)
@@ -64,6 +85,17 @@ class PluginMetadata(BaseModel):
     author: Optional[str] = None
     operation_name: str
     parameters: Dict[str, Any] = Field(default_factory=dict)
+    # 只读/幂等操作（查询类）：相同参数的并发请求会合并为一次执行，共享结果
+    read_only: bool = False
+    # 查询缓存时长（秒），仅对只读操作生效，0 表示不缓存
+    cache_ttl: float = 0
+    # 只读操作依赖的账户状态（如 holdings、funds），写操作通过 invalidates 使依赖这些状态的缓存失效
+    depends_on: List[str] = Field(default_factory=list)
+    invalidates: List[str] = Field(default_factory=list)
+    # 操作的目标页面，与导航后记录的页面标识一致（如 买入[F1]、查询[F4]/资金股票），页面亲和调度据此连续执行同页面的操作
+    page: Optional[str] = None
+    # 支持预先定位：定时执行时在 execute 中完成导航和填写后调用 fire() 再提交，否则在核心操作开始前等待
+    preposition: bool = False
 
     class Config:
         json_encoders = {
@@ -0,0 +1,246 @@
+import time
+from typing import Dict, Any, List, Optional
+
+from easyths.core import BaseOperation
+from easyths.core.instrument_rules import instrument_rules
+from easyths.core.control_cache import ORDER_PRICE, ORDER_QUANTITY, ORDER_STOCK_CODE, ORDER_STOCK_NAME
+from easyths.models.operations import PluginMetadata, OperationResult
+
+
+class BatchOrderOperation(BaseOperation):
+    """批量委托操作 - 在已打开的买入/卖出页面上连续录入多笔委托"""
+
+    # 单次批量委托的最大笔数
+    MAX_LEGS = 50
+    # 买卖方向 -> (页面快捷键, 操作名称, 页面标识)
+    SIDES = {
+        "buy": ("{F1}", "买入", "买入[F1]"),
+        "sell": ("{F2}", "卖出", "卖出[F2]"),
+    }
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(
+            name="BatchOrderOperation",
+            version="1.0.0",
+            description="批量买入/卖出股票，在委托页面上连续录入，逐笔返回结果",
+            author="noimank",
+            operation_name="batch_order",
+            invalidates=["holdings", "funds", "orders"],
+            parameters={
+                "legs": {
+                    "type": "array",
+                    "required": True,
+                    "description": "委托列表，按顺序提交，每笔包含 side（buy/sell）、stock_code、price、quantity",
+                    "min_items": 1,
+                    "max_items": self.MAX_LEGS,
+                    "items": {
+                        "side": {
+                            "type": "string",
+                            "required": True,
+                            "description": "买卖方向",
+                            "enum": ["buy", "sell"]
+                        },
+                        "stock_code": {
+                            "type": "string",
+                            "required": True,
+                            "description": "股票代码（6位数字）",
+                            "pattern": "^[0-9]{6}$"
+                        },
+                        "price": {
+                            "type": "number",
+                            "required": True,
+                            "description": "委托价格",
+                            "minimum": 0.01,
+                            "maximum": 10000
+                        },
+                        "quantity": {
+                            "type": "integer",
+                            "required": True,
+                            "description": "委托数量（股票必须是100的倍数，可转债必须是10的倍数）",
+                            "minimum": 10,
+                            "multiple_of": 10
+                        }
+                    }
+                },
+                "stop_on_error": {
+                    "type": "boolean",
+                    "required": False,
+                    "description": "某一笔失败后是否停止提交剩余委托",
+                    "default": False
+                }
+            }
+        )
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        """验证批量委托参数（任意一笔不合法则整批不执行）"""
+        try:
+            legs = params.get("legs")
+            if not isinstance(legs, list) or not legs:
+                self.logger.error("legs 必须是非空列表")
+                return False
+            if len(legs) > self.MAX_LEGS:
+                self.logger.error(f"单次批量委托不能超过{self.MAX_LEGS}笔")
+                return False
+
+            for index, leg in enumerate(legs):
+                error = self._validate_leg(leg)
+                if error:
+                    self.logger.error(f"第{index + 1}笔委托参数错误: {error}")
+                    return False
+
+            self.logger.info("批量委托参数验证通过", leg_count=len(legs))
+            return True
+
+        except Exception as e:
+            self.logger.exception("参数验证异常", error=str(e))
+            return False
+
+    def _validate_leg(self, leg: Any) -> Optional[str]:
+        """验证单笔委托，返回错误信息，合法返回None"""
+        if not isinstance(leg, dict):
+            return "委托必须是对象"
+        for param in ["side", "stock_code", "price", "quantity"]:
+            if param not in leg:
+                return f"缺少必需参数: {param}"
+
+        if leg["side"] not in self.SIDES:
+            return "side 必须是 buy 或 sell"
+
+        stock_code = leg["stock_code"]
+        if not isinstance(stock_code, str) or len(stock_code) != 6 or not stock_code.isdigit():
+            return "股票代码格式错误，必须是6位数字"
+
+        price = leg["price"]
+        if not isinstance(price, (int, float)) or price <= 0:
+            return "价格必须大于0"
+
+        # 按证券类别检查每手数量（可转债10张、股票100股）和单笔金额上限
+        return instrument_rules.check_order(stock_code, price, leg["quantity"])
+
+    def _open_order_page(self, side: str) -> Dict[str, Any]:
+        """打开买入/卖出页面并解析委托输入控件
+
+        Returns:
+            Dict: 输入控件，后续同方向的委托直接复用
+        """
+        page_key, _, page = self.SIDES[side]
+        # 已在委托页面时跳过导航；上一笔失败后页面已标记失效，会先切走再切回清空残留输入
+        self.switch_hotkey_page(page_key, page)
+        return {
+            "stock_code": self.locate(ORDER_STOCK_CODE),
+            "price": self.locate(ORDER_PRICE),
+            "quantity": self.locate(ORDER_QUANTITY),
+            "stock_name": self.locate(ORDER_STOCK_NAME),
+        }
+
+    def _submit_leg(self, main_window, controls: Dict[str, Any], leg: Dict[str, Any]) -> Dict[str, Any]:
+        """在已打开的委托页面上录入并提交一笔委托"""
+        stock_code = leg["stock_code"]
+        _, side_name, _ = self.SIDES[leg["side"]]
+        # 按证券类别的价格精度格式化（ETF、可转债为三位小数）
+        price = instrument_rules.format_price(stock_code, leg["price"])
+        quantity = leg["quantity"]
+
+        self.type_keys(controls["stock_code"], stock_code)
+        self.wait_for_text(controls["stock_code"], stock_code, timeout=0.08)
+        self.type_keys(controls["price"], price)
+        self.wait_for_text(controls["price"], price, timeout=0.08)
+        self.type_keys(controls["quantity"], str(quantity))
+        # 等待数量提交、证券名称带出后再确认
+        is_order_ready = self.wait_until(lambda: controls["quantity"].window_text() == str(quantity) and len(controls["stock_name"].window_text()) > 0,
+                                         timeout=0.3, name="order_ready")
+        self.type_keys(main_window, "{ENTER}")
+        # 等待弹窗出现或客户端清空输入框（提交成功）；证券名称没带出时只能等弹窗
+        if is_order_ready:
+            self.wait_until(lambda: self.is_exist_pop_dialog() or len(controls["stock_name"].window_text()) == 0,
+                            timeout=0.25, name="order_submitted")
+        else:
+            self.wait_for_pop_dialog(0.25)
+
+        # 没弹窗就是成功；成功后客户端会清空输入框，证券名称随之清空
+        is_op_success = not self.is_exist_pop_dialog()
+        stock_name = controls["stock_name"].window_text()
+
+        message = f"成功提交{stock_code}的{side_name}委托"
+        if not is_op_success:
+            message = f"{side_name}委托失败"
+            pop_dialog_title, pop_control = self.get_pop_dialog()
+            if pop_dialog_title == "失败提示":
+                message = self.get_control_with_children(pop_control, control_type="Image", auto_id="1004", class_name="Static").window_text()
+                self.type_keys(self.get_control_with_children(pop_control, control_type="Button", auto_id="2", class_name="Button"), "{ENTER}")
+            else:
+                self.close_pop_dialog()
+        elif len(stock_name) > 0:
+            message = f"{side_name}操作未能成功，请检查软件设置是否有项目要求不符的地方"
+            is_op_success = False
+
+        return {
+            "side": leg["side"],
+            "stock_code": stock_code,
+            "price": price,
+            "quantity": quantity,
+            "success": is_op_success,
+            "message": message,
+        }
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        """执行批量委托 - 同方向的连续委托只打开一次页面并复用输入控件"""
+        legs: List[Dict[str, Any]] = params["legs"]
+        stop_on_error = params.get("stop_on_error", False)
+        start_time = time.time()
+        results: List[Dict[str, Any]] = []
+
+        try:
+            self.logger.info("执行批量委托", leg_count=len(legs))
+            main_window = self.get_main_window(wrapper_obj=True)
+            controls = None
+            current_side = None
+
+            for index, leg in enumerate(legs):
+                # 切换方向或上一笔失败（输入框可能残留内容）时重新打开页面
+                if controls is None or leg["side"] != current_side:
+                    controls = self._open_order_page(leg["side"])
+                    current_side = leg["side"]
+
+                try:
+                    leg_result = self._submit_leg(main_window, controls, leg)
+                except Exception as e:
+                    self.logger.exception("批量委托单笔异常", index=index, error=str(e))
+                    leg_result = {**leg, "success": False, "message": f"委托异常: {str(e)}"}
+
+                leg_result["index"] = index
+                results.append(leg_result)
+                if not leg_result["success"]:
+                    # 输入框可能残留内容，重新打开页面时先切走再切回清空
+                    self.mark_page_dirty()
+                    controls = None
+                    if stop_on_error:
+                        break
+
+            success_count = sum(1 for leg_result in results if leg_result["success"])
+            skipped_count = len(legs) - len(results)
+            elapsed = time.time() - start_time
+            self.logger.info(f"批量委托完成，成功{success_count}/{len(legs)}笔，耗时{elapsed}")
+
+            message = f"成功提交{success_count}/{len(legs)}笔委托"
+            if skipped_count:
+                message += f"，因失败停止，剩余{skipped_count}笔未提交"
+            return OperationResult(
+                success=success_count == len(legs),
+                message=message,
+                data={
+                    "legs": results,
+                    "success_count": success_count,
+                    "failed_count": len(results) - success_count,
+                    "skipped_count": skipped_count,
+                },
+            )
+
+        except Exception as e:
+            error_msg = f"批量委托异常: {str(e)}"
+            self.logger.exception(error_msg)
+            return OperationResult(
+                success=False,
+                message=error_msg,
+                data={"legs": results, "success_count": sum(1 for leg_result in results if leg_result["success"])},
+            )
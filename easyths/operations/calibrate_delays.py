@@ -0,0 +1,99 @@
+from typing import Dict, Any
+
+from easyths.core import BaseOperation, operation_registry
+from easyths.core.delay_profile import DelayCalibrator, get_delay_profile
+from easyths.models.operations import PluginMetadata, OperationResult
+from easyths.utils import project_config_instance
+
+
+class CalibrateDelaysOperation(BaseOperation):
+    """延时校准操作 - 反复执行只读查询，为本机找出各延时能稳定通过的最短时长"""
+
+    # 校准使用的只读查询及参数（结果需可直接比较，因此使用 json 格式）
+    CALIBRATION_OPERATIONS = {
+        "holding_query": {"return_type": "json"},
+        "funds_query": {},
+        "order_query": {"return_type": "json"},
+        "historical_commission_query": {"return_type": "json"},
+        "condition_order_query": {"return_type": "json"},
+    }
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(
+            name="CalibrateDelaysOperation",
+            version="1.0.0",
+            description="校准本机的界面延时，结果保存为延时配置并立即生效（耗时数分钟，建议在收盘后执行）",
+            author="noimank",
+            operation_name="calibrate_delays",
+            parameters={
+                "operations": {
+                    "type": "array",
+                    "required": False,
+                    "description": "校准使用的查询操作，默认全部",
+                    "enum": list(self.CALIBRATION_OPERATIONS)
+                },
+                "rounds": {
+                    "type": "integer",
+                    "required": False,
+                    "description": "每个候选时长重复执行的次数",
+                    "default": 5,
+                    "minimum": 1,
+                    "maximum": 20
+                },
+                "tolerance": {
+                    "type": "number",
+                    "required": False,
+                    "description": "允许的失败率上升幅度",
+                    "default": 0.0,
+                    "minimum": 0,
+                    "maximum": 1
+                }
+            }
+        )
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        """验证校准参数"""
+        operations = params.get("operations", list(self.CALIBRATION_OPERATIONS))
+        if not isinstance(operations, list) or not operations:
+            self.logger.error("参数operations必须是非空列表")
+            return False
+        for name in operations:
+            if name not in self.CALIBRATION_OPERATIONS:
+                self.logger.error(f"不支持用于校准的操作：{name}，可选：{list(self.CALIBRATION_OPERATIONS)}")
+                return False
+        rounds = params.get("rounds", 5)
+        if not isinstance(rounds, int) or not 1 <= rounds <= 20:
+            self.logger.error("参数rounds必须是1-20的整数")
+            return False
+        tolerance = params.get("tolerance", 0.0)
+        if not isinstance(tolerance, (int, float)) or not 0 <= tolerance <= 1:
+            self.logger.error("参数tolerance必须在0-1之间")
+            return False
+        return True
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        """执行延时校准"""
+        operations = [(name, self.CALIBRATION_OPERATIONS[name])
+                      for name in params.get("operations", list(self.CALIBRATION_OPERATIONS))]
+
+        def run_operation(name: str, operation_params: Dict[str, Any]) -> OperationResult:
+            # 每次都完整导航，使菜单、页面切换的延时也参与校准
+            self.automator.page_state.invalidate()
+            return operation_registry.get_operation_instance(name, self.automator).run(operation_params)
+
+        profile = get_delay_profile()
+        calibrator = DelayCalibrator(run_operation, profile, operations,
+                                     rounds=params.get("rounds", 5), tolerance=params.get("tolerance", 0.0))
+        try:
+            self.logger.info("开始校准延时", operations=[name for name, _ in operations])
+            details = calibrator.calibrate()
+            profile.save(project_config_instance.app_delay_profile_file, details)
+            self.logger.info("延时校准完成", file=project_config_instance.app_delay_profile_file)
+            return OperationResult(
+                success=True,
+                message=f"延时校准完成，已保存到{project_config_instance.app_delay_profile_file}",
+                data={"profile": profile.stats(), "details": details}
+            )
+        except Exception as e:
+            self.logger.exception("延时校准异常", error=str(e))
+            return OperationResult(success=False, message=f"延时校准异常: {str(e)}")
@@ -3,6 +3,7 @@ import time
 from typing import Dict, Any
 
 from easyths.core import BaseOperation
+from easyths.core.instrument_rules import MAX_ORDER_AMOUNT, instrument_rules
 from easyths.models.operations import PluginMetadata, OperationResult
 
 
@@ -16,6 +17,8 @@ class ConditionBuyOperation(BaseOperation):
             description="条件买入股票操作",
             author="noimank",
             operation_name="condition_buy",
+            page="条件单/股价条件",
+            invalidates=["condition_orders"],
             parameters={
                 "stock_code": {
                     "type": "string",
@@ -74,19 +77,17 @@ class ConditionBuyOperation(BaseOperation):
                 self.logger.error("目标价格必须大于0")
                 return False
 
-            # 验证数量（可转债11/12开头为10的倍数，其余为100的倍数）
-            is_convertible_bond = stock_code.startswith(("11", "12"))
-            min_qty = 10 if is_convertible_bond else 100
-            multiple = 10 if is_convertible_bond else 100
-            if not isinstance(quantity, int) or quantity < min_qty or quantity % multiple != 0:
-                self.logger.error(f"数量必须是{multiple}的倍数且不小于{min_qty}" + ("（可转债）" if is_convertible_bond else ""))
+            # 验证数量（按证券类别的每手数量，如可转债10张、股票100股）
+            quantity_error = instrument_rules.check_quantity(stock_code, quantity)
+            if quantity_error:
+                self.logger.error(quantity_error)
                 return False
             # 验证有效期
             if expire_days not in [1, 3, 5, 10, 20, 30]:
                 self.logger.error("有效期必须是1,3,5,10,20,30中的任意一个")
                 return False
             # 验证价格和数量的合理性
-            if target_price * quantity > 10000000:  # 单笔不超过1000万
+            if target_price * quantity > MAX_ORDER_AMOUNT:
                 self.logger.error("单笔金额过大")
                 return False
 
@@ -101,11 +102,8 @@ class ConditionBuyOperation(BaseOperation):
         """执行条件买入操作"""
         stock_code = params["stock_code"]
         target_price = params["target_price"]
-        # 判断代码是否是etf,股票类别和etf类别精度不一致 https://github.com/noimank/easyths/issues/6
-        if stock_code.startswith("5") or stock_code.startswith("1"):
-            target_price = "{:.3f}".format(float(target_price))
-        else:
-            target_price = "{:.2f}".format(float(target_price))
+        # 按证券类别的价格精度格式化（ETF、可转债为三位小数）
+        target_price = instrument_rules.format_price(stock_code, target_price)
 
         quantity = params["quantity"]
         expire_days = params.get("expire_days", 30)
@@ -121,9 +119,9 @@ class ConditionBuyOperation(BaseOperation):
 
             main_window = self.get_main_window(wrapper_obj=True)
             # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            self.switch_left_menus("条件单", "股价条件")
+            self.switch_left_menus("条件单", "股价条件", clear_first=True)
+            # 页面会弹出提示框、填写表单，操作结束后状态未知，下次需要完整导航
+            self.mark_page_dirty()
             self.wait_for_pop_dialog(2.5)
             # 用于控制选择策略有效期索引
             count_map = {
@@ -155,8 +153,9 @@ class ConditionBuyOperation(BaseOperation):
                 self.sleep(0.2)
                 # 下一步
                 self.get_control_with_children(document_panel, control_type="Button", title="下一步").click()
-                # 等页面重绘渲染
-                self.sleep(0.4)
+                # 等页面重绘渲染（出现委托方式选项）
+                self.wait_until(lambda: self.get_control_with_children(document_panel, control_type="RadioButton", title="全自动委托") is not None,
+                                timeout=0.4, name="next_step_rendered")
                 # 只能根据序号定位
                 document_panel.children(control_type="Edit")[2].set_text(str(quantity))
                 self.sleep(0.05)
@@ -178,13 +177,14 @@ class ConditionBuyOperation(BaseOperation):
                 # 策略有效期
                 expire_choose = document_panel.children(control_type="Edit", title="请选择")[1]
                 expire_choose.click_input()
-                # 等待渲染
-                self.sleep(0.3)
+                # 等待下拉列表渲染
+                self.wait_until(lambda: self.get_control_with_children(document_panel, control_type="List") is not None,
+                                timeout=0.3, name="expire_list_rendered")
                 expire_list_control = self.get_control_with_children(document_panel, control_type="List")
                 expire_list_control.children(control_type="ListItem")[count_map.get(str(expire_days))].invoke()
 
                 self.sleep(0.1)
-                expire_list_control.type_keys("{ENTER}")
+                self.type_keys(expire_list_control, "{ENTER}")
                 self.sleep(0.1)
                 self.get_control_with_children(document_panel, control_type="Button", title="提交确认").click()
                 # 等待弹窗出现，看是否会出现提示成功添加到条件单的窗口，直接关闭，关不关都无所谓了，反正会被close_pop_dailog函数关闭，这里还省掉sleep呢
@@ -15,6 +15,8 @@ class ConditionOrderCancelOperation(BaseOperation):
             description="删除条件单",
             author="noimank",
             operation_name="condition_order_cancel",
+            page="条件单/条件单监控",
+            invalidates=["condition_orders"],
             parameters={
                 "stock_code": {
                     "type": "string",
@@ -78,13 +80,11 @@ class ConditionOrderCancelOperation(BaseOperation):
             )
 
             main_window = self.get_main_window(wrapper_obj=True)
-            # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            self.switch_left_menus("条件单", "条件单监控")
-            self.sleep(0.1)
-            main_window.type_keys("{F5}")
-            self.sleep(0.3)
+            # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应；已在条件单监控页面时跳过
+            if self.switch_left_menus("条件单", "条件单监控", clear_first=True):
+                self.sleep("condition.menu_settle")
+            self.type_keys(main_window, "{F5}")
+            self.sleep("table.refresh")
             # 有两个
             panel_AfxWnd140s_2 = \
             self.get_control_with_children(main_window, control_type="Pane", auto_id="59648").children(
@@ -109,7 +109,7 @@ class ConditionOrderCancelOperation(BaseOperation):
             type_tab_control = self.get_control_with_children(chrome_render_win, control_type="Tab")
             wcf_control = self.get_control_with_children(type_tab_control, control_type="TabItem", title="未触发")
             wcf_control.click_input()
-            self.sleep(0.3)
+            self.sleep("condition.tab_switch")
 
             # 获取未触发的显示面板
             custom_pane = self.get_control_with_children(chrome_render_win, title="未触发", control_type="Custom",
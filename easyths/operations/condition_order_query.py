@@ -17,6 +17,10 @@ class ConditionOrderQueryOperation(BaseOperation):
             description="查询条件单信息",
             author="noimank",
             operation_name="condition_order_query",
+            page="条件单/条件单监控",
+            read_only=True,
+            cache_ttl=2.0,
+            depends_on=["condition_orders"],
             parameters={
                 "return_type": {
                     "type": "string",
@@ -48,13 +52,11 @@ class ConditionOrderQueryOperation(BaseOperation):
         try:
             self.logger.info("执行条件单查询操作")
             main_window = self.get_main_window(wrapper_obj=True)
-            # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            self.switch_left_menus("条件单", "条件单监控")
-            self.sleep(0.1)
-            main_window.type_keys("{F5}")
-            self.sleep(0.3)
+            # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应；已在条件单监控页面时跳过
+            if self.switch_left_menus("条件单", "条件单监控", clear_first=True):
+                self.sleep("condition.menu_settle")
+            self.type_keys(main_window, "{F5}")
+            self.sleep("table.refresh")
             # 有两个
             panel_AfxWnd140s_2 = self.get_control_with_children(main_window, control_type="Pane", auto_id="59648").children(class_name="AfxMDIFrame140s")[0]
             panel_AfxWnd140s = self.get_control_with_children(panel_AfxWnd140s_2, auto_id="2393", control_type="Pane", class_name="AfxWnd140s")
@@ -66,12 +68,12 @@ class ConditionOrderQueryOperation(BaseOperation):
             confirm_pop_old = self.get_control_with_children(chrome_render_win, control_type="Custom", title="提示")
             if confirm_pop_old:
                 self.get_control_with_children(confirm_pop_old, control_type="Button", title="取消").click()
-                self.sleep(0.15)
+                self.sleep("condition.pop_close")
             # 要选择  未触发
             type_tab_control = self.get_control_with_children(chrome_render_win, control_type="Tab")
             wcf_control = self.get_control_with_children(type_tab_control, control_type="TabItem", title="未触发")
             wcf_control.click_input()
-            self.sleep(0.3)
+            self.sleep("condition.tab_switch")
 
             # 获取未触发的显示面板
             custom_pane = self.get_control_with_children(chrome_render_win, title="未触发", control_type="Custom", auto_id="pane-not_triggered")
@@ -87,6 +89,8 @@ class ConditionOrderQueryOperation(BaseOperation):
             data = []
             # 解析表格
             for table_row in data_tables:
+                # 逐行读取单元格耗时较长，每行之间检查是否需要让出执行线程
+                self.checkpoint("读取条件单")
                 data.append( [table_cell.window_text().replace('\xa0', ' ') for table_cell in table_row.children(control_type="DataItem")])
 
             df = pd.DataFrame(data, columns=header)
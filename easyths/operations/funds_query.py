@@ -2,6 +2,7 @@ import time
 from typing import Dict, Any
 
 from easyths.core import BaseOperation
+from easyths.core.control_cache import MAIN_PANEL
 from easyths.models.operations import PluginMetadata, OperationResult
 
 
@@ -15,6 +16,10 @@ class FundsQueryOperation(BaseOperation):
             description="查询账户资金信息",
             author="noimank",
             operation_name="funds_query",
+            page="查询[F4]",
+            read_only=True,
+            cache_ttl=2.0,
+            depends_on=["funds"],
             parameters={
             }
         )
@@ -34,17 +39,16 @@ class FundsQueryOperation(BaseOperation):
             # self.switch_left_menus("查询[F4]", "资金股票")  #不采用特定子菜单进行定位 https://github.com/noimank/easyths/issues/4
             # 刷新数据
             main_window_wrapper = self.get_main_window(wrapper_obj=True)
-            main_window_wrapper.type_keys("{F4}")
-            self.sleep(0.2)
-            main_window_wrapper.type_keys("{F5}")
+            self.switch_hotkey_page("{F4}", "查询[F4]", clear_first=False, settle="page.query_settle")
+            self.type_keys(main_window_wrapper, "{F5}")
             # 防抖
-            self.sleep(0.3)
+            self.sleep("table.refresh")
             # print(f"切换页面耗时：{time.time() - tt}")
             # 拿到显示面板, 大约会有 34个children
             # main_window = self.get_main_window()
             # main_panel = main_window.child_window(auto_id="59649", control_type="Pane", depth=2).wrapper_object()
                  # 改进版：不使用child_window从 1.5s降低到1s
-            main_panel = self.get_control_with_children(main_window_wrapper, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
+            main_panel = self.locate(MAIN_PANEL)
             # 再进一步筛选
             text_controls = main_panel.children(control_type="Text",class_name="Static")
 
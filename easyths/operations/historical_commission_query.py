@@ -4,6 +4,7 @@ from typing import Dict, Any
 from easyths.utils import df_format_convert, text2df
 
 from easyths.core import BaseOperation
+from easyths.core.control_cache import MAIN_PANEL
 from easyths.models.operations import PluginMetadata, OperationResult
 
 class HistoricalCommissionQueryOperation(BaseOperation):
@@ -16,11 +17,14 @@ class HistoricalCommissionQueryOperation(BaseOperation):
             description="查询股票历史委托订单信息",
             author="noimank",
             operation_name="historical_commission_query",
+            page="查询[F4]/历史委托",
+            read_only=True,
             parameters={
                 "return_type": {
                     "type": "string",
-                    "required": True,
+                    "required": False,
                     "description": "返回数据格式",
+                    "default": "str",
                     "enum": ["str", "markdown",  "json", "dict"],
                 },
                 "stock_code": {
@@ -86,7 +90,7 @@ class HistoricalCommissionQueryOperation(BaseOperation):
             # 1. 打开历史委托查询界面（通常是F7或Ctrl+F7）
             main_window = self.get_main_window(wrapper_obj=True)
             # 尝试使用Ctrl+F7打开历史委托，如果不行再尝试其他快捷键
-            main_panel = self.get_control_with_children(main_window, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
+            main_panel = self.locate(MAIN_PANEL)
 
 
             # auto_id
@@ -98,6 +102,7 @@ class HistoricalCommissionQueryOperation(BaseOperation):
                 "近一年": "5311"
             }
             # 2. 选择时间范围
+            self.checkpoint("选择时间范围")
             self.get_control_with_children(main_panel,auto_id=control_map[time_range], control_type="Button", class_name="Button").click()
 
             # 3. 如果指定了股票代码，输入股票代码进行查询
@@ -105,32 +110,38 @@ class HistoricalCommissionQueryOperation(BaseOperation):
                 combox = self.get_control_with_children(main_panel, control_type="ComboBox", class_name="ComboBox", auto_id="1337")
                 edit_stock_code = self.get_control_with_children(combox,auto_id="1001", control_type="Edit", class_name="Edit")
                 # 清空并输入股票代码
-                edit_stock_code.type_keys('{BACKSPACE 7}')
-                time.sleep(0.05)
-                edit_stock_code.type_keys(str(stock_code))
-                time.sleep(0.1)
+                self.type_keys(edit_stock_code, '{BACKSPACE 7}')
+                self.sleep("history.clear_input")
+                self.type_keys(edit_stock_code, str(stock_code))
+                self.sleep("table.filter_input")
             else:
                 query_btn = self.get_control_with_children(main_panel, class_name="Button", auto_id="2449")
                 query_btn.click()
 
             # 4. 点击查询按钮
             #等待加载数据
-            time.sleep(0.2)
+            self.sleep("history.load")
+            # 时间范围较长时加载很慢，复制前检查是否需要让出执行线程
+            self.checkpoint("复制历史委托")
             # 获取表格控件
             # table_control = self.get_control(control_id=0x417, class_name="CVirtualGridCtrl")
             table_panel = main_panel.children(control_type="Pane", title='HexinScrollWnd')[0].children(control_type="Pane", title="HexinScrollWnd2")[0].children(class_name="CVirtualGridCtrl")[0]
 
             # 鼠标左键点击
             table_panel.click_input()
-            time.sleep(0.01)
+            self.sleep("history.grid_focus")
 
             # 按下 Ctrl+A Ctrl+C 触发复制
-            table_panel.type_keys("^a")
-            time.sleep(0.02)
-            table_panel.type_keys("^c")
-            time.sleep(0.15)
+            self.clear_clipboard()
+            self.type_keys(table_panel, "^a")
+            self.sleep("history.select_all")
+            self.type_keys(table_panel, "^c")
+            # 等待复制完成，触发复制限制时会先弹出验证码框
+            self.wait_for_clipboard()
             # 处理触发复制的限制提示框
-            self.process_captcha_dialog()
+            if self.process_captcha_dialog():
+                # 输入验证码后才会完成复制
+                self.wait_for_clipboard()
             # 获取剪贴板数据
             table_data = self.get_clipboard_data()
             table_data = text2df(table_data)
@@ -3,6 +3,7 @@ import time
 from typing import Dict, Any
 
 from easyths.core import BaseOperation
+from easyths.core.control_cache import MAIN_GRID
 from easyths.utils import df_format_convert,text2df
 from easyths.models.operations import PluginMetadata, OperationResult
 
@@ -16,6 +17,10 @@ class HoldingQueryOperation(BaseOperation):
             description="查询股票持仓信息",
             author="noimank",
             operation_name="holding_query",
+            page="查询[F4]/资金股票",
+            read_only=True,
+            cache_ttl=2.0,
+            depends_on=["holdings"],
             parameters={
                 "return_type": {
                     "type": "string",
@@ -49,29 +54,25 @@ class HoldingQueryOperation(BaseOperation):
             # 切换到持仓菜单
             self.switch_left_menus("查询[F4]", "资金股票")
             # 刷新数据
-            self.get_main_window(wrapper_obj=True).type_keys("{F5}")
+            self.type_keys(self.get_main_window(wrapper_obj=True), "{F5}")
             # 等待页面加载完成，这个页面还是需要实时的
             self.clear_clipboard()
-            self.sleep(0.3)
-            main_window_wrapper = self.get_main_window(wrapper_obj=True)
-            main_panel = self.get_control_with_children(main_window_wrapper, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
-
-            HexinScrollWnd = self.get_control_with_children(main_panel, title='HexinScrollWnd', auto_id="1047")
-
-            HexinScrollWnd2 = self.get_control_with_children(HexinScrollWnd, auto_id="200", class_name="AfxWnd140s")
-
-            # 获取表格控件
-            table_panel = self.get_control_with_children(HexinScrollWnd2, title="Custom1", class_name="CVirtualGridCtrl")
+            self.sleep("table.refresh")
+            # 获取表格控件（面板 -> HexinScrollWnd -> HexinScrollWnd2 -> CVirtualGridCtrl）
+            table_panel = self.locate(MAIN_GRID)
             # 鼠标左键点击
             table_panel.click_input()
 
             # 按下 Ctrl+A Ctrl+ C  触发复制
-            table_panel.type_keys("^a")
-            time.sleep(0.05)
-            table_panel.type_keys("^c")
-            time.sleep(0.2)
+            self.type_keys(table_panel, "^a")
+            self.sleep("table.select_all")
+            self.type_keys(table_panel, "^c")
+            # 等待复制完成，触发复制限制时会先弹出验证码框
+            self.wait_for_clipboard()
             # 处理可能触发复制的限制提示框
-            self.process_captcha_dialog()
+            if self.process_captcha_dialog():
+                # 输入验证码后才会完成复制
+                self.wait_for_clipboard()
 
             # 获取剪贴板数据
             table_data = self.get_clipboard_data()
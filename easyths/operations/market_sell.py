@@ -1,6 +1,8 @@
 from typing import Dict, Any
 
 from easyths.core import BaseOperation
+from easyths.core.instrument_rules import instrument_rules
+from easyths.core.control_cache import MAIN_PANEL
 from easyths.models.operations import PluginMetadata, OperationResult
 
 # 成交策略映射
@@ -24,6 +26,9 @@ class MarketSellOperation(BaseOperation):
             description="市价卖出股票操作",
             author="noimank",
             operation_name="market_sell",
+            preposition=True,
+            page="市价委托/卖出",
+            invalidates=["holdings", "funds", "orders"],
             parameters={
                 "stock_code": {
                     "type": "string",
@@ -66,11 +71,10 @@ class MarketSellOperation(BaseOperation):
                 self.logger.error("股票代码格式错误，必须是6位数字")
                 return False
 
-            is_convertible_bond = stock_code.startswith(("11", "12"))
-            min_qty = 10 if is_convertible_bond else 100
-            multiple = 10 if is_convertible_bond else 100
-            if not isinstance(quantity, int) or quantity < min_qty or quantity % multiple != 0:
-                self.logger.error(f"数量必须是{multiple}的倍数且不小于{min_qty}" + ("（可转债）" if is_convertible_bond else ""))
+            # 按证券类别的每手数量检查（可转债10张、股票100股）
+            quantity_error = instrument_rules.check_quantity(stock_code, quantity)
+            if quantity_error:
+                self.logger.error(quantity_error)
                 return False
 
             self.logger.info("市价卖出参数验证通过")
@@ -95,25 +99,30 @@ class MarketSellOperation(BaseOperation):
             )
             main_window = self.get_main_window(wrapper_obj=True)
             self.switch_left_menus("市价委托", "卖出")
+            # 市价委托需要选择报价方式，操作结束后表单状态未知，下次需要完整导航
+            self.mark_page_dirty()
             # 防抖
             self.sleep(0.25)
             # 拿到控制面板
-            main_panel = self.get_control_with_children(main_window, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
+            main_panel = self.locate(MAIN_PANEL)
 
             # 清除可能存在的股票代码等待输出
-            self.get_control_with_children(main_panel, control_type="Edit", auto_id="1032").type_keys("{BACKSPACE 6}", pause=0.02)
-            self.sleep(0.2)
+            stock_code_edit = self.get_control_with_children(main_panel, control_type="Edit", auto_id="1032")
+            self.type_keys(stock_code_edit, "{BACKSPACE 6}", pause=0.02)
+            self.wait_for_text(stock_code_edit, "", timeout=0.2)
             # 输入股票代码
-            self.get_control_with_children(main_panel, control_type="Edit", auto_id="1032").type_keys(stock_code)
+            self.type_keys(stock_code_edit, stock_code)
 
             # 输入数量
-            self.get_control_with_children(main_panel, control_type="Edit", auto_id="1034").type_keys(str(quantity))
-            self.sleep(0.2)
+            quantity_edit = self.get_control_with_children(main_panel, control_type="Edit", auto_id="1034")
+            self.type_keys(quantity_edit, str(quantity))
+            self.wait_for_text(quantity_edit, str(quantity), timeout=0.2)
 
             # 判断是否支持市价委托
             combo_box = self.get_control_with_children(main_panel, control_type="ComboBox", auto_id="1541")
             combo_box.expand()
-            self.sleep(0.2)
+            self.wait_until(lambda: self.get_control_with_children(combo_box, control_type="List", class_name="ComboLBox") is not None,
+                            timeout=0.2, name="strategy_list_expanded")
             list_box = self.get_control_with_children(combo_box, control_type="List", class_name="ComboLBox")
             # 选择成交策略
             texts = [i[0] for i in list_box.texts()]
@@ -129,9 +138,11 @@ class MarketSellOperation(BaseOperation):
                     item = list_box.get_item(i)
                     item.click_input()
                     break
+            # 定时委托在导航、填写完成后等到点再提交
+            self.fire()
             # 点击卖出按钮
             self.get_control_with_children(main_panel, control_type="Button", auto_id="1006").click()
-            self.sleep(0.35)
+            self.wait_for_pop_dialog(0.35)
             pop_dialog_content = self.get_pop_dialog_content()
             # 出现弹窗说明没提交成功
             if pop_dialog_content:
@@ -2,6 +2,7 @@ import time
 from typing import Dict, Any
 
 from easyths.core import BaseOperation
+from easyths.core.control_cache import MAIN_PANEL
 from easyths.models.operations import PluginMetadata, OperationResult
 
 
@@ -15,6 +16,8 @@ class OrderCancelOperation(BaseOperation):
             description="撤单操作",
             author="noimank",
             operation_name="order_cancel",
+            page="撤单[F3]",
+            invalidates=["holdings", "funds", "orders"],
             parameters={
                 "stock_code": {
                     "type": "string",
@@ -89,25 +92,24 @@ class OrderCancelOperation(BaseOperation):
 
             main_window = self.get_main_window(wrapper_obj=True)
             #
-            # # 切换到撤单界面（假设使用某个快捷键或菜单）
-            main_window.type_keys("{F3}")
-            time.sleep(0.2)
+            # # 切换到撤单界面（假设使用某个快捷键或菜单），已在撤单界面时跳过
+            self.switch_hotkey_page("{F3}", "撤单[F3]", clear_first=False, settle="page.query_settle")
             # main_panel = main_window.children(control_type="Pane")[0].children(class_name='AfxMDIFrame140s')[0]
-            main_panel = self.get_control_with_children(main_window, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
+            main_panel = self.locate(MAIN_PANEL)
 
             #
             # # 如果指定了股票代码，定位到对应的委托，默认清空，点击查询代码按钮相当于刷新数据
             # 模拟清空
             edit_stock_code = self.get_control_with_children(main_panel, control_type="Edit",class_name="Edit", auto_id="3348")
-            edit_stock_code.type_keys('{BACKSPACE 6}')
-            time.sleep(0.1)
+            self.type_keys(edit_stock_code, '{BACKSPACE 6}')
+            self.sleep("table.filter_input")
             if stock_code:
                 # 查找并选择指定股票的委托
-                edit_stock_code.type_keys(str(stock_code))
+                self.type_keys(edit_stock_code, str(stock_code))
             #
             query_btn = self.get_control_with_children(main_panel, control_type="Button",class_name="Button", auto_id="3349")
             query_btn.click()
-            time.sleep(0.1)
+            self.sleep("table.filter_query")
 
             cancel_btn = None
             if cancel_type == "all":
@@ -4,6 +4,7 @@ from typing import Dict, Any
 from easyths.utils import df_format_convert,text2df
 
 from easyths.core import BaseOperation
+from easyths.core.control_cache import MAIN_GRID, MAIN_PANEL
 from easyths.models.operations import PluginMetadata, OperationResult
 
 class OrderQueryOperation(BaseOperation):
@@ -16,6 +17,8 @@ class OrderQueryOperation(BaseOperation):
             description="查询股票委托订单信息",
             author="noimank",
             operation_name="order_query",
+            page="撤单[F3]",
+            read_only=True,
             parameters={
                 "return_type": {
                     "type": "string",
@@ -67,44 +70,46 @@ class OrderQueryOperation(BaseOperation):
 
             # 1. 打开撤单界面（F3键），这个界面也显示了委托信息
             main_window = self.get_main_window(wrapper_obj=True)
-            main_window.type_keys("{F3}")
-            self.sleep(0.1)
-            main_window.type_keys("{F5}")
-            self.sleep(0.25)
+            self.switch_hotkey_page("{F3}", "撤单[F3]", clear_first=False, settle="page.order_settle")
+            self.type_keys(main_window, "{F5}")
+            self.sleep("table.order_refresh")
             # main_panel = main_window.children(control_type="Pane")[0].children(class_name='AfxMDIFrame140s')[0]
-            main_panel = self.get_control_with_children(main_window, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
+            main_panel = self.locate(MAIN_PANEL)
 
 
 
             edit_stock_code = self.get_control_with_children(main_panel, control_type="Edit", class_name="Edit",
                                                              auto_id="3348")
             # 如果没有指定股票代码，清空查询框以显示所有委托
-            edit_stock_code.type_keys('{BACKSPACE 6} ')
+            self.type_keys(edit_stock_code, '{BACKSPACE 6} ')
             # 2. 如果指定了股票代码，输入股票代码进行查询
             if stock_code:
-                edit_stock_code.type_keys(str(stock_code))
+                self.type_keys(edit_stock_code, str(stock_code))
 
-            time.sleep(0.1)
+            self.sleep("table.filter_input")
             query_btn = self.get_control_with_children(main_panel, control_type="Button", class_name="Button",
                                                        auto_id="3349")
             query_btn.click()
-            time.sleep(0.1)
+            self.sleep("table.filter_query")
 
             # 3. 根据查询类型获取委托数据
             self.clear_clipboard()
             # 获取表格控件
-            table_control = self.get_control_with_children(main_panel,auto_id="1047", control_type="Pane").children()[0].children(class_name="CVirtualGridCtrl")[0]
+            table_control = self.locate(MAIN_GRID)
             # 鼠标左键点击
             table_control.click_input()
 
             # 按下 Ctrl+A Ctrl+ C  触发复制
-            table_control.type_keys("^a")
-            time.sleep(0.05)
-            table_control.type_keys("^c")
-            time.sleep(0.1)
+            self.type_keys(table_control, "^a")
+            self.sleep("table.select_all")
+            self.type_keys(table_control, "^c")
+            # 等待复制完成，触发复制限制时会先弹出验证码框
+            self.wait_for_clipboard()
 
             # 处理触发复制的限制提示框
-            self.process_captcha_dialog()
+            if self.process_captcha_dialog():
+                # 输入验证码后才会完成复制
+                self.wait_for_clipboard()
 
             # 获取剪贴板数据
             table_data = self.get_clipboard_data()
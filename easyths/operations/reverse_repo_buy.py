@@ -16,6 +16,8 @@ class ReverseRepoBuyOperation(BaseOperation):
             description="国债逆回购操作,购买后可用在订单查询中查看购买情况",
             author="noimank",
             operation_name="reverse_repo_buy",
+            page="国债逆回购",
+            invalidates=["holdings", "funds", "orders"],
             parameters={
                 "market": {
                     "type": "string",
@@ -107,9 +109,9 @@ class ReverseRepoBuyOperation(BaseOperation):
             )
             main_window = self.get_main_window(wrapper_obj=True)
             #先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            self.switch_left_menus("国债逆回购")
+            self.switch_left_menus("国债逆回购", clear_first=True)
+            # 页面会弹出提示框、填写表单，操作结束后状态未知，下次需要完整导航
+            self.mark_page_dirty()
 
             # 1. 根据 market 和 time_range 获取对应的国债逆回购代码
             code_map = {
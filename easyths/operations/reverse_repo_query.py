@@ -15,6 +15,10 @@ class ReverseRepoQueryOperation(BaseOperation):
             description="查询国债逆回购年化利率信息",
             author="noimank",
             operation_name="reverse_repo_query",
+            page="国债逆回购",
+            read_only=True,
+            cache_ttl=5.0,
+            depends_on=["reverse_repo_rates"],
             parameters={
 
             }
@@ -61,9 +65,9 @@ class ReverseRepoQueryOperation(BaseOperation):
             self.logger.info(f"执行国债逆回购查询操作")
             main_window = self.get_main_window(wrapper_obj=True)
             # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            self.switch_left_menus("国债逆回购")
+            self.switch_left_menus("国债逆回购", clear_first=True)
+            # 页面会弹出提示框、填写表单，操作结束后状态未知，下次需要完整导航
+            self.mark_page_dirty()
 
             is_pop_up = self.wait_for_pop_dialog(5)
             reverse_repo_interest_data = None
@@ -2,6 +2,8 @@ import time
 from typing import Dict, Any
 
 from easyths.core import BaseOperation
+from easyths.core.instrument_rules import MAX_ORDER_AMOUNT, instrument_rules
+from easyths.core.control_cache import ORDER_PRICE, ORDER_QUANTITY, ORDER_STOCK_CODE, ORDER_STOCK_NAME
 from easyths.models.operations import PluginMetadata, OperationResult
 
 
@@ -15,6 +17,9 @@ class SellOperation(BaseOperation):
             description="卖出股票操作",
             author="noimank",
             operation_name="sell",
+            preposition=True,
+            page="卖出[F2]",
+            invalidates=["holdings", "funds", "orders"],
             parameters={
                 "stock_code": {
                     "type": "string",
@@ -65,16 +70,14 @@ class SellOperation(BaseOperation):
                 self.logger.error("价格必须大于0")
                 return False
 
-            # 验证数量（可转债11/12开头为10的倍数，其余为100的倍数）
-            is_convertible_bond = stock_code.startswith(("11", "12"))
-            min_qty = 10 if is_convertible_bond else 100
-            multiple = 10 if is_convertible_bond else 100
-            if not isinstance(quantity, int) or quantity < min_qty or quantity % multiple != 0:
-                self.logger.error(f"数量必须是{multiple}的倍数且不小于{min_qty}" + ("（可转债）" if is_convertible_bond else ""))
+            # 验证数量（按证券类别的每手数量，如可转债10张、股票100股）
+            quantity_error = instrument_rules.check_quantity(stock_code, quantity)
+            if quantity_error:
+                self.logger.error(quantity_error)
                 return False
 
             # 验证价格和数量的合理性
-            if price * quantity > 10000000:  # 单笔不超过1000万
+            if price * quantity > MAX_ORDER_AMOUNT:
                 self.logger.error("单笔金额过大")
                 return False
 
@@ -98,11 +101,8 @@ class SellOperation(BaseOperation):
     def execute(self, params: Dict[str, Any]) -> OperationResult:
         """执行卖出操作"""
         stock_code = params["stock_code"]
-        # 判断代码是否是etf,股票类别和etf类别精度不一致 https://github.com/noimank/easyths/issues/6
-        if stock_code.startswith("5") or stock_code.startswith("1"):
-            price = "{:.3f}".format(float(params["price"]))
-        else:
-            price = "{:.2f}".format(float(params["price"]))
+        # 按证券类别的价格精度格式化（ETF、可转债为三位小数）
+        price = instrument_rules.format_price(stock_code, params["price"])
 
         quantity = params["quantity"]
         start_time = time.time()
@@ -114,34 +114,39 @@ class SellOperation(BaseOperation):
                 quantity=quantity
             )
 
-            # 按下 F2键 （卖出快捷键）
+            # 按下 F2键 （卖出快捷键），已在卖出页面时跳过（上一笔成功提交后客户端会清空输入框）
             main_window = self.get_main_window(wrapper_obj=True)
-            # 切换到别的页面再切会买入页面会清空可能残留的操作信息，增强操作可用性
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            main_window.type_keys("{F2}")
-            # 防抖
-            self.sleep(0.25)
-            # 拿到显示面板, 大约会有 34个children
-            main_panel = self.get_control_with_children(main_window, class_name="AfxMDIFrame140s", control_type="Pane", auto_id="59648").children(class_name='AfxMDIFrame140s')[0]
+            self.switch_hotkey_page("{F2}", "卖出[F2]")
+            # 输入控件按定位路径缓存，停留在卖出页面时直接复用
             # # 1. 输入股票代码
-            self.get_control_with_children(main_panel, control_type="Edit", auto_id="1032").type_keys(stock_code)
-            self.sleep(0.08)
+            stock_code_edit = self.locate(ORDER_STOCK_CODE)
+            self.type_keys(stock_code_edit, stock_code)
+            self.wait_for_text(stock_code_edit, stock_code, timeout=0.08)
             # # 2.输入价格
-            self.get_control_with_children(main_panel, control_type="Edit", auto_id="1033").type_keys(price)
-            self.sleep(0.08)
+            price_edit = self.locate(ORDER_PRICE)
+            self.type_keys(price_edit, price)
+            self.wait_for_text(price_edit, price, timeout=0.08)
             # # 3. 输入数量
-            self.get_control_with_children(main_panel, control_type="Edit", auto_id="1034").type_keys(str(quantity))
-            # # 等待输入数量后稳定在确认
-            self.sleep(0.3)
+            quantity_edit = self.locate(ORDER_QUANTITY)
+            self.type_keys(quantity_edit, str(quantity))
+            # # 等待数量提交、证券名称带出后再确认
+            stock_name_text = self.locate(ORDER_STOCK_NAME)
+            is_order_ready = self.wait_until(lambda: quantity_edit.window_text() == str(quantity) and len(stock_name_text.window_text()) > 0,
+                                             timeout=0.3, name="order_ready")
+            # 定时委托在导航、填写完成后等到点再提交
+            self.fire()
             # 4. 点击买入按钮
-            main_window.type_keys("{ENTER}")
-            # self.sleep(0.25)
-            self.wait_for_pop_dialog(0.3)
+            self.type_keys(main_window, "{ENTER}")
+            # 等待弹窗出现或客户端清空输入框（提交成功）；证券名称没带出时只能等弹窗
+            if is_order_ready:
+                self.wait_until(lambda: self.is_exist_pop_dialog() or len(stock_name_text.window_text()) == 0,
+                                timeout=0.3, name="order_submitted")
+            else:
+                self.wait_for_pop_dialog(0.3)
             # 没弹窗就是成功，这里已经假设用户已经按照项目设置好软件，为了加快操作速度，去掉了多余的弹窗处理（因为设置好软件后不会有弹窗）
             is_op_success = not self.is_exist_pop_dialog()
             # 证券名称，如果购买成功，stock_name会清空
-            stock_name = self.get_control_with_children(main_panel, control_type="Text", auto_id="1036").window_text()
+            stock_name = stock_name_text.window_text()
 
             message = f"成功提交{stock_code}的卖出委托"
             if not is_op_success:
@@ -150,8 +155,8 @@ class SellOperation(BaseOperation):
                 if pop_dialog_title == "失败提示":
                     message = self.get_control_with_children(pop_control, control_type="Image", auto_id="1004",
                                                              class_name="Static").window_text()
-                    self.get_control_with_children(pop_control, control_type="Button", auto_id="2",
-                                                   class_name="Button").type_keys("{ENTER}")
+                    self.type_keys(self.get_control_with_children(pop_control, control_type="Button", auto_id="2",
+                                                                  class_name="Button"), "{ENTER}")
             # 二次确认
             elif len(stock_name) > 0:
                 message = f"卖出操作未能成功，请检查软件设置是否有项目要求不符的地方"
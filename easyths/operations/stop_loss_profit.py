@@ -3,6 +3,7 @@ import time
 from typing import Dict, Any
 import re
 from easyths.core import BaseOperation
+from easyths.core.instrument_rules import instrument_rules
 from easyths.models.operations import PluginMetadata, OperationResult
 
 
@@ -16,6 +17,8 @@ class StopLossProfitOperation(BaseOperation):
             description="止盈止损操作",
             author="noimank",
             operation_name="stop_loss_profit",
+            page="条件单/止盈止损",
+            invalidates=["condition_orders"],
             parameters={
                 "stock_code": {
                     "type": "string",
@@ -95,13 +98,11 @@ class StopLossProfitOperation(BaseOperation):
                 self.logger.error("有效期必须是1,3,5,10,20,30中的任意一个")
                 return False
 
-            # 验证数量（可转债11/12开头为10的倍数，其余为100的倍数）
+            # 验证数量（按证券类别的每手数量，如可转债10张、股票100股）
             if quantity is not None:
-                is_convertible_bond = stock_code.startswith(("11", "12"))
-                min_qty = 10 if is_convertible_bond else 100
-                multiple = 10 if is_convertible_bond else 100
-                if not isinstance(quantity, int) or quantity < min_qty or quantity % multiple != 0:
-                    self.logger.error(f"数量必须是{multiple}的倍数且不小于{min_qty}" + ("（可转债）" if is_convertible_bond else ""))
+                quantity_error = instrument_rules.check_quantity(stock_code, quantity)
+                if quantity_error:
+                    self.logger.error(quantity_error)
                     return False
 
             self.logger.info("止盈止损参数验证通过")
@@ -132,9 +133,9 @@ class StopLossProfitOperation(BaseOperation):
 
             main_window = self.get_main_window(wrapper_obj=True)
             # 先跳到其他页面，要是停留在国债逆回购的话，再次点击可能没反应
-            main_window.type_keys("{F3}")
-            self.sleep(0.2)
-            self.switch_left_menus("条件单", "止盈止损")
+            self.switch_left_menus("条件单", "止盈止损", clear_first=True)
+            # 页面会弹出提示框、填写表单，操作结束后状态未知，下次需要完整导航
+            self.mark_page_dirty()
             self.wait_for_pop_dialog(2.51)
 
             #用于控制选择策略有效期索引
@@ -181,7 +182,7 @@ class StopLossProfitOperation(BaseOperation):
                     is_op_success = False
                     op_message = f"执行{stock_code}的止盈止损单失败，不支持该品种的标的,请检查是否持仓该股票"
                     # 有些奇怪必须指定pause才能生效
-                    main_panel.type_keys("{ESC}", pause=0.15)
+                    self.type_keys(main_panel, "{ESC}", pause=0.15)
 
                 else:
                     # 盈利填写
@@ -193,8 +194,9 @@ class StopLossProfitOperation(BaseOperation):
 
                     # 下一步
                     self.get_control_with_children(document_panel, control_type="Button", title="下一步").click()
-                    # 画面渲染需要时间
-                    self.sleep(0.3)
+                    # 画面渲染需要时间（出现委托方式选项）
+                    self.wait_until(lambda: self.get_control_with_children(document_panel, control_type="RadioButton", title="全自动委托") is not None,
+                                    timeout=0.3, name="next_step_rendered")
 
                     #填写委托数量
                     if quantity is None:
@@ -225,13 +227,14 @@ class StopLossProfitOperation(BaseOperation):
                     # 策略有效期选择
                     expire_choose = document_panel.children(control_type="Edit", title="请选择")[1]
                     expire_choose.click_input()
-                    # 等待渲染
-                    self.sleep(0.3)
+                    # 等待下拉列表渲染
+                    self.wait_until(lambda: self.get_control_with_children(document_panel, control_type="List") is not None,
+                                    timeout=0.3, name="expire_list_rendered")
                     expire_list_control = self.get_control_with_children(document_panel, control_type="List")
                     expire_list_control.children(control_type="ListItem")[count_map.get(str(expire_days))].invoke()
 
                     self.sleep(0.1)
-                    expire_list_control.type_keys("{ENTER}")
+                    self.type_keys(expire_list_control, "{ENTER}")
                     self.sleep(0.2)
                     # 提交确认
                     self.get_control_with_children(document_panel, control_type="Button", title="提交确认").click()
@@ -3,7 +3,8 @@ easyths 客户端模块
 
 提供与 easyths 服务端的通信接口，支持远程调用交易操作。
 """
-from typing import Any, Dict, Optional, Literal, TypedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Literal, TypedDict
 
 import httpx
 
@@ -158,6 +159,45 @@ class TradeClient:
         """
         return self._request("GET", "/api/v1/system/info")
 
+    def get_delay_profile(self) -> APIResponse:
+        """
+        获取本机的延时配置
+
+        Returns:
+            各命名延时的默认值、校准值和实际使用的时长
+        """
+        return self._request("GET", "/api/v1/system/delay_profile")
+
+    def calibrate_delays(
+        self,
+        operations: Optional[List[str]] = None,
+        rounds: int = 5,
+        tolerance: float = 0.0,
+        timeout: Optional[float] = None
+    ) -> dict:
+        """
+        校准本机的界面延时（耗时数分钟，建议在收盘后执行）
+
+        Args:
+            operations: 校准使用的查询操作，默认全部
+            rounds: 每个候选时长重复执行的次数（1-20）
+            tolerance: 允许的失败率上升幅度（0-1）
+            timeout: 操作超时时间（秒），None 表示一直等待校准完成（不受客户端默认超时时间限制）
+
+        Returns:
+            操作结果（OperationResult），result["data"]["details"] 为每项延时的校准过程
+
+        Raises:
+            TradeClientError: 连接失败、API 错误或操作超时
+        """
+        data = {"rounds": rounds, "tolerance": tolerance}
+        if operations is not None:
+            data["operations"] = operations
+        response = self._request("POST", "/api/v1/system/calibrate", json=data)
+        # 校准耗时数分钟，远超客户端默认的超时时间，HTTP 请求按等待时间设置超时
+        return self._wait_result(response["data"]["operation_id"], timeout,
+                                 http_timeout=None if timeout is None else timeout + self.timeout)
+
     def get_queue_stats(self) -> APIResponse:
         """
         获取队列统计信息
@@ -182,7 +222,11 @@ class TradeClient:
         self,
         operation_name: str,
         params: Optional[Dict[str, Any]] = None,
-        priority: int = 0
+        priority: int = 0,
+        max_age: Optional[float] = None,
+        deadline: Optional[datetime] = None,
+        max_queue_wait: Optional[float] = None,
+        execute_at: Optional[datetime] = None
     ) -> str:
         """
         执行操作
@@ -191,14 +235,30 @@ class TradeClient:
             operation_name: 操作名称
             params: 操作参数
             priority: 优先级（0-10），数字越大优先级越高
+            max_age: 查询操作可接受的缓存数据最大时长（秒），None 使用服务端默认，0 表示不使用缓存
+            deadline: 截止时间，到时仍未开始执行的操作不再执行，以 expired 状态结束
+            max_queue_wait: 最长排队时间（秒），与 deadline 取较早者；定时操作从 execute_at 起算
+            execute_at: 定时执行时刻，服务端提前完成导航和填写，到点才提交，结果的 metadata["fire"] 记录触发误差
 
         Returns:
             操作 ID
         """
         data: Dict[str, Any] = {"params": params or {}, "priority": priority}
+        if max_age is not None:
+            data["max_age"] = max_age
+        if deadline is not None:
+            data["deadline"] = deadline.isoformat()
+        if max_queue_wait is not None:
+            data["max_queue_wait"] = max_queue_wait
+        if execute_at is not None:
+            data["execute_at"] = execute_at.isoformat()
         result = self._request("POST", f"/api/v1/operations/{operation_name}", json=data)
         return result["data"]["operation_id"]
 
+    def _queue_wait(self, timeout: Optional[float]) -> float:
+        """便捷方法的最长排队时间：等待结果超时后操作不再执行，避免过时的委托在之后被执行"""
+        return timeout if timeout is not None else self.timeout
+
     def get_operation_status(
         self,
         operation_id: str
@@ -237,17 +297,41 @@ class TradeClient:
             >>> if result["success"]:
             ...     print("操作成功:", result["data"])
         """
+        # 服务端最长阻塞 timeout 秒，HTTP 请求的超时时间要比它更长
+        return self._wait_result(operation_id, timeout,
+                                 http_timeout=self.timeout if timeout is None else timeout + self.timeout)
+
+    def _wait_result(self, operation_id: str, timeout: Optional[float], http_timeout: Optional[float]) -> dict:
+        """请求操作结果，服务端阻塞到操作完成或 timeout 秒，http_timeout 为 HTTP 请求的超时时间（None 表示不限制）"""
         params = {}
         if timeout is not None:
             params["timeout"] = timeout
 
         try:
-            return self._request("GET", f"/api/v1/operations/{operation_id}/result", params=params)
+            return self._request("GET", f"/api/v1/operations/{operation_id}/result", params=params,
+                                 timeout=http_timeout)
         except TradeClientError as e:
             if e.status_code == 408:
                 raise TradeClientError(f"操作 {operation_id} 超时", status_code=408) from e
             raise
 
+    def update_operation_priority(self, operation_id: str, priority: int) -> APIResponse:
+        """
+        调整排队中操作的优先级
+
+        Args:
+            operation_id: 操作 ID
+            priority: 新优先级（0-10），数字越大优先级越高
+
+        Returns:
+            调整结果，包含新的排队位置 queue_position
+        """
+        return self._request(
+            "PUT",
+            f"/api/v1/operations/{operation_id}/priority",
+            json={"priority": priority}
+        )
+
     def cancel_operation(self, operation_id: str) -> bool:
         """
         取消操作
@@ -302,7 +386,7 @@ class TradeClient:
             "price": price,
             "quantity": quantity
         }
-        operation_id = self.execute_operation("buy", params)
+        operation_id = self.execute_operation("buy", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def market_buy(
@@ -343,7 +427,7 @@ class TradeClient:
             "quantity": quantity,
             "execution_strategy": execution_strategy
         }
-        operation_id = self.execute_operation("market_buy", params)
+        operation_id = self.execute_operation("market_buy", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def market_sell(
@@ -384,7 +468,7 @@ class TradeClient:
             "quantity": quantity,
             "execution_strategy": execution_strategy
         }
-        operation_id = self.execute_operation("market_sell", params)
+        operation_id = self.execute_operation("market_sell", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def sell(
@@ -416,9 +500,51 @@ class TradeClient:
             "price": price,
             "quantity": quantity
         }
-        operation_id = self.execute_operation("sell", params)
+        operation_id = self.execute_operation("sell", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
+    def batch_order(
+        self,
+        legs: List[Dict[str, Any]],
+        stop_on_error: bool = False,
+        priority: int = 0,
+        timeout: Optional[float] = None
+    ) -> dict:
+        """
+        批量委托（在委托页面上连续录入，适合开盘时一篮子下单）
+
+        Args:
+            legs: 委托列表，按顺序提交，每笔包含：
+                - side: "buy" 或 "sell"
+                - stock_code: 股票代码（6位数字）
+                - price: 委托价格
+                - quantity: 委托数量（股票必须是100的倍数，可转债必须是10的倍数）
+            stop_on_error: 某一笔失败后是否停止提交剩余委托
+            priority: 优先级（0-10），数字越大优先级越高
+            timeout: 操作超时时间（秒）
+
+        Returns:
+            操作结果（OperationResult），逐笔结果在 result["data"]["legs"]，
+            每笔包含 index、side、stock_code、price、quantity、success、message；
+            全部成功时 result["success"] 为 True
+
+        Raises:
+            TradeClientError: 连接失败、API 错误或操作超时
+
+        Examples:
+            >>> result = client.batch_order([
+            ...     {"side": "buy", "stock_code": "600000", "price": 10.50, "quantity": 100},
+            ...     {"side": "buy", "stock_code": "000001", "price": 12.30, "quantity": 200},
+            ...     {"side": "sell", "stock_code": "601318", "price": 45.00, "quantity": 100},
+            ... ])
+            >>> for leg in result["data"]["legs"]:
+            ...     print(leg["stock_code"], leg["success"], leg["message"])
+        """
+        data = {"legs": legs, "stop_on_error": stop_on_error, "priority": priority,
+                "max_queue_wait": self._queue_wait(timeout)}
+        response = self._request("POST", "/api/v1/operations/batch_order", json=data)
+        return self.get_operation_result(response["data"]["operation_id"], timeout=timeout)
+
     def cancel_order(
         self,
         stock_code: Optional[str] = None,
@@ -450,7 +576,7 @@ class TradeClient:
         if stock_code:
             params["stock_code"] = stock_code
 
-        operation_id = self.execute_operation("order_cancel", params)
+        operation_id = self.execute_operation("order_cancel", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def condition_buy(
@@ -497,7 +623,7 @@ class TradeClient:
             "quantity": quantity,
             "expire_days": expire_days
         }
-        operation_id = self.execute_operation("condition_buy", params)
+        operation_id = self.execute_operation("condition_buy", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def stop_loss_profit(
@@ -543,13 +669,14 @@ class TradeClient:
         if quantity is not None:
             params["quantity"] = quantity
 
-        operation_id = self.execute_operation("stop_loss_profit", params)
+        operation_id = self.execute_operation("stop_loss_profit", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def query_condition_orders(
         self,
         return_type: Literal["str", "json", "dict", "markdown"] = "json",
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        max_age: Optional[float] = None
     ) -> dict:
         """
         查询条件单
@@ -561,6 +688,7 @@ class TradeClient:
                 - "dict": 字典格式
                 - "markdown": Markdown 表格
             timeout: 操作超时时间（秒）
+            max_age: 可接受的缓存数据最大时长（秒），0 表示强制从客户端重新查询
 
         Returns:
             操作结果（OperationResult），格式为：
@@ -582,7 +710,7 @@ class TradeClient:
             ...     print(orders)
         """
         params = {"return_type": return_type}
-        operation_id = self.execute_operation("condition_order_query", params)
+        operation_id = self.execute_operation("condition_order_query", params, max_age=max_age, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def cancel_condition_orders(
@@ -621,7 +749,7 @@ class TradeClient:
         if order_type is not None:
             params["order_type"] = order_type
 
-        operation_id = self.execute_operation("condition_order_cancel", params)
+        operation_id = self.execute_operation("condition_order_cancel", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     # ==================== 查询操作便捷方法 ====================
@@ -629,7 +757,8 @@ class TradeClient:
     def query_holdings(
         self,
         return_type: Literal["str", "json", "dict", "markdown"] = "json",
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        max_age: Optional[float] = None
     ) -> dict:
         """
         查询持仓
@@ -641,9 +770,11 @@ class TradeClient:
                 - "dict": 字典格式
                 - "markdown": Markdown 表格
             timeout: 操作超时时间（秒）
+            max_age: 可接受的缓存数据最大时长（秒），0 表示强制从客户端重新查询
 
         Returns:
             操作结果（OperationResult），持仓数据在 result["data"]["holdings"]
+            是否来自缓存见 result["metadata"]["cached"]，数据时长见 result["metadata"]["cache_age"]
 
         Examples:
             >>> result = client.query_holdings()
@@ -651,16 +782,21 @@ class TradeClient:
             ...     holdings = result["data"]["holdings"]
         """
         params = {"return_type": return_type}
-        operation_id = self.execute_operation("holding_query", params)
+        operation_id = self.execute_operation("holding_query", params, max_age=max_age, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def query_funds(
         self,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        max_age: Optional[float] = None
     ) -> dict:
         """
         查询资金
 
+        Args:
+            timeout: 操作超时时间（秒）
+            max_age: 可接受的缓存数据最大时长（秒），0 表示强制从客户端重新查询
+
         Returns:
             操作结果（OperationResult），资金数据在 result["data"]
             包含：资金余额、冻结金额、可用金额、可取金额、股票市值、总资产、持仓盈亏
@@ -671,7 +807,7 @@ class TradeClient:
             ...     funds = result["data"]
             ...     print(funds["总资产"])
         """
-        operation_id = self.execute_operation("funds_query", {})
+        operation_id = self.execute_operation("funds_query", {}, max_age=max_age, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def query_orders(
@@ -704,7 +840,7 @@ class TradeClient:
         if stock_code:
             params["stock_code"] = stock_code
 
-        operation_id = self.execute_operation("order_query", params)
+        operation_id = self.execute_operation("order_query", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def query_historical_commission(
@@ -746,7 +882,7 @@ class TradeClient:
         if stock_code is not None:
             params["stock_code"] = stock_code
 
-        operation_id = self.execute_operation("historical_commission_query", params)
+        operation_id = self.execute_operation("historical_commission_query", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def reverse_repo_buy(
@@ -779,18 +915,20 @@ class TradeClient:
             "time_range": time_range,
             "amount": amount
         }
-        operation_id = self.execute_operation("reverse_repo_buy", params)
+        operation_id = self.execute_operation("reverse_repo_buy", params, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     def query_reverse_repo(
         self,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        max_age: Optional[float] = None
     ) -> dict:
         """
         查询国债逆回购年化利率
 
         Args:
             timeout: 操作超时时间（秒）
+            max_age: 可接受的缓存数据最大时长（秒），0 表示强制从客户端重新查询
 
         Returns:
             操作结果（OperationResult），年化利率数据在 result["data"]["reverse_repo_interest"]
@@ -802,7 +940,7 @@ class TradeClient:
             ...     for item in rates:
             ...         print(f"{item['市场类型']} - {item['时间类型']}: {item['年化利率']}")
         """
-        operation_id = self.execute_operation("reverse_repo_query", {})
+        operation_id = self.execute_operation("reverse_repo_query", {}, max_age=max_age, max_queue_wait=self._queue_wait(timeout))
         return self.get_operation_result(operation_id, timeout=timeout)
 
     # ==================== 连接管理 ====================
@@ -2,4 +2,5 @@ from .config import project_config_instance
 
 from .screen_capture import get_mss_instance
 from .captcha_ocr import get_captcha_ocr_server
+from .clipboard import get_clipboard_provider, set_clipboard_provider
 from .table_text_handel import df_format_convert, text2df
\ No newline at end of file
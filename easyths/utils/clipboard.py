@@ -0,0 +1,121 @@
+"""剪贴板访问 - 可替换的剪贴板实现，支持判断复制内容是否已到达
+
+表格数据通过 Ctrl+A Ctrl+C 复制到剪贴板后读取，复制耗时与表格大小相关。
+先清空剪贴板并记下序列号，之后按序列号（Windows）和内容变化判断复制是否完成，
+不再依赖固定时长的等待。
+
+Author: noimank
+Email: noimank@163.com
+"""
+
+import sys
+import threading
+from typing import Optional
+
+import pyperclip
+
+
+class ClipboardProvider:
+    """剪贴板接口"""
+
+    # 清空后的剪贴板内容
+    CLEARED = ""
+
+    def get_text(self) -> str:
+        """读取剪贴板文本"""
+        raise NotImplementedError
+
+    def set_text(self, text: str) -> None:
+        """写入剪贴板文本"""
+        raise NotImplementedError
+
+    def sequence_number(self) -> Optional[int]:
+        """剪贴板序列号，每次内容变化递增；不支持时返回None"""
+        return None
+
+    def clear(self) -> Optional[int]:
+        """清空剪贴板
+
+        Returns:
+            清空后的序列号，作为判断新内容是否到达的标记
+        """
+        self.set_text(self.CLEARED)
+        return self.sequence_number()
+
+    def has_new_content(self, mark: Optional[int]) -> bool:
+        """清空之后是否有新内容写入
+
+        序列号在复制方清空剪贴板时就会变化，因此序列号变化后还要确认内容已不是清空时的内容；
+        序列号未变时不读取内容，避免频繁打开剪贴板
+        """
+        if mark is not None and self.sequence_number() == mark:
+            return False
+        return self.get_text() != self.CLEARED
+
+
+class SystemClipboard(ClipboardProvider):
+    """系统剪贴板（pyperclip），Windows 下使用 GetClipboardSequenceNumber 判断变化"""
+
+    def __init__(self):
+        self._get_sequence_number = None
+        if sys.platform == "win32":
+            import ctypes
+
+            self._get_sequence_number = ctypes.windll.user32.GetClipboardSequenceNumber
+
+    def get_text(self) -> str:
+        return pyperclip.paste()
+
+    def set_text(self, text: str) -> None:
+        pyperclip.copy(text)
+
+    def sequence_number(self) -> Optional[int]:
+        if self._get_sequence_number is None:
+            return None
+        return self._get_sequence_number()
+
+
+class MemoryClipboard(ClipboardProvider):
+    """内存剪贴板 - 非Windows环境下的替身，用于单元测试和基准测试"""
+
+    def __init__(self):
+        self._text = self.CLEARED
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def get_text(self) -> str:
+        with self._lock:
+            return self._text
+
+    def set_text(self, text: str) -> None:
+        with self._lock:
+            self._text = text
+            self._sequence += 1
+
+    def sequence_number(self) -> Optional[int]:
+        with self._lock:
+            return self._sequence
+
+    def copy_after(self, text: str, delay: float) -> threading.Timer:
+        """模拟客户端异步复制：delay 秒后写入剪贴板"""
+        timer = threading.Timer(delay, self.set_text, args=(text,))
+        timer.daemon = True
+        timer.start()
+        return timer
+
+
+_clipboard_provider: Optional[ClipboardProvider] = None
+
+
+def get_clipboard_provider() -> ClipboardProvider:
+    """获取当前使用的剪贴板实现（默认系统剪贴板）"""
+    global _clipboard_provider
+    if _clipboard_provider is None:
+        _clipboard_provider = SystemClipboard()
+    return _clipboard_provider
+
+
+def set_clipboard_provider(provider: Optional[ClipboardProvider]) -> None:
+    """替换剪贴板实现，None 表示恢复系统剪贴板"""
+    global _clipboard_provider
+    _clipboard_provider = provider
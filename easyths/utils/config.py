@@ -10,13 +10,57 @@ class ProjectConfig:
     onnx_model_dir = os.getenv("APP_ONNX_MODEL_DIR", None)
     # 默认保存
     save_error_captcha_image = os.getenv("APP_SAVE_ERROR_CAPTCHA_IMAGE", "true").lower() == "true"
+    # 控件定位学习到的下标持久化文件，重启后复用
+    app_locator_index_file = str(Path("~/easyths/locator_index.json").expanduser()) if os.getenv("APP_LOCATOR_INDEX_FILE", "") == "" else os.getenv("APP_LOCATOR_INDEX_FILE")
+    # 本机校准的延时配置文件，启动时加载
+    app_delay_profile_file = str(Path("~/easyths/delay_profile.json").expanduser()) if os.getenv("APP_DELAY_PROFILE_FILE", "") == "" else os.getenv("APP_DELAY_PROFILE_FILE")
+    # 延时保护带：实际延时 = 校准值 × (1 + 比例) + 余量秒数，且不超过默认值
+    app_delay_guard_ratio = float(os.getenv("APP_DELAY_GUARD_RATIO", 0.5))
+    app_delay_guard_margin = float(os.getenv("APP_DELAY_GUARD_MARGIN", 0.02))
+    # 界面交互轨迹：录制每次操作的 UIA 调用，用于离线回放（easyths --replay）
+    app_trace_enabled = os.getenv("APP_TRACE_ENABLED", "false").lower() == "true"
+    app_trace_dir = str(Path("~/easyths/traces").expanduser()) if os.getenv("APP_TRACE_DIR", "") == "" else os.getenv("APP_TRACE_DIR")
+    # 只保存耗时不少于该秒数的操作，0 表示全部保存
+    app_trace_min_duration = float(os.getenv("APP_TRACE_MIN_DURATION", 0))
 
     # Trading配置
     trading_app_path = os.getenv("TRADING_APP_PATH", "C:/同花顺远航版/transaction/xiadan.exe")
+    # GUI 后端：uia 连接真实客户端，simulated 使用内存中的模拟客户端（可在 Linux 上运行）
+    trading_backend = os.getenv("TRADING_BACKEND", "uia")
+    # 模拟客户端界面耗时的缩放比例，0 表示界面即时响应
+    trading_simulated_latency_scale = float(os.getenv("TRADING_SIMULATED_LATENCY_SCALE", 1.0))
     # Queue
     queue_max_size = int(os.getenv("QUEUE_MAX_SIZE", 1000))
     queue_priority_levels = int(os.getenv("QUEUE_PRIORITY_LEVELS", 5))
     queue_batch_size = int(os.getenv("QUEUE_BATCH_SIZE", 10))
+    # 排队超过该时长（秒）的操作提升一个优先级通道，0 表示不提升
+    queue_aging_interval = float(os.getenv("QUEUE_AGING_INTERVAL", 5))
+    # 每个调用方排队中的操作数上限，0 表示不限制；调用方之间赤字轮询每轮补充的GUI时间（秒）
+    queue_max_queued_per_caller = int(os.getenv("QUEUE_MAX_QUEUED_PER_CALLER", 200))
+    queue_fair_quantum = float(os.getenv("QUEUE_FAIR_QUANTUM", 1.0))
+    # 页面亲和调度：同一通道队首若干个操作中优先执行与当前页面相同的，减少页面切换；每个操作最多被越过的次数
+    queue_page_affinity_enabled = os.getenv("QUEUE_PAGE_AFFINITY_ENABLED", "false").lower() == "true"
+    queue_page_affinity_window = int(os.getenv("QUEUE_PAGE_AFFINITY_WINDOW", 8))
+    queue_page_affinity_max_skips = int(os.getenv("QUEUE_PAGE_AFFINITY_MAX_SKIPS", 3))
+    # 抢占：优先级不低于 queue_preempt_priority 的写操作提交时，正在执行的只读操作在下一个检查点中止并重新排队，
+    # 这些写操作排队时越过调用方之间和通道之间的轮询；每个操作最多被抢占的次数
+    queue_preemption_enabled = os.getenv("QUEUE_PREEMPTION_ENABLED", "true").lower() == "true"
+    queue_preempt_priority = int(os.getenv("QUEUE_PREEMPT_PRIORITY", 9))
+    queue_max_preemptions = int(os.getenv("QUEUE_MAX_PREEMPTIONS", 3))
+    # 定时委托（execute_at）提前入队的时长（秒），需覆盖排队、导航和填写的耗时
+    queue_schedule_lead = float(os.getenv("QUEUE_SCHEDULE_LEAD", 3))
+    # 已完成操作的保留策略，0 表示不限制
+    queue_result_ttl = float(os.getenv("QUEUE_RESULT_TTL", 3600))  # 秒
+    queue_result_max_count = int(os.getenv("QUEUE_RESULT_MAX_COUNT", 10000))
+    queue_result_max_bytes = int(os.getenv("QUEUE_RESULT_MAX_BYTES", 256 * 1024 * 1024))
+    # 结果超过该字节数时落盘，0 表示不落盘
+    queue_result_spill_threshold = int(os.getenv("QUEUE_RESULT_SPILL_THRESHOLD", 0))
+    queue_result_spill_dir = str(Path("~/easyths/results").expanduser()) if os.getenv("QUEUE_RESULT_SPILL_DIR", "") == "" else os.getenv("QUEUE_RESULT_SPILL_DIR")
+    # 只读查询结果缓存（各查询的缓存时长由插件元数据 cache_ttl 声明）
+    queue_query_cache_enabled = os.getenv("QUEUE_QUERY_CACHE_ENABLED", "true").lower() == "true"
+    # 下单前按最近查询到的资金、持仓检查委托，快照有效期（秒）
+    queue_pre_trade_check_enabled = os.getenv("QUEUE_PRE_TRADE_CHECK_ENABLED", "true").lower() == "true"
+    queue_pre_trade_snapshot_ttl = float(os.getenv("QUEUE_PRE_TRADE_SNAPSHOT_TTL", 10))
 
     # API配置
     api_host = os.getenv("API_HOST", "0.0.0.0")
@@ -24,6 +68,7 @@ class ProjectConfig:
     api_rate_limit = int(os.getenv("API_RATE_LIMIT", 10))
     api_cors_origins = os.getenv("API_CORS_ORIGINS", "*")
     api_key = os.getenv("API_KEY", None)
+    api_keys = os.getenv("API_KEYS", None)  # 多个调用方的密钥，逗号分隔的 名称:密钥，如"strategy_a:key1,strategy_b:key2"
     api_ip_whitelist = os.getenv("API_IP_WHITELIST", None)  # None表示允许所有，逗号分隔如"127.0.0.1,192.168.1.*"
     api_mcp_server_type = os.getenv("API_MCP_SERVER_TYPE", "streamable-http")  # MCP服务器传输类型: http, streamable-http, sse
 
@@ -65,12 +110,30 @@ class ProjectConfig:
                 pa = Path("~/easyths/captcha_error").expanduser()
                 if not pa.exists():
                     pa.mkdir(parents=True, exist_ok=True)
+            if "locator_index_file" in app_config:
+                self.app_locator_index_file = str(Path("~/easyths/locator_index.json").expanduser()) if app_config["locator_index_file"] == "" else app_config["locator_index_file"]
+            if "delay_profile_file" in app_config:
+                self.app_delay_profile_file = str(Path("~/easyths/delay_profile.json").expanduser()) if app_config["delay_profile_file"] == "" else app_config["delay_profile_file"]
+            if "delay_guard_ratio" in app_config:
+                self.app_delay_guard_ratio = app_config["delay_guard_ratio"]
+            if "delay_guard_margin" in app_config:
+                self.app_delay_guard_margin = app_config["delay_guard_margin"]
+            if "trace_enabled" in app_config:
+                self.app_trace_enabled = app_config["trace_enabled"]
+            if "trace_dir" in app_config:
+                self.app_trace_dir = str(Path("~/easyths/traces").expanduser()) if app_config["trace_dir"] == "" else app_config["trace_dir"]
+            if "trace_min_duration" in app_config:
+                self.app_trace_min_duration = app_config["trace_min_duration"]
 
         # 处理 [trading] 部分
         if "trading" in config:
             trading_config = config["trading"]
             if "app_path" in trading_config:
                 self.trading_app_path = trading_config["app_path"]
+            if "backend" in trading_config:
+                self.trading_backend = trading_config["backend"]
+            if "simulated_latency_scale" in trading_config:
+                self.trading_simulated_latency_scale = trading_config["simulated_latency_scale"]
 
         # 处理 [queue] 部分
         if "queue" in config:
@@ -81,6 +144,46 @@ class ProjectConfig:
                 self.queue_priority_levels = queue_config["priority_levels"]
             if "batch_size" in queue_config:
                 self.queue_batch_size = queue_config["batch_size"]
+            if "aging_interval" in queue_config:
+                self.queue_aging_interval = queue_config["aging_interval"]
+            if "max_queued_per_caller" in queue_config:
+                self.queue_max_queued_per_caller = queue_config["max_queued_per_caller"]
+            if "fair_quantum" in queue_config:
+                # 时间片必须为正数，否则赤字永远补不回来
+                if queue_config["fair_quantum"] > 0:
+                    self.queue_fair_quantum = queue_config["fair_quantum"]
+                else:
+                    raise ValueError(f"无效的 fair_quantum: {queue_config['fair_quantum']}，必须大于 0")
+            if "page_affinity_enabled" in queue_config:
+                self.queue_page_affinity_enabled = queue_config["page_affinity_enabled"]
+            if "page_affinity_window" in queue_config:
+                self.queue_page_affinity_window = queue_config["page_affinity_window"]
+            if "page_affinity_max_skips" in queue_config:
+                self.queue_page_affinity_max_skips = queue_config["page_affinity_max_skips"]
+            if "preemption_enabled" in queue_config:
+                self.queue_preemption_enabled = queue_config["preemption_enabled"]
+            if "preempt_priority" in queue_config:
+                self.queue_preempt_priority = queue_config["preempt_priority"]
+            if "max_preemptions" in queue_config:
+                self.queue_max_preemptions = queue_config["max_preemptions"]
+            if "schedule_lead" in queue_config:
+                self.queue_schedule_lead = queue_config["schedule_lead"]
+            if "result_ttl" in queue_config:
+                self.queue_result_ttl = queue_config["result_ttl"]
+            if "result_max_count" in queue_config:
+                self.queue_result_max_count = queue_config["result_max_count"]
+            if "result_max_bytes" in queue_config:
+                self.queue_result_max_bytes = queue_config["result_max_bytes"]
+            if "result_spill_threshold" in queue_config:
+                self.queue_result_spill_threshold = queue_config["result_spill_threshold"]
+            if "result_spill_dir" in queue_config:
+                self.queue_result_spill_dir = str(Path("~/easyths/results").expanduser()) if queue_config["result_spill_dir"] == "" else queue_config["result_spill_dir"]
+            if "query_cache_enabled" in queue_config:
+                self.queue_query_cache_enabled = queue_config["query_cache_enabled"]
+            if "pre_trade_check_enabled" in queue_config:
+                self.queue_pre_trade_check_enabled = queue_config["pre_trade_check_enabled"]
+            if "pre_trade_snapshot_ttl" in queue_config:
+                self.queue_pre_trade_snapshot_ttl = queue_config["pre_trade_snapshot_ttl"]
 
         # 处理 [api] 部分
         if "api" in config:
@@ -96,6 +199,9 @@ class ProjectConfig:
             if "key" in api_config:
                 # 空字符串转换为 None
                 self.api_key = api_config["key"] or None
+            if "keys" in api_config:
+                # 空字符串转换为 None
+                self.api_keys = api_config["keys"] or None
             if "ip_whitelist" in api_config:
                 # 空字符串转换为 None
                 self.api_ip_whitelist = api_config["ip_whitelist"] or None
@@ -131,6 +237,23 @@ class ProjectConfig:
             return None
         return [ip.strip() for ip in self.api_ip_whitelist.split(",") if ip.strip()]
 
+    @property
+    def api_key_callers(self) -> dict[str, str]:
+        """获取 API 密钥到调用方名称的映射
+
+        Returns:
+            dict[str, str]: 密钥 -> 调用方名称，[api] key 对应的调用方名称为 default，为空表示未启用认证
+        """
+        callers = {}
+        if self.api_key:
+            callers[self.api_key] = "default"
+        for pair in (self.api_keys or "").split(","):
+            name, sep, key = pair.strip().partition(":")
+            if not sep or not name.strip() or not key.strip():
+                continue
+            callers[key.strip()] = name.strip()
+        return callers
+
     @property
     def api_cors_origins_list(self) -> list[str]:
         """获取CORS允许的源列表
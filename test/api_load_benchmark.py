@@ -0,0 +1,86 @@
+"""API 压测 - 大量长轮询结果时的下单提交延迟
+
+启动一个只挂载操作路由的 FastAPI 应用，让 500 个客户端同时长轮询一个慢操作的结果，
+同时测量提交新操作的延迟。结果等待走异步接口，不占用事件循环，提交延迟应保持平稳。
+
+运行方式:
+    python test/api_load_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from easyths.api.dependencies.common import set_global_instances
+from easyths.api.routes import operations_router
+from easyths.core import operation_registry
+from easyths.core.operation_queue import OperationQueue
+
+from operation_queue_benchmark import NoopOperation
+
+
+def create_app(queue: OperationQueue) -> FastAPI:
+    """创建只包含操作路由的应用"""
+    app = FastAPI()
+    set_global_instances(queue, None)
+    app.include_router(operations_router)
+    return app
+
+
+async def submit_latencies(client: httpx.AsyncClient, rounds: int) -> List[float]:
+    """测量提交操作的延迟（毫秒）"""
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = await client.post("/api/v1/operations/bench_noop", json={"params": {}})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def long_poll(client: httpx.AsyncClient, operation_id: str) -> int:
+    """长轮询慢操作结果"""
+    response = await client.get(f"/api/v1/operations/{operation_id}/result", params={"timeout": 30})
+    return response.status_code
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """计算常用分位数"""
+    cuts = statistics.quantiles(values, n=100)
+    return {"p50": round(cuts[49], 2), "p99": round(cuts[98], 2), "max": round(max(values), 2)}
+
+
+async def run(waiters: int = 500, rounds: int = 200, slow_work: float = 3.0) -> None:
+    operation_registry.register(NoopOperation)
+    queue = OperationQueue()
+    queue.start()
+    transport = httpx.ASGITransport(app=create_app(queue))
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            idle = await submit_latencies(client, rounds)
+
+            # 提交一个慢操作，让所有客户端等待它的结果
+            response = await client.post("/api/v1/operations/bench_noop", json={"params": {"work": slow_work}})
+            slow_id = response.json()["data"]["operation_id"]
+            pollers = [asyncio.create_task(long_poll(client, slow_id)) for _ in range(waiters)]
+            await asyncio.sleep(0.2)
+
+            loaded = await submit_latencies(client, rounds)
+            status_codes = await asyncio.gather(*pollers)
+    finally:
+        queue.stop()
+
+    print(f"提交延迟（毫秒），{rounds} 次:")
+    print(f"  无等待方:        {summarize(idle)}")
+    print(f"  {waiters} 个长轮询: {summarize(loaded)}")
+    print(f"  长轮询返回 200 的数量: {status_codes.count(200)}/{waiters}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,84 @@
+"""剪贴板到达检测测试 - 使用内存剪贴板模拟客户端异步复制
+
+Author: noimank
+Email: noimank@163.com
+"""
+from typing import Any, Dict
+
+import pytest
+
+from easyths.core import BaseOperation
+from easyths.models.operations import OperationResult, PluginMetadata
+from easyths.utils import set_clipboard_provider
+from easyths.utils.clipboard import MemoryClipboard
+
+
+class CopyOperation(BaseOperation):
+    """测试用操作：清空剪贴板后等待复制内容到达"""
+
+    def __init__(self):
+        super().__init__()
+        self.popup = False
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(name="CopyOperation", description="测试用操作", operation_name="copy_test")
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def pre_execute(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def is_exist_pop_dialog(self) -> bool:
+        return self.popup
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        self.clear_clipboard()
+        if params.get("text") is not None:
+            params["clipboard"].copy_after(params["text"], params["delay"])
+        arrived = self.wait_for_clipboard(timeout=params.get("timeout", 2.0))
+        return OperationResult(success=arrived, data=self.get_clipboard_data())
+
+
+@pytest.fixture
+def clipboard():
+    clipboard = MemoryClipboard()
+    set_clipboard_provider(clipboard)
+    yield clipboard
+    set_clipboard_provider(None)
+
+
+def test_has_new_content_after_clear(clipboard):
+    """清空后的序列号作为标记，只有写入非空内容才算到达"""
+    clipboard.set_text("旧数据")
+    mark = clipboard.clear()
+    assert not clipboard.has_new_content(mark)
+    clipboard.set_text("证券代码\t证券名称")
+    assert clipboard.has_new_content(mark)
+
+
+def test_wait_returns_when_copy_arrives(clipboard):
+    """复制完成后立即返回，不用等满固定时长"""
+    result = CopyOperation().run({"clipboard": clipboard, "text": "证券代码\t证券名称", "delay": 0.03})
+    assert result.success
+    assert result.data == "证券代码\t证券名称"
+    record = result.metadata["waits"][0]
+    assert record["name"] == "clipboard"
+    assert 0.03 <= record["elapsed"] < 0.2
+
+
+def test_wait_times_out_without_copy(clipboard):
+    """没有复制内容时超时返回，读到的是清空后的内容而不是旧数据"""
+    clipboard.set_text("上一次查询的数据")
+    result = CopyOperation().run({"clipboard": clipboard, "timeout": 0.1})
+    assert not result.success
+    assert result.data == ""
+
+
+def test_wait_stops_on_pop_dialog(clipboard):
+    """触发复制限制时弹出验证码框，立即返回交给验证码处理"""
+    operation = CopyOperation()
+    operation.popup = True
+    result = operation.run({"clipboard": clipboard, "timeout": 1.0})
+    assert not result.success
+    assert result.metadata["waits"][0]["elapsed"] < 0.05
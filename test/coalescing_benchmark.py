@@ -0,0 +1,119 @@
+"""请求合并基准测试 - 看板轮询负载下查询占用的GUI时间
+
+多个客户端线程同时轮询持仓查询（提交后等待结果，再立即提交下一次），
+对比查询未声明只读（逐个排队执行）与声明只读（相同查询合并执行）时实际执行次数和占用的GUI时间。
+
+运行方式:
+    python test/coalescing_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from easyths.core import BaseOperation, operation_registry
+from easyths.core.operation_queue import OperationQueue
+from easyths.models.operations import Operation, OperationResult, PluginMetadata
+
+# 模拟一次持仓查询占用的GUI时间（切换菜单、刷新、复制、解析剪贴板）
+QUERY_WORK = 0.05
+
+
+class _QueryOperation(BaseOperation):
+    """模拟查询操作，统计实际执行次数和占用时间"""
+
+    executions = 0
+    gui_time = 0.0
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def pre_execute(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        start = time.perf_counter()
+        time.sleep(QUERY_WORK)
+        type(self).executions += 1
+        type(self).gui_time += time.perf_counter() - start
+        return OperationResult(success=True, data={"holdings": []})
+
+
+class SerialQueryOperation(_QueryOperation):
+    """未声明只读的查询"""
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(
+            name="SerialQueryOperation",
+            description="基准测试用查询（不合并）",
+            operation_name="bench_query_serial",
+        )
+
+
+class CoalescedQueryOperation(_QueryOperation):
+    """声明只读的查询"""
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(
+            name="CoalescedQueryOperation",
+            description="基准测试用查询（合并）",
+            operation_name="bench_query_coalesced",
+            read_only=True,
+            parameters={
+                "return_type": {"type": "string", "required": False, "default": "json"}
+            }
+        )
+
+
+def poll(queue: OperationQueue, name: str, deadline: float, served: list) -> None:
+    """单个看板客户端：循环提交查询并等待结果"""
+    count = 0
+    while time.perf_counter() < deadline:
+        operation_id = queue.submit(Operation(name=name, params={"return_type": "json"}))
+        result = queue.get_result(operation_id, timeout=30)
+        if result and result.success:
+            count += 1
+    served.append(count)
+
+
+def run(operation_class: type, clients: int, duration: float) -> Dict[str, Any]:
+    """运行一轮看板轮询负载"""
+    operation_registry.register(operation_class)
+    operation_class.executions = 0
+    operation_class.gui_time = 0.0
+    name = operation_class().metadata.operation_name
+
+    queue = OperationQueue()
+    queue.start()
+    served: list = []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=poll, args=(queue, name, deadline, served)) for _ in range(clients)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        queue.stop()
+
+    requests = sum(served)
+    return {
+        "请求数": requests,
+        "执行数": operation_class.executions,
+        "GUI时间": round(operation_class.gui_time, 2),
+        "每次执行服务的请求": round(requests / max(operation_class.executions, 1), 1),
+        "每请求GUI时间(ms)": round(operation_class.gui_time * 1000 / max(requests, 1), 1),
+        "合并数": queue.get_queue_stats()["total_coalesced"],
+    }
+
+
+def main(clients: int = 20, duration: float = 3.0) -> None:
+    print(f"{clients} 个看板客户端轮询持仓查询 {duration}s（每次查询占用GUI {QUERY_WORK * 1000:.0f}ms）:")
+    print(f"  逐个执行(旧): {run(SerialQueryOperation, clients, duration)}")
+    print(f"  合并执行(新): {run(CoalescedQueryOperation, clients, duration)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""请求合并测试 - 跟随者共享主操作的结果，调整跟随者的优先级作用于主操作
+
+Author: noimank
+Email: noimank@163.com
+"""
+import pytest
+
+from easyths.core.operation_queue import OperationQueue
+from easyths.models.operations import Operation
+from easyths.utils import project_config_instance
+
+
+@pytest.fixture
+def coalesced_queries(simulated_automator):
+    _, automator = simulated_automator()
+    operation_queue = OperationQueue(automator)
+    # 处理线程启动前提交，第二个查询合并到第一个
+    leader, follower = Operation(name="funds_query"), Operation(name="funds_query")
+    operation_queue.submit(leader)
+    operation_queue.submit(follower)
+    assert follower.metadata["coalesced_with"] == leader.id
+    yield operation_queue, leader, follower
+    operation_queue.stop()
+
+
+@pytest.fixture
+def spill_results(monkeypatch, tmp_path):
+    monkeypatch.setattr(project_config_instance, "queue_result_spill_threshold", 10)
+    monkeypatch.setattr(project_config_instance, "queue_result_spill_dir", str(tmp_path))
+
+
+def test_follower_result_survives_spill(spill_results, coalesced_queries):
+    operation_queue, leader, follower = coalesced_queries
+    operation_queue.start()
+
+    leader_result = operation_queue.get_result(leader.id, timeout=30)
+    follower_result = operation_queue.get_result(follower.id, timeout=30)
+    assert leader_result.success and leader_result.data
+    assert follower_result is not None and follower_result.data == leader_result.data
+
+
+def test_follower_priority_raises_leader(coalesced_queries):
+    operation_queue, leader, follower = coalesced_queries
+
+    assert operation_queue.update_priority(follower.id, 8)
+    assert follower.priority == 8 and leader.priority == 8
+    # 调低跟随者不影响主操作和其他请求
+    assert operation_queue.update_priority(follower.id, 2)
+    assert follower.priority == 2 and leader.priority == 8
+    assert operation_queue.get_queue_position(follower.id) == 0
@@ -0,0 +1,32 @@
+"""测试公共夹具 - 连接模拟同花顺客户端的自动化器
+
+Author: noimank
+Email: noimank@163.com
+"""
+import pytest
+
+from easyths.core import operation_registry
+from easyths.core.gui_backend import SimulatedBackend
+from easyths.core.simulated_client import SimulatedClient
+from easyths.core.tonghuashun_automator import TonghuashunAutomator
+
+
+@pytest.fixture
+def simulated_automator():
+    """连接模拟客户端：simulated_automator(**账户参数) 返回 (client, automator)，测试结束时断开
+
+    账户参数（balance、holdings 等）原样传给 SimulatedClient，模拟耗时固定为 0。
+    """
+    operation_registry.load_plugins()
+    automators = []
+
+    def connect(**account):
+        client = SimulatedClient(latency_scale=0, **account)
+        automator = TonghuashunAutomator(backend=SimulatedBackend(client))
+        assert automator.connect()
+        automators.append(automator)
+        return client, automator
+
+    yield connect
+    for automator in automators:
+        automator.disconnect()
@@ -0,0 +1,126 @@
+"""控件句柄缓存测试 - 使用模拟控件树统计 children() 调用次数
+
+Author: noimank
+Email: noimank@163.com
+"""
+import itertools
+
+from easyths.core.control_cache import ControlCache, MAIN_GRID, MAIN_PANEL, ORDER_PRICE, ORDER_STOCK_CODE, locator_key
+
+_runtime_ids = itertools.count(1)
+
+
+class FakeElementInfo:
+    def __init__(self, automation_id: str):
+        self.automation_id = automation_id
+        self.runtime_id = (42, next(_runtime_ids))
+        self.handle = None
+
+
+class FakeControl:
+    """模拟控件，统计整棵树的 children() 调用次数"""
+
+    calls = 0
+
+    def __init__(self, control_type: str = "Pane", class_name: str = "", title: str = "", auto_id: str = "", children=()):
+        self.control_type = control_type
+        self.class_name = class_name
+        self.title = title
+        self.element_info = FakeElementInfo(auto_id)
+        self._children = list(children)
+
+    def children(self, control_type=None, class_name=None, title=None):
+        FakeControl.calls += 1
+        return [child for child in self._children
+                if (control_type is None or child.control_type == control_type)
+                and (class_name is None or child.class_name == class_name)
+                and (title is None or child.title == title)]
+
+    def destroy(self):
+        """模拟控件被销毁：runtime id 变化"""
+        self.element_info.runtime_id = None
+
+
+def build_tree() -> FakeControl:
+    """主窗口 -> 59648 -> AfxMDIFrame140s -> 输入框 / 表格"""
+    grid = FakeControl(class_name="CVirtualGridCtrl", title="Custom1")
+    panel = FakeControl(class_name="AfxMDIFrame140s", children=[
+        FakeControl(control_type="Edit", auto_id=str(auto_id)) for auto_id in range(1000, 1032)
+    ] + [
+        FakeControl(control_type="Edit", auto_id="1032"),
+        FakeControl(control_type="Edit", auto_id="1033"),
+        FakeControl(auto_id="1047", title="HexinScrollWnd", children=[
+            FakeControl(class_name="AfxWnd140s", auto_id="200", children=[grid])
+        ]),
+    ])
+    return FakeControl(control_type="Window", children=[
+        FakeControl(class_name="AfxMDIFrame140s", auto_id="59648", children=[panel])
+    ])
+
+
+def test_repeated_lookups_skip_children_calls():
+    """重复定位同一路径不再发出 children() 调用"""
+    root = build_tree()
+    cache = ControlCache()
+
+    FakeControl.calls = 0
+    first = cache.resolve(root, ORDER_STOCK_CODE, generation=1)
+    assert first.element_info.automation_id == "1032"
+    assert FakeControl.calls == len(ORDER_STOCK_CODE)
+
+    FakeControl.calls = 0
+    for _ in range(10):
+        assert cache.resolve(root, ORDER_STOCK_CODE, generation=1) is first
+    assert FakeControl.calls == 0
+
+    # 共享前缀的路径只解析剩余的一级
+    FakeControl.calls = 0
+    assert cache.resolve(root, ORDER_PRICE, generation=1).element_info.automation_id == "1033"
+    assert FakeControl.calls == 1
+    assert cache.resolve(root, MAIN_GRID, generation=1).class_name == "CVirtualGridCtrl"
+    assert FakeControl.calls == 1 + len(MAIN_GRID) - len(MAIN_PANEL)
+
+
+def test_page_change_and_reconnect_invalidate():
+    """页面代数变化、重连后重新解析；会话级控件不随页面失效"""
+    root = build_tree()
+    cache = ControlCache()
+    cache.resolve(root, ORDER_STOCK_CODE, generation=1)
+
+    FakeControl.calls = 0
+    cache.resolve(root, ORDER_STOCK_CODE, generation=2)
+    assert FakeControl.calls == len(ORDER_STOCK_CODE)
+
+    cache.resolve(root, MAIN_PANEL)
+    cache.clear()
+    FakeControl.calls = 0
+    cache.resolve(root, MAIN_PANEL)
+    assert FakeControl.calls == len(MAIN_PANEL)
+    FakeControl.calls = 0
+    cache.resolve(root, MAIN_PANEL, generation=3)
+    assert FakeControl.calls == 0
+
+
+def test_stale_control_is_revalidated():
+    """控件被销毁后只重新解析失效的那一级"""
+    root = build_tree()
+    cache = ControlCache()
+    edit = cache.resolve(root, ORDER_STOCK_CODE, generation=1)
+    edit.destroy()
+
+    FakeControl.calls = 0
+    assert cache.resolve(root, ORDER_STOCK_CODE, generation=1) is edit
+    assert FakeControl.calls == 1
+    assert cache.stats()["stale"] == 1
+
+
+def test_learned_indexes_persist(tmp_path):
+    """学到的下标写入文件，重启后按下标直接比对"""
+    index_file = str(tmp_path / "locator_index.json")
+    root = build_tree()
+    ControlCache(index_file).resolve(root, ORDER_STOCK_CODE, generation=1)
+
+    restarted = ControlCache(index_file)
+    assert restarted.stats()["learned_indexes"] == 2
+    assert restarted._indexes[locator_key(ORDER_STOCK_CODE)] == 32
+    assert restarted.resolve(build_tree(), ORDER_STOCK_CODE, generation=1).element_info.automation_id == "1032"
@@ -0,0 +1,64 @@
+"""截止时间测试 - 排队超时的操作不操作界面，直接以 expired 结束
+
+Author: noimank
+Email: noimank@163.com
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from easyths.core.operation_queue import OperationQueue
+from easyths.models.operations import Operation, OperationStatus
+
+
+@pytest.fixture
+def client_queue(simulated_automator):
+    client, automator = simulated_automator(holdings={"600000": (1000, 9.8)})
+    # 先提交、后启动处理线程，模拟操作在队列中等待
+    return client, OperationQueue(automator)
+
+
+def test_expired_operation_skips_gui(client_queue):
+    client, operation_queue = client_queue
+    stale = Operation(name="buy", params={"stock_code": "601318", "price": 45.0, "quantity": 100},
+                      max_queue_wait=0.05)
+    past = Operation(name="sell", params={"stock_code": "600000", "price": 10.3, "quantity": 100},
+                     deadline=datetime.now(timezone.utc) - timedelta(seconds=1))
+    fresh = Operation(name="sell", params={"stock_code": "600000", "price": 10.3, "quantity": 100},
+                      max_queue_wait=60)
+    for operation in (stale, past, fresh):
+        operation_queue.submit(operation)
+    time.sleep(0.1)
+
+    operation_queue.start()
+    try:
+        result = operation_queue.get_result(fresh.id, timeout=30)
+        assert result.success
+        for operation in (stale, past):
+            result = operation_queue.get_result(operation.id, timeout=1)
+            assert not result.success and result.metadata["expired"]
+            assert operation_queue.get_status(operation.id) == OperationStatus.EXPIRED
+        # 只有未过期的卖出到达了交易客户端
+        assert [order["side"] for order in client.account.orders] == ["卖出"]
+        assert operation_queue.get_queue_stats()["total_expired"] == 2
+    finally:
+        operation_queue.stop()
+
+
+def test_coalesced_query_extends_deadline(client_queue):
+    _, operation_queue = client_queue
+    leader = Operation(name="funds_query", max_queue_wait=0.05)
+    follower = Operation(name="funds_query")
+    operation_queue.submit(leader)
+    operation_queue.submit(follower)
+    # 跟随者没有截止时间，合并后的查询不会过期
+    assert leader.deadline is None
+    time.sleep(0.1)
+
+    operation_queue.start()
+    try:
+        assert operation_queue.get_result(follower.id, timeout=30).success
+        assert operation_queue.get_status(leader.id) == OperationStatus.COMPLETED
+    finally:
+        operation_queue.stop()
@@ -0,0 +1,62 @@
+"""延时配置测试 - 保护带、按机器加载、校准过程
+
+Author: noimank
+Email: noimank@163.com
+"""
+import json
+import platform
+
+from easyths.core.delay_profile import DELAY_DEFAULTS, DelayCalibrator, DelayProfile
+from easyths.models.operations import OperationResult
+
+
+def test_guard_band_never_exceeds_default():
+    """实际时长 = 校准值加保护带，且不超过默认值"""
+    profile = DelayProfile({"menu.expand": 0.04, "table.refresh": 0.29}, guard_ratio=0.5, guard_margin=0.02)
+    assert profile.get("menu.expand") == 0.08
+    assert profile.get("table.refresh") == DELAY_DEFAULTS["table.refresh"][0]
+    assert profile.get("menu.select") == DELAY_DEFAULTS["menu.select"][0]
+    profile.override("menu.expand", 0.0)
+    assert profile.get("menu.expand") == 0.0
+
+
+def test_load_only_on_calibrated_host(tmp_path):
+    """其他机器校准的配置不加载，使用默认延时"""
+    file_path = tmp_path / "delay_profile.json"
+    profile = DelayProfile({"menu.expand": 0.04, "unknown": 1.0}, host=platform.node())
+    profile.save(str(file_path))
+    assert DelayProfile.load(str(file_path)).delays == {"menu.expand": 0.04}
+
+    data = json.loads(file_path.read_text(encoding="utf-8"))
+    data["host"] = "other-host"
+    file_path.write_text(json.dumps(data), encoding="utf-8")
+    assert DelayProfile.load(str(file_path)).delays == {}
+
+
+def test_calibrate_stops_when_failures_rise():
+    """逐步缩短延时，失败率上升时保留最后一个通过的时长，未用到的延时不校准"""
+    profile = DelayProfile()
+    runs = []
+
+    def run_operation(name, params):
+        runs.append(name)
+        # 模拟界面：子菜单渲染需要 0.05 秒，查询表格需要刷新 0.1 秒
+        if profile.get("menu.expand") < 0.05:
+            return OperationResult(success=True, data="表格未刷新")
+        if name == "holding_query" and profile.get("table.refresh") < 0.1:
+            return OperationResult(success=False, message="复制失败")
+        return OperationResult(success=True, data=f"{name}数据")
+
+    calibrator = DelayCalibrator(run_operation, profile, [("holding_query", {}), ("funds_query", {})], rounds=2)
+    details = calibrator.calibrate()
+
+    assert details["menu.expand"]["calibrated"] == 0.0525
+    # 结果与基准不一致同样视为失败
+    assert details["menu.expand"]["trials"][-1] == {"value": 0.0375, "failure_rate": 1.0}
+    assert details["table.refresh"]["calibrated"] == 0.105
+    assert details["table.refresh"]["operations"] == ["holding_query"]
+    assert "menu.select" not in details
+    assert profile.delays == {"menu.expand": 0.0525, "table.refresh": 0.105}
+    assert profile.host == platform.node()
+    # 校准结束后不再使用临时延时
+    assert profile.get("menu.expand") == round(0.0525 * 1.5 + 0.02, 4)
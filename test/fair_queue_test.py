@@ -0,0 +1,146 @@
+"""按调用方公平调度测试 - 赤字轮询、排队上限、多密钥认证
+
+Author: noimank
+Email: noimank@163.com
+"""
+import asyncio
+import queue
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from easyths.api.dependencies.common import set_global_instances
+from easyths.api.middleware import APIKeyAuthMiddleware
+from easyths.api.routes import operations_router
+from easyths.core import operation_registry
+from easyths.core.fair_queue import CallerQueueFull, FairQueue
+from easyths.core.operation_queue import OperationQueue
+from easyths.utils import project_config_instance
+
+
+def test_deficit_round_robin_by_gui_time():
+    fair = FairQueue(quantum=1.0, aging_interval=0)
+    # a 的操作每个占用0.5秒，b 的操作每个占用2秒
+    cost = {"a": 0.5, "b": 2.0}
+    for i in range(1, 11):
+        fair.put(f"a{i}", f"a{i}", caller="a")
+    for i in range(1, 4):
+        fair.put(f"b{i}", f"b{i}", caller="b")
+
+    order = []
+    while not fair.empty():
+        key = fair.get_nowait()
+        order.append(key)
+        fair.charge(key[0], cost[key[0]])
+
+    # 两个调用方轮流获得大致相同的GUI时间，a 每轮执行的操作更多
+    assert order == ["a1", "b1", "a2", "a3", "a4", "a5", "b2", "a6", "a7", "a8", "a9", "b3", "a10"]
+    stats = fair.caller_stats()
+    assert stats["a"]["gui_time"] == 5.0 and stats["b"]["gui_time"] == 6.0
+    assert stats["a"]["dispatched"] == 10
+
+
+def test_one_at_a_time_caller_pays_for_gui_time():
+    fair = FairQueue(quantum=1.0, aging_interval=0)
+    # a 每次只提交一个10秒的操作，执行完再提交下一个；b 一直有0.5秒的操作排队
+    cost = {"a": 10.0, "b": 0.5}
+    fair.put("a0", "a0", caller="a")
+    for i in range(400):
+        fair.put(f"b{i}", f"b{i}", caller="b")
+
+    gui_time = {"a": 0.0, "b": 0.0}
+    submitted = 1
+    while gui_time["a"] + gui_time["b"] < 200:
+        key = fair.get_nowait()
+        fair.charge(key[0], cost[key[0]])
+        gui_time[key[0]] += cost[key[0]]
+        if key[0] == "a":
+            fair.put(f"a{submitted}", f"a{submitted}", caller="a")
+            submitted += 1
+
+    # 欠下的GUI时间在重新提交后保留，两个调用方获得大致相同的GUI时间
+    assert abs(gui_time["a"] - gui_time["b"]) <= 20
+    assert fair.caller_stats()["a"]["deficit"] < 0
+
+
+def test_quantum_must_be_positive():
+    with pytest.raises(ValueError):
+        FairQueue(quantum=0)
+
+
+def fair_caller(key: str) -> str:
+    return "a" if key.startswith("a") else "b"
+
+
+def test_urgent_write_skips_other_callers_turn():
+    # 以 w 开头的是写操作
+    fair = FairQueue(quantum=1.0, aging_interval=0, urgent_priority=9, urgent=lambda key: key.startswith("w"))
+    for i in range(1, 4):
+        fair.put(f"a{i}", f"a{i}", caller="a")
+    fair.put("b_query", "b_query", priority=10, caller="b")
+    assert not fair.has_urgent()
+    fair.put("w_stop", "w_stop", priority=10, caller="b")
+    assert fair.has_urgent()
+
+    order = []
+    while not fair.empty():
+        key = fair.get_nowait()
+        order.append(key)
+        fair.charge(fair_caller(key), 1.0)
+
+    # 紧急写操作越过 a 的轮次，占用的时间计入 b 的赤字，b 的查询之后按轮询排在 a 后面
+    assert order == ["w_stop", "a1", "a2", "b_query", "a3"]
+    stats = fair.caller_stats()
+    assert stats["b"]["urgent"] == 1 and stats["b"]["gui_time"] == 2.0
+
+
+def test_caller_cap_and_position():
+    fair = FairQueue(max_per_caller=2, aging_interval=0)
+    fair.put("a1", "a1", caller="a")
+    fair.put("a2", "a2", caller="a")
+    with pytest.raises(CallerQueueFull):
+        fair.put("a3", "a3", caller="a")
+    # 其他调用方不受影响
+    fair.put("b1", "b1", caller="b")
+    fair.put("x1", "x1")
+    assert fair.caller_of("x1") == "anonymous"
+    assert fair.caller_stats()["a"]["rejected"] == 1
+
+    assert [fair.position(key) for key in ("a1", "b1", "x1", "a2")] == [0, 1, 2, 3]
+    assert fair.remove("b1") == "b1" and fair.position("x1") == 1
+    assert fair.update_priority("a2", 10) and fair.position("a2") == 0
+    assert sorted(fair.clear()) == ["a1", "a2", "x1"]
+    with pytest.raises(queue.Empty):
+        fair.get(timeout=0.01)
+
+
+def test_api_keys_tag_caller_and_enforce_quota(monkeypatch):
+    monkeypatch.setattr(project_config_instance, "api_key", None)
+    monkeypatch.setattr(project_config_instance, "api_keys", "strategy_a:key-a, strategy_b:key-b")
+    monkeypatch.setattr(project_config_instance, "queue_max_queued_per_caller", 1)
+    operation_registry.load_plugins()
+    # 不启动处理线程，提交的操作留在队列中
+    operation_queue = OperationQueue()
+    app = FastAPI()
+    set_global_instances(operation_queue, None)
+    app.add_middleware(APIKeyAuthMiddleware)
+    app.include_router(operations_router)
+
+    async def post(key):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/v1/operations/order_cancel", json={"params": {"cancel_type": "all"}},
+                                     headers={"Authorization": f"Bearer {key}"})
+
+    assert asyncio.run(post("key-x")).status_code == 401
+    response = asyncio.run(post("key-a"))
+    assert response.status_code == 200
+    assert operation_queue.get_operation(response.json()["data"]["operation_id"]).caller == "strategy_a"
+    # strategy_a 已有一个排队中的操作，strategy_b 不受影响
+    assert asyncio.run(post("key-a")).status_code == 429
+    assert asyncio.run(post("key-b")).status_code == 200
+
+    callers = operation_queue.get_queue_stats()["callers"]
+    assert {name: stats["queued"] for name, stats in callers.items()} == {"strategy_a": 1, "strategy_b": 1}
+    assert callers["strategy_a"]["rejected"] == 1
@@ -0,0 +1,70 @@
+"""界面交互轨迹测试 - 在模拟客户端上录制，离线回放得到相同结果
+
+Author: noimank
+Email: noimank@163.com
+"""
+from easyths.core.gui_backend import SimulatedBackend
+from easyths.core.gui_trace import TraceRecorder, TraceReplayer, load_trace
+from easyths.core.simulated_client import SimulatedClient
+from easyths.core.tonghuashun_automator import TonghuashunAutomator
+from easyths.operations.batch_order import BatchOrderOperation
+from easyths.operations.holding_query import HoldingQueryOperation
+from easyths.operations.order_query import OrderQueryOperation
+
+
+def record(tmp_path, client: SimulatedClient, min_duration: float = 0.0) -> TonghuashunAutomator:
+    automator = TonghuashunAutomator(backend=SimulatedBackend(client))
+    TraceRecorder(str(tmp_path), min_duration=min_duration).attach(automator)
+    assert automator.connect()
+    return automator
+
+
+def test_replay_holding_query_without_client(tmp_path):
+    """录制的持仓查询（含验证码）离线回放，结果和数据与录制一致"""
+    client = SimulatedClient(latency_scale=0, holdings={"600000": (1000, 9.8)}, captcha_every=1)
+    automator = record(tmp_path, client)
+    result = HoldingQueryOperation(automator).run({"return_type": "json"})
+    automator.disconnect()
+    assert result.success
+
+    [path] = tmp_path.glob("*_holding_query.jsonl.gz")
+    header, events = load_trace(str(path))
+    assert header["operation"] == "holding_query" and header["result"]["success"]
+    kinds = {event["k"] for event in events}
+    assert {"call", "clip", "ocr", "wait"} <= kinds
+
+    report = TraceReplayer(str(path), realtime=False).run(HoldingQueryOperation)
+    assert report["replayed"]["success"], report
+    assert report["calls"]["missing"] == 0 and not report["missing"]
+    assert report["replayed"]["data"] == result.data
+
+
+def test_replay_restores_page_state_and_control_cache(tmp_path):
+    """第二次操作开始时已在目标页面且控件已缓存，回放时同样跳过导航"""
+    client = SimulatedClient(latency_scale=0, balance=100000.0)
+    automator = record(tmp_path, client)
+    BatchOrderOperation(automator).run({"legs": [
+        {"side": "buy", "stock_code": "601318", "price": 45.0, "quantity": 200},
+    ]})
+    first = OrderQueryOperation(automator).run({"return_type": "json"})
+    second = OrderQueryOperation(automator).run({"return_type": "json"})
+    automator.disconnect()
+    assert second.success and second.data == first.data
+
+    paths = sorted(tmp_path.glob("*_order_query.jsonl.gz"))
+    assert len(paths) == 2
+    header, _ = load_trace(str(paths[1]))
+    assert header["state"]["page"] is not None and header["state"]["cache"]
+
+    report = TraceReplayer(str(paths[1]), realtime=False).run(OrderQueryOperation)
+    assert report["replayed"]["success"] and not report["missing"], report
+    assert report["replayed"]["data"] == second.data
+
+
+def test_min_duration_discards_fast_operations(tmp_path):
+    client = SimulatedClient(latency_scale=0)
+    automator = record(tmp_path, client, min_duration=60)
+    assert HoldingQueryOperation(automator).run({"return_type": "json"}).success
+    assert automator.trace_recorder.stats()["discarded"] == 1
+    automator.disconnect()
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,118 @@
+"""多通道调度基准测试 - 持续高优先级负载下低优先级操作的排队等待时间
+
+用模拟时钟做离散事件仿真：单一执行线程每个操作占用固定的GUI时间，
+高优先级查询（priority=10）按泊松过程持续到达，低优先级操作（priority=0）偶尔到达。
+对比旧的单一堆（严格按优先级出队）与多通道加权轮询 + 老化的等待时间分位数。
+
+运行方式:
+    python test/lane_queue_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import heapq
+import itertools
+import random
+import statistics
+from typing import Dict, List
+
+from easyths.core.lane_queue import LaneQueue
+
+# 每个操作占用的GUI时间（秒）
+SERVICE_TIME = 1.0
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StrictPriorityQueue:
+    """旧的单一堆：严格按 (-priority, 入队顺序) 出队"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+
+    def put(self, key: str, item: str, priority: int = 0) -> None:
+        heapq.heappush(self._heap, (-priority, next(self._counter), item))
+
+    def get_nowait(self) -> str:
+        return heapq.heappop(self._heap)[2]
+
+    def empty(self) -> bool:
+        return not self._heap
+
+
+def simulate(queue_factory, high_rate: float, low_rate: float, duration: float, seed: int = 0) -> Dict[str, List[float]]:
+    """仿真 duration 秒，返回各类操作的等待时间，结束时仍在排队的操作按已等待时间计入"""
+    rng = random.Random(seed)
+    clock = SimClock()
+    pq = queue_factory(clock)
+    arrivals = []
+    for kind, rate, priority in (("high", high_rate, 10), ("low", low_rate, 0)):
+        t = rng.expovariate(rate)
+        while t < duration:
+            arrivals.append((t, kind, priority))
+            t += rng.expovariate(rate)
+    arrivals.sort()
+
+    waits: Dict[str, List[float]] = {"high": [], "low": []}
+    pending = {}
+    next_arrival = 0
+    busy_until = 0.0
+    while clock.now < duration:
+        # 执行线程空闲前到达的操作先入队
+        while next_arrival < len(arrivals) and arrivals[next_arrival][0] <= busy_until:
+            t, kind, priority = arrivals[next_arrival]
+            clock.now = t
+            key = str(next_arrival)
+            pending[key] = (kind, t)
+            pq.put(key, key, priority)
+            next_arrival += 1
+        clock.now = busy_until
+        if pq.empty():
+            if next_arrival >= len(arrivals):
+                break
+            busy_until = arrivals[next_arrival][0]
+            continue
+        kind, t = pending.pop(pq.get_nowait())
+        waits[kind].append(clock.now - t)
+        busy_until = clock.now + SERVICE_TIME
+
+    for kind, t in pending.values():
+        waits[kind].append(duration - t)
+    return waits
+
+
+def summarize(waits: List[float]) -> Dict[str, float]:
+    if not waits:
+        return {}
+    ordered = sorted(waits)
+    return {
+        "数量": len(ordered),
+        "p50": round(statistics.median(ordered), 1),
+        "p95": round(ordered[int(len(ordered) * 0.95) - 1], 1),
+        "最长": round(ordered[-1], 1),
+    }
+
+
+def main(duration: float = 3600.0) -> None:
+    factories = {
+        "单一堆(旧)": lambda clock: StrictPriorityQueue(),
+        "多通道(新)": lambda clock: LaneQueue(levels=5, batch_size=10, aging_interval=5, clock=clock),
+    }
+    print(f"单线程执行，每个操作占用GUI {SERVICE_TIME}s，仿真 {duration:.0f}s，等待时间单位为秒:")
+    for high_rate in (0.9, 1.2):
+        print(f"  高优先级到达率 {high_rate}/s，低优先级到达率 0.05/s:")
+        for name, factory in factories.items():
+            waits = simulate(factory, high_rate, 0.05, duration)
+            print(f"    {name} 高优先级 {summarize(waits['high'])}")
+            print(f"    {name} 低优先级 {summarize(waits['low'])}")
+
+
+if __name__ == "__main__":
+    main()
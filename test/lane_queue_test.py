@@ -0,0 +1,93 @@
+"""多通道优先级队列测试 - 加权轮询、老化提升、排队位置
+
+Author: noimank
+Email: noimank@163.com
+"""
+import queue
+
+import pytest
+
+from easyths.core.lane_queue import LaneQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def drain(lanes: LaneQueue) -> list:
+    items = []
+    while not lanes.empty():
+        items.append(lanes.get_nowait())
+    return items
+
+
+def test_weighted_round_robin():
+    lanes = LaneQueue(levels=2, batch_size=3, aging_interval=0)
+    assert lanes.weights == [1, 3]
+    assert [lanes.lane_of(priority) for priority in (0, 5, 6, 10)] == [0, 0, 1, 1]
+    for i in range(4):
+        lanes.put(f"low{i}", f"low{i}", 0)
+    for i in range(6):
+        lanes.put(f"high{i}", f"high{i}", 10)
+
+    positions = {key: lanes.position(key) for key in ("high0", "low0", "low1")}
+    order = drain(lanes)
+    # 高优先级先出队，每出队3个高优先级轮到1个低优先级
+    assert order == ["high0", "high1", "low0", "high2", "high3", "high4", "low1", "high5", "low2", "low3"]
+    assert positions == {key: order.index(key) for key in positions}
+    with pytest.raises(queue.Empty):
+        lanes.get(timeout=0.01)
+
+
+def test_aging_bounds_wait():
+    clock = FakeClock()
+    lanes = LaneQueue(levels=3, batch_size=1000, aging_interval=5, clock=clock)
+    lanes.put("low", "low", 0)
+    for i in range(3):
+        lanes.put(f"high{i}", f"high{i}", 10)
+    assert lanes.get_nowait() == "high0"
+
+    # 等待两个老化间隔后提升到最高通道，排在较晚入队的高优先级操作之前
+    clock.now = 10
+    lanes.put("high3", "high3", 10)
+    assert lanes.get_nowait() == "low"
+    stats = lanes.stats()
+    assert [lane["promoted"] for lane in stats] == [1, 1, 0]
+    assert stats[0]["dispatched"] == 1 and stats[0]["max_wait"] == 10
+
+
+def test_remove_and_update_priority():
+    lanes = LaneQueue(maxsize=3, levels=5, aging_interval=0)
+    lanes.put("a", "a", 0)
+    lanes.put("b", "b", 0)
+    lanes.put("c", "c", 0)
+    with pytest.raises(queue.Full):
+        lanes.put("d", "d", 0)
+    assert lanes.remove("b") == "b" and lanes.remove("b") is None
+    assert lanes.update_priority("c", 10) and lanes.priority("c") == 10
+    assert not lanes.update_priority("missing", 1)
+    assert lanes.position("c") == 0
+    assert lanes.clear() == ["a", "c"]
+    assert lanes.qsize() == 0
+
+
+def test_promoted_head_does_not_block_aging():
+    clock = FakeClock()
+    lanes = LaneQueue(levels=3, batch_size=3, aging_interval=5, clock=clock)
+    lanes.put("old", "old", 0)
+    clock.now = 1.0
+    lanes.put("mid", "mid", 5)
+    for i in range(3):
+        lanes.put(f"high{i}", f"high{i}", 10)
+
+    # old 提升到中间通道，入队更早排在 mid 前面
+    clock.now = 5.5
+    assert lanes.get_nowait() == "high0"
+    # old 还要再等一个间隔，mid 已等待 5.5 秒，应提升到最高通道
+    clock.now = 6.5
+    lanes.get_nowait()
+    assert [lane["promoted"] for lane in lanes.stats()] == [1, 1, 0]
@@ -0,0 +1,95 @@
+"""操作队列基准测试 - 提交到获取结果的延迟分布
+
+使用不触碰GUI的空操作，对比旧的 100ms 轮询等待方式与基于完成事件的等待方式，
+输出 submit→result 延迟的分位数。
+
+运行方式:
+    python test/operation_queue_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from easyths.core import BaseOperation, operation_registry
+from easyths.core.operation_queue import OperationQueue
+from easyths.models.operations import Operation, OperationResult, OperationStatus, PluginMetadata
+
+
+class NoopOperation(BaseOperation):
+    """空操作 - 模拟一次耗时固定的GUI操作"""
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(
+            name="NoopOperation",
+            description="基准测试用空操作",
+            operation_name="bench_noop",
+        )
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def pre_execute(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        time.sleep(params.get("work", 0.0))
+        return OperationResult(success=True, data=params)
+
+
+def polling_get_result(queue: OperationQueue, operation_id: str, timeout: Optional[float] = None) -> Optional[OperationResult]:
+    """旧实现：每100ms轮询一次已完成列表"""
+    start_time = time.perf_counter()
+    while True:
+        operation = queue._completed_operations.get(operation_id)
+        if operation and operation.status in [OperationStatus.COMPLETED, OperationStatus.FAILED]:
+            return operation.result
+        if timeout is not None and time.perf_counter() - start_time >= timeout:
+            return None
+        time.sleep(0.1)
+
+
+def measure(queue: OperationQueue, rounds: int, work: float, polling: bool) -> List[float]:
+    """测量每次 submit→result 的延迟（毫秒）"""
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        operation_id = queue.submit(Operation(name="bench_noop", params={"work": work}))
+        if polling:
+            polling_get_result(queue, operation_id, timeout=10)
+        else:
+            queue.get_result(operation_id, timeout=10)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """计算常用分位数"""
+    cuts = statistics.quantiles(values, n=100)
+    return {
+        "p50": round(cuts[49], 2),
+        "p90": round(cuts[89], 2),
+        "p99": round(cuts[98], 2),
+        "max": round(max(values), 2),
+    }
+
+
+def main(rounds: int = 200, work: float = 0.005) -> None:
+    operation_registry.register(NoopOperation)
+    queue = OperationQueue()
+    queue.start()
+    try:
+        before = percentiles(measure(queue, rounds, work, polling=True))
+        after = percentiles(measure(queue, rounds, work, polling=False))
+    finally:
+        queue.stop()
+
+    print(f"操作耗时 {work * 1000:.1f}ms，共 {rounds} 次，submit→result 延迟（毫秒）:")
+    print(f"  轮询等待(旧): {before}")
+    print(f"  事件等待(新): {after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""定时委托测试 - 提前入队、预先填写、高精度触发和触发误差
+
+Author: noimank
+Email: noimank@163.com
+"""
+import functools
+from datetime import datetime, timedelta
+
+import pytest
+
+from easyths.core import operation_registry
+from easyths.core.operation_queue import OperationQueue
+from easyths.core.order_scheduler import FireTimer, OrderScheduler
+from easyths.models.operations import Operation, OperationStatus
+from easyths.utils import project_config_instance
+
+OPEN = datetime(2026, 10, 19, 9, 30)
+
+
+class FakeClock:
+    """模拟时钟：每次读取前进 tick 秒，睡眠比请求的多 overshoot 秒"""
+
+    def __init__(self, now: datetime, tick: float = 0.0, overshoot: float = 0.0):
+        self.now = now.timestamp()
+        self.tick = tick
+        self.overshoot = overshoot
+        self.on_sleep = None
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        if self.on_sleep is not None:
+            self.on_sleep(seconds)
+        self.now += seconds + self.overshoot
+
+
+def buy(stock_code: str = "601318") -> Operation:
+    return Operation(name="buy", params={"stock_code": stock_code, "price": 45.0, "quantity": 100}, execute_at=OPEN)
+
+
+def test_release_before_execute_at():
+    clock = FakeClock(OPEN - timedelta(seconds=10))
+    released = []
+    scheduler = OrderScheduler(released.append, lead=3, clock=clock)
+    first, cancelled = buy(), buy("600000")
+    scheduler.schedule(first)
+    scheduler.schedule(cancelled)
+    assert scheduler.poll() == 0 and first.id in scheduler
+
+    assert scheduler.cancel(cancelled.id) is cancelled
+    clock.now = (OPEN - timedelta(seconds=3)).timestamp()
+    assert scheduler.poll() == 1
+    assert released == [first] and scheduler.stats()["pending"] == 0
+
+
+def test_fire_timer_spins_past_sleep_overshoot():
+    # 睡眠每次多睡 1.5ms，时钟读取间隔 0.1ms
+    clock = FakeClock(OPEN - timedelta(seconds=1), tick=0.0001, overshoot=0.0015)
+    timer = FireTimer(clock=clock, perf=clock, sleep=clock.sleep, spin=0.002)
+    assert 0 <= timer.wait_until(OPEN.timestamp()) < 0.0002
+
+    # 只靠睡眠时误差就是睡眠的唤醒延迟
+    clock.now = (OPEN - timedelta(seconds=1)).timestamp()
+    assert FireTimer(clock=clock, perf=clock, sleep=clock.sleep, spin=0).wait_until(OPEN.timestamp()) > 0.001
+    # 已过时刻的立即触发，返回迟到的时长
+    assert FireTimer(clock=clock, perf=clock, sleep=clock.sleep).wait_until(OPEN.timestamp() - 1) > 1
+
+
+@pytest.fixture
+def client_automator(simulated_automator):
+    return simulated_automator()
+
+
+def test_order_is_filled_before_fire(client_automator):
+    client, automator = client_automator
+    clock = FakeClock(OPEN - timedelta(seconds=3))
+    scheduler = OrderScheduler(lambda operation: None, lead=3, clock=clock,
+                               timer=FireTimer(clock=clock, perf=clock, sleep=clock.sleep, spin=0))
+    # 等待触发时记录界面状态：输入框已填写，委托还没有提交
+    snapshots = []
+    clock.on_sleep = lambda seconds: snapshots.append(
+        (len(client.account.orders), client.order_inputs[1].window_text(), client.order_inputs[3].window_text()))
+
+    operation = buy()
+    result = operation_registry.get_operation_instance("buy", automator).run(
+        operation.params, fire=functools.partial(scheduler.fire, operation))
+
+    assert snapshots == [(0, "601318", "100")]
+    assert result.success and len(client.account.orders) == 1
+    assert result.metadata["fire"] == {"execute_at": "2026-10-19T09:30:00.000000",
+                                       "fired_at": "2026-10-19T09:30:00.000000", "error_ms": 0.0}
+
+
+def test_queue_fires_scheduled_order(client_automator, monkeypatch):
+    client, automator = client_automator
+    monkeypatch.setattr(project_config_instance, "queue_schedule_lead", 1.5)
+    operation_queue = OperationQueue(automator)
+    operation = Operation(name="buy", params={"stock_code": "600000", "price": 10.2, "quantity": 100},
+                          execute_at=datetime.now() + timedelta(seconds=2))
+    operation_queue.submit(operation)
+    assert operation_queue.get_status(operation.id) == OperationStatus.SCHEDULED
+    operation_queue.start()
+    try:
+        result = operation_queue.get_result(operation.id, timeout=30)
+    finally:
+        operation_queue.stop()
+
+    assert result.success and len(client.account.orders) == 1
+    fired_at = datetime.fromisoformat(result.metadata["fire"]["fired_at"])
+    assert fired_at >= operation.execute_at and abs(result.metadata["fire"]["error_ms"]) < 50
+    assert operation_queue.get_queue_stats()["scheduled"]["fired"] == 1
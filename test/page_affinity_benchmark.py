@@ -0,0 +1,117 @@
+"""页面亲和调度基准测试 - 混合负载下页面切换的次数和耗时
+
+在模拟同花顺客户端上，每轮一次性提交一批随机混合的买入、卖出、撤单查询、持仓查询、资金查询，
+等这一批全部完成后再提交下一批。分别关闭、开启页面亲和调度执行相同的操作序列，
+统计页面导航（switch_hotkey_page / switch_left_menus 实际执行导航的部分）的次数和耗时，以及总耗时。
+
+运行方式:
+    python test/page_affinity_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import functools
+import random
+import time
+from typing import Any, Dict, List, Tuple
+
+from easyths.core import operation_registry
+from easyths.core.base_operation import BaseOperation
+from easyths.core.gui_backend import SimulatedBackend
+from easyths.core.operation_queue import OperationQueue
+from easyths.core.simulated_client import SimulatedClient
+from easyths.core.tonghuashun_automator import TonghuashunAutomator
+from easyths.models.operations import Operation
+from easyths.utils import project_config_instance
+
+# 混合负载中可能出现的操作
+MIX: List[Tuple[str, Dict[str, Any]]] = [
+    ("buy", {"stock_code": "600000", "price": 10.2, "quantity": 100}),
+    ("buy", {"stock_code": "601318", "price": 45.5, "quantity": 100}),
+    ("buy", {"stock_code": "510300", "price": 3.9, "quantity": 100}),
+    ("sell", {"stock_code": "600519", "price": 1500.0, "quantity": 100}),
+    ("sell", {"stock_code": "300750", "price": 200.5, "quantity": 100}),
+    ("order_query", {"return_type": "json"}),
+    ("holding_query", {"return_type": "json"}),
+    ("funds_query", {}),
+]
+
+# 页面导航的累计次数和耗时，嵌套调用只计最外层
+_navigation = {"count": 0, "seconds": 0.0, "depth": 0}
+
+
+def _timed(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        _navigation["depth"] += 1
+        start = time.perf_counter()
+        try:
+            navigated = method(*args, **kwargs)
+        finally:
+            _navigation["depth"] -= 1
+        if _navigation["depth"] == 0 and navigated:
+            _navigation["count"] += 1
+            _navigation["seconds"] += time.perf_counter() - start
+        return navigated
+    return wrapper
+
+
+def workload(rounds: int, batch: int, seed: int = 0) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    rng = random.Random(seed)
+    return [[rng.choice(MIX) for _ in range(batch)] for _ in range(rounds)]
+
+
+def simulate(batches: List[List[Tuple[str, Dict[str, Any]]]], affinity: bool) -> Dict[str, Any]:
+    project_config_instance.queue_page_affinity_enabled = affinity
+    client = SimulatedClient(latency_scale=project_config_instance.trading_simulated_latency_scale,
+                             holdings={"600519": (100000, 1400.0), "300750": (100000, 180.0)}, seed=0)
+    automator = TonghuashunAutomator(backend=SimulatedBackend(client))
+    automator.connect()
+    queue = OperationQueue(automator)
+    queue.start()
+    _navigation.update(count=0, seconds=0.0)
+    failures = 0
+    start = time.perf_counter()
+    try:
+        for operations in batches:
+            submitted = [Operation(name=name, params=dict(params)) for name, params in operations]
+            for operation in submitted:
+                queue.submit(operation)
+            for operation in submitted:
+                result = queue.get_result(operation.id, timeout=60)
+                failures += 0 if result is not None and result.success else 1
+    finally:
+        queue.stop()
+        automator.disconnect()
+    return {
+        "导航次数": _navigation["count"],
+        "导航耗时": round(_navigation["seconds"], 2),
+        "总耗时": round(time.perf_counter() - start, 2),
+        "提前执行": (queue.get_queue_stats()["page_affinity"] or {}).get("reordered", 0),
+        "失败": failures,
+    }
+
+
+def main(rounds: int = 6, batch: int = 12) -> None:
+    # 查询缓存会让重复查询不再导航，这里测的是调度本身减少的页面切换
+    project_config_instance.queue_query_cache_enabled = False
+    BaseOperation.switch_hotkey_page = _timed(BaseOperation.switch_hotkey_page)
+    BaseOperation.switch_left_menus = _timed(BaseOperation.switch_left_menus)
+    operation_registry.load_plugins()
+
+    batches = workload(rounds, batch)
+    print(f"模拟客户端，耗时缩放 {project_config_instance.trading_simulated_latency_scale}，"
+          f"{rounds} 批 x 每批 {batch} 个随机混合操作，"
+          f"窗口 {project_config_instance.queue_page_affinity_window}，"
+          f"最多越过 {project_config_instance.queue_page_affinity_max_skips} 次:")
+    baseline = simulate(batches, affinity=False)
+    print(f"  按提交顺序   {baseline}")
+    result = simulate(batches, affinity=True)
+    print(f"  页面亲和调度 {result}")
+    print(f"  页面切换减少 {baseline['导航次数'] - result['导航次数']} 次，"
+          f"导航耗时节省 {baseline['导航耗时'] - result['导航耗时']:.2f}s，"
+          f"总耗时节省 {baseline['总耗时'] - result['总耗时']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
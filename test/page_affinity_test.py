@@ -0,0 +1,77 @@
+"""页面亲和调度测试 - 同页面操作连续执行、冲突委托不调换顺序、越过次数上限
+
+Author: noimank
+Email: noimank@163.com
+"""
+import pytest
+
+from easyths.core import operation_registry
+from easyths.core.lane_queue import LaneQueue
+from easyths.core.operation_queue import OperationQueue
+from easyths.core.page_affinity import PageAffinity
+from easyths.models.operations import Operation
+from easyths.utils import project_config_instance
+
+
+def order(name: str, **params) -> Operation:
+    return Operation(name=name, params=params)
+
+
+def test_reorder_respects_max_skips():
+    # 总是选择窗口中的最后一个
+    lanes = LaneQueue(levels=1, aging_interval=0, reorder=lambda items: len(items) - 1, reorder_window=3,
+                      max_skips=2)
+    for i in range(6):
+        lanes.put(f"op{i}", f"op{i}", 0)
+    dispatched = [lanes.get_nowait() for _ in range(6)]
+    # op0、op1 被越过两次后按顺序出队，之后的操作才继续重排
+    assert dispatched == ["op2", "op3", "op0", "op1", "op5", "op4"]
+
+
+def test_affinity_skips_conflicting_writes():
+    operation_registry.load_plugins()
+    current = {"page": "卖出[F2]"}
+    affinity = PageAffinity(lambda: current["page"])
+    operations = [order("buy", stock_code="600000", price=10.0, quantity=100),
+                  order("sell", stock_code="600000", price=10.5, quantity=100),
+                  order("sell", stock_code="600036", price=40.0, quantity=100)]
+    # 同一证券的卖出不能越过买入
+    assert affinity(operations) == 2
+    assert affinity.stats() == {"reordered": 1, "conflicts": 1}
+    # 全部撤单与所有写操作冲突，查询不冲突
+    current["page"] = "撤单[F3]"
+    assert affinity([operations[0], order("order_cancel", cancel_type="all")]) == 0
+    assert affinity([operations[0], order("order_query")]) == 1
+    # 页面未知时按原顺序
+    current["page"] = None
+    assert affinity([operations[0], order("order_query")]) == 0
+
+
+@pytest.fixture
+def affinity_queue(monkeypatch, simulated_automator):
+    monkeypatch.setattr(project_config_instance, "queue_page_affinity_enabled", True)
+    client, automator = simulated_automator(holdings={"600000": (1000, 9.8), "600519": (100, 1400.0)})
+    return client, automator, OperationQueue(automator)
+
+
+def test_queue_runs_same_page_consecutively(affinity_queue):
+    client, automator, operation_queue = affinity_queue
+    operations = [order("buy", stock_code="601318", price=45.0, quantity=100),
+                  order("sell", stock_code="600000", price=10.3, quantity=100),
+                  order("buy", stock_code="300750", price=200.0, quantity=100),
+                  order("sell", stock_code="600519", price=1500.0, quantity=100),
+                  order("buy", stock_code="510300", price=3.9, quantity=100)]
+    for operation in operations:
+        operation_queue.submit(operation)
+
+    operation_queue.start()
+    try:
+        for operation in operations:
+            assert operation_queue.get_result(operation.id, timeout=30).success
+    finally:
+        operation_queue.stop()
+
+    # 三笔买入连续执行后再执行两笔卖出，只切换两次页面
+    assert [placed["side"] for placed in client.account.orders] == ["买入", "买入", "买入", "卖出", "卖出"]
+    assert automator.page_state.stats()["navigated"] == 2
+    assert operation_queue.get_queue_stats()["page_affinity"]["reordered"] == 2
@@ -0,0 +1,93 @@
+"""参数验证器测试 - 提交时按参数定义验证，错误请求不进入队列
+
+Author: noimank
+Email: noimank@163.com
+"""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from easyths.api.dependencies.common import set_global_instances
+from easyths.api.routes import operations_router
+from easyths.core import operation_registry
+from easyths.core.param_validator import ParamValidator
+
+ORDER_PARAMETERS = {
+    "stock_code": {"type": "string", "required": True, "min_length": 6, "max_length": 6, "pattern": "^[0-9]{6}$"},
+    "price": {"type": "number", "required": True, "minimum": 0.01, "maximum": 10000},
+    "quantity": {"type": "integer", "required": True, "minimum": 10, "multiple_of": 10},
+    "strategy": {"type": "integer", "required": False, "enum": [1, 3, 5]},
+}
+
+
+def test_scalar_checks():
+    validator = ParamValidator(ORDER_PARAMETERS)
+    assert validator.validate({"stock_code": "600000", "price": 10.5, "quantity": 100}) == []
+    # 整数价格按数字处理，未声明的参数不检查
+    assert validator.validate({"stock_code": "600000", "price": 10, "quantity": 100, "note": object()}) == []
+
+    assert validator.validate({"price": 10.5, "quantity": 100}) == ["stock_code: 缺少必需参数"]
+    assert validator.validate({"stock_code": "60000a", "price": 10.5, "quantity": 100}) == \
+        ["stock_code: 格式不符合 ^[0-9]{6}$"]
+    assert validator.validate({"stock_code": "600000", "price": 0, "quantity": 105, "strategy": 2}) == [
+        "price: 不能小于0.01", "quantity: 必须是10的整数倍", "strategy: 取值必须是 [1, 3, 5] 之一"]
+    # 布尔值和浮点数都不是整数
+    assert validator.validate({"stock_code": "600000", "price": True, "quantity": 100.0}) == [
+        "price: 必须是数字", "quantity: 必须是整数"]
+
+
+def test_array_items():
+    validator = ParamValidator({
+        "legs": {"type": "array", "required": True, "min_items": 1, "max_items": 2, "items": {
+            "side": {"type": "string", "required": True, "enum": ["buy", "sell"]},
+            "price": {"type": "number", "required": True, "multiple_of": 0.01},
+        }},
+        "operations": {"type": "array", "enum": ["funds_query", "holding_query"]},
+    })
+    assert validator.validate({"legs": [{"side": "buy", "price": 10.23}], "operations": ["funds_query"]}) == []
+    assert validator.validate({"legs": []}) == ["legs: 元素个数不能小于1"]
+    assert validator.validate({"legs": [{"side": "buy", "price": 10.0}, "x"]}) == ["legs[1]: 必须是对象"]
+    assert validator.validate({"legs": [{"side": "short", "price": 10.235}]}) == [
+        "legs[0].side: 取值必须是 ['buy', 'sell'] 之一; legs[0].price: 必须是0.01的整数倍"]
+    assert validator.validate({"legs": [{"side": "buy", "price": 1}], "operations": ["buy"]}) == [
+        "operations: 取值必须是 ['funds_query', 'holding_query'] 之一"]
+
+
+class RecordingQueue:
+    """只记录提交的操作"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, operation):
+        self.submitted.append(operation)
+        return operation.id
+
+    def get_queue_position(self, operation_id):
+        return 0
+
+
+def test_invalid_request_rejected_before_queue():
+    operation_registry.load_plugins()
+    queue = RecordingQueue()
+    app = FastAPI()
+    set_global_instances(queue, None)
+    app.include_router(operations_router)
+
+    async def post(name, params):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(f"/api/v1/operations/{name}", json={"params": params})
+
+    response = asyncio.run(post("market_buy", {"stock_code": "600000", "quantity": 100, "execution_strategy": 9}))
+    assert response.status_code == 422
+    assert "execution_strategy: 不能大于6" in response.json()["detail"]
+    # 声明式检查通过，插件自己的 validate() 拒绝（股票数量必须是100的倍数）
+    response = asyncio.run(post("market_buy", {"stock_code": "600000", "quantity": 150}))
+    assert response.status_code == 422
+    assert queue.submitted == []
+
+    response = asyncio.run(post("market_buy", {"stock_code": "600000", "quantity": 200}))
+    assert response.status_code == 200
+    assert [operation.name for operation in queue.submitted] == ["market_buy"]
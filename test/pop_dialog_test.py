@@ -0,0 +1,133 @@
+"""弹窗识别测试 - 使用模拟控件树统计每次 pre_execute 的UIA调用次数
+
+Author: noimank
+Email: noimank@163.com
+"""
+from typing import Any, Dict
+
+from easyths.core import BaseOperation
+from easyths.core.pop_dialog import POP_DIALOG_RULES, PopDialogClassifier, PopDialogSnapshot
+from easyths.models.operations import OperationResult, PluginMetadata
+
+
+class FakeControl:
+    """模拟控件，统计所有跨进程调用（children/window_text/class_name/点击等）"""
+
+    calls = 0
+
+    def __init__(self, control_type: str = "Pane", class_name: str = "", text: str = "", auto_id: str = "", children=(), on_click=None):
+        self.control_type = control_type
+        self._class_name = class_name
+        self._text = text
+        self.auto_id = auto_id
+        self._children = list(children)
+        self._on_click = on_click
+
+    @property
+    def element_info(self):
+        return self
+
+    @property
+    def automation_id(self):
+        return self.auto_id
+
+    def children(self, control_type=None, class_name=None, title=None):
+        FakeControl.calls += 1
+        return [child for child in self._children
+                if (control_type is None or child.control_type == control_type)
+                and (class_name is None or child._class_name == class_name)]
+
+    def window_text(self):
+        FakeControl.calls += 1
+        return self._text
+
+    def class_name(self):
+        FakeControl.calls += 1
+        return self._class_name
+
+    def click(self):
+        FakeControl.calls += 1
+        self._on_click()
+
+    def is_visible(self):
+        return True
+
+    def set_focus(self):
+        pass
+
+
+class FakeMainWindow(FakeControl):
+    def __init__(self):
+        super().__init__(control_type="Window", children=[FakeControl(auto_id="59648")])
+
+    def popup(self, text: str, button: str):
+        """弹出一个 #32770 弹窗，点击按钮后关闭"""
+        dialog = FakeControl(class_name="#32770")
+        dialog._children = [
+            FakeControl(class_name="Static", text=text),
+            FakeControl(control_type="Button", class_name="Button", auto_id=button, on_click=lambda: self._children.remove(dialog)),
+        ]
+        self._children.append(dialog)
+
+
+class FakeAutomator:
+    def __init__(self):
+        self.main_window_wrapper_object = FakeMainWindow()
+
+    def is_connected(self):
+        return True
+
+
+class NoopOperation(BaseOperation):
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(name="NoopOperation", description="测试用操作", operation_name="noop")
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        return OperationResult(success=True)
+
+    def sleep(self, seconds: float = 0.1) -> None:
+        pass
+
+
+def test_classifier_keeps_rule_priority():
+    """多个关键字同时出现时按规则表顺序取优先级最高的"""
+    classifier = PopDialogClassifier(POP_DIALOG_RULES)
+    assert classifier.classify("提交失败：您输入的价格已超出涨跌停限制").title == "提示信息"
+    assert classifier.classify("BeginTransaction failed").title == "BeginFailed失败提示"
+    assert classifier.classify("委托已提交") is None
+
+
+def test_snapshot_shared_between_exist_and_get():
+    """is_exist_pop_dialog 之后的 get_pop_dialog 复用快照，不再重新枚举"""
+    operation = NoopOperation(FakeAutomator())
+    main_window = operation.automator.main_window_wrapper_object
+    main_window.popup("委托提交失败，可用资金不足", "2")
+
+    FakeControl.calls = 0
+    assert operation.is_exist_pop_dialog()
+    assert FakeControl.calls == 1
+    title, control = operation.get_pop_dialog()
+    assert title == "失败提示"
+    # Static 子控件枚举 + 读取文本
+    assert FakeControl.calls == 3
+    assert operation.get_pop_dialog_content() == "委托提交失败，可用资金不足"
+
+
+def test_pre_execute_uia_calls():
+    """pre_execute 的UIA调用次数：无弹窗2次，单个弹窗识别+关闭+复查共7次（原实现14次）"""
+    operation = NoopOperation(FakeAutomator())
+    main_window = operation.automator.main_window_wrapper_object
+
+    FakeControl.calls = 0
+    assert operation.pre_execute({})
+    assert FakeControl.calls == 2
+
+    main_window.popup("您输入的价格已超出涨跌停限制，是否继续", "7")
+    FakeControl.calls = 0
+    assert operation.pre_execute({})
+    # 快照1 + Static 1 + 文本1 + 查找按钮1 + 点击1 + 复查快照（#32770、独立窗口）2
+    assert FakeControl.calls == 7
+    assert not PopDialogSnapshot(main_window).exists()
@@ -0,0 +1,109 @@
+"""下单前检查测试 - 证券交易规则、账户快照检查与本地预留
+
+Author: noimank
+Email: noimank@163.com
+"""
+import pytest
+
+from easyths.core.instrument_rules import instrument_rules
+from easyths.core.operation_queue import OperationQueue
+from easyths.core.pre_trade import PreTradeChecker, PreTradeRejectedError
+from easyths.models.operations import Operation, OperationResult, OperationStatus
+
+
+def finished(operation: Operation, success: bool, data=None) -> Operation:
+    """模拟处理线程执行结束后的操作"""
+    operation.update_status(OperationStatus.COMPLETED if success else OperationStatus.FAILED)
+    operation.result = OperationResult(success=success, data=data)
+    return operation
+
+
+def order(name: str, **params) -> Operation:
+    return Operation(name=name, params=params)
+
+
+def test_instrument_rules():
+    assert instrument_rules.lookup("600000").market == "SH"
+    assert instrument_rules.lookup("920001").market == "BJ"
+    # 最长前缀优先：11 开头为可转债，1 开头为深市基金
+    assert instrument_rules.lookup("113050").kind == "可转债"
+    assert instrument_rules.lookup("159915").kind == "基金"
+    assert instrument_rules.lookup("999999") == instrument_rules.default
+
+    assert instrument_rules.format_price("600000", 10.2) == "10.20"
+    assert instrument_rules.format_price("510300", 3.8) == "3.800"
+    assert instrument_rules.check_quantity("600000", 100) is None
+    assert instrument_rules.check_quantity("600000", 150) == "数量必须是100的倍数且不小于100"
+    assert instrument_rules.check_quantity("123001", 10) is None
+    assert instrument_rules.check_quantity("123001", 5) == "数量必须是10的倍数且不小于10（可转债）"
+    assert instrument_rules.check_order("600000", 1000, 100000) == "单笔金额过大"
+
+
+def test_reservations():
+    checker = PreTradeChecker(snapshot_ttl=10)
+    # 没有快照时不检查
+    unchecked = order("buy", stock_code="600000", price=100.0, quantity=100000)
+    checker.check_and_reserve(unchecked)
+    assert checker.stats()["unchecked"] == 1
+    # 操作取消时释放
+    checker.release(unchecked.id)
+
+    checker.observe(finished(Operation(name="funds_query"), True, {"可用金额": "10000.00"}))
+    checker.observe(finished(Operation(name="holding_query"), True, [{"证券代码": 600000, "可用余额": 300}]))
+
+    first = order("buy", stock_code="600000", price=10.0, quantity=600)
+    checker.check_and_reserve(first)
+    with pytest.raises(PreTradeRejectedError, match="可用资金不足"):
+        checker.check_and_reserve(order("buy", stock_code="600000", price=10.0, quantity=500))
+    # 委托失败释放预留
+    checker.observe(finished(first, False))
+    checker.check_and_reserve(order("buy", stock_code="600000", price=10.0, quantity=500))
+    assert checker.stats()["reserved_funds"] == 5000.0
+
+    # 批量委托只保留提交成功的笔数
+    batch = order("batch_order", legs=[
+        {"side": "sell", "stock_code": "600000", "price": 10.0, "quantity": 200},
+        {"side": "sell", "stock_code": "600000", "price": 10.1, "quantity": 100},
+    ])
+    checker.check_and_reserve(batch)
+    with pytest.raises(PreTradeRejectedError, match="可用股份不足"):
+        checker.check_and_reserve(order("market_sell", stock_code="600000", quantity=100))
+    checker.observe(finished(batch, False, {"legs": [{"index": 0, "success": True}, {"index": 1, "success": False}]}))
+    checker.check_and_reserve(order("market_sell", stock_code="600000", quantity=100))
+    # 卖出成交会增加可用资金，资金快照失效
+    assert checker.stats()["funds"] is None
+    checker.check_and_reserve(order("buy", stock_code="600000", price=10.0, quantity=10000))
+
+
+@pytest.fixture
+def trade_queue(simulated_automator):
+    _, automator = simulated_automator(balance=10000.0, holdings={"600000": (1000, 9.8)})
+    operation_queue = OperationQueue(automator)
+    operation_queue.start()
+    yield operation_queue
+    operation_queue.stop()
+
+
+def run(operation_queue: OperationQueue, name: str, **params) -> OperationResult:
+    operation_id = operation_queue.submit(Operation(name=name, params=params))
+    return operation_queue.get_result(operation_id, timeout=30)
+
+
+def test_queue_rejects_before_gui(trade_queue):
+    assert run(trade_queue, "funds_query").success
+    assert run(trade_queue, "holding_query", return_type="json").success
+
+    with pytest.raises(PreTradeRejectedError, match="可用资金不足"):
+        trade_queue.submit(Operation(name="buy", params={"stock_code": "601318", "price": 45.0, "quantity": 300}))
+    with pytest.raises(PreTradeRejectedError, match="可用股份不足"):
+        trade_queue.submit(Operation(name="sell", params={"stock_code": "600000", "price": 10.3, "quantity": 1100}))
+    assert trade_queue.automator.app.account.orders == []
+
+    assert run(trade_queue, "buy", stock_code="601318", price=45.0, quantity=200).success
+    # 已提交的委托在下一次资金查询前仍预留资金
+    with pytest.raises(PreTradeRejectedError):
+        trade_queue.submit(Operation(name="buy", params={"stock_code": "601318", "price": 45.0, "quantity": 100}))
+    assert run(trade_queue, "funds_query").success
+    stats = trade_queue.get_queue_stats()["pre_trade"]
+    assert stats["funds"] == 1000.0 and stats["reserved_funds"] == 0
+    assert stats["rejected"] == 3
@@ -0,0 +1,91 @@
+"""协作式抢占测试 - 紧急委托中止正在执行的只读查询，查询重新排队后完成
+
+Author: noimank
+Email: noimank@163.com
+"""
+import threading
+import time
+
+import pytest
+
+from easyths.core import operation_registry
+from easyths.core.operation_queue import OperationQueue
+from easyths.models.operations import Operation, OperationStatus
+
+
+@pytest.fixture
+def client_automator(simulated_automator):
+    return simulated_automator(holdings={"600000": (1000, 9.8)})
+
+
+def test_only_read_only_operations_stop_at_checkpoint(client_automator):
+    _, automator = client_automator
+    preempt = threading.Event()
+    preempt.set()
+
+    result = operation_registry.get_operation_instance("holding_query", automator).run(
+        {"return_type": "json"}, preempt)
+    assert not result.success
+    assert result.metadata["preempted"] and result.metadata["checkpoint"] == "执行前检查"
+    assert automator.page_state.page is None
+
+    # 写操作不会被中止
+    result = operation_registry.get_operation_instance("sell", automator).run(
+        {"stock_code": "600000", "price": 10.3, "quantity": 100}, preempt)
+    assert result.success and "preempted" not in result.metadata
+
+
+def test_urgent_order_preempts_running_query(client_automator):
+    client, automator = client_automator
+    operation_queue = OperationQueue(automator)
+    query = Operation(name="historical_commission_query", params={"time_range": "近一年", "return_type": "json"})
+    urgent = Operation(name="sell", params={"stock_code": "600000", "price": 10.3, "quantity": 100}, priority=10)
+    operation_queue.submit(query)
+    operation_queue.start()
+    try:
+        deadline = time.monotonic() + 5
+        while operation_queue.get_status(query.id) != OperationStatus.RUNNING and time.monotonic() < deadline:
+            time.sleep(0.001)
+        operation_queue.submit(urgent)
+
+        assert operation_queue.get_result(urgent.id, timeout=30).success
+        # 委托完成时查询还没有完成，之后重新执行成功；重新排队期间不带被中止的那次结果
+        assert operation_queue.get_status(query.id) != OperationStatus.COMPLETED
+        if query.status == OperationStatus.QUEUED:
+            assert query.result is None
+        assert operation_queue.get_result(query.id, timeout=30).success
+    finally:
+        operation_queue.stop()
+
+    assert query.metadata["preempted"] == 1
+    assert operation_queue.get_queue_stats()["total_preempted"] == 1
+    assert [order["side"] for order in client.account.orders] == ["卖出"]
+
+
+def test_urgent_order_runs_before_other_callers_queries(client_automator):
+    client, automator = client_automator
+    operation_queue = OperationQueue(automator)
+    # 调用方 a 排队三个查询（时间范围不同，不会合并）
+    queries = [Operation(name="historical_commission_query", params={"time_range": time_range, "return_type": "json"},
+                         caller="a") for time_range in ("近三月", "近一年", "近一月")]
+    urgent = Operation(name="market_sell", params={"stock_code": "600000", "quantity": 100}, priority=10, caller="b")
+    for query in queries:
+        operation_queue.submit(query)
+    operation_queue.start()
+    try:
+        deadline = time.monotonic() + 5
+        while operation_queue.get_status(queries[1].id) != OperationStatus.RUNNING and time.monotonic() < deadline:
+            time.sleep(0.001)
+        operation_queue.submit(urgent)
+
+        assert operation_queue.get_result(urgent.id, timeout=30).success
+        for query in queries:
+            assert operation_queue.get_result(query.id, timeout=30).success
+    finally:
+        operation_queue.stop()
+
+    # 被抢占的查询让出执行线程后，下一个执行的是 b 的紧急委托，而不是轮到 a 的第三个查询
+    assert queries[1].metadata["preempted"] == 1
+    assert queries[1].timestamp > urgent.timestamp and queries[2].timestamp > urgent.timestamp
+    assert operation_queue.get_queue_stats()["callers"]["b"]["urgent"] == 1
+    assert [order["side"] for order in client.account.orders] == ["卖出"]
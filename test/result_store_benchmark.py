@@ -0,0 +1,71 @@
+"""已完成操作存储基准测试 - 10万次操作的内存增长
+
+模拟一个交易日内完成 10 万次操作（其中一部分带有整张持仓/历史委托表格的结果），
+对比不设上限的字典保存方式与 ResultStore 有界保留（可选落盘）方式的内存占用。
+
+运行方式:
+    python test/result_store_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from easyths.core.result_store import ResultStore
+from easyths.models.operations import Operation, OperationResult, OperationStatus
+
+# 模拟一张 50 行的持仓表格（约 4KB）
+TABLE_ROW = "证券代码\t证券名称\t股票余额\t可用余额\t冻结数量\t成本价\t市价\t盈亏\t盈亏比例(%)\t市值\n"
+TABLE_DATA = TABLE_ROW * 50
+
+
+def make_operation(index: int) -> Operation:
+    """构造一个已完成的操作，每10个操作中有1个大表格结果"""
+    if index % 10 == 0:
+        result = OperationResult(success=True, data=f"{TABLE_DATA}{index}")
+        name = "holding_query"
+    else:
+        result = OperationResult(success=True, data={"stock_code": "600000", "price": "10.50", "quantity": 100})
+        name = "buy"
+    operation = Operation(name=name, params={"index": index}, status=OperationStatus.COMPLETED)
+    operation.result = result
+    return operation
+
+
+def measure(label: str, count: int, put: Callable[[Operation], None]) -> None:
+    """执行 count 次保存并输出内存占用"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(count):
+        put(make_operation(i))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} 当前 {current / 1024 / 1024:8.1f} MB  峰值 {peak / 1024 / 1024:8.1f} MB  耗时 {elapsed:6.2f}s")
+
+
+def main(count: int = 100_000) -> None:
+    print(f"保存 {count} 个已完成操作:")
+
+    unbounded: Dict[str, Operation] = {}
+    measure("无上限字典(旧)", count, lambda op: unbounded.__setitem__(op.id, op))
+    unbounded.clear()
+
+    bounded = ResultStore(ttl=3600, max_count=10000, max_bytes=64 * 1024 * 1024)
+    measure("ResultStore 有界保留", count, bounded.put)
+    print(f"    {bounded.stats()}")
+    bounded.clear()
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        spilling = ResultStore(ttl=3600, max_count=10000, max_bytes=64 * 1024 * 1024,
+                               spill_threshold=2048, spill_dir=spill_dir)
+        measure("ResultStore 有界保留+落盘", count, spilling.put)
+        print(f"    {spilling.stats()}")
+        spilling.clear()
+
+
+if __name__ == "__main__":
+    main()
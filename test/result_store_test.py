@@ -0,0 +1,21 @@
+"""已完成操作存储测试 - 大结果落盘与启动时的清理范围
+
+Author: noimank
+Email: noimank@163.com
+"""
+from easyths.core.result_store import ResultStore
+from easyths.models.operations import Operation, OperationResult, OperationStatus
+
+
+def test_startup_cleanup_keeps_unrelated_files(tmp_path):
+    (tmp_path / "settings.json").write_text("{}", encoding="utf-8")
+    store = ResultStore(spill_threshold=10, spill_dir=str(tmp_path))
+    operation = Operation(name="funds_query", status=OperationStatus.COMPLETED,
+                          result=OperationResult(success=True, data={"可用金额": 10000.0}))
+    store.put(operation)
+    assert operation.result is None and (tmp_path / f"result_{operation.id}.json").exists()
+    assert store.get(operation.id, load_result=True).result.data == {"可用金额": 10000.0}
+
+    # 重启后只清理上次落盘的结果
+    ResultStore(spill_threshold=10, spill_dir=str(tmp_path))
+    assert [path.name for path in tmp_path.iterdir()] == ["settings.json"]
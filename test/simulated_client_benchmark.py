@@ -0,0 +1,103 @@
+"""模拟客户端基准测试 - API -> 队列 -> 操作 的端到端延迟
+
+在模拟同花顺客户端上按固定顺序反复执行下单、查询、撤单，通过 API 提交并等待结果，
+统计每种操作的端到端延迟、UIA 调用次数，以及队列汇总的耗时预算（睡眠、等待、UIA查找等）。
+模拟客户端的行情、验证码使用固定随机种子，结果可复现，可在 Linux CI 中运行。
+
+运行方式:
+    python test/simulated_client_benchmark.py
+    # 界面即时响应，只测框架和插件本身的开销
+    TRADING_SIMULATED_LATENCY_SCALE=0 python test/simulated_client_benchmark.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from easyths.api.dependencies.common import set_global_instances
+from easyths.api.routes import operations_router
+from easyths.core import operation_registry
+from easyths.core.gui_backend import SimulatedBackend
+from easyths.core.operation_queue import OperationQueue
+from easyths.core.simulated_client import SimulatedClient
+from easyths.core.tonghuashun_automator import TonghuashunAutomator
+from easyths.utils import project_config_instance
+
+# 每轮依次执行的操作
+WORKLOAD: List[Tuple[str, Dict[str, Any]]] = [
+    ("buy", {"stock_code": "600000", "price": 10.2, "quantity": 100}),
+    ("sell", {"stock_code": "601318", "price": 45.8, "quantity": 100}),
+    ("funds_query", {}),
+    ("holding_query", {"return_type": "json"}),
+    ("order_query", {"return_type": "json"}),
+    ("order_cancel", {"cancel_type": "all"}),
+]
+
+
+def create_app(queue: OperationQueue, automator: TonghuashunAutomator) -> FastAPI:
+    """创建只包含操作路由的应用"""
+    app = FastAPI()
+    set_global_instances(queue, automator)
+    app.include_router(operations_router)
+    return app
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """计算常用分位数"""
+    if len(values) < 2:
+        return {"p50": round(values[0], 2), "p99": round(values[0], 2), "max": round(values[0], 2)}
+    cuts = statistics.quantiles(values, n=100)
+    return {"p50": round(cuts[49], 2), "p99": round(cuts[98], 2), "max": round(max(values), 2)}
+
+
+async def run(rounds: int = 10) -> None:
+    # 查询缓存会让重复查询直接返回，这里测的是完整执行路径
+    project_config_instance.queue_query_cache_enabled = False
+    client = SimulatedClient(latency_scale=project_config_instance.trading_simulated_latency_scale,
+                             holdings={"601318": (100 * rounds, 40.0)}, captcha_every=7, seed=0)
+    automator = TonghuashunAutomator(backend=SimulatedBackend(client))
+    automator.connect()
+    operation_registry.load_plugins()
+    queue = OperationQueue(automator)
+    queue.start()
+
+    latencies: Dict[str, List[float]] = {name: [] for name, _ in WORKLOAD}
+    uia_calls: Dict[str, List[int]] = {name: [] for name, _ in WORKLOAD}
+    failures: Dict[str, int] = {name: 0 for name, _ in WORKLOAD}
+    transport = httpx.ASGITransport(app=create_app(queue, automator))
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+            for _ in range(rounds):
+                for name, params in WORKLOAD:
+                    calls_before = client.stats["uia_calls"]
+                    start = time.perf_counter()
+                    response = await http.post(f"/api/v1/operations/{name}", json={"params": params})
+                    response.raise_for_status()
+                    operation_id = response.json()["data"]["operation_id"]
+                    result = (await http.get(f"/api/v1/operations/{operation_id}/result", params={"timeout": 30})).json()
+                    latencies[name].append((time.perf_counter() - start) * 1000)
+                    uia_calls[name].append(client.stats["uia_calls"] - calls_before)
+                    failures[name] += 0 if result["success"] else 1
+    finally:
+        queue.stop()
+        automator.disconnect()
+
+    print(f"模拟客户端端到端延迟（毫秒），耗时缩放 {project_config_instance.trading_simulated_latency_scale}，每种操作 {rounds} 次:")
+    for name, values in latencies.items():
+        print(f"  {name:<14} {summarize(values)}  UIA调用 {statistics.mean(uia_calls[name]):.1f} 次/次  失败 {failures[name]}")
+    print(f"  验证码弹出 {client.stats['captchas']} 次，复制表格 {client.stats['copies']} 次")
+
+    print("耗时预算（平均每次，秒）:")
+    for name, stats in queue.get_queue_stats()["budget"].items():
+        categories = {category: record["avg_self_time"] for category, record in stats["categories"].items() if record["count"]}
+        print(f"  {name:<14} 总计 {stats['avg_total']}  {categories}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,100 @@
+"""模拟客户端测试 - 现有插件不经修改在模拟客户端上运行
+
+Author: noimank
+Email: noimank@163.com
+"""
+import pytest
+
+from easyths.core.gui_backend import SimulatedBackend
+from easyths.core.simulated_client import SimulatedClient, parse_keys
+from easyths.core.tonghuashun_automator import TonghuashunAutomator
+from easyths.operations.batch_order import BatchOrderOperation
+from easyths.operations.funds_query import FundsQueryOperation
+from easyths.operations.historical_commission_query import HistoricalCommissionQueryOperation
+from easyths.operations.holding_query import HoldingQueryOperation
+from easyths.operations.market_buy import MarketBuyOperation
+from easyths.operations.order_cancel import OrderCancelOperation
+from easyths.operations.order_query import OrderQueryOperation
+
+
+def connect(client: SimulatedClient) -> TonghuashunAutomator:
+    automator = TonghuashunAutomator(backend=SimulatedBackend(client))
+    assert automator.connect()
+    return automator
+
+
+@pytest.fixture
+def automator():
+    automator = connect(SimulatedClient(latency_scale=0, balance=100000.0, holdings={"600000": (1000, 9.8)}))
+    yield automator
+    automator.disconnect()
+
+
+def test_parse_keys():
+    assert parse_keys("{F1}") == ["F1"]
+    assert parse_keys("{BACKSPACE 3} 60") == ["BACKSPACE"] * 3 + ["6", "0"]
+    assert parse_keys("{BACKSPACE 0}") == []
+    assert parse_keys("^a^C") == ["^a", "^c"]
+
+
+def test_order_query_cancel_round_trip(automator):
+    """下单 -> 查询委托 -> 撤单 -> 资金解冻"""
+    result = BatchOrderOperation(automator).run({"legs": [
+        {"side": "buy", "stock_code": "601318", "price": 45.0, "quantity": 200},
+        {"side": "buy", "stock_code": "601318", "price": 44.5, "quantity": 100},
+        {"side": "sell", "stock_code": "600000", "price": 10.3, "quantity": 500},
+    ]})
+    assert result.success, result.data
+    client = automator.app
+    assert [order["side"] for order in client.account.orders] == ["买入", "买入", "卖出"]
+
+    result = OrderQueryOperation(automator).run({"return_type": "json"})
+    assert result.success
+    orders = result.data["orders"]
+    assert [(row["证券名称"], row["委托数量"], row["备注"]) for row in orders] == [
+        ("中国平安", 200, "已报"), ("中国平安", 100, "已报"), ("浦发银行", 500, "已报")]
+
+    funds = FundsQueryOperation(automator).run({})
+    assert funds.data["冻结金额"] == "13450.00"
+
+    result = OrderCancelOperation(automator).run({"stock_code": "601318", "cancel_type": "buy"})
+    assert result.success
+    assert [order["status"] for order in client.account.orders] == ["已撤", "已撤", "已报"]
+    assert FundsQueryOperation(automator).run({}).data["可用金额"] == "100000.00"
+
+
+def test_failed_order_reports_client_message(automator):
+    """委托失败时返回客户端弹窗中的原因，后续委托不受影响"""
+    result = BatchOrderOperation(automator).run({"legs": [
+        {"side": "buy", "stock_code": "600519", "price": 1500.0, "quantity": 100},
+        {"side": "buy", "stock_code": "600000", "price": 10.0, "quantity": 100},
+    ]})
+    legs = result.data["legs"]
+    assert legs[0]["success"] is False and legs[0]["message"] == "可用资金不足"
+    assert legs[1]["success"] is True
+    assert len(automator.app.account.orders) == 1
+
+
+def test_holding_query_solves_captcha():
+    """复制表格触发验证码时，识别后完成复制"""
+    client = SimulatedClient(latency_scale=0, holdings={"600000": (1000, 9.8)}, captcha_every=1)
+    automator = connect(client)
+    result = HoldingQueryOperation(automator).run({"return_type": "json"})
+    automator.disconnect()
+
+    assert result.success
+    assert result.data[0]["证券名称"] == "浦发银行" and result.data[0]["股票余额"] == 1000
+    assert client.stats["captchas"] == 1
+
+
+def test_history_and_market_order_with_latency():
+    """带界面耗时时，等待和延时足以覆盖页面切换、菜单渲染、复制"""
+    client = SimulatedClient(latency_scale=0.5)
+    automator = connect(client)
+    market = MarketBuyOperation(automator).run({"stock_code": "510300", "quantity": 1000})
+    history = HistoricalCommissionQueryOperation(automator).run({"stock_code": "510300", "return_type": "json"})
+    automator.disconnect()
+
+    assert market.success, market.message
+    assert history.success, history.message
+    assert [row["证券名称"] for row in history.data["historical_orders"]] == ["沪深300ETF"]
@@ -0,0 +1,98 @@
+"""耗时预算测试 - 嵌套计时、操作结果中的明细和按操作名称汇总
+
+Author: noimank
+Email: noimank@163.com
+"""
+import time
+from typing import Any, Dict
+
+from easyths.core import BaseOperation
+from easyths.core.time_budget import BudgetStats, TimeBudget
+from easyths.models.operations import OperationResult, PluginMetadata
+
+
+class FakeControl:
+    """模拟控件：查找子控件和按键各耗时10ms"""
+
+    def __init__(self, auto_id: str = "", children=()):
+        self.element_info = self
+        self.automation_id = auto_id
+        self._children = list(children)
+        self.keys = []
+
+    def children(self, control_type=None, class_name=None, title=None):
+        time.sleep(0.01)
+        return self._children
+
+    def type_keys(self, keys, **kwargs):
+        time.sleep(0.01)
+        self.keys.append(keys)
+
+
+class BudgetOperation(BaseOperation):
+    """测试用操作：查找控件、输入、睡眠、等待各一次"""
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(name="BudgetOperation", description="测试用操作", operation_name="budget_test")
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def pre_execute(self, params: Dict[str, Any]) -> bool:
+        self.sleep(0.02)
+        return True
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        panel = FakeControl(children=[FakeControl(auto_id="1032")])
+        edit = self.get_control_with_children(panel, auto_id="1032")
+        self.type_keys(edit, "600000")
+        self.sleep(0.03)
+        # 每次轮询查找一次控件
+        self.wait_until(lambda: self.get_control_with_children(panel, auto_id="9999"), timeout=0.05, name="missing")
+        return OperationResult(success=edit.keys == ["600000"])
+
+
+def test_nested_self_time():
+    """嵌套计时：外层的自身耗时扣除内层耗时"""
+    budget = TimeBudget()
+    budget.enter_stage("execute")
+    with budget.measure("captcha"):
+        with budget.measure("sleep"):
+            time.sleep(0.02)
+    summary = budget.summary()
+    captcha = summary["categories"]["captcha"]
+    assert captcha["count"] == 1
+    assert captcha["time"] >= 0.02
+    assert captcha["self_time"] < 0.01
+    assert summary["by_stage"]["execute"]["sleep"] >= 0.02
+
+
+def test_run_attaches_budget():
+    """运行结果的 metadata 中带有各阶段、各类耗时明细"""
+    result = BudgetOperation().run({})
+    assert result.success
+    budget = result.metadata["budget"]
+    categories = budget["categories"]
+    assert categories["sleep"]["count"] == 2 and categories["sleep"]["time"] >= 0.05
+    assert categories["keystroke"]["count"] == 1
+    # 直接查找1次 + 等待期间的轮询查找
+    assert categories["uia_lookup"]["count"] >= 3
+    assert categories["wait"]["count"] == 1
+    assert categories["wait"]["self_time"] < categories["wait"]["time"]
+    assert set(budget["stages"]) == {"validate", "pre_execute", "execute", "post_execute"}
+    assert budget["by_stage"]["pre_execute"]["sleep"] >= 0.02
+    accounted = sum(record["self_time"] for record in categories.values())
+    assert abs(accounted + budget["other"] - budget["total"]) < 0.005
+
+
+def test_stats_aggregate_by_operation():
+    """按操作名称汇总多次运行"""
+    stats = BudgetStats()
+    for _ in range(2):
+        stats.record("budget_test", BudgetOperation().run({}).metadata["budget"])
+    stats.record("budget_test", None)
+    entry = stats.stats()["budget_test"]
+    assert entry["runs"] == 2
+    assert entry["categories"]["keystroke"]["count"] == 2
+    assert entry["categories"]["sleep"]["avg_self_time"] >= 0.05
+    assert entry["avg_total"] >= entry["avg_stages"]["execute"]
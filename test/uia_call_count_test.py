@@ -0,0 +1,153 @@
+"""UIA 调用次数回归测试 - 每个操作的界面调用次数不得超过登记的基线
+
+在模拟客户端上执行每个操作，用界面交互轨迹的记录代理统计 children()、child_window()、window_text()、
+type_keys()、click() 等调用次数，以及睡眠次数和总时长，与 uia_call_baselines.json 中登记的基线比较。
+每个操作执行两次：cold 为刚连接、页面状态未知时，warm 为紧接着再执行一次（已在目标页面、控件已缓存）。
+
+模拟客户端没有实现条件单、逆回购页面，这些操作以及延时校准登记在 UNSUPPORTED 中，暂不检查调用次数；
+每个已注册的操作必须在 WORKLOAD 或 UNSUPPORTED 之一中，新增的操作不会被悄悄跳过。
+
+改动减少了调用次数后，重新生成基线并随改动一起提交:
+    python test/uia_call_count_test.py
+
+Author: noimank
+Email: noimank@163.com
+"""
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from easyths.core import operation_registry
+from easyths.core.delay_profile import DelayProfile, set_delay_profile
+from easyths.core.gui_backend import SimulatedBackend
+from easyths.core.gui_trace import TraceRecorder
+from easyths.core.simulated_client import SimulatedClient
+from easyths.core.tonghuashun_automator import TonghuashunAutomator
+
+BASELINE_FILE = Path(__file__).parent / "uia_call_baselines.json"
+
+# 单独统计的调用，child_window() 会遍历整个控件树，插件中禁止使用
+COUNTED_CALLS = ["children", "child_window", "window_text", "type_keys", "click", "click_input"]
+
+# 操作名称 -> 参数
+WORKLOAD: Dict[str, Dict[str, Any]] = {
+    "buy": {"stock_code": "600000", "price": 10.2, "quantity": 100},
+    "sell": {"stock_code": "600000", "price": 10.3, "quantity": 100},
+    "market_buy": {"stock_code": "510300", "quantity": 1000},
+    "market_sell": {"stock_code": "600000", "quantity": 100},
+    "batch_order": {"legs": [
+        {"side": "buy", "stock_code": "601318", "price": 45.0, "quantity": 100},
+        {"side": "sell", "stock_code": "600000", "price": 10.3, "quantity": 100},
+    ]},
+    "order_cancel": {"cancel_type": "all"},
+    "funds_query": {},
+    "holding_query": {"return_type": "json"},
+    "order_query": {"return_type": "json"},
+    "historical_commission_query": {"return_type": "json"},
+}
+
+# 暂不检查调用次数的操作 -> 原因
+UNSUPPORTED: Dict[str, str] = {
+    "calibrate_delays": "反复执行其他查询，调用次数由被校准的查询决定",
+    "condition_buy": "模拟客户端没有条件单页面",
+    "condition_order_cancel": "模拟客户端没有条件单页面",
+    "condition_order_query": "模拟客户端没有条件单页面",
+    "stop_loss_profit": "模拟客户端没有条件单页面",
+    "reverse_repo_buy": "模拟客户端没有逆回购页面",
+    "reverse_repo_query": "模拟客户端没有逆回购页面",
+}
+
+
+class CallCountRecorder(TraceRecorder):
+    """只在内存中统计每次操作的界面调用，不写轨迹文件"""
+
+    def __init__(self):
+        super().__init__(trace_dir="", min_duration=0)
+        self.counts: List[Dict[str, Any]] = []
+
+    def save(self, header: Dict[str, Any], events: List[Dict[str, Any]]) -> Optional[Path]:
+        calls = Counter(event.get("n") for event in events if event["k"] in ("call", "get"))
+        sleeps = [event["d"] for event in events if event["k"] == "sleep"]
+        self.counts.append({
+            "success": header["result"]["success"],
+            "uia_calls": sum(calls.values()),
+            **{name: calls[name] for name in COUNTED_CALLS},
+            "sleeps": len(sleeps),
+            "sleep_time": round(sum(sleeps), 3),
+        })
+        return None
+
+
+def measure(operation_name: str) -> Dict[str, Dict[str, Any]]:
+    """在新的模拟客户端上执行两次操作，返回 cold / warm 两次的调用统计"""
+    # 使用默认延时，结果不受本机校准的影响
+    set_delay_profile(DelayProfile())
+    client = SimulatedClient(latency_scale=0, holdings={"600000": (1000, 9.8)}, seed=0)
+    # 撤单需要有未成交的委托
+    client.account.place_order("买入", "601318", "45.00", "200")
+    recorder = CallCountRecorder()
+    automator = TonghuashunAutomator(backend=SimulatedBackend(client))
+    recorder.attach(automator)
+    automator.connect()
+    try:
+        operation_class = operation_registry.get_operation_class(operation_name)
+        for _ in range(2):
+            operation_class(automator).run(WORKLOAD[operation_name])
+    finally:
+        automator.disconnect()
+        set_delay_profile(None)
+    cold, warm = recorder.counts
+    return {"cold": cold, "warm": warm}
+
+
+def compare(counts: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """超出基线的统计项"""
+    exceeded = []
+    for key, limit in baseline.items():
+        if key == "success":
+            continue
+        tolerance = 0.001 if key == "sleep_time" else 0
+        if counts.get(key, 0) > limit + tolerance:
+            exceeded.append(f"{key}: {counts.get(key, 0)} > {limit}")
+    return exceeded
+
+
+@pytest.fixture(scope="module")
+def baselines() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    operation_registry.load_plugins()
+    return json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+
+
+def test_every_operation_is_covered(baselines):
+    missing = sorted(set(operation_registry.list_operations()) - set(WORKLOAD) - set(UNSUPPORTED))
+    assert not missing, f"操作没有加入 WORKLOAD（或登记到 UNSUPPORTED 并说明原因）: {missing}"
+    assert not set(WORKLOAD) & set(UNSUPPORTED)
+
+
+@pytest.mark.parametrize("operation_name", list(WORKLOAD))
+def test_uia_calls_within_baseline(operation_name: str, baselines):
+    assert operation_name in baselines, f"{operation_name} 没有登记基线，请运行 python test/uia_call_count_test.py"
+    measured = measure(operation_name)
+    for run in ("cold", "warm"):
+        counts, baseline = measured[run], baselines[operation_name][run]
+        assert counts["success"], f"{operation_name} ({run}) 执行失败"
+        exceeded = compare(counts, baseline)
+        assert not exceeded, f"{operation_name} ({run}) 的界面调用超出基线: {exceeded}"
+        assert counts["child_window"] == 0, f"{operation_name} ({run}) 使用了 child_window()"
+
+
+def update_baselines() -> None:
+    """重新测量所有操作并写入基线文件"""
+    operation_registry.load_plugins()
+    result = {name: measure(name) for name in WORKLOAD}
+    BASELINE_FILE.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    for name, runs in result.items():
+        print(f"{name:<28} cold {runs['cold']['uia_calls']:>4} 次调用 / 睡眠 {runs['cold']['sleep_time']}s"
+              f"   warm {runs['warm']['uia_calls']:>4} 次调用 / 睡眠 {runs['warm']['sleep_time']}s")
+
+
+if __name__ == "__main__":
+    update_baselines()
@@ -0,0 +1,68 @@
+"""条件等待测试 - wait_until 的退避轮询、超时和耗时记录
+
+Author: noimank
+Email: noimank@163.com
+"""
+import time
+from typing import Any, Dict
+
+from easyths.core import BaseOperation
+from easyths.models.operations import OperationResult, PluginMetadata
+
+
+class WaitOperation(BaseOperation):
+    """测试用操作：等待条件成立后返回"""
+
+    def __init__(self, ready_after: float):
+        super().__init__()
+        self.ready_at = time.perf_counter() + ready_after
+
+    def _get_metadata(self) -> PluginMetadata:
+        return PluginMetadata(name="WaitOperation", description="测试用操作", operation_name="wait_test")
+
+    def validate(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def pre_execute(self, params: Dict[str, Any]) -> bool:
+        return True
+
+    def execute(self, params: Dict[str, Any]) -> OperationResult:
+        ready = self.wait_until(lambda: time.perf_counter() >= self.ready_at, timeout=params["timeout"], name="ready")
+        return OperationResult(success=ready)
+
+
+def test_wait_returns_as_soon_as_condition_holds():
+    """条件提前成立时不用等满超时时间"""
+    operation = WaitOperation(ready_after=0.05)
+    result = operation.run({"timeout": 1.0})
+    assert result.success
+    record = result.metadata["waits"][0]
+    assert record["name"] == "ready" and record["success"]
+    assert 0.05 <= record["elapsed"] < 0.3
+    # 退避轮询：远少于按1ms间隔忙等的次数
+    assert record["polls"] < 15
+
+
+def test_wait_times_out():
+    """超时返回False并记录实际耗时"""
+    operation = WaitOperation(ready_after=10)
+    result = operation.run({"timeout": 0.1})
+    assert not result.success
+    record = result.metadata["waits"][0]
+    assert not record["success"]
+    assert 0.1 <= record["elapsed"] < 0.2
+
+
+def test_predicate_errors_count_as_not_ready():
+    """条件检查抛出异常（控件正在重绘）视为未成立"""
+    operation = WaitOperation(ready_after=0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("控件不可用")
+        return True
+
+    assert operation.wait_until(flaky, timeout=1.0, interval=0.001)
+    assert operation.wait_records[-1]["polls"] == 3